@@ -16,6 +16,7 @@ a = Analysis(
     ],
     hiddenimports=[
         'openai',
+        'google.genai',
         'pydub',
         'pyperclip',
     ],
@@ -0,0 +1,1002 @@
+"""
+疑似プロバイダサーバー（OpenAI / Gemini API のオフライン代替）
+
+実際のAPIクォータを消費せずにパイプラインのベンチマーク・負荷試験を行うため、
+Common_OpenAIAPI と new_gemini_api.GeminiAPI が使用するエンドポイントを模倣する。
+
+OpenAI互換（ベースURL: http://<host>:<port>/v1）:
+- POST /v1/chat/completions            チャット（input_audio・json_schema を含む）
+- POST /v1/audio/transcriptions        音声書き起こし（Whisper）
+- POST /v1/files                       ファイルのアップロード（purpose=batch の JSONL）
+- GET  /v1/files/<id>/content          ファイルの内容（バッチの結果 JSONL）
+- POST /v1/batches                     バッチジョブの作成
+- GET  /v1/batches/<id>                バッチジョブの状態
+
+Gemini互換（ベースURL: http://<host>:<port>）:
+- POST   /upload/v1beta/files           再開可能アップロードの開始
+- POST   /upload/v1beta/files?upload_id=<id>  チャンクの送信・確定・受信済みバイト数の問い合わせ
+- GET    /v1beta/files/<id>             ファイル情報の取得
+- DELETE /v1beta/files/<id>             ファイルの削除
+- POST   /v1beta/models/<model>:generateContent
+- POST   /v1beta/models/<model>:streamGenerateContent?alt=sse
+- POST   /v1beta/cachedContents         コンテキストキャッシュの作成
+- GET / PATCH / DELETE /v1beta/cachedContents/<id>  取得・有効期限の更新・削除
+- POST   /v1beta/models/<model>:batchGenerateContent  バッチジョブの作成（インラインのリクエスト）
+- GET    /v1beta/batches/<id>           バッチジョブの状態と結果
+
+管理用:
+- GET  /_fake/stats     リクエスト数・ステータス別件数・最大同時接続数など
+- POST /_fake/scenario  シナリオ（遅延・エラー注入）を部分的に更新
+- POST /_fake/reset     統計とアップロード済みファイルをリセット
+
+遅延の指定（--latency またはシナリオJSONの latency）:
+    fixed:ms=200
+    uniform:min_ms=100,max_ms=800
+    normal:mean_ms=500,stddev_ms=100
+    lognormal:median_ms=800,sigma=0.5
+  いずれも per_mb_ms=<値> を付けるとリクエストサイズ1MBあたりの遅延を加算する。
+
+使い方:
+    python benchmarks/fake_provider_server.py --port 8766 --latency lognormal:median_ms=800,sigma=0.4 --rate-limit-rate 0.05
+    # 別のターミナルで（APIキーは任意の文字列でよい）
+    OPENAI_BASE_URL=http://127.0.0.1:8766/v1 GEMINI_BASE_URL=http://127.0.0.1:8766 \\
+    OPENAI_API_KEY=dummy GEMINI_API_KEY=dummy python main.py
+"""
+
+import re
+import json
+import email
+import email.policy
+import math
+import time
+import uuid
+import random
+import logging
+import argparse
+import threading
+from copy import deepcopy
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8766
+
+# シナリオの初期値
+DEFAULT_SCENARIO: Dict[str, Any] = {
+    "seed": None,
+    # ルート種別（upload, files, generate, stream, chat, audio_transcription）ごとの遅延。defaultは共通値
+    "latency": {"default": "fixed:ms=0"},
+    "faults": {
+        "error_rate": 0.0,  # 500エラーを返す割合
+        "rate_limit_rate": 0.0,  # 429エラーを返す割合
+        "retry_after_seconds": 1,  # 429時の Retry-After
+        "degenerate_rate": 0.0,  # 繰り返しの多い異常な書き起こしを返す割合
+        "truncate_rate": 0.0,  # 出力トークン上限で途中切れしたJSONを返す割合
+    },
+    "utterances_per_segment": 12,  # 書き起こし1回あたりの発言数
+    "stream_chunk_chars": 200,  # ストリーミング時の1チャンクの文字数
+    "batch_completion_seconds": 0,  # バッチジョブが完了するまでの時間（秒）
+}
+
+# 疑似的な発言（書き起こし結果に使用）
+CANNED_UTTERANCES = [
+    "それでは定例会議を始めます。",
+    "まず先週の進捗から確認させてください。",
+    "資料の二ページ目をご覧ください。",
+    "予定どおり今月末にリリースできる見込みです。",
+    "テスト環境の準備はもう終わっていますか。",
+    "はい、昨日のうちに完了しています。",
+    "残っている課題は性能の確認だけですね。",
+    "来週までに負荷試験の結果をまとめます。",
+    "ありがとうございます。ほかに共有事項はありますか。",
+    "特にありません。",
+    "では次回は来週の同じ時間にしましょう。",
+    "お疲れさまでした。",
+]
+CANNED_SPEAKERS = ["Speaker A", "Speaker B", "Speaker C"]
+
+# --- 遅延モデル -----------------------------------------------------------
+
+class LatencyModel:
+    """遅延分布（ミリ秒）"""
+
+    def __init__(self, spec: str):
+        """
+        Args:
+            spec (str): "種類:キー=値,..." 形式の指定（例: lognormal:median_ms=800,sigma=0.5）
+        """
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        self.kind = kind.strip() or "fixed"
+        self.params: Dict[str, float] = {}
+        for item in filter(None, params.split(",")):
+            key, _, value = item.partition("=")
+            self.params[key.strip()] = float(value)
+        if self.kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"未対応の遅延分布です: {self.kind}")
+
+    def sample_ms(self, rng: random.Random, payload_bytes: int = 0) -> float:
+        """遅延を1回サンプリングする"""
+        p = self.params
+        if self.kind == "fixed":
+            value = p.get("ms", 0.0)
+        elif self.kind == "uniform":
+            value = rng.uniform(p.get("min_ms", 0.0), p.get("max_ms", 0.0))
+        elif self.kind == "normal":
+            value = rng.gauss(p.get("mean_ms", 0.0), p.get("stddev_ms", 0.0))
+        else:
+            value = rng.lognormvariate(math.log(max(p.get("median_ms", 1.0), 1e-6)), p.get("sigma", 0.5))
+        value += p.get("per_mb_ms", 0.0) * payload_bytes / (1024 * 1024)
+        return max(0.0, value)
+
+# --- 状態 -----------------------------------------------------------------
+
+class FakeProviderState:
+    """シナリオ・統計・アップロード済みファイルを保持する（スレッドセーフ）"""
+
+    def __init__(self, scenario: Optional[Dict[str, Any]] = None):
+        self._lock = threading.Lock()
+        self.scenario = deepcopy(DEFAULT_SCENARIO)
+        self.latency: Dict[str, LatencyModel] = {}
+        self.rng = random.Random()
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.upload_sessions: Dict[str, Dict[str, Any]] = {}
+        self.caches: Dict[str, Dict[str, Any]] = {}
+        self.openai_files: Dict[str, Dict[str, Any]] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self.reset_stats()
+        self.update_scenario(scenario or {})
+
+    def update_scenario(self, patch: Dict[str, Any]) -> None:
+        """シナリオを部分的に更新する"""
+        with self._lock:
+            for key, value in patch.items():
+                if isinstance(value, dict) and isinstance(self.scenario.get(key), dict):
+                    self.scenario[key].update(value)
+                else:
+                    self.scenario[key] = value
+            self.latency = {name: LatencyModel(spec) for name, spec in self.scenario["latency"].items()}
+            if "seed" in patch:
+                self.rng = random.Random(self.scenario["seed"])
+
+    def reset_stats(self) -> None:
+        """統計をリセットする"""
+        self.stats: Dict[str, Any] = {
+            "started_at": time.time(),
+            "requests": {},
+            "statuses": {},
+            "injected": {"error": 0, "rate_limit": 0, "degenerate": 0, "truncate": 0},
+            "bytes_received": 0,
+            "in_flight": 0,
+            "max_in_flight": 0,
+            "latency_ms_total": 0.0,
+        }
+
+    def reset(self) -> None:
+        """統計とファイルをリセットする"""
+        with self._lock:
+            self.reset_stats()
+            self.files.clear()
+            self.upload_sessions.clear()
+            self.caches.clear()
+            self.openai_files.clear()
+            self.batches.clear()
+
+    def roll(self, rate_key: str) -> bool:
+        """故障注入の判定"""
+        with self._lock:
+            rate = float(self.scenario["faults"].get(rate_key, 0.0))
+            return rate > 0 and self.rng.random() < rate
+
+    def sample_latency_ms(self, route: str, payload_bytes: int) -> float:
+        """ルート種別の遅延をサンプリングする"""
+        with self._lock:
+            model = self.latency.get(route) or self.latency["default"]
+            return model.sample_ms(self.rng, payload_bytes)
+
+    def begin(self, route: str, payload_bytes: int) -> None:
+        with self._lock:
+            self.stats["requests"][route] = self.stats["requests"].get(route, 0) + 1
+            self.stats["bytes_received"] += payload_bytes
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+    def end(self, status: int, latency_ms: float) -> None:
+        with self._lock:
+            self.stats["in_flight"] -= 1
+            self.stats["statuses"][str(status)] = self.stats["statuses"].get(str(status), 0) + 1
+            self.stats["latency_ms_total"] += latency_ms
+
+    def count_injection(self, kind: str) -> None:
+        with self._lock:
+            self.stats["injected"][kind] += 1
+
+    def snapshot_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = deepcopy(self.stats)
+            stats["uptime_seconds"] = round(time.time() - stats.pop("started_at"), 3)
+            stats["files"] = len(self.files)
+            stats["caches"] = len(self.caches)
+            stats["batches"] = len(self.batches)
+            stats["scenario"] = deepcopy(self.scenario)
+            return stats
+
+# --- 応答の生成 -----------------------------------------------------------
+
+def build_transcript(count: int, offset: int = 0) -> Dict[str, Any]:
+    """書き起こし結果（conversations形式）を生成する"""
+    conversations = []
+    for i in range(count):
+        conversations.append({
+            "speaker": CANNED_SPEAKERS[(offset + i) % len(CANNED_SPEAKERS)],
+            "utterance": CANNED_UTTERANCES[(offset + i) % len(CANNED_UTTERANCES)],
+        })
+    return {"conversations": conversations}
+
+def build_degenerate_transcript() -> Dict[str, Any]:
+    """同じ語句を繰り返す異常な書き起こし結果を生成する（再試行処理の検証用）"""
+    return {"conversations": [{"speaker": "Speaker A", "utterance": "はい、" * 300}]}
+
+def transcript_speakers(text: str) -> List[str]:
+    """
+    テキストに含まれる書き起こし（{"conversations": [...]} のJSON文書）の話者を返す
+
+    話者リマップのプロンプト自体にも書き起こしの例が含まれるため、プロンプトと書き起こしを
+    結合して送る場合に備えて、最後に現れる書き起こしを使う。
+    """
+    decoder = json.JSONDecoder()
+    conversations = None
+    for match in re.finditer(r'\{\s*"conversations"\s*:', text):
+        try:
+            document, _ = decoder.raw_decode(text, match.start())
+        except ValueError:
+            continue
+        if isinstance(document.get("conversations"), list):
+            conversations = document["conversations"]
+    speakers = []
+    for item in conversations or []:
+        speaker = item.get("speaker") if isinstance(item, dict) else None
+        if isinstance(speaker, str) and speaker not in speakers:
+            speakers.append(speaker)
+    return speakers
+
+def build_speaker_mapping(transcript_text: str) -> Dict[str, str]:
+    """話者リマップ用のマッピングを生成する（"Speaker A_seg1" → "Speaker A"、プロンプトの例は対象外）"""
+    return {speaker: re.sub(r"_seg\d+$", "", speaker) for speaker in transcript_speakers(transcript_text)}
+
+def build_minutes() -> str:
+    """議事録（マークダウン）を生成する"""
+    return (
+        "# 定例会議 議事録\n\n"
+        "## 決定事項\n- 今月末にリリースする\n\n"
+        "## 課題\n- 性能の確認\n\n"
+        "## 次回までの対応\n- 負荷試験の結果をまとめる（担当: Speaker B）\n"
+    )
+
+def classify_request(text: str, has_media: bool, schema_name: Optional[str]) -> str:
+    """リクエストの内容から応答の種類を判定する"""
+    if schema_name == "meeting_post_processing":
+        return "fused"
+    if schema_name == "speaker_mapping":
+        return "speaker_mapping"
+    if schema_name == "meeting_title" or '"title"' in text:
+        return "title"
+    if "Speaker Mapping" in text or "speaker mapping" in text.lower():
+        return "remap"
+    if has_media or schema_name == "meeting_transcript" or '"conversations"' in text:
+        return "transcript"
+    return "minutes"
+
+def render_response(state: FakeProviderState, kind: str, text: str, transcript_text: Optional[str] = None) -> Tuple[str, bool]:
+    """
+    応答テキストを生成する
+
+    Args:
+        state (FakeProviderState): サーバーの状態
+        kind (str): 応答の種類（classify_request の戻り値）
+        text (str): リクエストの全テキスト
+        transcript_text (str, optional): システムプロンプトを除いたテキスト（書き起こしを含む部分。省略時は text）
+
+    Returns:
+        Tuple[str, bool]: (応答テキスト, 出力上限で途中切れしたか)
+    """
+    if transcript_text is None:
+        transcript_text = text
+    if kind == "title":
+        return json.dumps({"title": "疑似会議タイトル"}, ensure_ascii=False), False
+    if kind == "remap":
+        return json.dumps(build_speaker_mapping(transcript_text), ensure_ascii=False), False
+    if kind == "speaker_mapping":
+        mapping = build_speaker_mapping(transcript_text)
+        return json.dumps({
+            "speaker_mapping": [{"speaker": speaker, "name": name} for speaker, name in mapping.items()],
+        }, ensure_ascii=False), False
+    if kind == "minutes":
+        return build_minutes(), False
+    if kind == "fused":
+        mapping = build_speaker_mapping(transcript_text)
+        return json.dumps({
+            "title": "疑似会議タイトル",
+            "speaker_mapping": [{"speaker": speaker, "name": name} for speaker, name in mapping.items()],
+            "minutes": build_minutes(),
+        }, ensure_ascii=False), False
+
+    if state.roll("degenerate_rate"):
+        state.count_injection("degenerate")
+        return json.dumps(build_degenerate_transcript(), ensure_ascii=False), False
+    count = int(state.scenario.get("utterances_per_segment", 12))
+    body = json.dumps(build_transcript(count, offset=state.rng.randrange(len(CANNED_UTTERANCES))), ensure_ascii=False)
+    if state.roll("truncate_rate"):
+        state.count_injection("truncate")
+        return body[: max(1, len(body) * 2 // 3)], True
+    return body, False
+
+def approx_tokens(text: str) -> int:
+    """トークン数の概算"""
+    return max(1, len(text) // 4)
+
+# --- HTTPハンドラ ---------------------------------------------------------
+
+class FakeProviderHandler(BaseHTTPRequestHandler):
+    """疑似プロバイダのリクエストハンドラ"""
+
+    server_version = "GiJiRoKuFakeProvider/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def state(self) -> FakeProviderState:
+        return self.server.state
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+    # --- 共通処理 ---
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length > 0 else b""
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_sse(self, events: List[Dict[str, Any]], delay_seconds: float = 0.0, done_marker: bool = False) -> None:
+        """Server-Sent Events をチャンク転送で送信する"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        payloads = [f"data: {json.dumps(event, ensure_ascii=False)}\r\n\r\n" for event in events]
+        if done_marker:
+            payloads.append("data: [DONE]\r\n\r\n")
+        for i, payload in enumerate(payloads):
+            if i and delay_seconds:
+                time.sleep(delay_seconds)
+            data = payload.encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _base_url(self) -> str:
+        return f"http://{self.headers.get('Host') or '%s:%d' % self.server.server_address[:2]}"
+
+    def _inject_fault(self, provider: str) -> Optional[int]:
+        """エラー注入（注入した場合はステータスコードを返す）"""
+        if self.state.roll("rate_limit_rate"):
+            self.state.count_injection("rate_limit")
+            retry_after = str(self.state.scenario["faults"].get("retry_after_seconds", 1))
+            if provider == "openai":
+                payload = {"error": {"message": "Rate limit reached (fake provider)", "type": "rate_limit_error", "code": "rate_limit_exceeded"}}
+            else:
+                payload = {"error": {"code": 429, "message": "Resource has been exhausted (fake provider)", "status": "RESOURCE_EXHAUSTED"}}
+            self._send_json(429, payload, {"Retry-After": retry_after})
+            return 429
+        if self.state.roll("error_rate"):
+            self.state.count_injection("error")
+            if provider == "openai":
+                payload = {"error": {"message": "Internal server error (fake provider)", "type": "server_error", "code": None}}
+            else:
+                payload = {"error": {"code": 500, "message": "Internal error (fake provider)", "status": "INTERNAL"}}
+            self._send_json(500, payload)
+            return 500
+        return None
+
+    def _dispatch(self, method: str) -> None:
+        parsed = urlparse(self.path)
+        path = parsed.path
+        query = parse_qs(parsed.query)
+        body = self._read_body() if method in ("POST", "PUT", "PATCH") else b""
+
+        route, handler = self._resolve(method, path)
+        if handler is None:
+            self._send_json(404, {"error": {"code": 404, "message": f"Not found: {method} {path}"}})
+            return
+        if route == "admin":
+            handler(path, query, body)
+            return
+
+        self.state.begin(route, len(body))
+        status = 500
+        latency_ms = self.state.sample_latency_ms(route, len(body))
+        try:
+            time.sleep(latency_ms / 1000)
+            provider = "openai" if path.startswith("/v1/") else "gemini"
+            status = self._inject_fault(provider) or handler(path, query, body)
+        except (BrokenPipeError, ConnectionResetError):
+            status = 499
+        except Exception as e:
+            logger.error(f"疑似プロバイダでエラーが発生しました: {str(e)}", exc_info=True)
+            self._send_json(500, {"error": {"code": 500, "message": str(e)}})
+        finally:
+            self.state.end(status, latency_ms)
+
+    def _resolve(self, method: str, path: str):
+        """パスから処理関数を決定する"""
+        if path.startswith("/_fake/"):
+            return "admin", self._handle_admin
+        if method == "POST" and path == "/v1/chat/completions":
+            return "chat", self._handle_openai_chat
+        if method == "POST" and path == "/v1/audio/transcriptions":
+            return "audio_transcription", self._handle_openai_transcription
+        if method == "POST" and path == "/v1/files":
+            return "batch_files", self._handle_openai_files
+        if method == "GET" and re.fullmatch(r"/v1/files/[^/]+(/content)?", path):
+            return "batch_files", self._handle_openai_files
+        if method == "POST" and path == "/v1/batches":
+            return "batches", self._handle_openai_batches
+        if method == "GET" and re.fullmatch(r"/v1/batches/[^/]+", path):
+            return "batches", self._handle_openai_batches
+        if method == "POST" and re.fullmatch(r"/v1(beta|alpha)?/models/[^/:]+:batchGenerateContent", path):
+            return "batches", self._handle_gemini_batch
+        if method == "GET" and re.fullmatch(r"/v1(beta|alpha)?/batches/[^/]+", path):
+            return "batches", self._handle_gemini_batch
+        if method == "POST" and re.fullmatch(r"/upload/v1(beta|alpha)?/files", path):
+            return "upload", self._handle_gemini_upload
+        if re.fullmatch(r"/v1(beta|alpha)?/files/[^/]+", path) and method in ("GET", "DELETE"):
+            return "files", self._handle_gemini_file
+        if method == "POST" and re.fullmatch(r"/v1(beta|alpha)?/models/[^/:]+:generateContent", path):
+            return "generate", self._handle_gemini_generate
+        if method == "POST" and re.fullmatch(r"/v1(beta|alpha)?/models/[^/:]+:streamGenerateContent", path):
+            return "stream", self._handle_gemini_generate
+        if method == "POST" and re.fullmatch(r"/v1(beta|alpha)?/cachedContents", path):
+            return "caches", self._handle_gemini_cache
+        if re.fullmatch(r"/v1(beta|alpha)?/cachedContents/[^/]+", path) and method in ("GET", "PATCH", "DELETE"):
+            return "caches", self._handle_gemini_cache
+        return None, None
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def do_DELETE(self) -> None:
+        self._dispatch("DELETE")
+
+    def do_PATCH(self) -> None:
+        self._dispatch("PATCH")
+
+    # --- 管理用 ---
+
+    def _handle_admin(self, path: str, query: Dict[str, List[str]], body: bytes) -> int:
+        if path == "/_fake/stats":
+            self._send_json(200, self.state.snapshot_stats())
+        elif path == "/_fake/scenario" and self.command == "POST":
+            try:
+                self.state.update_scenario(json.loads(body.decode("utf-8") or "{}"))
+            except (ValueError, TypeError) as e:
+                self._send_json(400, {"error": {"code": 400, "message": str(e)}})
+                return 400
+            self._send_json(200, self.state.snapshot_stats()["scenario"])
+        elif path == "/_fake/reset" and self.command == "POST":
+            self.state.reset()
+            self._send_json(200, {"status": "reset"})
+        else:
+            self._send_json(404, {"error": {"code": 404, "message": f"Not found: {path}"}})
+            return 404
+        return 200
+
+    # --- OpenAI ---
+
+    def _handle_openai_chat(self, path: str, query: Dict[str, List[str]], body: bytes) -> int:
+        request = json.loads(body.decode("utf-8") or "{}")
+        completion = self._chat_completion(request)
+
+        if request.get("stream"):
+            content = completion["choices"][0]["message"]["content"]
+            size = int(self.state.scenario.get("stream_chunk_chars", 200))
+            header = {"id": completion["id"], "object": "chat.completion.chunk", "created": completion["created"], "model": completion["model"]}
+            events = []
+            for i in range(0, len(content), size):
+                events.append({**header, "choices": [{"index": 0, "delta": {"role": "assistant", "content": content[i:i + size]}, "finish_reason": None}]})
+            events.append({**header, "choices": [{"index": 0, "delta": {}, "finish_reason": completion["choices"][0]["finish_reason"]}]})
+            self._send_sse(events, done_marker=True)
+            return 200
+
+        self._send_json(200, completion)
+        return 200
+
+    def _chat_completion(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """バッチ内のチャットリクエスト1件分の応答を生成する"""
+        texts = []
+        user_texts = []  # システムプロンプト以外（書き起こしはここに含まれる）
+        has_audio = False
+        for message in request.get("messages", []):
+            content = message.get("content")
+            message_texts = [content] if isinstance(content, str) else []
+            for part in content if isinstance(content, list) else []:
+                if part.get("type") == "text":
+                    message_texts.append(part.get("text", ""))
+                elif part.get("type") == "input_audio":
+                    has_audio = True
+            texts.extend(message_texts)
+            if message.get("role") not in ("system", "developer"):
+                user_texts.extend(message_texts)
+        schema_name = ((request.get("response_format") or {}).get("json_schema") or {}).get("name")
+        prompt_text = "\n".join(texts)
+        content, truncated = render_response(
+            self.state, classify_request(prompt_text, has_audio, schema_name), prompt_text, "\n".join(user_texts)
+        )
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake-model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content, "refusal": None},
+                "finish_reason": "length" if truncated else "stop",
+                "logprobs": None,
+            }],
+            "usage": {"prompt_tokens": approx_tokens(prompt_text), "completion_tokens": approx_tokens(content), "total_tokens": approx_tokens(prompt_text) + approx_tokens(content)},
+        }
+
+    def _openai_file_resource(self, file_id: str) -> Dict[str, Any]:
+        stored = self.state.openai_files[file_id]
+        return {
+            "id": file_id, "object": "file", "bytes": len(stored["content"]), "created_at": stored["created_at"],
+            "filename": stored["filename"], "purpose": stored["purpose"], "status": "processed",
+        }
+
+    def _store_openai_file(self, content: bytes, filename: str, purpose: str) -> str:
+        file_id = f"file-{uuid.uuid4().hex[:24]}"
+        self.state.openai_files[file_id] = {"content": content, "filename": filename, "purpose": purpose, "created_at": int(time.time())}
+        return file_id
+
+    def _handle_openai_files(self, path: str, query: Dict[str, List[str]], body: bytes) -> int:
+        if self.command == "POST":
+            # multipart/form-data から purpose と file を取り出す
+            message = email.message_from_bytes(
+                f"Content-Type: {self.headers.get('Content-Type', '')}\r\n\r\n".encode("utf-8") + body,
+                policy=email.policy.HTTP,
+            )
+            fields = {}
+            for part in message.iter_parts():
+                name = part.get_param("name", header="content-disposition")
+                fields[name] = (part.get_filename(), part.get_payload(decode=True) or b"")
+            if "file" not in fields:
+                self._send_json(400, {"error": {"message": "file is required", "type": "invalid_request_error"}})
+                return 400
+            filename, content = fields["file"]
+            purpose = fields.get("purpose", (None, b"batch"))[1].decode("utf-8")
+            file_id = self._store_openai_file(content, filename or "upload.jsonl", purpose)
+            self._send_json(200, self._openai_file_resource(file_id))
+            return 200
+
+        parts = path.split("/")
+        file_id = parts[3]
+        if file_id not in self.state.openai_files:
+            self._send_json(404, {"error": {"message": f"No such File object: {file_id}", "type": "invalid_request_error"}})
+            return 404
+        if path.endswith("/content"):
+            content = self.state.openai_files[file_id]["content"]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        else:
+            self._send_json(200, self._openai_file_resource(file_id))
+        return 200
+
+    def _batch_done(self, batch: Dict[str, Any]) -> bool:
+        """作成からシナリオで指定した時間が経過したバッチジョブは完了とみなす"""
+        return time.time() - batch["created_at"] >= float(self.state.scenario.get("batch_completion_seconds", 0))
+
+    def _handle_openai_batches(self, path: str, query: Dict[str, List[str]], body: bytes) -> int:
+        if self.command == "POST":
+            request = json.loads(body.decode("utf-8") or "{}")
+            input_file_id = request.get("input_file_id")
+            if input_file_id not in self.state.openai_files:
+                self._send_json(400, {"error": {"message": f"Invalid input_file_id: {input_file_id}", "type": "invalid_request_error"}})
+                return 400
+            batch_id = f"batch_{uuid.uuid4().hex[:24]}"
+            lines = [json.loads(line) for line in self.state.openai_files[input_file_id]["content"].decode("utf-8").splitlines() if line.strip()]
+            self.state.batches[batch_id] = {
+                "provider": "openai", "created_at": int(time.time()), "request": request, "lines": lines, "output_file_id": None,
+            }
+            batch_id_for_response = batch_id
+        else:
+            batch_id_for_response = path.rsplit("/", 1)[-1]
+            if batch_id_for_response not in self.state.batches:
+                self._send_json(404, {"error": {"message": f"No such batch: {batch_id_for_response}", "type": "invalid_request_error"}})
+                return 404
+
+        batch = self.state.batches[batch_id_for_response]
+        done = self._batch_done(batch)
+        if done and batch["output_file_id"] is None:
+            output = []
+            for line in batch["lines"]:
+                output.append(json.dumps({
+                    "id": f"batch_req_{uuid.uuid4().hex[:16]}",
+                    "custom_id": line.get("custom_id"),
+                    "response": {"status_code": 200, "request_id": uuid.uuid4().hex, "body": self._chat_completion(line.get("body") or {})},
+                    "error": None,
+                }, ensure_ascii=False))
+            batch["output_file_id"] = self._store_openai_file("\n".join(output).encode("utf-8"), "batch_output.jsonl", "batch_output")
+        total = len(batch["lines"])
+        self._send_json(200, {
+            "id": batch_id_for_response,
+            "object": "batch",
+            "endpoint": batch["request"].get("endpoint", "/v1/chat/completions"),
+            "errors": None,
+            "input_file_id": batch["request"].get("input_file_id"),
+            "completion_window": batch["request"].get("completion_window", "24h"),
+            "status": "completed" if done else "in_progress",
+            "output_file_id": batch["output_file_id"],
+            "error_file_id": None,
+            "created_at": batch["created_at"],
+            "completed_at": int(time.time()) if done else None,
+            "request_counts": {"total": total, "completed": total if done else 0, "failed": 0},
+            "metadata": batch["request"].get("metadata"),
+        })
+        return 200
+
+    def _handle_openai_transcription(self, path: str, query: Dict[str, List[str]], body: bytes) -> int:
+        # multipart本体は読み捨て、疑似的な書き起こしテキストを返す
+        count = int(self.state.scenario.get("utterances_per_segment", 12))
+        text = "".join(CANNED_UTTERANCES[i % len(CANNED_UTTERANCES)] for i in range(count))
+        self._send_json(200, {"text": text})
+        return 200
+
+    # --- Gemini ---
+
+    def _file_resource(self, file_id: str) -> Dict[str, Any]:
+        return self.state.files[file_id]["resource"]
+
+    def _handle_gemini_upload(self, path: str, query: Dict[str, List[str]], body: bytes) -> int:
+        command = (self.headers.get("X-Goog-Upload-Command") or "").lower()
+        upload_id = (query.get("upload_id") or [None])[0]
+
+        if command == "start" or (not upload_id and "upload" not in command):
+            metadata = json.loads(body.decode("utf-8") or "{}").get("file", {})
+            upload_id = uuid.uuid4().hex
+            self.state.upload_sessions[upload_id] = {
+                "metadata": metadata,
+                "mime_type": self.headers.get("X-Goog-Upload-Header-Content-Type") or metadata.get("mimeType", "application/octet-stream"),
+                "received": 0,
+            }
+            upload_url = f"{self._base_url()}{path}?upload_id={upload_id}"
+            self._send_json(200, {}, {"X-Goog-Upload-URL": upload_url, "X-Goog-Upload-Status": "active"})
+            return 200
+
+        session = self.state.upload_sessions.get(upload_id)
+        if session is None:
+            self._send_json(404, {"error": {"code": 404, "message": f"Unknown upload session: {upload_id}", "status": "NOT_FOUND"}})
+            return 404
+        if command == "query":
+            if "resource" in session:
+                self._send_json(200, {"file": session["resource"]}, {"X-Goog-Upload-Status": "final"})
+            else:
+                self._send_json(200, {}, {"X-Goog-Upload-Status": "active", "X-Goog-Upload-Size-Received": str(session["received"])})
+            return 200
+        offset = self.headers.get("X-Goog-Upload-Offset")
+        if offset is not None and int(offset) != session["received"]:
+            self._send_json(400, {"error": {"code": 400, "message": f"Invalid upload offset {offset} (received {session['received']})", "status": "INVALID_ARGUMENT"}})
+            return 400
+        session["received"] += len(body)
+
+        if "finalize" not in command:
+            self._send_json(200, {}, {"X-Goog-Upload-Status": "active"})
+            return 200
+
+        file_id = uuid.uuid4().hex[:12]
+        now = datetime.now(timezone.utc)
+        resource = {
+            "name": f"files/{file_id}",
+            "displayName": session["metadata"].get("displayName", file_id),
+            "mimeType": session["mime_type"],
+            "sizeBytes": str(session["received"]),
+            "createTime": now.isoformat().replace("+00:00", "Z"),
+            "updateTime": now.isoformat().replace("+00:00", "Z"),
+            "expirationTime": (now + timedelta(hours=48)).isoformat().replace("+00:00", "Z"),
+            "sha256Hash": "",
+            "uri": f"{self._base_url()}/v1beta/files/{file_id}",
+            "state": "ACTIVE",
+            "source": "UPLOADED",
+        }
+        self.state.files[file_id] = {"resource": resource}
+        # 確定後の問い合わせにはファイル情報を返す
+        session["resource"] = resource
+        self._send_json(200, {"file": resource}, {"X-Goog-Upload-Status": "final"})
+        return 200
+
+    def _handle_gemini_file(self, path: str, query: Dict[str, List[str]], body: bytes) -> int:
+        file_id = path.rsplit("/", 1)[-1]
+        if file_id not in self.state.files:
+            self._send_json(404, {"error": {"code": 404, "message": f"File files/{file_id} not found", "status": "NOT_FOUND"}})
+            return 404
+        if self.command == "DELETE":
+            self.state.files.pop(file_id, None)
+            self._send_json(200, {})
+        else:
+            self._send_json(200, self._file_resource(file_id))
+        return 200
+
+    @staticmethod
+    def _content_texts(contents: List[Any]) -> Tuple[List[str], bool]:
+        """contents からテキストを取り出す（戻り値: (テキストのリスト, メディアを含むか)）"""
+        texts = []
+        has_media = False
+        for content in contents:
+            for part in content.get("parts", []) if isinstance(content, dict) else []:
+                if "text" in part:
+                    texts.append(part["text"])
+                if any(key in part for key in ("fileData", "file_data", "inlineData", "inline_data")):
+                    has_media = True
+        return texts, has_media
+
+    def _cache_resource(self, cache_id: str) -> Dict[str, Any]:
+        cache = self.state.caches[cache_id]
+        return {
+            "name": f"cachedContents/{cache_id}",
+            "model": cache["model"],
+            "displayName": cache["display_name"],
+            "createTime": cache["create_time"],
+            "updateTime": cache["update_time"],
+            "expireTime": cache["expire_time"],
+            "usageMetadata": {"totalTokenCount": cache["token_count"]},
+        }
+
+    def _handle_gemini_cache(self, path: str, query: Dict[str, List[str]], body: bytes) -> int:
+        request = json.loads(body.decode("utf-8") or "{}")
+        now = datetime.now(timezone.utc)
+
+        def expire_time(ttl: Optional[str]) -> str:
+            seconds = float(str(ttl).rstrip("s")) if ttl else 3600.0
+            return (now + timedelta(seconds=seconds)).isoformat().replace("+00:00", "Z")
+
+        if self.command == "POST":
+            texts, _ = self._content_texts(request.get("contents", []))
+            cache_id = uuid.uuid4().hex[:12]
+            self.state.caches[cache_id] = {
+                "model": request.get("model", ""),
+                "display_name": request.get("displayName", ""),
+                "token_count": approx_tokens("\n".join(texts)),
+                "text": "\n".join(texts),
+                "create_time": now.isoformat().replace("+00:00", "Z"),
+                "update_time": now.isoformat().replace("+00:00", "Z"),
+                "expire_time": expire_time(request.get("ttl")),
+            }
+            self._send_json(200, self._cache_resource(cache_id))
+            return 200
+
+        cache_id = path.rsplit("/", 1)[-1]
+        if cache_id not in self.state.caches:
+            self._send_json(404, {"error": {"code": 404, "message": f"CachedContent cachedContents/{cache_id} not found", "status": "NOT_FOUND"}})
+            return 404
+        if self.command == "DELETE":
+            self.state.caches.pop(cache_id, None)
+            self._send_json(200, {})
+            return 200
+        if self.command == "PATCH":
+            self.state.caches[cache_id]["expire_time"] = expire_time(request.get("ttl"))
+            self.state.caches[cache_id]["update_time"] = now.isoformat().replace("+00:00", "Z")
+        self._send_json(200, self._cache_resource(cache_id))
+        return 200
+
+    def _gemini_response(self, request: Dict[str, Any], model: str) -> Tuple[Dict[str, Any], str, bool]:
+        """generateContent のリクエスト1件分の応答を生成する（戻り値: (応答, 本文, 途中切れしたか)）"""
+        texts, has_media = self._content_texts(request.get("contents", []))
+        # 書き起こしは contents（コンテキストキャッシュを使う場合はキャッシュの contents）に含まれる
+        transcript_texts = list(texts)
+        cache_name = request.get("cachedContent") or request.get("cached_content")
+        cache = self.state.caches.get(cache_name.rsplit("/", 1)[-1]) if cache_name else None
+        if cache:
+            transcript_texts.insert(0, cache.get("text", ""))
+        system = request.get("systemInstruction") or request.get("system_instruction") or {}
+        for part in system.get("parts", []) if isinstance(system, dict) else []:
+            texts.append(part.get("text", ""))
+        prompt_text = "\n".join(texts)
+        generation_config = request.get("generationConfig") or request.get("generation_config") or {}
+        response_schema = generation_config.get("responseSchema") or generation_config.get("response_schema") or {}
+        schema_keys = set((response_schema.get("properties") or {}).keys())
+        if {"title", "speaker_mapping", "minutes"} <= schema_keys:
+            schema_name = "meeting_post_processing"
+        elif schema_keys == {"speaker_mapping"}:
+            schema_name = "speaker_mapping"
+        else:
+            schema_name = None
+        content, truncated = render_response(
+            self.state, classify_request(prompt_text, has_media, schema_name), prompt_text, "\n".join(transcript_texts)
+        )
+        response = {
+            "candidates": [{
+                "content": {"parts": [{"text": content}], "role": "model"},
+                "finishReason": "MAX_TOKENS" if truncated else "STOP",
+                "index": 0,
+            }],
+            "usageMetadata": {
+                "promptTokenCount": approx_tokens(prompt_text) + (258 if has_media else 0),
+                "candidatesTokenCount": approx_tokens(content),
+                "totalTokenCount": approx_tokens(prompt_text) + approx_tokens(content),
+            },
+            "modelVersion": model,
+        }
+        return response, content, truncated
+
+    def _handle_gemini_batch(self, path: str, query: Dict[str, List[str]], body: bytes) -> int:
+        if self.command == "POST":
+            request = json.loads(body.decode("utf-8") or "{}")
+            batch_config = request.get("batch") or request
+            input_config = batch_config.get("inputConfig") or batch_config.get("input_config") or {}
+            inline = (input_config.get("requests") or {}).get("requests") or []
+            batch_id = uuid.uuid4().hex[:12]
+            self.state.batches[batch_id] = {
+                "provider": "gemini",
+                "created_at": int(time.time()),
+                "model": path.split("/models/", 1)[1].split(":", 1)[0],
+                "display_name": batch_config.get("displayName") or batch_config.get("display_name", ""),
+                "requests": [item.get("request", item) for item in inline],
+                "responses": None,
+            }
+        else:
+            batch_id = path.rsplit("/", 1)[-1]
+            if batch_id not in self.state.batches:
+                self._send_json(404, {"error": {"code": 404, "message": f"Batch batches/{batch_id} not found", "status": "NOT_FOUND"}})
+                return 404
+
+        batch = self.state.batches[batch_id]
+        done = self._batch_done(batch)
+        if done and batch["responses"] is None:
+            batch["responses"] = [{"response": self._gemini_response(item, batch["model"])[0]} for item in batch["requests"]]
+        created = datetime.fromtimestamp(batch["created_at"], timezone.utc).isoformat().replace("+00:00", "Z")
+        metadata = {
+            "@type": "type.googleapis.com/google.ai.generativelanguage.v1beta.GenerateContentBatch",
+            "name": f"batches/{batch_id}",
+            "model": f"models/{batch['model']}",
+            "displayName": batch["display_name"],
+            "createTime": created,
+            "updateTime": created,
+            "state": "BATCH_STATE_SUCCEEDED" if done else "BATCH_STATE_RUNNING",
+            "batchStats": {"requestCount": str(len(batch["requests"])), "successfulRequestCount": str(len(batch["requests"]) if done else 0)},
+        }
+        payload = {"name": f"batches/{batch_id}", "metadata": metadata, "done": done}
+        if done:
+            output = {"inlinedResponses": {"inlinedResponses": batch["responses"]}}
+            metadata["output"] = output
+            payload["response"] = {"@type": "type.googleapis.com/google.ai.generativelanguage.v1beta.GenerateContentBatchOutput", **output}
+        self._send_json(200, payload)
+        return 200
+
+    def _handle_gemini_generate(self, path: str, query: Dict[str, List[str]], body: bytes) -> int:
+        request = json.loads(body.decode("utf-8") or "{}")
+        cached_tokens = 0
+        cache_name = request.get("cachedContent") or request.get("cached_content")
+        if cache_name:
+            cache = self.state.caches.get(cache_name.rsplit("/", 1)[-1])
+            if cache is None:
+                self._send_json(404, {"error": {"code": 404, "message": f"CachedContent {cache_name} not found", "status": "NOT_FOUND"}})
+                return 404
+            cached_tokens = cache["token_count"]
+        model = path.split("/models/", 1)[1].split(":", 1)[0]
+        response, content, _ = self._gemini_response(request, model)
+        usage = response["usageMetadata"]
+        if cached_tokens:
+            usage["promptTokenCount"] += cached_tokens
+            usage["totalTokenCount"] += cached_tokens
+            usage["cachedContentTokenCount"] = cached_tokens
+        finish_reason = response["candidates"][0]["finishReason"]
+
+        def chunk(text: str, final: bool) -> Dict[str, Any]:
+            candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+            if final:
+                candidate["finishReason"] = finish_reason
+            return {"candidates": [candidate], "usageMetadata": usage, "modelVersion": model}
+
+        if path.endswith(":streamGenerateContent"):
+            size = int(self.state.scenario.get("stream_chunk_chars", 200))
+            pieces = [content[i:i + size] for i in range(0, len(content), size)] or [""]
+            events = [chunk(piece, i == len(pieces) - 1) for i, piece in enumerate(pieces)]
+            self._send_sse(events)
+            return 200
+
+        self._send_json(200, response)
+        return 200
+
+# --- サーバー -------------------------------------------------------------
+
+class FakeProviderServer(ThreadingHTTPServer):
+    """疑似プロバイダのHTTPサーバー"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], scenario: Optional[Dict[str, Any]] = None):
+        super().__init__(address, FakeProviderHandler)
+        self.state = FakeProviderState(scenario)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def openai_base_url(self) -> str:
+        return f"{self.base_url}/v1"
+
+    @property
+    def gemini_base_url(self) -> str:
+        return self.base_url
+
+    def start_background(self) -> threading.Thread:
+        """別スレッドでサーバーを起動する（ベンチマークから利用）"""
+        thread = threading.Thread(target=self.serve_forever, name="fake-provider", daemon=True)
+        thread.start()
+        return thread
+
+def load_scenario(args: argparse.Namespace) -> Dict[str, Any]:
+    """コマンドライン引数とシナリオファイルからシナリオを作成する"""
+    scenario: Dict[str, Any] = {}
+    if args.scenario:
+        with open(args.scenario, "r", encoding="utf-8") as f:
+            scenario = json.load(f)
+    faults = scenario.setdefault("faults", {})
+    for key in ("error_rate", "rate_limit_rate", "degenerate_rate", "truncate_rate"):
+        value = getattr(args, key)
+        if value is not None:
+            faults[key] = value
+    if args.latency:
+        scenario.setdefault("latency", {})["default"] = args.latency
+    if args.seed is not None:
+        scenario["seed"] = args.seed
+    return scenario
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """疑似プロバイダサーバーのエントリーポイント"""
+    parser = argparse.ArgumentParser(description="OpenAI / Gemini API の疑似サーバー（オフライン負荷試験用）")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"待ち受けアドレス（デフォルト: {DEFAULT_HOST}）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"待ち受けポート（デフォルト: {DEFAULT_PORT}）")
+    parser.add_argument("--scenario", help="シナリオJSONファイル（latency / faults などを指定）")
+    parser.add_argument("--latency", help="全ルート共通の遅延分布（例: lognormal:median_ms=800,sigma=0.5）")
+    parser.add_argument("--error-rate", type=float, help="500エラーを返す割合")
+    parser.add_argument("--rate-limit-rate", type=float, help="429エラーを返す割合")
+    parser.add_argument("--degenerate-rate", type=float, help="異常な（繰り返しの多い）書き起こしを返す割合")
+    parser.add_argument("--truncate-rate", type=float, help="出力上限で途中切れした応答を返す割合")
+    parser.add_argument("--seed", type=int, help="乱数シード（指定すると遅延・故障注入が再現可能になる）")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    server = FakeProviderServer((args.host, args.port), load_scenario(args))
+    logger.info(f"疑似プロバイダサーバーを起動しました: {server.base_url}")
+    logger.info(f"  OPENAI_BASE_URL={server.openai_base_url}")
+    logger.info(f"  GEMINI_BASE_URL={server.gemini_base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("停止要求を受け付けました")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,438 @@
+"""
+処理パイプラインのスループットベンチマーク
+
+合成した会議風の音声（発話区間と無音区間を一定のパターンで繰り返すWAV/MP4）を入力に、
+以下の各段階を個別のサブプロセスで計測する。
+
+- convert  : format_converter.convert_file（MP4などの変換）
+- extract  : AudioProcessor.extract_audio（音声抽出・必要に応じた圧縮）
+- split    : AudioSplitter.split_audio（無音検出による分割）
+- pipeline : processor.process_audio_file（疑似プロバイダサーバーに対する全処理）
+
+各段階について、経過時間、ピークRSS（本体 / FFmpegなどの子プロセス）、作業ディレクトリの
+ピーク使用量（一時ファイルを含む）、セグメント数と segments/sec をJSONで出力する。
+--baseline を指定すると保存済みの結果と比較し、許容率を超えて劣化した項目があれば終了コード1を返す。
+
+使い方:
+    python benchmarks/pipeline_throughput.py                              # 10分・1時間の入力で全段階を計測
+    python benchmarks/pipeline_throughput.py --durations 10m,1h,4h --formats wav,mp4
+    python benchmarks/pipeline_throughput.py --stages split --pattern dense
+    python benchmarks/pipeline_throughput.py --output bench.json --save-baseline benchmarks/throughput_baseline.json
+    python benchmarks/pipeline_throughput.py --baseline benchmarks/throughput_baseline.json --tolerance 0.2
+    python benchmarks/pipeline_throughput.py --stages pipeline --speed-factor 1.5   # 音声を1.5倍速にして書き起こす
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+STAGES = ["convert", "extract", "split", "pipeline"]
+
+# 発話区間と無音区間のパターン（秒）
+SILENCE_PATTERNS = {
+    "meeting": {"talk_seconds": 8.0, "pause_seconds": 1.2},  # 通常の会議（短い間が頻繁にある）
+    "sparse": {"talk_seconds": 4.0, "pause_seconds": 4.0},  # 発言の少ない会議
+    "dense": {"talk_seconds": 45.0, "pause_seconds": 0.3},  # 途切れない発話（無音検出が難しい）
+}
+
+# ベースライン比較の対象（値が大きいほど悪い指標）
+COMPARED_METRICS = ["wall_seconds", "peak_rss_mb", "peak_children_rss_mb", "peak_disk_bytes"]
+
+# --- 入力音声の合成 -------------------------------------------------------
+
+def parse_duration(value: str) -> int:
+    """ "10m", "1h", "90s", "600" などの表記を秒数に変換する"""
+    value = value.strip().lower()
+    units = {"h": 3600, "m": 60, "s": 1}
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(float(value))
+
+def find_ffmpeg() -> str:
+    """合成に使用するFFmpegを探す（同梱版 → システムのffmpeg）"""
+    sys.path.insert(0, str(REPO_ROOT))
+    from src.utils.ffmpeg_handler import get_ffmpeg_path
+    path = get_ffmpeg_path() or shutil.which("ffmpeg")
+    if not path:
+        raise RuntimeError("FFmpegが見つかりません。resources/ffmpeg に配置するかPATHを設定してください。")
+    return path
+
+def synthesize_input(cache_dir: Path, duration_seconds: int, fmt: str, pattern: str) -> Path:
+    """
+    発話風の合成音声を作成する（作成済みの場合は再利用）
+
+    発話区間は基本周波数が揺らぐ倍音付きの音に音節程度の周期で振幅変調をかけたもの、
+    無音区間は完全な無音とし、SILENCE_PATTERNS の周期で繰り返す。
+
+    Args:
+        cache_dir (Path): 合成した入力の保存先
+        duration_seconds (int): 長さ（秒）
+        fmt (str): wav または mp4（映像トラック付き）
+        pattern (str): SILENCE_PATTERNS のキー
+    Returns:
+        Path: 合成した入力ファイルのパス
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    output = cache_dir / f"synthetic_{pattern}_{duration_seconds}s.{fmt}"
+    if output.exists() and output.stat().st_size > 0:
+        return output
+
+    talk = SILENCE_PATTERNS[pattern]["talk_seconds"]
+    cycle = talk + SILENCE_PATTERNS[pattern]["pause_seconds"]
+    voice = (
+        f"lt(mod(t,{cycle}),{talk})"
+        f"*(0.35+0.25*sin(2*PI*4*t))"
+        f"*(0.6*sin(2*PI*(140+30*sin(2*PI*0.7*t))*t)+0.25*sin(2*PI*(280+60*sin(2*PI*0.7*t))*t)+0.1*sin(2*PI*(560+90*sin(2*PI*1.3*t))*t))"
+    )
+    cmd = [find_ffmpeg(), "-y", "-v", "error",
+           "-f", "lavfi", "-i", f"aevalsrc='{voice}':s=16000:c=mono:d={duration_seconds}"]
+    if fmt == "mp4":
+        cmd += ["-f", "lavfi", "-i", f"color=c=black:s=160x90:r=1:d={duration_seconds}",
+                "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", "-b:a", "64k", "-shortest"]
+    elif fmt != "wav":
+        raise ValueError(f"未対応の入力形式です: {fmt}")
+    tmp_output = output.with_name(output.stem + ".partial" + output.suffix)
+    cmd.append(str(tmp_output))
+
+    print(f"合成音声を作成中: {output.name}", flush=True)
+    subprocess.run(cmd, check=True, capture_output=True)
+    tmp_output.replace(output)
+    return output
+
+# --- 計測（サブプロセス側） -----------------------------------------------
+
+class DiskUsageMonitor:
+    """ディレクトリの使用量を定期的に計測し、ピーク値を記録する"""
+
+    def __init__(self, directory: Path, interval_seconds: float = 0.2):
+        self.directory = directory
+        self.interval_seconds = interval_seconds
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="disk-monitor", daemon=True)
+
+    def measure(self) -> int:
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass  # 計測中に削除されたファイル
+        self.peak_bytes = max(self.peak_bytes, total)
+        return total
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            self.measure()
+
+    def __enter__(self) -> "DiskUsageMonitor":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.measure()
+
+def peak_rss_mb() -> Dict[str, Optional[float]]:
+    """本プロセスと子プロセス（FFmpeg）のピークRSS[MB]を返す"""
+    try:
+        import resource
+    except ImportError:
+        # Windows: psutil があればピークワーキングセットを使う
+        try:
+            import psutil
+            info = psutil.Process().memory_info()
+            peak = getattr(info, "peak_wset", info.rss)
+            return {"peak_rss_mb": round(peak / (1024 * 1024), 1), "peak_children_rss_mb": None}
+        except ImportError:
+            return {"peak_rss_mb": None, "peak_children_rss_mb": None}
+    # ru_maxrss は Linux ではKB、macOSではバイト
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "peak_children_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+def write_benchmark_settings(work_dir: Path, args: argparse.Namespace, openai_base_url: str, gemini_base_url: str) -> Path:
+    """疑似プロバイダを使う計測用の設定ファイルを作成する（利用者の設定ファイルは変更しない）"""
+    from src.utils.config import config_manager
+
+    settings = json.loads(json.dumps(dict(config_manager.get_snapshot().raw)))
+    settings.pop("openai_api_key", None)
+    settings.pop("gemini_api_key", None)
+    settings["openai_base_url"] = openai_base_url
+    settings["gemini_base_url"] = gemini_base_url
+    transcription = settings.setdefault("transcription", {})
+    transcription["method"] = args.method
+    transcription["segment_length_seconds"] = args.segment_length
+    transcription["in_memory_segments"] = args.in_memory
+    transcription["speed_factor"] = args.speed_factor
+    settings.setdefault("summarization", {})["model"] = "gemini" if args.method == "gemini" else "openai"
+    path = work_dir / "settings.json"
+    path.write_text(json.dumps(settings, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+def run_pipeline_stage(input_file: Path, work_dir: Path, args: argparse.Namespace) -> Dict[str, Any]:
+    """疑似プロバイダサーバーを起動し、process_audio_file を実行する"""
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from fake_provider_server import FakeProviderServer
+    from src.utils.config import config_manager
+    from src.utils.run_context import RunContext
+    from src.services.processor import process_audio_file
+
+    scenario = json.loads(Path(args.scenario).read_text(encoding="utf-8")) if args.scenario else {}
+    scenario.setdefault("seed", args.seed)
+    server = FakeProviderServer(("127.0.0.1", 0), scenario)
+    server.start_background()
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ["OPENAI_BASE_URL"] = server.openai_base_url
+    os.environ["GEMINI_BASE_URL"] = server.gemini_base_url
+
+    # 計測用の設定ファイルに切り替える（このサブプロセス内のみ）
+    config_manager.config_file = write_benchmark_settings(work_dir, args, server.openai_base_url, server.gemini_base_url)
+    config_manager.reload_if_changed()
+
+    run = RunContext(runs_dir=work_dir / "runs")
+    try:
+        with run:
+            results = process_audio_file(input_file, {"transcribe": True, "minutes": True, "reflection": False}, run_context=run)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    segments = 0
+    for path in (run.workspace / "transcriptions").glob("complete_transcription_*.json"):
+        segments = json.loads(path.read_text(encoding="utf-8")).get("metadata", {}).get("total_segments", 0)
+    stats = server.state.snapshot_stats()
+    return {
+        "success": bool(results.get("success")),
+        "error": results.get("error"),
+        "segments": segments,
+        "provider_requests": stats["requests"],
+        "provider_max_in_flight": stats["max_in_flight"],
+        "provider_bytes_received": stats["bytes_received"],
+        "segmentation": run.to_dict()["metadata"].get("segmentation"),
+        "output": None,
+    }
+
+def run_stage(stage: str, input_file: Path, work_dir: Path, args: argparse.Namespace) -> Dict[str, Any]:
+    """計測対象の処理を1つ実行する（サブプロセス内で呼び出す）"""
+    if stage == "convert":
+        from src.services.format_converter import convert_file
+        converted = convert_file(str(input_file), output_dir=work_dir)
+        return {"success": True, "skipped": converted == str(input_file), "output": str(converted)}
+    if stage == "extract":
+        from src.services.audio import AudioProcessor
+        audio_file, was_compressed = AudioProcessor(temp_dir=work_dir).extract_audio(input_file)
+        return {"success": True, "compressed": was_compressed, "output": str(audio_file)}
+    if stage == "split":
+        from src.modules.audio_splitter import AudioSplitter
+        splitter = AudioSplitter(segment_length_seconds=args.segment_length)
+        if args.in_memory:
+            segments = splitter.split_audio_to_buffers(str(input_file), spill_dir=str(work_dir))
+        else:
+            segments = splitter.split_audio(str(input_file), str(work_dir))
+        return {"success": True, "segments": len(segments), "output": None}
+    if stage == "pipeline":
+        return run_pipeline_stage(input_file, work_dir, args)
+    raise ValueError(f"未対応の段階です: {stage}")
+
+def child_main(args: argparse.Namespace) -> int:
+    """サブプロセスとして1つの段階を計測し、結果をJSONで標準出力に書き出す"""
+    import logging
+    logging.basicConfig(level=logging.WARNING if not args.verbose else logging.INFO)
+    sys.path.insert(0, str(REPO_ROOT))
+    from src.utils.ffmpeg_handler import setup_ffmpeg
+    setup_ffmpeg()
+
+    work_dir = Path(args.work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    input_file = Path(args.input)
+
+    with DiskUsageMonitor(work_dir) as disk:
+        start = time.perf_counter()
+        try:
+            result = run_stage(args.child, input_file, work_dir, args)
+        except Exception as e:
+            result = {"success": False, "error": f"{type(e).__name__}: {e}", "output": None}
+        result["wall_seconds"] = round(time.perf_counter() - start, 3)
+    result["peak_disk_bytes"] = disk.peak_bytes
+    result.update(peak_rss_mb())
+    segments = result.get("segments")
+    if segments and result["wall_seconds"] > 0:
+        result["segments_per_second"] = round(segments / result["wall_seconds"], 3)
+    print("RESULT " + json.dumps(result, ensure_ascii=False), flush=True)
+    return 0
+
+# --- 計測の実行（親プロセス側） -------------------------------------------
+
+def run_child(stage: str, input_file: Path, work_dir: Path, args: argparse.Namespace) -> Dict[str, Any]:
+    """1つの段階を新しいサブプロセスで計測する（段階ごとにピークRSSを分離するため）"""
+    env = os.environ.copy()
+    env["PYTHONPATH"] = str(REPO_ROOT) + os.pathsep + env.get("PYTHONPATH", "")
+    # pydubなどが tempfile で作る一時ファイルも作業ディレクトリ内で計測する
+    tmp_dir = work_dir / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    for key in ("TMPDIR", "TEMP", "TMP"):
+        env[key] = str(tmp_dir)
+
+    cmd = [sys.executable, str(Path(__file__).resolve()), "--child", stage,
+           "--input", str(input_file), "--work-dir", str(work_dir),
+           "--segment-length", str(args.segment_length), "--method", args.method,
+           "--seed", str(args.seed), "--speed-factor", str(args.speed_factor)]
+    if args.in_memory:
+        cmd.append("--in-memory")
+    if args.scenario:
+        cmd += ["--scenario", str(Path(args.scenario).resolve())]
+    if args.verbose:
+        cmd.append("--verbose")
+
+    proc = subprocess.run(cmd, cwd=str(REPO_ROOT), env=env, capture_output=True, text=True,
+                          encoding="utf-8", errors="replace")
+    for line in proc.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    return {"success": False, "error": f"計測プロセスが異常終了しました (code={proc.returncode}): {proc.stderr[-2000:]}"}
+
+def run_case(input_file: Path, duration_seconds: int, fmt: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """1つの入力について選択された段階を順に計測する（前段の出力を次段の入力にする）"""
+    case = {"input": input_file.name, "duration_seconds": duration_seconds, "format": fmt,
+            "pattern": args.pattern, "input_bytes": input_file.stat().st_size, "stages": {}}
+    work_root = Path(tempfile.mkdtemp(prefix="gijiroku_bench_", dir=args.work_root))
+    try:
+        stage_input = input_file
+        for stage in STAGES:
+            if stage not in args.stages:
+                continue
+            # 全処理は元の入力から開始する
+            source = input_file if stage == "pipeline" else stage_input
+            print(f"  {stage} ...", end="", flush=True)
+            result = run_child(stage, source, work_root / stage, args)
+            case["stages"][stage] = result
+            status = "OK" if result.get("success") else f"NG ({result.get('error')})"
+            print(f" {result.get('wall_seconds', 0):.2f}s {status}", flush=True)
+            if result.get("output"):
+                stage_input = Path(result["output"])
+    finally:
+        if not args.keep_work:
+            shutil.rmtree(work_root, ignore_errors=True)
+    return case
+
+def compare_with_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """ベースラインと比較し、劣化した項目の説明を返す"""
+    regressions = []
+    baseline_cases = {case["input"]: case for case in baseline.get("cases", [])}
+    for case in report["cases"]:
+        base_case = baseline_cases.get(case["input"])
+        if not base_case:
+            continue
+        for stage, result in case["stages"].items():
+            base = base_case["stages"].get(stage)
+            if not base or not base.get("success"):
+                continue
+            if not result.get("success"):
+                regressions.append(f"{case['input']} / {stage}: 失敗しました ({result.get('error')})")
+                continue
+            for metric in COMPARED_METRICS:
+                value, base_value = result.get(metric), base.get(metric)
+                if value is None or not base_value:
+                    continue
+                limit = base_value * (1 + tolerance)
+                if value > limit:
+                    regressions.append(f"{case['input']} / {stage}: {metric} {value} > {limit:.3f}（ベースライン {base_value}）")
+    return regressions
+
+def print_summary(report: Dict[str, Any]) -> None:
+    print("\n入力                                   段階       時間[s]  RSS[MB]  子RSS[MB]  ディスク[MB]  seg/s")
+    for case in report["cases"]:
+        for stage, result in case["stages"].items():
+            disk_mb = (result.get("peak_disk_bytes") or 0) / (1024 * 1024)
+            print(f"{case['input']:<38} {stage:<9} {result.get('wall_seconds', 0):>8.2f} "
+                  f"{result.get('peak_rss_mb') or 0:>8.1f} {result.get('peak_children_rss_mb') or 0:>10.1f} "
+                  f"{disk_mb:>12.1f} {result.get('segments_per_second', ''):>6}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="GiJiRoKu 処理パイプラインのスループットベンチマーク")
+    parser.add_argument("--durations", default="10m,1h", help="入力の長さ（カンマ区切り。例: 10m,1h,4h）")
+    parser.add_argument("--formats", default="wav,mp4", help="入力形式（wav, mp4 のカンマ区切り）")
+    parser.add_argument("--pattern", default="meeting", choices=sorted(SILENCE_PATTERNS), help="発話と無音のパターン")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"計測する段階（{', '.join(STAGES)} のカンマ区切り）")
+    parser.add_argument("--method", default="gemini", choices=["gemini", "gpt4_audio", "whisper_gpt4"], help="全処理で使う書き起こし方式")
+    parser.add_argument("--segment-length", type=int, default=450, help="分割長（秒）")
+    parser.add_argument("--in-memory", action="store_true", help="セグメントをメモリ上で扱う")
+    parser.add_argument("--speed-factor", type=float, default=1.0, help="全処理で音声を速める倍率（1.0〜2.0）")
+    parser.add_argument("--scenario", help="疑似プロバイダのシナリオJSON（遅延・エラー注入）")
+    parser.add_argument("--seed", type=int, default=0, help="疑似プロバイダの乱数シード")
+    parser.add_argument("--cache-dir", type=Path, default=REPO_ROOT / "benchmarks" / ".cache", help="合成した入力の保存先")
+    parser.add_argument("--work-root", help="作業ディレクトリを作成する場所（既定: システムの一時ディレクトリ）")
+    parser.add_argument("--keep-work", action="store_true", help="計測後に作業ディレクトリを削除しない")
+    parser.add_argument("--output", type=Path, help="結果のJSONを保存するパス")
+    parser.add_argument("--baseline", type=Path, help="比較対象のベースラインJSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="ベースラインに対する許容増加率")
+    parser.add_argument("--save-baseline", type=Path, help="計測結果をベースラインとして保存する")
+    parser.add_argument("--verbose", action="store_true", help="計測対象の処理ログを表示する")
+    # サブプロセス用の内部引数
+    parser.add_argument("--child", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--input", help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        return child_main(args)
+
+    args.stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = [stage for stage in args.stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"未対応の段階です: {', '.join(unknown)}")
+
+    report: Dict[str, Any] = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "settings": {"pattern": args.pattern, "method": args.method, "segment_length_seconds": args.segment_length,
+                     "in_memory_segments": args.in_memory, "speed_factor": args.speed_factor, "seed": args.seed},
+        "cases": [],
+    }
+    for duration in (parse_duration(value) for value in args.durations.split(",")):
+        for fmt in (value.strip() for value in args.formats.split(",")):
+            input_file = synthesize_input(args.cache_dir, duration, fmt, args.pattern)
+            print(f"{input_file.name}（{duration}秒, {input_file.stat().st_size:,} bytes）", flush=True)
+            report["cases"].append(run_case(input_file, duration, fmt, args))
+
+    print_summary(report)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+        print(f"\n結果を保存しました: {args.output}")
+    else:
+        print("\n" + text)
+    if args.save_baseline:
+        args.save_baseline.write_text(text, encoding="utf-8")
+        print(f"ベースラインを保存しました: {args.save_baseline}")
+
+    failures = [f"{case['input']} / {stage}: 失敗しました ({result.get('error')})"
+                for case in report["cases"] for stage, result in case["stages"].items() if not result.get("success")]
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        failures += [item for item in compare_with_baseline(report, baseline, args.tolerance) if item not in failures]
+    for failure in failures:
+        print(f"NG: {failure}")
+    if not failures:
+        print("OK")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
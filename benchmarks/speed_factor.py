@@ -0,0 +1,144 @@
+"""
+再生速度の倍率ごとの処理時間・コスト比較ベンチマーク
+
+合成した会議風の音声を、倍率ごと（既定: 1.0, 1.25, 1.5, 1.75, 2.0）に
+processor.process_audio_file で疑似プロバイダサーバーに対して全処理し、以下を比較する。
+
+- wall_seconds       : 全処理の経過時間
+- audio_seconds      : プロバイダーに送った音声の長さ（秒、音声トークン数はこれに比例する）
+- audio_tokens       : 音声トークン数の見積もり（Geminiは音声1秒あたり32トークン）
+- upload_bytes       : 疑似プロバイダが受信したバイト数
+- segments           : セグメント数（セグメント長は元の時間軸で決まるため倍率によらずほぼ一定）
+
+疑似プロバイダは既定で送信サイズに比例した遅延（per_mb_ms）を返すため、アップロード量の削減が
+処理時間に反映される。精度への影響（書き起こしの誤り）は実際のAPIでの確認が必要で、ここでは計測しない。
+
+使い方:
+    python benchmarks/speed_factor.py
+    python benchmarks/speed_factor.py --duration 1h --factors 1.0,1.5,2.0 --output speed.json
+    python benchmarks/speed_factor.py --scenario scenario.json   # 遅延・エラー注入を指定する
+"""
+
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from pipeline_throughput import REPO_ROOT, SILENCE_PATTERNS, parse_duration, synthesize_input, run_child
+
+# 音声1秒あたりの入力トークン数（Gemini）
+AUDIO_TOKENS_PER_SECOND = {"gemini": 32}
+
+# 疑似プロバイダの既定のシナリオ（送信サイズに比例する遅延を加える）
+DEFAULT_SCENARIO = {"latency": {"default": "lognormal:median_ms=600,sigma=0.3,per_mb_ms=400"}}
+
+def audio_seconds_sent(result: Dict[str, Any]) -> Optional[float]:
+    """セグメントの長さの合計を、プロバイダーに送った音声の長さ（速めた後）に換算する"""
+    segmentation = result.get("segmentation") or {}
+    segments = segmentation.get("segments")
+    if not segments:
+        return None
+    factor = segmentation.get("speed_factor") or 1.0
+    return round(sum(s["end_ms"] - s["start_ms"] for s in segments) / 1000 / factor, 1)
+
+def run_factor(input_file: Path, factor: float, work_root: Path, scenario_path: Path, args: argparse.Namespace) -> Dict[str, Any]:
+    """1つの倍率で全処理を計測する"""
+    child_args = argparse.Namespace(
+        segment_length=args.segment_length,
+        method=args.method,
+        seed=args.seed,
+        speed_factor=factor,
+        in_memory=args.in_memory,
+        scenario=str(scenario_path),
+        verbose=args.verbose,
+    )
+    result = run_child("pipeline", input_file, work_root / f"speed_{factor:g}", child_args)
+    audio_seconds = audio_seconds_sent(result)
+    tokens_per_second = AUDIO_TOKENS_PER_SECOND.get(args.method)
+    return {
+        "factor": factor,
+        "success": result.get("success"),
+        "error": result.get("error"),
+        "wall_seconds": result.get("wall_seconds"),
+        "audio_seconds": audio_seconds,
+        "audio_tokens": int(audio_seconds * tokens_per_second) if audio_seconds and tokens_per_second else None,
+        "upload_bytes": result.get("provider_bytes_received"),
+        "segments": result.get("segments"),
+    }
+
+def add_reductions(rows: List[Dict[str, Any]]) -> None:
+    """倍率1.0（または最小の倍率）に対する削減率を追加する"""
+    base = min(rows, key=lambda row: row["factor"])
+    for row in rows:
+        for metric in ("wall_seconds", "audio_seconds", "upload_bytes"):
+            value, base_value = row.get(metric), base.get(metric)
+            row[f"{metric}_reduction"] = round(1 - value / base_value, 3) if value is not None and base_value else None
+
+def print_summary(rows: List[Dict[str, Any]]) -> None:
+    print("\n倍率   時間[s]  削減    音声[s]  削減    送信[MB]  削減    トークン   seg")
+    for row in rows:
+        def pct(key: str) -> str:
+            value = row.get(key)
+            return f"{value:>6.1%}" if value is not None else "     -"
+        upload_mb = (row.get("upload_bytes") or 0) / (1024 * 1024)
+        print(f"{row['factor']:<5g} {row.get('wall_seconds') or 0:>8.2f} {pct('wall_seconds_reduction')} "
+              f"{row.get('audio_seconds') or 0:>8.1f} {pct('audio_seconds_reduction')} "
+              f"{upload_mb:>9.2f} {pct('upload_bytes_reduction')} "
+              f"{row.get('audio_tokens') or '-':>9} {row.get('segments') or '-':>4}"
+              + ("" if row.get("success") else f"  NG ({row.get('error')})"))
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="GiJiRoKu 再生速度の倍率ごとの処理時間・コスト比較")
+    parser.add_argument("--duration", default="30m", help="入力の長さ（例: 30m, 1h）")
+    parser.add_argument("--factors", default="1.0,1.25,1.5,1.75,2.0", help="比較する倍率（カンマ区切り、1.0〜2.0）")
+    parser.add_argument("--pattern", default="meeting", choices=sorted(SILENCE_PATTERNS), help="発話と無音のパターン")
+    parser.add_argument("--method", default="gemini", choices=["gemini", "gpt4_audio"], help="書き起こし方式")
+    parser.add_argument("--segment-length", type=int, default=450, help="分割長（秒、元の時間軸）")
+    parser.add_argument("--in-memory", action="store_true", help="セグメントをメモリ上で扱う")
+    parser.add_argument("--scenario", type=Path, help="疑似プロバイダのシナリオJSON（省略時は送信サイズに比例する遅延）")
+    parser.add_argument("--seed", type=int, default=0, help="疑似プロバイダの乱数シード")
+    parser.add_argument("--cache-dir", type=Path, default=REPO_ROOT / "benchmarks" / ".cache", help="合成した入力の保存先")
+    parser.add_argument("--output", type=Path, help="結果のJSONを保存するパス")
+    parser.add_argument("--verbose", action="store_true", help="計測対象の処理ログを表示する")
+    args = parser.parse_args(argv)
+
+    factors = [float(value) for value in args.factors.split(",") if value.strip()]
+    invalid = [factor for factor in factors if not 1.0 <= factor <= 2.0]
+    if invalid:
+        parser.error(f"倍率は1.0〜2.0の範囲で指定してください: {invalid}")
+
+    duration = parse_duration(args.duration)
+    input_file = synthesize_input(args.cache_dir, duration, "wav", args.pattern)
+    print(f"{input_file.name}（{duration}秒, {input_file.stat().st_size:,} bytes）", flush=True)
+
+    work_root = Path(tempfile.mkdtemp(prefix="gijiroku_speed_"))
+    try:
+        scenario_path = args.scenario.resolve() if args.scenario else work_root / "scenario.json"
+        if not args.scenario:
+            scenario_path.write_text(json.dumps(DEFAULT_SCENARIO), encoding="utf-8")
+        rows = []
+        for factor in factors:
+            print(f"  {factor:g}倍速 ...", end="", flush=True)
+            row = run_factor(input_file, factor, work_root, scenario_path, args)
+            print(f" {row.get('wall_seconds') or 0:.2f}s {'OK' if row['success'] else 'NG'}", flush=True)
+            rows.append(row)
+    finally:
+        shutil.rmtree(work_root, ignore_errors=True)
+
+    add_reductions(rows)
+    print_summary(rows)
+    report = {"input": input_file.name, "duration_seconds": duration, "method": args.method, "results": rows}
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+        print(f"\n結果を保存しました: {args.output}")
+    else:
+        print("\n" + text)
+    return 0 if all(row["success"] for row in rows) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+起動時間ベンチマーク
+
+`python -X importtime` でメインウィンドウ表示までに読み込まれるモジュールを計測し、
+起動時間が予算を超えた場合や、遅延読み込みすべきモジュール（プロバイダSDK、pydub、
+処理系サービス）が起動時に読み込まれた場合に終了コード1を返す。
+
+使い方:
+    python benchmarks/startup_time.py                 # インポート時間を計測
+    python benchmarks/startup_time.py --window        # ウィンドウ表示までの時間を計測（要ディスプレイ）
+    python benchmarks/startup_time.py --save-baseline benchmarks/startup_baseline.json
+    python benchmarks/startup_time.py --baseline benchmarks/startup_baseline.json --tolerance 0.2
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# ウィンドウ表示までに読み込まれてはならないモジュール（初回使用時に読み込む）
+LAZY_MODULES = [
+    "openai",
+    "google.genai",
+    "httplib2",
+    "pydub",
+    "src.services.processor",
+    "src.services.transcription",
+    "src.services.minutes",
+    "src.utils.Common_OpenAIAPI",
+    "src.utils.new_gemini_api",
+]
+
+# メインウィンドウ生成までのインポート（main.py 経由）
+IMPORT_SNIPPET = "import main; from src.ui.main_window import MainWindow"
+
+# ウィンドウの初回描画までを計測するスニペット
+WINDOW_SNIPPET = """
+import tkinter as tk
+import main
+from src.ui.main_window import MainWindow
+root = tk.Tk()
+MainWindow(root)
+root.update()
+print("READY", flush=True)
+root.destroy()
+"""
+
+def _child_env() -> Dict[str, str]:
+    """計測用サブプロセスの環境変数"""
+    env = os.environ.copy()
+    env["PYTHONPATH"] = str(REPO_ROOT) + os.pathsep + env.get("PYTHONPATH", "")
+    # バイトコードのキャッシュを使う通常の起動条件で計測する
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+def parse_importtime(stderr: str) -> Tuple[float, Dict[str, float]]:
+    """
+    -X importtime の出力を解析する
+
+    Args:
+        stderr (str): サブプロセスの標準エラー出力
+    Returns:
+        Tuple[float, Dict[str, float]]: (トップレベルのインポート時間合計[ms], モジュール名→累積時間[ms])
+    """
+    total_us = 0
+    cumulative: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # ヘッダー行
+        cumulative_us = int(parts[1].strip())
+        raw_name = parts[2].rstrip()
+        name = raw_name.strip()
+        cumulative[name] = cumulative_us / 1000
+        # インデントのないモジュールがトップレベルのインポート
+        if len(raw_name) - len(raw_name.lstrip()) <= 1:
+            total_us += cumulative_us
+    return total_us / 1000, cumulative
+
+def measure_imports() -> Tuple[float, Dict[str, float]]:
+    """メインウィンドウ生成までのインポートを1回計測する"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SNIPPET],
+        cwd=str(REPO_ROOT),
+        env=_child_env(),
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"インポートに失敗しました:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+def measure_window() -> float:
+    """プロセス起動からウィンドウの初回描画までの時間[ms]を1回計測する"""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", WINDOW_SNIPPET],
+        cwd=str(REPO_ROOT),
+        env=_child_env(),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    for line in proc.stdout:
+        if line.strip() == "READY":
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            proc.wait()
+            return elapsed_ms
+    proc.wait()
+    raise RuntimeError(f"ウィンドウを表示できませんでした:\n{proc.stderr.read()[-2000:]}")
+
+def find_eager_modules(modules: Dict[str, float]) -> List[str]:
+    """起動時に読み込まれてしまった遅延読み込み対象モジュールを返す"""
+    return [name for name in LAZY_MODULES if name in modules]
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="GiJiRoKu 起動時間ベンチマーク")
+    parser.add_argument("--runs", type=int, default=5, help="計測回数（中央値を採用）")
+    parser.add_argument("--window", action="store_true", help="ウィンドウの初回描画までを計測する")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="許容する起動時間[ms]（既定: インポート500ms / ウィンドウ1000ms）")
+    parser.add_argument("--baseline", type=Path, help="比較対象のベースラインJSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="ベースラインに対する許容増加率")
+    parser.add_argument("--save-baseline", type=Path, help="計測結果をベースラインとして保存する")
+    parser.add_argument("--top", type=int, default=15, help="表示する低速モジュールの件数")
+    args = parser.parse_args()
+
+    failures = []
+
+    # インポート計測（1回目はバイトコード生成を含むため捨てる）
+    measure_imports()
+    import_totals = []
+    modules: Dict[str, float] = {}
+    for _ in range(args.runs):
+        total_ms, modules = measure_imports()
+        import_totals.append(total_ms)
+    import_ms = statistics.median(import_totals)
+    metric = "import_ms"
+    value = import_ms
+
+    print(f"インポート時間（中央値, {args.runs}回）: {import_ms:.1f}ms")
+    print("累積時間の大きいモジュール:")
+    for name, ms in sorted(modules.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {ms:8.1f}ms  {name}")
+
+    eager = find_eager_modules(modules)
+    if eager:
+        failures.append(f"起動時に遅延読み込み対象のモジュールが読み込まれています: {', '.join(eager)}")
+
+    result = {"import_ms": round(import_ms, 1), "eager_modules": eager}
+
+    if args.window:
+        window_ms = statistics.median(measure_window() for _ in range(args.runs))
+        print(f"ウィンドウ表示までの時間（中央値, {args.runs}回）: {window_ms:.1f}ms")
+        result["window_ms"] = round(window_ms, 1)
+        metric = "window_ms"
+        value = window_ms
+
+    budget_ms = args.budget_ms if args.budget_ms is not None else (1000 if args.window else 500)
+    if value > budget_ms:
+        failures.append(f"{metric} が予算を超えています: {value:.1f}ms > {budget_ms:.1f}ms")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if metric in baseline:
+            limit = baseline[metric] * (1 + args.tolerance)
+            print(f"ベースライン: {baseline[metric]:.1f}ms（許容上限 {limit:.1f}ms）")
+            if value > limit:
+                failures.append(f"{metric} がベースラインから劣化しています: {value:.1f}ms > {limit:.1f}ms")
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"ベースラインを保存しました: {args.save_baseline}")
+
+    for failure in failures:
+        print(f"NG: {failure}")
+    if not failures:
+        print("OK")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,13 +14,11 @@ from tkinter import messagebox
 import logging
 import shutil
 import atexit
+import copy
 import json
 from pathlib import Path
 from datetime import datetime
-from src.modules.audio_processor import AudioProcessor
-from pydub import AudioSegment
 from src.utils.ffmpeg_handler import setup_ffmpeg
-from src.utils.path_resolver import get_config_file_path
 
 # ロガーの初期化
 logger = logging.getLogger(__name__)
@@ -28,10 +26,6 @@ logger = logging.getLogger(__name__)
 # ログ出力を設定します（デバッグ用）
 logging.basicConfig(level=logging.DEBUG)
 
-# FFMPEGの初期設定
-ffmpeg_path, ffprobe_path = setup_ffmpeg()
-logger.info(f"FFmpeg設定: {ffmpeg_path}, ffprobe: {ffprobe_path}")
-
 # アプリケーションのベースディレクトリを設定
 if getattr(sys, 'frozen', False):
     # PyInstallerで実行時のパス
@@ -56,12 +50,20 @@ def cleanup_temp():
         logging.error(f"一時ファイルの削除中にエラーが発生しました: {e}")
         print(f"一時ファイルの削除中にエラーが発生しました: {e}")
 
-    # outputフォルダー内のmp3とjsonファイルの削除
+    # outputフォルダー内のmp3とjsonファイルの削除（実行中の処理の作業ディレクトリは除く）
     try:
         output_folder = Path("output")
         if output_folder.exists():
             for file in output_folder.rglob("*"):
                 if file.is_file() and file.suffix.lower() in [".mp3", ".json"]:
+                    workspace = find_run_workspace(file)
+                    if workspace and is_run_active(workspace):
+                        logging.debug(f"実行中の作業ディレクトリのためスキップ: {file}")
+                        continue
+                    if workspace and file.parent.name == "batch" and has_pending_batch(workspace):
+                        # 完了していないバッチジョブの記録は再開（--resume-run-id）に必要なため残す
+                        logging.debug(f"完了していないバッチジョブの記録のためスキップ: {file}")
+                        continue
                     try:
                         file.unlink()
                         logging.info(f"削除しました: {file}")
@@ -93,15 +95,15 @@ def cleanup_temp():
     # srcディレクトリをPythonパスに追加
     sys.path.insert(0, str(BASE_DIR))
 
-from src.ui.main_window import MainWindow
 from src.utils.config import config_manager
+from src.utils.run_context import find_run_workspace, is_run_active, has_pending_batch
 
 def setup_logging():
     """ロギングの初期設定"""
     log_dir = Path("logs")
     log_dir.mkdir(exist_ok=True)
     
-    config = config_manager.get_config()
+    config = config_manager.get_snapshot().config
     log_level = getattr(logging, config.log_level.upper(), logging.INFO)
     
     logging.basicConfig(
@@ -113,6 +115,12 @@ def setup_logging():
         ]
     )
 
+    # 設定ファイルでログレベルが変更された場合は再起動せずに反映する
+    def apply_log_level(snapshot):
+        logging.getLogger().setLevel(getattr(logging, snapshot.config.log_level.upper(), logging.INFO))
+
+    config_manager.subscribe(apply_log_level)
+
 def setup_default_output_dir():
     """デフォルトの出力ディレクトリ（マイドキュメント/議事録）の初期設定"""
     try:
@@ -138,22 +146,18 @@ def setup_default_output_dir():
         raise
 
 def load_config():
-    """設定ファイルを読み込む"""
+    """設定を読み込む（ConfigManagerのスナップショットから生データを取得）"""
     try:
-        # 統一されたパス解決ユーティリティを使用
-        config_file = get_config_file_path()
-        logger.info(f"設定ファイルを読み込みます: {config_file.absolute()}")
-        
-        if config_file.exists():
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                # 設定内容のログ
-                transcription_method = config.get('transcription', {}).get('method', 'gpt4_audio')
-                logger.info(f"読み込まれた文字起こし方式: {transcription_method}")
-                return config
-        else:
-            logger.warning(f"設定ファイルが見つかりません: {config_file}")
+        snapshot = config_manager.get_snapshot()
+        logger.info(f"設定を読み込みます: {config_manager.config_file.absolute()} (設定バージョン: {snapshot.version})")
+        if not snapshot.raw:
+            logger.warning(f"設定ファイルが見つかりません: {config_manager.config_file}")
             return {}
+        config = copy.deepcopy(dict(snapshot.raw))
+        # 設定内容のログ
+        transcription_method = config.get('transcription', {}).get('method', 'gpt4_audio')
+        logger.info(f"読み込まれた文字起こし方式: {transcription_method}")
+        return config
     except Exception as e:
         logger.error(f"設定ファイルの読み込み中にエラーが発生しました: {str(e)}")
         return {}
@@ -175,6 +179,7 @@ def process_audio_file(input_file, config):
         if transcription_method == "gemini":
             # Geminiを使用する場合はAudioProcessorを使用
             logger.info("Gemini APIを使用した処理を開始します")
+            from src.modules.audio_processor import AudioProcessor
             processor = AudioProcessor()
             output_file = processor.process_audio_file(
                 input_file=input_file,
@@ -208,6 +213,10 @@ def main():
             logger.info(f"PyInstaller実行パス: {sys._MEIPASS}")
             logger.info(f"実行ファイルパス: {sys.executable}")
             
+        # FFMPEGの初期設定（PATHと環境変数の設定のみ。pydubは初回使用時に読み込まれる）
+        ffmpeg_path, ffprobe_path = setup_ffmpeg()
+        logger.info(f"FFmpeg設定: {ffmpeg_path}, ffprobe: {ffprobe_path}")
+
         logger.info("強制的に一時ファイルのクリーンアップを実行します...")
         cleanup_temp()
         
@@ -229,6 +238,8 @@ def main():
         
         # メインウィンドウの作成
         logger.info("メインウィンドウを作成します...")
+        # 処理系のサービスはMainWindow内で初回実行時に読み込まれる
+        from src.ui.main_window import MainWindow
         root = tk.Tk()
         app = MainWindow(root)
         
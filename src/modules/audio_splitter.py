@@ -1,19 +1,30 @@
 import os
-from pydub import AudioSegment
-from pydub.silence import detect_silence
+import subprocess
 import logging
+from .segment_buffer import AudioSegmentBuffer
+from .segment_planner import speech_ms_per_segment
 
 logger = logging.getLogger(__name__)
 
+# FFmpegのパイプ出力でエンコードできるセグメント形式
+PIPE_FORMATS = ("mp3", "wav", "flac")
+
+# 分割位置の目標の前後で無音区間を探す範囲（ミリ秒）
+SILENCE_SEARCH_MARGIN_MS = 10000
+
 class AudioSplitter:
-    def __init__(self, segment_length_seconds=600):
+    def __init__(self, segment_length_seconds=600, planner=None):
         """
         音声分割クラスの初期化
         Args:
             segment_length_seconds (int): 分割する長さ（秒）
+            planner (SegmentPlanner, optional): 発話密度に応じて分割位置を決める計画器（指定時は segment_length_seconds を使わない）
         """
         self.segment_length_seconds = segment_length_seconds
         self.segment_length_ms = segment_length_seconds * 1000
+        self.planner = planner
+        self.last_split_points_ms = []  # 直近の分割で使用した分割位置（ミリ秒）
+        self.last_speech_ms = []  # 直近の分割での各セグメントの推定発話時間（ミリ秒）
         logger.info(f"AudioSplitterを初期化: セグメント長 = {segment_length_seconds}秒 ({self.segment_length_ms}ミリ秒)")
 
     def split_audio(self, input_file_path, output_dir):
@@ -35,27 +46,13 @@ class AudioSplitter:
 
             # 音声ファイルを読み込む
             logger.info("音声ファイルを読み込み中...")
+            from pydub import AudioSegment
             audio = AudioSegment.from_file(input_file_path)
             audio_length_ms = len(audio)
             audio_length_seconds = audio_length_ms / 1000
             logger.info(f"音声ファイルを読み込みました: 長さ = {audio_length_seconds:.2f}秒")
 
-            # 理論上の分割位置を計算（例: 0, 300秒, 600秒, ...）
-            theoretical_split_points = list(range(0, audio_length_ms, self.segment_length_ms))
-            if theoretical_split_points[-1] != audio_length_ms:
-                theoretical_split_points.append(audio_length_ms)
-
-            logger.info("理論上の分割位置を計算しました:")
-            for i, pos in enumerate(theoretical_split_points):
-                logger.info(f"  理論位置 {i+1}: {pos/1000:.2f}秒")
-
-            # 実際の分割位置を決定（無音検出による調整）
-            actual_split_points = self._determine_all_split_points(audio, theoretical_split_points)
-
-            logger.info("実際の分割位置を決定しました:")
-            for i, (theory, actual) in enumerate(zip(theoretical_split_points, actual_split_points)):
-                diff = (actual - theory) / 1000
-                logger.info(f"  分割位置 {i+1}: {actual/1000:.2f}秒 (理論位置との差: {diff:.2f}秒)")
+            actual_split_points = self._plan_split_points(audio)
 
             # 分割されたファイルのパスを保存するリスト
             split_files = []
@@ -90,6 +87,189 @@ class AudioSplitter:
             logger.error(f"音声分割中にエラーが発生しました: {str(e)}", exc_info=True)
             raise
 
+    def split_audio_to_buffers(self, input_file_path, spill_dir=None, memory_budget_bytes=256 * 1024 * 1024):
+        """
+        音声ファイルを分割し、各セグメントをメモリ上のバッファとして返す
+        セグメントはFFmpegのパイプ出力で直接エンコードするため一時ファイルを作らない。
+        メモリ予算を超えた分のセグメントのみ spill_dir に書き出す。
+        Args:
+            input_file_path (str): 入力音声ファイルのパス
+            spill_dir (str, optional): メモリ予算超過時の退避ディレクトリ（Noneの場合は退避せずメモリに保持）
+            memory_budget_bytes (int): メモリ上に保持するセグメントの合計バイト数の上限
+        Returns:
+            list[AudioSegmentBuffer]: 分割されたセグメントのリスト
+        """
+        try:
+            logger.info(f"音声分割（メモリモード）を開始: {input_file_path}")
+            logger.info(f"メモリ予算: {memory_budget_bytes / (1024 * 1024):.1f}MB, 退避ディレクトリ: {spill_dir}")
+
+            from pydub import AudioSegment
+            audio = AudioSegment.from_file(input_file_path)
+            audio_length_ms = len(audio)
+            logger.info(f"音声ファイルを読み込みました: 長さ = {audio_length_ms / 1000:.2f}秒")
+
+            actual_split_points = self._plan_split_points(audio)
+
+            buffers = []
+            bytes_in_memory = 0
+            for i in range(len(actual_split_points) - 1):
+                index = i + 1
+                start_ms = actual_split_points[i]
+                end_ms = actual_split_points[i + 1]
+
+                data = self.encode_segment(audio[start_ms:end_ms], "mp3")
+
+                if spill_dir and bytes_in_memory + len(data) > memory_budget_bytes:
+                    # メモリ予算を超える場合のみディスクへ退避
+                    os.makedirs(spill_dir, exist_ok=True)
+                    spill_path = os.path.join(spill_dir, f"segment_{index}.mp3")
+                    with open(spill_path, "wb") as f:
+                        f.write(data)
+                    buffers.append(AudioSegmentBuffer(index, start_ms, end_ms, path=spill_path, speech_ms=self.speech_ms_of(i)))
+                    logger.info(f"セグメント {index} をディスクへ退避しました: {spill_path} ({len(data):,} bytes)")
+                else:
+                    bytes_in_memory += len(data)
+                    buffers.append(AudioSegmentBuffer(index, start_ms, end_ms, data=data, speech_ms=self.speech_ms_of(i)))
+                    logger.info(f"セグメント {index} をメモリ上に保持しました: {start_ms/1000:.2f}秒 - {end_ms/1000:.2f}秒 ({len(data):,} bytes)")
+
+            logger.info(f"音声分割（メモリモード）が完了しました。合計 {len(buffers)} 個のセグメント（メモリ使用量: {bytes_in_memory:,} bytes）")
+            return buffers
+
+        except Exception as e:
+            logger.error(f"音声分割（メモリモード）中にエラーが発生しました: {str(e)}", exc_info=True)
+            raise
+
+    def bisect_segment(self, segment_buffer, min_chunk_ms=30000):
+        """
+        セグメントを中央付近の無音区間で2つに分割する（部分的な再書き起こし用）
+        分割後のセグメントは元音声での位置（start_ms / end_ms）を引き継ぎ、メモリ上に保持する。
+        Args:
+            segment_buffer (AudioSegmentBuffer): 分割するセグメント
+            min_chunk_ms (int): 分割後の各セグメントの最小長（ミリ秒）
+        Returns:
+            list[AudioSegmentBuffer]: 分割されたセグメント（短すぎて分割できない場合は空のリスト）
+        """
+        import io
+        from pydub import AudioSegment
+
+        source = segment_buffer.source()
+        if isinstance(source, memoryview):
+            audio = AudioSegment.from_file(io.BytesIO(source), format=segment_buffer.format)
+        else:
+            audio = AudioSegment.from_file(source)
+        audio_length_ms = len(audio)
+        if audio_length_ms < min_chunk_ms * 2:
+            logger.info(f"セグメント {segment_buffer.index} は短いため分割しません: {audio_length_ms/1000:.2f}秒")
+            return []
+
+        # 中央付近の無音区間で分割し、どちらかが短くなりすぎる場合は中央で分割する
+        split_ms = self._find_optimal_split_point(audio, audio_length_ms // 2)
+        if split_ms < min_chunk_ms or audio_length_ms - split_ms < min_chunk_ms:
+            split_ms = audio_length_ms // 2
+
+        # パイプに出力できない形式（m4a / aac など、再エンコードせずに送ったセグメント）はMP3で出力する
+        chunk_format = segment_buffer.format if segment_buffer.format in PIPE_FORMATS else "mp3"
+        # 速めた音声の場合、セグメント内の位置を元の時間軸に戻して割り当てる
+        base_ms = segment_buffer.start_ms
+        scale = segment_buffer.speed_factor
+        chunks = []
+        for start_ms, end_ms in ((0, split_ms), (split_ms, audio_length_ms)):
+            data = self.encode_segment(audio[start_ms:end_ms], chunk_format)
+            chunks.append(AudioSegmentBuffer(
+                segment_buffer.index, base_ms + int(start_ms * scale), base_ms + int(end_ms * scale),
+                data=data, format=chunk_format, speed_factor=scale
+            ))
+        logger.info(
+            f"セグメント {segment_buffer.index} を {(base_ms + split_ms * scale)/1000:.2f}秒で分割しました "
+            f"({chunks[0].duration_seconds:.2f}秒 + {chunks[1].duration_seconds:.2f}秒)"
+        )
+        return chunks
+
+    def next_split_point(self, audio, final=False):
+        """
+        録音中の音声の先頭から、次のセグメントの分割位置を求める（ライブモードでの増分分割用）
+        分割長の位置の前後で無音区間を探すため、分割長＋探索範囲の音声が揃うまでは分割しない。
+        Args:
+            audio (AudioSegment): まだセグメントにしていない音声
+            final (bool): 録音が終了しているか（終了時は揃っていない分も切り出す）
+        Returns:
+            int | None: 分割位置（ミリ秒）。まだ分割できない場合はNone
+        """
+        audio_length_ms = len(audio)
+        if audio_length_ms == 0:
+            return None
+        if audio_length_ms >= self.segment_length_ms + SILENCE_SEARCH_MARGIN_MS or (final and audio_length_ms > self.segment_length_ms):
+            return self._find_optimal_split_point(audio, self.segment_length_ms)
+        return audio_length_ms if final else None
+
+    def encode_segment(self, segment, format="mp3"):
+        """
+        AudioSegmentをFFmpegのパイプ経由でエンコードし、バイト列として返す
+        （pydubのexportは内部で一時ファイルを使うため使用しない）
+        Args:
+            segment (AudioSegment): エンコードする音声
+            format (str): 出力フォーマット
+        Returns:
+            bytes: エンコード済みの音声データ
+        """
+        from pydub import AudioSegment
+        converter = AudioSegment.converter or "ffmpeg"
+        sample_format = {1: "s8", 2: "s16le", 3: "s24le", 4: "s32le"}.get(segment.sample_width, "s16le")
+        cmd = [
+            converter, "-v", "error",
+            "-f", sample_format, "-ar", str(segment.frame_rate), "-ac", str(segment.channels),
+            "-i", "pipe:0",
+            "-f", format, "pipe:1"
+        ]
+        result = subprocess.run(cmd, input=segment.raw_data, capture_output=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"FFmpegによるセグメントのエンコードに失敗しました: {result.stderr.decode('utf-8', errors='replace')}")
+        return result.stdout
+
+    def _plan_split_points(self, audio):
+        """
+        分割位置を決定する（plannerがあれば発話密度に応じた可変長、なければ固定長）
+        Args:
+            audio (AudioSegment): 音声データ
+        Returns:
+            list: 分割位置のリスト（ミリ秒、先頭0と終端を含む）
+        """
+        audio_length_ms = len(audio)
+        if self.planner is not None:
+            logger.info("発話密度に応じて分割位置を決定します")
+            actual_split_points, self.last_speech_ms = self.planner.plan(audio, self._find_optimal_split_point)
+            self.last_split_points_ms = actual_split_points
+            return actual_split_points
+
+        self.last_speech_ms = []
+
+        # 理論上の分割位置を計算（例: 0, 300秒, 600秒, ...）
+        theoretical_split_points = list(range(0, audio_length_ms, self.segment_length_ms))
+        if theoretical_split_points[-1] != audio_length_ms:
+            theoretical_split_points.append(audio_length_ms)
+
+        logger.info("理論上の分割位置を計算しました:")
+        for i, pos in enumerate(theoretical_split_points):
+            logger.info(f"  理論位置 {i+1}: {pos/1000:.2f}秒")
+
+        # 実際の分割位置を決定（無音検出による調整）
+        actual_split_points = self._determine_all_split_points(audio, theoretical_split_points)
+        self.last_split_points_ms = actual_split_points
+        # 固定長の分割でも推定発話時間を求め、発話密度の実績（SegmentationStats）と書き起こし漏れの判定に使う
+        self.last_speech_ms = speech_ms_per_segment(audio, actual_split_points)
+
+        logger.info("実際の分割位置を決定しました:")
+        for i, (theory, actual) in enumerate(zip(theoretical_split_points, actual_split_points)):
+            diff = (actual - theory) / 1000
+            logger.info(f"  分割位置 {i+1}: {actual/1000:.2f}秒 (理論位置との差: {diff:.2f}秒)")
+        return actual_split_points
+
+    def speech_ms_of(self, segment_position):
+        """直近の分割でのセグメントの推定発話時間（ミリ秒、不明な場合はNone）"""
+        if segment_position < len(self.last_speech_ms):
+            return self.last_speech_ms[segment_position]
+        return None
+
     def _determine_all_split_points(self, audio, theoretical_points):
         """
         全ての分割位置を事前に決定する
@@ -125,8 +305,7 @@ class AudioSplitter:
         # 無音検出のパラメータ
         min_silence_len = 500  # 最小無音長（ミリ秒）
         silence_thresh = -30   # -40dBから-30dBに変更（より大きな音も「無音」と判定）
-        margin_seconds = 10    # 目標時間の前後にどれだけ余裕を持たせるか（秒）- 5秒から10秒に拡大
-        margin_ms = margin_seconds * 1000
+        margin_ms = SILENCE_SEARCH_MARGIN_MS  # 目標時間の前後にどれだけ余裕を持たせるか
 
         # 音声の終端を超えないように調整
         target_ms = min(target_ms, len(audio))
@@ -142,6 +321,8 @@ class AudioSplitter:
             logger.debug(f"探索範囲が狭すぎるため、目標位置で分割します: {target_ms/1000:.2f}秒")
             return target_ms
 
+        from pydub.silence import detect_silence
+
         # 探索範囲の音声を抽出
         search_segment = audio[search_start:search_end]
 
@@ -0,0 +1,167 @@
+import os
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# セグメント形式とMIMEタイプの対応
+SEGMENT_MIME_TYPES = {
+    "mp3": "audio/mpeg",
+    "wav": "audio/wav",
+    "flac": "audio/flac",
+    "aac": "audio/aac",
+    "m4a": "audio/mp4",
+    "ogg": "audio/ogg",
+}
+
+class SegmentBufferError(Exception):
+    """解放済みのセグメントの読み込みなど、セグメントバッファ関連のエラーを扱うカスタム例外クラス"""
+    pass
+
+class AudioSegmentBuffer:
+    """分割済み音声セグメント
+
+    エンコード済みのバイト列をメモリ上に保持するか、メモリ予算を超えた場合は
+    ディスク上のファイルとして保持する。アップロード処理には source() の戻り値
+    （memoryview またはファイルパス）をそのまま渡す。
+    複数のスレッドから同じセグメントを送信する場合は in_use() の中で読み込むこと。
+    release() は使用中のスレッドが全て終わるまでデータの解放を遅らせる。
+    """
+
+    def __init__(
+        self,
+        index: int,
+        start_ms: int = 0,
+        end_ms: int = 0,
+        data: Optional[bytes] = None,
+        path: Optional[Union[str, Path]] = None,
+        format: str = "mp3",
+        speech_ms: Optional[int] = None,
+        speed_factor: float = 1.0
+    ):
+        """
+        Args:
+            index (int): セグメント番号（1始まり）
+            start_ms (int): 元音声での開始位置（ミリ秒）
+            end_ms (int): 元音声での終了位置（ミリ秒）
+            data (bytes, optional): エンコード済みの音声データ
+            path (str | Path, optional): ディスクに退避したファイルのパス
+            format (str): 音声フォーマット（拡張子）
+            speech_ms (int, optional): 推定発話時間（ミリ秒、発話密度に応じた分割時のみ）
+            speed_factor (float): 音声データの再生速度の倍率（速めた音声の場合。位置と長さは元の時間軸で持つ）
+        """
+        if data is None and path is None:
+            raise ValueError("data または path のどちらかを指定してください")
+        self.index = index
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.data = data
+        self.path = str(path) if path is not None else None
+        self.format = format
+        self.speech_ms = speech_ms
+        self.speed_factor = speed_factor
+        self._lock = threading.Lock()
+        self._users = 0
+        self._released = False
+
+    @classmethod
+    def from_file(cls, index: int, path: Union[str, Path], start_ms: int = 0, end_ms: int = 0, speech_ms: Optional[int] = None) -> "AudioSegmentBuffer":
+        """既存のセグメントファイルからバッファを作成"""
+        ext = os.path.splitext(str(path))[1].lower().lstrip(".") or "mp3"
+        return cls(index=index, start_ms=start_ms, end_ms=end_ms, path=path, format=ext, speech_ms=speech_ms)
+
+    @property
+    def in_memory(self) -> bool:
+        """データをメモリ上に保持しているか"""
+        return self.data is not None and self.path is None
+
+    @property
+    def name(self) -> str:
+        """セグメントの表示名（ファイル名相当）"""
+        if self.path:
+            return Path(self.path).name
+        return f"segment_{self.index}.{self.format}"
+
+    @property
+    def mime_type(self) -> str:
+        """セグメントのMIMEタイプ"""
+        return SEGMENT_MIME_TYPES.get(self.format, "application/octet-stream")
+
+    @property
+    def size(self) -> int:
+        """セグメントのバイト数"""
+        if self.data is not None:
+            return len(self.data)
+        return os.path.getsize(self.path)
+
+    @property
+    def duration_seconds(self) -> float:
+        """セグメントの長さ（秒、元の時間軸）"""
+        return max(0, self.end_ms - self.start_ms) / 1000
+
+    def rescale(self, speed_factor: float) -> None:
+        """速めた音声上の位置を元の時間軸に戻す（分割直後に1回だけ呼び出す）"""
+        self.start_ms = int(round(self.start_ms * speed_factor))
+        self.end_ms = int(round(self.end_ms * speed_factor))
+        if self.speech_ms is not None:
+            self.speech_ms = int(round(self.speech_ms * speed_factor))
+        self.speed_factor = speed_factor
+
+    def _check_available(self) -> None:
+        """データを解放済みでディスクにも退避していない場合はエラーにする"""
+        if self.data is None and self.path is None:
+            raise SegmentBufferError(f"セグメント {self.index} のデータは解放済みです")
+
+    def source(self) -> Union[str, memoryview]:
+        """アップロードAPIに渡す入力（メモリ上ならmemoryview、それ以外はパス）"""
+        self._check_available()
+        if self.data is not None:
+            return memoryview(self.data)
+        return self.path
+
+    def read_bytes(self) -> bytes:
+        """セグメントのバイト列を取得"""
+        self._check_available()
+        if self.data is not None:
+            return self.data
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    @contextmanager
+    def in_use(self) -> Iterator["AudioSegmentBuffer"]:
+        """
+        セグメントを使用中にするコンテキストマネージャ（この間に release() されてもデータを解放しない）
+
+        Yields:
+            AudioSegmentBuffer: このセグメント
+        Raises:
+            SegmentBufferError: 既に解放済みの場合
+        """
+        with self._lock:
+            self._check_available()
+            self._users += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._users -= 1
+                if self._released and self._users == 0:
+                    self.data = None
+
+    def release(self) -> None:
+        """
+        メモリ上のデータを解放する（書き起こし完了後に呼び出す。退避ファイルは削除しない）
+
+        他のスレッドが in_use() の中で使用している場合は、最後のスレッドが終わった時点で解放する。
+        """
+        with self._lock:
+            self._released = True
+            if self._users == 0:
+                self.data = None
+
+    def __repr__(self) -> str:
+        location = "memory" if self.in_memory else self.path
+        return f"AudioSegmentBuffer(index={self.index}, {self.start_ms}-{self.end_ms}ms, {location})"
@@ -0,0 +1,203 @@
+import json
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from src.utils.path_resolver import get_app_config_dir
+
+logger = logging.getLogger(__name__)
+
+# 発話密度の推定に使うエネルギー包絡のウィンドウ長（ミリ秒）
+ENVELOPE_WINDOW_MS = 1000
+
+# このdBFSを超えるウィンドウを発話区間とみなす
+SPEECH_THRESHOLD_DBFS = -35.0
+
+# 過去の実績がない場合に使う、発話1秒あたりの出力文字数（JSONの構造を含む）
+DEFAULT_CHARS_PER_SPEECH_SECOND = 12.0
+
+# 出力1文字あたりのトークン数の目安（日本語とJSONの構造が混在する出力を想定）
+TOKENS_PER_CHAR = 0.9
+
+# 出力トークン上限に対して見込み出力を抑える割合（推定誤差の余裕）
+TOKEN_SAFETY_RATIO = 0.7
+
+# 実績の更新に使う指数移動平均の重み
+STATS_SMOOTHING = 0.3
+
+# 実績として採用するセグメントの最小発話時間（秒）
+MIN_SPEECH_SECONDS_FOR_STATS = 30
+
+STATS_FILE_NAME = "segmentation_stats.json"
+
+def speech_envelope(audio) -> List[bool]:
+    """ウィンドウ（ENVELOPE_WINDOW_MS）ごとに発話区間かどうかを判定する"""
+    flags = []
+    for start in range(0, len(audio), ENVELOPE_WINDOW_MS):
+        window = audio[start:start + ENVELOPE_WINDOW_MS]
+        flags.append(window.dBFS > SPEECH_THRESHOLD_DBFS)
+    return flags
+
+def _speech_ms_between(flags: List[bool], start_ms: int, end_ms: int) -> int:
+    """エネルギー包絡から区間の推定発話時間（ミリ秒）を求める"""
+    first, last = start_ms // ENVELOPE_WINDOW_MS, -(-end_ms // ENVELOPE_WINDOW_MS)
+    return sum(flags[first:last]) * ENVELOPE_WINDOW_MS
+
+def speech_ms_per_segment(audio, points: List[int]) -> List[int]:
+    """
+    分割位置で区切った各セグメントの推定発話時間を求める（固定長の分割でも発話密度の実績を記録するため）
+
+    Args:
+        audio (AudioSegment): 音声データ
+        points (List[int]): 分割位置のリスト（ミリ秒、先頭0と終端を含む）
+    Returns:
+        List[int]: 各セグメントの推定発話時間（ミリ秒）
+    """
+    flags = speech_envelope(audio)
+    return [_speech_ms_between(flags, start, end) for start, end in zip(points, points[1:])]
+
+class SegmentationStats:
+    """過去の書き起こし実績（発話1秒あたりの出力文字数）を保存・更新する"""
+
+    _lock = threading.Lock()
+
+    def __init__(self, stats_file: Optional[Path] = None):
+        """
+        Args:
+            stats_file (Path, optional): 実績ファイルのパス（省略時は設定ディレクトリの segmentation_stats.json）
+        """
+        self.stats_file = Path(stats_file) if stats_file else get_app_config_dir() / STATS_FILE_NAME
+
+    def _load(self) -> dict:
+        try:
+            with open(self.stats_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"分割実績ファイルの読み込みに失敗しました: {str(e)}")
+            return {}
+
+    def chars_per_speech_second(self) -> float:
+        """発話1秒あたりの出力文字数（実績がない場合はデフォルト値）"""
+        value = self._load().get("chars_per_speech_second")
+        return float(value) if value else DEFAULT_CHARS_PER_SPEECH_SECOND
+
+    def record(self, samples: List[Tuple[float, int]]) -> Optional[float]:
+        """
+        書き起こし結果の実績を記録する
+
+        Args:
+            samples (List[Tuple[float, int]]): (発話時間[秒], 出力文字数) のリスト
+        Returns:
+            Optional[float]: 更新後の発話1秒あたりの出力文字数（採用できる実績がない場合はNone）
+        """
+        samples = [(seconds, chars) for seconds, chars in samples if seconds >= MIN_SPEECH_SECONDS_FOR_STATS and chars > 0]
+        if not samples:
+            return None
+        observed = sum(chars for _, chars in samples) / sum(seconds for seconds, _ in samples)
+
+        with self._lock:
+            data = self._load()
+            previous = data.get("chars_per_speech_second")
+            value = observed if not previous else previous * (1 - STATS_SMOOTHING) + observed * STATS_SMOOTHING
+            data.update({
+                "chars_per_speech_second": round(value, 3),
+                "last_observed": round(observed, 3),
+                "samples": int(data.get("samples", 0)) + len(samples),
+                "updated_at": datetime.now().isoformat(timespec="seconds"),
+            })
+            try:
+                self.stats_file.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.stats_file, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+            except Exception as e:
+                logger.warning(f"分割実績ファイルの保存に失敗しました: {str(e)}")
+        logger.info(f"発話1秒あたりの出力文字数を更新しました: 観測値={observed:.2f}, 採用値={value:.2f}")
+        return value
+
+class SegmentPlanner:
+    """発話密度と出力トークン上限から区間ごとの分割位置を決める
+
+    エネルギー包絡から発話区間を推定し、過去の実績（発話1秒あたりの出力文字数）から
+    各セグメントの見込み出力トークン数を計算する。見込みが上限に収まる範囲で
+    できるだけ長いセグメントにすることで、出力の途中切れとAPI呼び出し回数の両方を減らす。
+    """
+
+    def __init__(
+        self,
+        output_token_limit: int = 8192,
+        min_segment_seconds: int = 120,
+        max_segment_seconds: int = 900,
+        chars_per_speech_second: Optional[float] = None
+    ):
+        """
+        Args:
+            output_token_limit (int): 1回の書き起こしの出力トークン上限
+            min_segment_seconds (int): セグメントの最小長（秒）
+            max_segment_seconds (int): セグメントの最大長（秒）
+            chars_per_speech_second (float, optional): 発話1秒あたりの出力文字数（省略時は過去の実績）
+        """
+        self.output_token_limit = output_token_limit
+        self.min_segment_ms = min_segment_seconds * 1000
+        self.max_segment_ms = max(max_segment_seconds, min_segment_seconds) * 1000
+        self.chars_per_speech_second = chars_per_speech_second or SegmentationStats().chars_per_speech_second()
+        # 1セグメントに含められる発話時間（ミリ秒）
+        token_budget = output_token_limit * TOKEN_SAFETY_RATIO
+        self.speech_budget_ms = int(token_budget / TOKENS_PER_CHAR / self.chars_per_speech_second * 1000)
+        logger.info(
+            f"SegmentPlannerを初期化: 出力上限={output_token_limit}トークン, "
+            f"発話1秒あたり{self.chars_per_speech_second:.2f}文字, 1セグメントの発話上限={self.speech_budget_ms/1000:.0f}秒"
+        )
+
+    def speech_envelope(self, audio) -> List[bool]:
+        """ウィンドウごとに発話区間かどうかを判定する"""
+        return speech_envelope(audio)
+
+    def plan(self, audio, find_split_point: Callable[[object, int], int]) -> Tuple[List[int], List[int]]:
+        """
+        分割位置を決定する
+
+        Args:
+            audio (AudioSegment): 音声データ
+            find_split_point (Callable): 目標位置付近の無音区間を返す関数（AudioSplitter._find_optimal_split_point）
+        Returns:
+            Tuple[List[int], List[int]]: (分割位置のリスト[ミリ秒], 各セグメントの推定発話時間のリスト[ミリ秒])
+        """
+        audio_length_ms = len(audio)
+        flags = self.speech_envelope(audio)
+
+        def speech_ms_between(start_ms: int, end_ms: int) -> int:
+            return _speech_ms_between(flags, start_ms, end_ms)
+
+        points = [0]
+        while audio_length_ms - points[-1] > self.max_segment_ms or speech_ms_between(points[-1], audio_length_ms) > self.speech_budget_ms:
+            start_ms = points[-1]
+            # 発話時間が上限に達する位置（または最大長）を目標位置にする
+            target_ms = min(start_ms + self.max_segment_ms, audio_length_ms)
+            speech_ms = 0
+            for index in range(start_ms // ENVELOPE_WINDOW_MS, len(flags)):
+                speech_ms += ENVELOPE_WINDOW_MS if flags[index] else 0
+                if speech_ms >= self.speech_budget_ms:
+                    target_ms = min(target_ms, (index + 1) * ENVELOPE_WINDOW_MS)
+                    break
+            target_ms = max(target_ms, start_ms + self.min_segment_ms)
+            if audio_length_ms - target_ms < self.min_segment_ms:
+                break  # 残りが短すぎる場合は最後のセグメントに含める
+            split_ms = find_split_point(audio, target_ms)
+            # 無音区間の調整で最小長を下回ったり後戻りしたりしないようにする
+            if split_ms <= start_ms + self.min_segment_ms // 2:
+                split_ms = target_ms
+            points.append(split_ms)
+        points.append(audio_length_ms)
+
+        speech = [speech_ms_between(start, end) for start, end in zip(points, points[1:])]
+        for i, (start, end) in enumerate(zip(points, points[1:]), 1):
+            logger.info(
+                f"  計画セグメント {i}: {start/1000:.2f}秒 - {end/1000:.2f}秒 "
+                f"(長さ {(end-start)/1000:.0f}秒, 推定発話 {speech[i-1]/1000:.0f}秒)"
+            )
+        return points, speech
@@ -0,0 +1,503 @@
+"""
+ローカルジョブサーバー
+
+GUIを介さずに音声/動画ファイルの処理ジョブを投入するためのHTTPサーバー。
+プロセスを常駐させることで、FFmpeg設定・設定ファイル・APIクライアントの
+初期化コストをジョブごとに払わずに済む。
+
+エンドポイント:
+- GET  /health                 サーバーの状態
+- POST /jobs                   JSON {"path": "...", "modes": {...}} でローカルファイルのジョブを投入
+                               （"resume_run_id" を指定すると中断した遅延実行モードの実行を再開する）
+- POST /jobs/upload?filename=  リクエストボディのファイルをアップロードしてジョブを投入
+- GET  /jobs                   ジョブ一覧
+- GET  /jobs/<id>              ジョブの状態と進捗
+- GET  /jobs/<id>/result       完了したジョブの処理結果
+- GET  /catalog/search?q=      処理済みの会議の発言を全文検索（limit, context, speaker, since, until で絞り込み）
+
+使用方法:
+    python -m src.server.job_server --port 8765
+"""
+
+import os
+import re
+import json
+import uuid
+import time
+import queue
+import logging
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from ..utils.progress import ProgressEvent, format_progress
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+UPLOAD_DIR = Path("output/server_uploads")
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # アップロード受信時の読み込み単位（バイト）
+FINISHED_JOB_TTL_SECONDS = 24 * 60 * 60  # 完了したジョブを保持する時間（秒）
+MAX_FINISHED_JOBS = 100  # 保持する完了したジョブの上限（古いものから削除）
+
+DEFAULT_MODES = {
+    "transcribe": True,
+    "minutes": True,
+    "reflection": False,
+    "deferred": False,  # バッチAPIでの遅延実行（急ぎでない録音向け）
+    "live": False  # 録音中のファイルを追いかけて書き起こす（録音開始後に投入する）
+}
+
+class JobServerError(Exception):
+    """ジョブサーバー関連のエラーを扱うカスタム例外クラス"""
+    pass
+
+class Job:
+    """処理ジョブ"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    def __init__(self, input_file: Path, modes: Dict[str, bool], organize: bool = True, resume_run_id: Optional[str] = None,
+                 uploaded: bool = False):
+        self.id = uuid.uuid4().hex[:12]
+        self.input_file = input_file
+        # アップロードされたファイルか（ジョブの終了時に削除する）
+        self.uploaded = uploaded
+        self.modes = modes
+        self.organize = organize
+        # 中断した遅延実行モードの実行ID（投入済みのバッチジョブの完了を待つ）
+        self.resume_run_id = resume_run_id
+        self.status = Job.QUEUED
+        self.stage = "待機中"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.results: Optional[Dict[str, Any]] = None
+        self.output_folder: Optional[str] = None
+        self.error: Optional[str] = None
+        # 最新の進捗イベント（process_audio_file から受け取る）
+        self.progress_event: Optional[ProgressEvent] = None
+        self.progress_updated_at: Optional[float] = None
+
+    def on_progress(self, event: ProgressEvent) -> None:
+        """進捗イベントを記録する（段階名も更新する）"""
+        self.progress_event = event
+        self.progress_updated_at = time.time()
+        self.stage = format_progress(event)
+
+    def _progress_dict(self, now: float) -> Optional[Dict[str, Any]]:
+        """最新の進捗（seconds_since_update が伸び続けている場合は処理が止まっている可能性がある）"""
+        event = self.progress_event
+        if event is None:
+            return None
+        return {
+            **event.to_dict(),
+            "text": format_progress(event),
+            "seconds_since_update": round(now - self.progress_updated_at, 1),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """ジョブの状態を辞書形式で返す"""
+        now = time.time()
+        elapsed = None
+        if self.started_at:
+            elapsed = (self.finished_at or now) - self.started_at
+        return {
+            "id": self.id,
+            "input_file": str(self.input_file),
+            "modes": self.modes,
+            "resume_run_id": self.resume_run_id,
+            "status": self.status,
+            "stage": self.stage,
+            "created_at": datetime.fromtimestamp(self.created_at).isoformat(),
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat() if self.started_at else None,
+            "finished_at": datetime.fromtimestamp(self.finished_at).isoformat() if self.finished_at else None,
+            "elapsed_seconds": round(elapsed, 1) if elapsed is not None else None,
+            "progress": self._progress_dict(now),
+            "output_folder": self.output_folder,
+            "error": self.error
+        }
+
+    @property
+    def finished(self) -> bool:
+        """ジョブが終了している（成功または失敗）か"""
+        return self.status in (Job.SUCCEEDED, Job.FAILED)
+
+class JobQueue:
+    """ジョブキューとワーカースレッド
+
+    ワーカーは常駐し、処理パイプラインのモジュール・設定・APIクライアントを
+    ジョブ間で使い回す。
+    """
+
+    def __init__(self, workers: int = 1):
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue()
+        self._workers: List[threading.Thread] = []
+        for i in range(max(1, workers)):
+            worker = threading.Thread(target=self._worker_loop, name=f"job-worker-{i+1}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        logger.info(f"ジョブキューを起動しました（ワーカー数: {len(self._workers)}）")
+
+    def submit(self, input_file: Path, modes: Dict[str, bool], organize: bool = True, resume_run_id: Optional[str] = None,
+               uploaded: bool = False) -> Job:
+        """ジョブを投入する（uploaded=True の場合、入力ファイルはジョブの終了時に削除される）"""
+        if not input_file.exists():
+            raise JobServerError(f"入力ファイルが見つかりません: {input_file}")
+        if resume_run_id:
+            from ..utils.run_context import RUNS_DIR, has_pending_batch
+            if not has_pending_batch(RUNS_DIR / resume_run_id):
+                raise JobServerError(f"再開できるバッチジョブがありません: {resume_run_id}")
+            modes = {**modes, "deferred": True}
+        job = Job(input_file, modes, organize, resume_run_id, uploaded)
+        with self._lock:
+            self._evict_finished_jobs()
+            self._jobs[job.id] = job
+        self._queue.put(job)
+        logger.info(f"ジョブを投入しました: {job.id} ({input_file})")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """ジョブを取得する"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        """全ジョブを投入順に返す"""
+        with self._lock:
+            self._evict_finished_jobs()
+            return sorted(self._jobs.values(), key=lambda job: job.created_at)
+
+    def queue_position(self, job: Job) -> Optional[int]:
+        """待機中ジョブのキュー内の順番（1始まり）を返す"""
+        if job.status != Job.QUEUED:
+            return None
+        queued = [j for j in self.list() if j.status == Job.QUEUED]
+        return queued.index(job) + 1 if job in queued else None
+
+    def _evict_finished_jobs(self) -> None:
+        """
+        保持期間を過ぎた、または上限を超えた完了済みのジョブを削除する（self._lock を取得して呼ぶこと）
+
+        待機中・実行中のジョブは削除しない。
+        """
+        now = time.time()
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished and job.finished_at is not None),
+            key=lambda job: job.finished_at
+        )
+        expired = [job for job in finished if now - job.finished_at > FINISHED_JOB_TTL_SECONDS]
+        kept = [job for job in finished if job not in expired]
+        expired.extend(kept[:max(0, len(kept) - MAX_FINISHED_JOBS)])
+        for job in expired:
+            del self._jobs[job.id]
+        if expired:
+            logger.debug(f"完了したジョブを削除しました: {len(expired)}件")
+
+    def shutdown(self) -> None:
+        """ワーカースレッドを停止する"""
+        for _ in self._workers:
+            self._queue.put(None)
+
+    def _worker_loop(self) -> None:
+        """ジョブを1件ずつ取り出して処理する"""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            try:
+                self._run_job(job)
+            finally:
+                self._queue.task_done()
+
+    def _run_job(self, job: Job) -> None:
+        """ジョブを実行する"""
+        from ..services.processor import process_audio_file
+        from ..services.file_organizer import FileOrganizer
+        from ..utils.config import config_manager
+        from ..utils.run_context import resume_run_context
+
+        job.status = Job.RUNNING
+        job.stage = "処理中"
+        job.started_at = time.time()
+        logger.info(f"ジョブを開始します: {job.id}")
+
+        run_context = None
+        try:
+            run_context = resume_run_context(job.resume_run_id) if job.resume_run_id else None
+            results = process_audio_file(job.input_file, job.modes, run_context=run_context, progress_callback=job.on_progress)
+            job.results = results
+
+            if not results.get("success", False):
+                raise JobServerError(results.get("error", "処理に失敗しました"))
+
+            # GUIと同様に出力ファイルを会議フォルダへ整理
+            timestamp = results.get("transcription", {}).get("timestamp")
+            if job.organize and timestamp:
+                job.stage = "ファイル整理中"
+                organizer = FileOrganizer(debug_mode=config_manager.get_snapshot().config.debug_mode)
+                job.output_folder = organizer.organize_meeting_files(timestamp, workspace_dir=results.get("workspace_dir"))
+
+            job.status = Job.SUCCEEDED
+            job.stage = "完了"
+            logger.info(f"ジョブが完了しました: {job.id}")
+        except Exception as e:
+            job.status = Job.FAILED
+            job.stage = "エラー"
+            job.error = str(e)
+            logger.error(f"ジョブの処理中にエラーが発生しました: {job.id} - {str(e)}", exc_info=True)
+        finally:
+            if run_context is not None:
+                run_context.close()
+            if job.uploaded:
+                self._remove_upload(job)
+            job.finished_at = time.time()
+
+    def _remove_upload(self, job: Job) -> None:
+        """アップロードされた入力ファイルを削除する（削除に失敗しても処理結果には影響させない）"""
+        try:
+            job.input_file.unlink(missing_ok=True)
+            logger.info(f"アップロードファイルを削除しました: {job.input_file}")
+        except OSError as e:
+            logger.warning(f"アップロードファイルの削除に失敗しました: {job.input_file} - {str(e)}")
+
+def _json_default(value: Any) -> Any:
+    """JSONに変換できない値（Pathなど）を文字列化する"""
+    return str(value)
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """ジョブサーバーのHTTPリクエストハンドラ"""
+
+    server_version = "GiJiRoKuJobServer/1.0"
+
+    @property
+    def job_queue(self) -> JobQueue:
+        return self.server.job_queue
+
+    def log_message(self, format: str, *args) -> None:
+        logger.info(f"{self.address_string()} - {format % args}")
+
+    def _send_json(self, status: int, payload: Any) -> None:
+        body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str) -> None:
+        self._send_json(status, {"error": message})
+
+    def _parse_modes(self, raw_modes: Optional[Dict[str, Any]]) -> Dict[str, bool]:
+        modes = dict(DEFAULT_MODES)
+        if raw_modes:
+            for key in modes:
+                if key in raw_modes:
+                    modes[key] = bool(raw_modes[key])
+        modes["transcribe"] = True  # 書き起こしは常に必須
+        return modes
+
+    def do_GET(self) -> None:
+        path = urlparse(self.path).path.rstrip("/")
+
+        if path == "/health":
+            self._send_json(200, {"status": "ok", "jobs": len(self.job_queue.list())})
+            return
+
+        if path == "/jobs":
+            self._send_json(200, {"jobs": [job.to_dict() for job in self.job_queue.list()]})
+            return
+
+        if path == "/catalog/search":
+            self._search_catalog(parse_qs(urlparse(self.path).query))
+            return
+
+        match = re.fullmatch(r"/jobs/([0-9a-f]+)(/result)?", path)
+        if not match:
+            self._send_error(404, f"不明なパスです: {path}")
+            return
+
+        job = self.job_queue.get(match.group(1))
+        if job is None:
+            self._send_error(404, f"ジョブが見つかりません: {match.group(1)}")
+            return
+
+        if match.group(2):
+            if not job.finished:
+                self._send_error(409, f"ジョブはまだ完了していません（状態: {job.status}）")
+                return
+            self._send_json(200, {"job": job.to_dict(), "results": job.results})
+            return
+
+        status = job.to_dict()
+        status["queue_position"] = self.job_queue.queue_position(job)
+        self._send_json(200, status)
+
+    def _search_catalog(self, params: Dict[str, List[str]]) -> None:
+        """会議カタログを全文検索する"""
+        from ..services.meeting_catalog import get_meeting_catalog, MeetingCatalogError
+
+        def param(name: str) -> Optional[str]:
+            return params.get(name, [None])[0]
+
+        try:
+            started = time.perf_counter()
+            hits = get_meeting_catalog().search(
+                param("q") or "",
+                limit=int(param("limit") or 20),
+                context=int(param("context") or 1),
+                speaker=param("speaker"),
+                since=param("since"),
+                until=param("until"),
+            )
+        except (MeetingCatalogError, ValueError) as e:
+            self._send_error(400, str(e))
+            return
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        self._send_json(200, {"hits": [hit.to_dict() for hit in hits], "elapsed_ms": elapsed_ms})
+
+    def do_POST(self) -> None:
+        parsed = urlparse(self.path)
+        path = parsed.path.rstrip("/")
+
+        try:
+            if path == "/jobs":
+                self._handle_submit_path()
+            elif path == "/jobs/upload":
+                self._handle_upload(parse_qs(parsed.query))
+            else:
+                self._send_error(404, f"不明なパスです: {path}")
+        except JobServerError as e:
+            self._send_error(400, str(e))
+        except Exception as e:
+            logger.error(f"リクエスト処理中にエラーが発生しました: {str(e)}", exc_info=True)
+            self._send_error(500, str(e))
+
+    def _handle_submit_path(self) -> None:
+        """ローカルファイルのパス指定でジョブを投入"""
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length).decode("utf-8")) if length else {}
+        except json.JSONDecodeError as e:
+            raise JobServerError(f"リクエストボディのJSONが不正です: {str(e)}")
+
+        input_path = payload.get("path")
+        if not input_path:
+            raise JobServerError("'path' を指定してください")
+
+        job = self.job_queue.submit(
+            Path(input_path),
+            self._parse_modes(payload.get("modes")),
+            organize=bool(payload.get("organize", True)),
+            resume_run_id=payload.get("resume_run_id")
+        )
+        self._send_json(202, job.to_dict())
+
+    def _handle_upload(self, query: Dict[str, List[str]]) -> None:
+        """リクエストボディのファイルを保存してジョブを投入"""
+        from ..utils.config import config_manager
+
+        filename = os.path.basename(query.get("filename", [""])[0])
+        if not filename:
+            raise JobServerError("クエリパラメータ 'filename' を指定してください")
+
+        length = int(self.headers.get("Content-Length", 0))
+        if length <= 0:
+            raise JobServerError("アップロードするファイルの内容が空です")
+        max_bytes = config_manager.get_snapshot().config.max_audio_size_mb * 1024 * 1024
+        if length > max_bytes:
+            raise JobServerError(f"ファイルサイズが上限（{max_bytes // (1024 * 1024)}MB）を超えています")
+
+        UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+        saved_path = UPLOAD_DIR / f"{uuid.uuid4().hex[:8]}_{filename}"
+        remaining = length
+        with open(saved_path, "wb") as f:
+            while remaining > 0:
+                chunk = self.rfile.read(min(UPLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                f.write(chunk)
+                remaining -= len(chunk)
+        if remaining > 0:
+            saved_path.unlink(missing_ok=True)
+            raise JobServerError("アップロードが途中で切断されました")
+        logger.info(f"アップロードファイルを保存しました: {saved_path} ({length:,} bytes)")
+
+        raw_modes = {key: query[key][0] not in ("0", "false", "False") for key in DEFAULT_MODES if key in query}
+        organize = query.get("organize", ["1"])[0] not in ("0", "false", "False")
+        try:
+            job = self.job_queue.submit(saved_path, self._parse_modes(raw_modes), organize=organize, uploaded=True)
+        except Exception:
+            saved_path.unlink(missing_ok=True)
+            raise
+        self._send_json(202, job.to_dict())
+
+class JobServer(ThreadingHTTPServer):
+    """ジョブキューを保持するHTTPサーバー"""
+
+    daemon_threads = True
+
+    def __init__(self, address, job_queue: JobQueue):
+        super().__init__(address, JobRequestHandler)
+        self.job_queue = job_queue
+
+def warm_up() -> None:
+    """FFmpeg設定・設定ファイル・処理モジュール・APIクライアントを事前に読み込む"""
+    from ..utils.ffmpeg_handler import setup_ffmpeg
+    from ..utils.config import config_manager
+
+    setup_ffmpeg()
+    config = config_manager.get_snapshot().config
+    logger.info(f"設定を読み込みました（書き起こし方式: {config.transcription.method}）")
+
+    # 処理パイプラインのモジュールを読み込む（プロバイダSDKは下記のクライアント生成時に読み込まれる）
+    from ..services import processor  # noqa: F401
+
+    # APIキーが設定されていればクライアントを生成しておく
+    try:
+        if config.transcription.method == "gemini" or config.summarization.model == "gemini":
+            from ..utils.new_gemini_api import GeminiAPI
+            GeminiAPI()
+        if config.transcription.method != "gemini" or config.summarization.model == "openai":
+            from ..utils.Common_OpenAIAPI import get_client
+            get_client(lease=False)  # リクエストは送らないため、資格情報プールのレート枠は使わない
+    except Exception as e:
+        logger.warning(f"APIクライアントの事前生成に失敗しました（ジョブ実行時に再試行します）: {str(e)}")
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """ジョブサーバーのエントリーポイント"""
+    parser = argparse.ArgumentParser(description="GiJiRoKu ローカルジョブサーバー")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"待ち受けアドレス（デフォルト: {DEFAULT_HOST}）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"待ち受けポート（デフォルト: {DEFAULT_PORT}）")
+    parser.add_argument("--workers", type=int, default=1, help="同時に処理するジョブ数（デフォルト: 1。ジョブごとに作業ディレクトリが分かれるため複数指定可）")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    warm_up()
+    job_queue = JobQueue(workers=args.workers)
+    server = JobServer((args.host, args.port), job_queue)
+    logger.info(f"ジョブサーバーを起動しました: http://{args.host}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("ジョブサーバーを停止します")
+    finally:
+        job_queue.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
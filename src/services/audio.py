@@ -5,19 +5,23 @@ import tempfile
 import logging
 import time
 import sys
-from pydub import AudioSegment
 from typing import Tuple
 
 logger = logging.getLogger(__name__)
 
+# 再生速度の倍率の範囲（atempoは1段で0.5〜2.0倍に対応する）
+MIN_SPEED_FACTOR = 1.0
+MAX_SPEED_FACTOR = 2.0
+
 class AudioProcessingError(Exception):
     """音声処理関連のエラーを扱うカスタム例外クラス"""
     pass
 
 class AudioProcessor:
-    def __init__(self, target_file_size: int = 25000000):  # 25MB
+    def __init__(self, target_file_size: int = 25000000, temp_dir: pathlib.Path = None):  # 25MB
         self.target_file_size = target_file_size
-        self.temp_dir = pathlib.Path(tempfile.gettempdir()) / "GiJiRoKu"
+        # 実行ごとの一時ディレクトリが指定されていればそれを使用する
+        self.temp_dir = pathlib.Path(temp_dir) if temp_dir else pathlib.Path(tempfile.gettempdir()) / "GiJiRoKu"
         self.temp_dir.mkdir(parents=True, exist_ok=True)
 
         logger.info(f"一時ディレクトリを作成しました: {self.temp_dir}")
@@ -108,6 +112,8 @@ class AudioProcessor:
 
             # 圧縮が必要な場合
             logger.info(f"音声ファイルの圧縮を開始します（目標サイズ: {self.target_file_size:,} bytes）")
+            # pydubは起動時間短縮のため圧縮が必要になった時点で読み込む
+            from pydub import AudioSegment
             audio_segment = AudioSegment.from_file(str(temp_audio))
             audio_length_sec = len(audio_segment) / 1000
             target_kbps = int(self.target_file_size * 8 / audio_length_sec / 1000 * 0.95)
@@ -159,6 +165,40 @@ class AudioProcessor:
             logger.error(f"エラータイプ: {type(e).__name__}")
             raise AudioProcessingError(f"音声処理に失敗しました: {str(e)}")
 
+    def change_speed(self, input_file: pathlib.Path, speed_factor: float) -> pathlib.Path:
+        """音声の再生速度を上げる（atempoフィルタでピッチを保ったまま時間を短縮する）
+
+        音声モデルは音声の長さに比例して課金・処理されるため、書き起こし前に速めることで
+        トークン数とアップロードサイズを減らす。分割位置などの時刻は呼び出し側で元の時間軸に戻す。
+
+        Args:
+            input_file (pathlib.Path): 入力音声ファイル
+            speed_factor (float): 速度の倍率（1.0〜2.0）
+        Returns:
+            pathlib.Path: 速度を変えた音声ファイル（倍率が1.0の場合は入力ファイル）
+        Raises:
+            AudioProcessingError: 倍率が範囲外の場合、またはFFmpegの処理に失敗した場合
+        """
+        if speed_factor == 1.0:
+            return input_file
+        if not MIN_SPEED_FACTOR <= speed_factor <= MAX_SPEED_FACTOR:
+            raise AudioProcessingError(f"速度の倍率は{MIN_SPEED_FACTOR}〜{MAX_SPEED_FACTOR}の範囲で指定してください: {speed_factor}")
+
+        output_file = self.temp_dir / f"speed_{speed_factor:g}x_{os.urandom(4).hex()}.mp3"
+        cmd = [str(self.ffmpeg_path), "-y", "-i", str(input_file), "-vn",
+               "-filter:a", f"atempo={speed_factor:g}",
+               "-codec:a", "libmp3lame", "-q:a", "4",
+               str(output_file)]
+        logger.info(f"音声を{speed_factor:g}倍速に変換します: {' '.join(cmd)}")
+        try:
+            subprocess.run(cmd, check=True, capture_output=True, text=True, encoding='utf-8')
+        except subprocess.CalledProcessError as e:
+            logger.error(f"FFmpegエラー: {e.stderr}")
+            raise AudioProcessingError(f"音声の速度変換に失敗しました: {e.stderr}")
+
+        logger.info(f"速度変換後のファイルサイズ: {output_file.stat().st_size:,} bytes（変換前: {input_file.stat().st_size:,} bytes）")
+        return output_file
+
     def __del__(self):
         """デストラクタでの一時ファイルクリーンアップ"""
         try:
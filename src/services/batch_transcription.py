@@ -0,0 +1,223 @@
+import json
+import time
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from src.utils.Common_OpenAIAPI import build_audio_chat_request, submit_chat_batch, retrieve_chat_batch
+from src.utils.new_gemini_api import GeminiAPI
+from src.utils.run_context import RunContext, BATCH_MANIFEST_PATH
+from src.modules.segment_buffer import AudioSegmentBuffer
+
+logger = logging.getLogger(__name__)
+
+class BatchTranscriptionError(Exception):
+    """バッチ書き起こし処理に関連するエラーを扱うカスタム例外クラス"""
+    pass
+
+class BatchTranscriber:
+    """セグメントの書き起こしを各プロバイダーのバッチAPIでまとめて実行する（遅延実行モード）
+
+    全セグメントの書き起こしリクエストを1つのバッチジョブとして投入し、完了まで待って
+    セグメントごとの結果を返す。バッチAPIは応答が遅い代わりに処理量の上限が大きく、
+    急ぎでない録音をまとめて処理する場合に向いている。
+
+    ジョブIDは実行の作業ディレクトリ（batch/transcription_batch.json）に保存するため、
+    待機中にアプリケーションを終了しても、同じ run_id で再実行すれば投入済みのジョブの完了を待つ
+    （python -m src.services.processor --resume-run-id、またはジョブサーバーの resume_run_id）。
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        model: str,
+        run_context: RunContext,
+        system_prompt: str = "",
+        gemini_api: Optional[GeminiAPI] = None
+    ):
+        """
+        Args:
+            provider (str): "gemini" または "openai"
+            model (str): 書き起こしに使うモデル
+            run_context (RunContext): 実行コンテキスト（ジョブの状態の保存先）
+            system_prompt (str): 書き起こし用のシステムプロンプト（OpenAIのみ。Geminiは通常の書き起こしと同じプロンプトを使う）
+            gemini_api (GeminiAPI, optional): Gemini APIクライアント（省略時は生成する）
+        """
+        if provider not in ("gemini", "openai"):
+            raise BatchTranscriptionError(f"バッチ書き起こしに対応していないプロバイダーです: {provider}")
+        self.provider = provider
+        self.model = model
+        self.run_context = run_context
+        self.system_prompt = system_prompt
+        self._gemini_api = gemini_api
+        transcription_config = run_context.config.transcription
+        self.poll_interval_seconds = transcription_config.batch_poll_interval_seconds
+        self.max_wait_seconds = transcription_config.batch_max_wait_hours * 3600
+        self.manifest_path = run_context.workspace / BATCH_MANIFEST_PATH
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def gemini_api(self) -> GeminiAPI:
+        if self._gemini_api is None:
+            self._gemini_api = GeminiAPI(snapshot=self.run_context.snapshot)
+        return self._gemini_api
+
+    @staticmethod
+    def _segment_keys(segments: List[AudioSegmentBuffer]) -> List[Dict[str, int]]:
+        """保存済みのジョブと同じ分割かを確認するためのセグメントの範囲"""
+        return [{"index": s.index, "start_ms": s.start_ms, "end_ms": s.end_ms} for s in segments]
+
+    def _load_manifest(self, segments: List[AudioSegmentBuffer]) -> Optional[Dict[str, Any]]:
+        """同じ条件で投入済みのジョブがあればその状態を返す"""
+        if not self.manifest_path.exists():
+            return None
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"バッチジョブの状態ファイルを読み込めません: {str(e)}")
+            return None
+        if (
+            manifest.get("provider") != self.provider
+            or manifest.get("model") != self.model
+            or manifest.get("segments") != self._segment_keys(segments)
+        ):
+            logger.info("保存済みのバッチジョブは今回の分割と一致しないため、新しく投入します")
+            return None
+        return manifest
+
+    def _save_manifest(self, manifest: Dict[str, Any]) -> None:
+        self.manifest_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def _submit(self, segments: List[AudioSegmentBuffer]) -> Dict[str, Any]:
+        """全セグメントの書き起こしリクエストをバッチジョブとして投入する"""
+        logger.info(f"{len(segments)}個のセグメントをバッチジョブとして投入します（{self.provider}, モデル: {self.model}）")
+        if self.provider == "openai":
+            requests = [
+                build_audio_chat_request(segment.read_bytes(), self.system_prompt, segment.format, self.model)
+                for segment in segments
+            ]
+            submitted = submit_chat_batch(requests, [f"segment-{segment.index}" for segment in segments])
+            job = {"job_id": submitted["id"], "key_hint": submitted["key_hint"], "files": []}
+        else:
+            submitted = self.gemini_api.submit_transcription_batch(
+                [(segment.read_bytes(), segment.mime_type) for segment in segments],
+                model=self.model,
+                display_name=f"transcription-{self.run_context.run_id}",
+            )
+            job = {"job_id": submitted["name"], "key_hint": submitted["key_hint"], "files": submitted["files"]}
+
+        manifest = {
+            "provider": self.provider,
+            "model": self.model,
+            "segments": self._segment_keys(segments),
+            "submitted_at": datetime.now().isoformat(),
+            "state": "running",
+            **job,
+        }
+        self._save_manifest(manifest)
+        logger.info(f"バッチジョブを投入しました: {manifest['job_id']}")
+        return manifest
+
+    def _retrieve(self, manifest: Dict[str, Any]) -> Dict[str, Any]:
+        """ジョブの状態を取得する"""
+        if self.provider == "openai":
+            return retrieve_chat_batch(manifest["job_id"], manifest.get("key_hint"))
+        return self.gemini_api.get_transcription_batch(manifest["job_id"], manifest.get("key_hint"))
+
+    def _wait(self, manifest: Dict[str, Any]) -> Dict[str, Any]:
+        """ジョブの完了まで一定間隔で状態を確認する"""
+        submitted_at = datetime.fromisoformat(manifest["submitted_at"])
+        while True:
+            status = self._retrieve(manifest)
+            if status["state"] != "running":
+                return status
+            waited = (datetime.now() - submitted_at).total_seconds()
+            if waited > self.max_wait_seconds:
+                raise BatchTranscriptionError(
+                    f"バッチジョブ {manifest['job_id']} が{self.max_wait_seconds / 3600:.0f}時間以内に完了しませんでした"
+                    f"（--resume-run-id {self.run_context.run_id} で再実行すると完了を待ち続けます）"
+                )
+            logger.info(f"バッチジョブの完了を待っています: {manifest['job_id']}（状態: {status['detail']}, 経過: {waited / 60:.0f}分）")
+            time.sleep(self.poll_interval_seconds)
+
+    def run(self, segments: List[AudioSegmentBuffer]) -> Dict[int, str]:
+        """
+        全セグメントをバッチジョブで書き起こす
+
+        Args:
+            segments (List[AudioSegmentBuffer]): 分割済みセグメント
+        Returns:
+            Dict[int, str]: セグメント番号 → 書き起こし結果（失敗したセグメントや途中で切れた結果は含めない）
+        Raises:
+            BatchTranscriptionError: 最大待機時間内にジョブが完了しなかった場合
+        """
+        manifest = self._load_manifest(segments)
+        if manifest is None:
+            manifest = self._submit(segments)
+        else:
+            logger.info(f"投入済みのバッチジョブの完了を待ちます: {manifest['job_id']}")
+
+        started = time.monotonic()
+        status = self._wait(manifest)
+
+        results: Dict[int, str] = {}
+        truncated = 0
+        for position, segment in enumerate(segments):
+            key = f"segment-{segment.index}" if self.provider == "openai" else position
+            result = status["results"].get(key)
+            if result is None:
+                continue
+            if result["truncated"]:
+                # 続きの依頼はバッチではできないため、通常の書き起こしで処理する
+                truncated += 1
+                continue
+            results[segment.index] = result["text"]
+
+        if manifest.get("files"):
+            self.gemini_api.delete_files(manifest["files"], manifest.get("key_hint"))
+            manifest["files"] = []
+        manifest["state"] = status["state"]
+        manifest["completed_at"] = datetime.now().isoformat()
+        self._save_manifest(manifest)
+
+        missing = len(segments) - len(results)
+        if status["state"] == "failed":
+            logger.warning(f"バッチジョブが失敗しました（状態: {status['detail']}）。全てのセグメントを通常の書き起こしで処理します")
+        elif missing:
+            logger.warning(f"{missing}個のセグメントはバッチジョブの結果を使えないため、通常の書き起こしで処理します（うち出力上限による途中切れ: {truncated}個）")
+        self.run_context.set_metadata("batch_transcription", {
+            "provider": self.provider,
+            "model": self.model,
+            "job_id": manifest["job_id"],
+            "state": status["detail"],
+            "segments": len(segments),
+            "completed_segments": len(results),
+            "truncated_segments": truncated,
+            "wait_seconds": round(time.monotonic() - started, 1),
+        })
+        return results
+
+    def transcriber(
+        self,
+        segments: List[AudioSegmentBuffer],
+        fallback: Callable[[AudioSegmentBuffer], str]
+    ) -> Callable[[AudioSegmentBuffer], str]:
+        """
+        バッチジョブの結果を返す書き起こし関数を作成する（TranscriptionService の通常の処理に結果を渡すため）
+
+        各セグメントの最初の呼び出しではバッチの結果を返し、結果がない場合や
+        再試行・分割再実行での呼び出しでは fallback（通常の書き起こし）を使う。
+
+        Args:
+            segments (List[AudioSegmentBuffer]): 分割済みセグメント
+            fallback (Callable): 通常の書き起こし関数
+        Returns:
+            Callable: セグメントを受け取り書き起こしテキストを返す関数
+        """
+        results = self.run(segments)
+
+        def transcribe_segment(segment: AudioSegmentBuffer) -> str:
+            text = results.pop(segment.index, None)
+            return fallback(segment) if text is None else text
+
+        return transcribe_segment
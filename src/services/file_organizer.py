@@ -17,9 +17,13 @@ class FileOrganizer:
         """
         self.debug_mode = debug_mode
         self.file_utils = FileUtils()
-        self.config = config_manager.get_config()
         self.logger = logging.getLogger(__name__)
 
+    @property
+    def config(self):
+        """現在の設定スナップショット（設定画面での変更を反映するため毎回取得する）"""
+        return config_manager.get_snapshot().config
+
     def get_output_directory(self) -> str:
         """
         出力ディレクトリを取得する
@@ -56,17 +60,21 @@ class FileOrganizer:
             self.logger.error(error_msg)
             raise
 
-    def organize_meeting_files(self, timestamp: str) -> str:
+    def organize_meeting_files(self, timestamp: str, workspace_dir: str = None) -> str:
         """
         会議ファイルを整理する
         Args:
             timestamp (str): 処理対象のタイムスタンプ
+            workspace_dir (str, optional): 実行ごとの作業ディレクトリ（output/runs/<run_id>）。
+                指定した場合はそのディレクトリ内のファイルだけを整理し、整理後に作業ディレクトリを削除する
         Returns:
             str: 作成されたフォルダのパス
         """
         try:
+            base_dir = workspace_dir or "output"
+
             # 必要なディレクトリの存在確認と作成
-            required_dirs = ['output', 'output/transcriptions', 'output/csv', 'output/minutes', 'output/title']
+            required_dirs = [base_dir] + [os.path.join(base_dir, name) for name in ('transcriptions', 'csv', 'minutes', 'title')]
             for dir_path in required_dirs:
                 if not os.path.exists(dir_path):
                     os.makedirs(dir_path)
@@ -74,7 +82,7 @@ class FileOrganizer:
                         print(f"[DEBUG] 一時ディレクトリを作成: {dir_path}")
 
             # 会議タイトルの取得
-            meeting_title_file = f"output/title/meetingtitle_{timestamp}.txt"
+            meeting_title_file = os.path.join(base_dir, "title", f"meetingtitle_{timestamp}.txt")
             if not os.path.exists(meeting_title_file):
                 if self.debug_mode:
                     print(f"[DEBUG] タイトルファイルが見つかりません: {meeting_title_file}")
@@ -101,7 +109,21 @@ class FileOrganizer:
             self.logger.info(f"会議フォルダを作成しました: {new_folder}")
 
             # ファイルのコピーとリネーム、その後元ファイルを削除
-            self._copy_rename_and_cleanup_files(timestamp, new_folder, date, meeting_title)
+            all_copied = self._copy_rename_and_cleanup_files(timestamp, new_folder, date, meeting_title, base_dir)
+
+            # 会議カタログに整理後のフォルダを記録する（作業ディレクトリ名が実行ID）
+            if workspace_dir and self.config.catalog.enabled:
+                try:
+                    # 会議カタログ（SQLite）はGUI起動時に読み込まないよう、使うときに読み込む
+                    from .meeting_catalog import get_meeting_catalog
+                    get_meeting_catalog(self.config.catalog.db_path).set_folder(Path(workspace_dir).name, new_folder)
+                except Exception as e:
+                    self.logger.warning(f"会議カタログへのフォルダの記録に失敗しました: {e}")
+
+            # 作業ディレクトリは実行専用のため、整理が完了したら削除する（失敗時は調査用に残す）
+            if workspace_dir and all_copied:
+                shutil.rmtree(workspace_dir, ignore_errors=True)
+                self.logger.info(f"作業ディレクトリを削除しました: {workspace_dir}")
 
             return new_folder
 
@@ -113,7 +135,7 @@ class FileOrganizer:
                 print(f"[DEBUG] 詳細エラー: {str(e)}")
             return "output"  # エラー時はデフォルトの出力ディレクトリを返す
 
-    def _copy_rename_and_cleanup_files(self, timestamp: str, new_folder: str, date: str, meeting_title: str) -> None:
+    def _copy_rename_and_cleanup_files(self, timestamp: str, new_folder: str, date: str, meeting_title: str, base_dir: str = "output") -> bool:
         """
         ファイルのコピー、リネーム、および元ファイルの削除を行う
         Args:
@@ -121,24 +143,31 @@ class FileOrganizer:
             new_folder (str): 新規フォルダパス
             date (str): 日付
             meeting_title (str): 会議タイトル
+            base_dir (str): 整理対象のファイルがあるディレクトリ（output または作業ディレクトリ）
+        Returns:
+            bool: エラーなくすべての処理が完了した場合はTrue
         """
+        def src_path(*parts: str) -> str:
+            return os.path.join(base_dir, *parts)
+
         # コピー対象ファイルの定義
         files_to_process = {
             # 元のパターン
-            f"output/csv/transcription_summary_{timestamp}.csv": f"{date}_{meeting_title}_発言記録.csv",
-            f"output/minutes/transcription_summary_{timestamp}_minutes.md": f"{date}_{meeting_title}_議事録まとめ.md",
-            f"output/minutes/{timestamp}_reflection.md": f"{date}_{meeting_title}_振り返り.md",
-            f"output/transcriptions/transcription_summary_{timestamp}.txt": f"{date}_{meeting_title}_書き起こし.txt",
-            f"output/transcriptions/transcription_{timestamp}.txt": f"{date}_{meeting_title}_書き起こし_raw.txt",
-            f"output/title/meetingtitle_{timestamp}.txt": f"{date}_{meeting_title}_タイトル.txt",
+            src_path("csv", f"transcription_summary_{timestamp}.csv"): f"{date}_{meeting_title}_発言記録.csv",
+            src_path("minutes", f"transcription_summary_{timestamp}_minutes.md"): f"{date}_{meeting_title}_議事録まとめ.md",
+            src_path("minutes", f"{timestamp}_reflection.md"): f"{date}_{meeting_title}_振り返り.md",
+            src_path("transcriptions", f"transcription_summary_{timestamp}.txt"): f"{date}_{meeting_title}_書き起こし.txt",
+            src_path("transcriptions", f"transcription_{timestamp}.txt"): f"{date}_{meeting_title}_書き起こし_raw.txt",
+            src_path("title", f"meetingtitle_{timestamp}.txt"): f"{date}_{meeting_title}_タイトル.txt",
             
             # リマップ後のファイル用パターン
-            f"output/csv/transcription_summary_{timestamp}_remapped.csv": f"{date}_{meeting_title}_発言記録.csv",
-            f"output/minutes/transcription_summary_{timestamp}_remapped_minutes.md": f"{date}_{meeting_title}_議事録まとめ.md",
-            f"output/transcriptions/transcription_summary_{timestamp}_remapped.txt": f"{date}_{meeting_title}_書き起こし.txt",
+            src_path("csv", f"transcription_summary_{timestamp}_remapped.csv"): f"{date}_{meeting_title}_発言記録.csv",
+            src_path("minutes", f"transcription_summary_{timestamp}_remapped_minutes.md"): f"{date}_{meeting_title}_議事録まとめ.md",
+            src_path("transcriptions", f"transcription_summary_{timestamp}_remapped.txt"): f"{date}_{meeting_title}_書き起こし.txt",
         }
 
         successful_copies = []
+        has_error = False
 
         # ファイルごとの処理
         for src, dst in files_to_process.items():
@@ -157,6 +186,7 @@ class FileOrganizer:
             except Exception as e:
                 error_msg = f"ファイル {src} の処理中にエラーが発生しました: {e}"
                 self.logger.error(error_msg)
+                has_error = True
                 continue
 
         # コピーに成功したファイルの削除
@@ -168,6 +198,9 @@ class FileOrganizer:
             except Exception as e:
                 error_msg = f"ファイル {src} の削除中にエラーが発生しました: {e}"
                 self.logger.error(error_msg)
+                has_error = True
+
+        return not has_error
 
     def _handle_error(self, error: Exception) -> None:
         """
@@ -1,8 +1,9 @@
 import subprocess
 import os
+import json
 import logging
 import sys
-from src.utils.paths import get_ffmpeg_path
+from src.utils.paths import get_ffmpeg_path, get_ffprobe_path
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +15,16 @@ class FormatConversionError(Exception):
 AUDIO_FORMATS = ['m4a', 'aac', 'flac', 'ogg']
 VIDEO_FORMATS = ['mkv', 'mp4','avi', 'mov', 'flv']
 
+# 書き起こし方式ごとに、変換せずにそのまま送れる音声コーデックと、音声のみを取り出す場合の拡張子
+PASSTHROUGH_CODECS = {
+    "gemini": {"mp3": "mp3", "aac": "aac", "flac": "flac", "vorbis": "ogg", "opus": "ogg", "pcm_s16le": "wav"},
+    "gpt4_audio": {"mp3": "mp3", "pcm_s16le": "wav"},
+    "whisper_gpt4": {"mp3": "mp3", "aac": "m4a", "flac": "flac", "vorbis": "ogg", "opus": "ogg", "pcm_s16le": "wav"},
+}
+
+# 音声のみを取り出す場合のFFmpegの出力形式（拡張子 → フォーマット名）
+REMUX_FORMATS = {"mp3": "mp3", "aac": "adts", "m4a": "ipod", "flac": "flac", "ogg": "ogg", "wav": "wav"}
+
 def get_ffmpeg_executable():
     """
     FFmpegの実行ファイルの絶対パスを取得する関数。
@@ -40,20 +51,24 @@ def is_conversion_needed(file_path):
     logger.info(f"ファイル {file_path} は変換不要です（形式: {ext}）")
     return False
 
-def get_output_filename(input_file, target_ext='mp3'):
+def get_output_filename(input_file, target_ext='mp3', output_dir=None):
     """
     入力ファイルパスから変換後のファイル名を生成する関数
+    output_dirを指定した場合はそのディレクトリに出力する（同じ入力を並行して変換しても衝突しない）
     """
     base, _ = os.path.splitext(input_file)
+    if output_dir:
+        base = os.path.join(str(output_dir), os.path.basename(base))
     output_file = f"{base}_converted.{target_ext}"
     logger.debug(f"変換後のファイル名を生成: {output_file}")
     return output_file
 
-def convert_file(input_file):
+def convert_file(input_file, output_dir=None):
     """
     入力ファイルをFFmpegを利用して変換し、変換後のファイルパスを返す。
     変換対象のファイルが未対応フォーマットの場合のみ変換処理を実施し、
     それ以外の場合は入力ファイルパスをそのまま返す。
+    output_dirを指定した場合、変換後のファイルはそのディレクトリに作成する。
     """
     logger.info(f"ファイル変換処理を開始: {input_file}")
 
@@ -63,7 +78,7 @@ def convert_file(input_file):
         return input_file
 
     # 変換先のファイル名生成
-    output_file = get_output_filename(input_file, target_ext='mp3')
+    output_file = get_output_filename(input_file, target_ext='mp3', output_dir=output_dir)
 
     # 入力ファイルの拡張子を取得
     _, ext = os.path.splitext(input_file)
@@ -118,6 +133,104 @@ def convert_file(input_file):
     logger.info(f"変換処理が完了しました: {output_file}")
     return output_file
 
+def probe_media(file_path):
+    """
+    ffprobeでファイルのコンテナ・最初の音声ストリームのコーデック・長さを調べる関数
+    調べられない場合（ffprobeがない、音声ストリームがないなど）はNoneを返す。
+    戻り値: {"container", "audio_codec", "has_video", "duration", "size"} の辞書
+    """
+    ffprobe_exec = get_ffprobe_path()
+    if not ffprobe_exec:
+        logger.warning("ffprobeが見つからないため、メディア情報を取得できません")
+        return None
+
+    cmd = [ffprobe_exec, "-v", "error", "-print_format", "json", "-show_format", "-show_streams", str(file_path)]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8")
+        if result.returncode != 0:
+            logger.warning(f"ffprobeによる解析に失敗しました: {result.stderr.strip()}")
+            return None
+        probe = json.loads(result.stdout or "{}")
+    except (subprocess.SubprocessError, OSError, ValueError) as e:
+        logger.warning(f"ffprobeの実行中にエラーが発生: {str(e)}")
+        return None
+
+    streams = probe.get("streams", [])
+    audio_streams = [s for s in streams if s.get("codec_type") == "audio"]
+    if not audio_streams:
+        logger.warning(f"音声ストリームが見つかりません: {file_path}")
+        return None
+    # MP3などに埋め込まれたジャケット画像は映像として扱わない
+    has_video = any(
+        s.get("codec_type") == "video" and not s.get("disposition", {}).get("attached_pic")
+        for s in streams
+    )
+    media_format = probe.get("format", {})
+    info = {
+        "container": media_format.get("format_name", ""),
+        "audio_codec": audio_streams[0].get("codec_name", ""),
+        "has_video": has_video,
+        "duration": float(media_format.get("duration") or audio_streams[0].get("duration") or 0),
+        "size": int(media_format.get("size") or os.path.getsize(file_path)),
+    }
+    logger.info(f"メディア情報: {info}")
+    return info
+
+def passthrough_formats(method):
+    """書き起こし方式がそのまま受け付ける音声ファイルの拡張子"""
+    return set(PASSTHROUGH_CODECS.get(method, {}).values())
+
+def remux_audio(input_file, target_ext, output_dir=None):
+    """
+    再エンコードせずに最初の音声ストリームだけを取り出す関数（-c:a copy）
+    変換後のファイルパスを返す。
+    """
+    output_file = get_output_filename(input_file, target_ext=target_ext, output_dir=output_dir)
+    cmd = [
+        get_ffmpeg_path(), "-y", "-v", "error", "-i", str(input_file),
+        "-vn", "-map", "0:a:0", "-c:a", "copy", "-f", REMUX_FORMATS[target_ext], output_file
+    ]
+    logger.info(f"音声ストリームの取り出しを開始（再エンコードなし）: {' '.join(cmd)}")
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except (subprocess.SubprocessError, OSError) as e:
+        raise FormatConversionError(f"FFmpegの実行中にエラーが発生: {str(e)}")
+    if result.returncode != 0 or not os.path.exists(output_file):
+        logger.error("FFmpegエラー詳細: %s", result.stderr)
+        raise FormatConversionError(f"音声ストリームの取り出しに失敗しました。: {result.stderr}")
+    logger.info(f"音声ストリームの取り出しが完了しました: {output_file}")
+    return output_file
+
+def prepare_media(input_file, output_dir=None, method=None):
+    """
+    書き起こし方式に合わせて入力ファイルを用意し、使用するファイルパスを返す関数。
+    method を指定した場合はffprobeでコーデックを調べ、その方式がそのまま受け付ける音声であれば
+    MP3への再エンコードを省き、元のファイル（映像を含む場合や形式が異なる場合は音声のみを
+    -c:a copy で取り出したファイル）を返す。それ以外の場合は convert_file と同じ変換を行う。
+    """
+    if method not in PASSTHROUGH_CODECS:
+        return convert_file(input_file, output_dir=output_dir)
+
+    info = probe_media(input_file)
+    if info is None:
+        return convert_file(input_file, output_dir=output_dir)
+
+    target_ext = PASSTHROUGH_CODECS[method].get(info["audio_codec"])
+    if target_ext is None:
+        logger.info(f"音声コーデック {info['audio_codec']} は {method} がそのまま受け付けないため変換します")
+        return convert_file(input_file, output_dir=output_dir)
+
+    _, ext = os.path.splitext(input_file)
+    if not info["has_video"] and ext.lower().lstrip('.') == target_ext:
+        logger.info(f"変換は不要です。元のファイルをそのまま使用します（コーデック: {info['audio_codec']}）")
+        return input_file
+
+    try:
+        return remux_audio(input_file, target_ext, output_dir=output_dir)
+    except FormatConversionError as e:
+        logger.warning(f"音声ストリームを取り出せなかったため変換します: {str(e)}")
+        return convert_file(input_file, output_dir=output_dir)
+
 def cleanup_file(file_path):
     """
     変換後の一時ファイルを削除する関数
@@ -136,7 +249,6 @@ def cleanup_file(file_path):
 
 if __name__ == '__main__':
     # テスト実行用のコード
-    import sys
     logging.basicConfig(level=logging.INFO)
 
     if len(sys.argv) < 2:
@@ -0,0 +1,135 @@
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from src.utils.Common_OpenAIAPI import generate_structured_chat_response, MEETING_POST_PROCESSING_SCHEMA, SPEAKER_MAPPING_INSTRUCTION
+from src.utils.new_gemini_api import GeminiAPI
+from src.utils.config import config_manager, ConfigSnapshot
+from src.utils.prompt_manager import PromptManager
+from src.utils.schema_utils import parse_structured_response
+from src.utils.transcript_json import parse_conversations
+
+logger = logging.getLogger(__name__)
+
+# 議事録として短すぎる応答は失敗とみなす（文字数）
+MIN_MINUTES_CHARS = 20
+
+class FusedPostProcessingError(Exception):
+    """一括後処理に関連するエラーを扱うカスタム例外クラス"""
+    pass
+
+@dataclass
+class FusedPostProcessResult:
+    """一括後処理の結果"""
+    title: str
+    minutes: str
+    speaker_mapping: Dict[str, str] = field(default_factory=dict)
+
+class FusedPostProcessor:
+    """タイトル・話者マッピング・議事録を1回の構造化出力でまとめて生成する
+
+    書き起こし後の3回のLLM呼び出し（タイトル生成、話者マッピング、議事録生成）を
+    1回にまとめ、同じ書き起こしの入力処理と往復の待ち時間を減らす。
+    応答がスキーマに従わない場合は FusedPostProcessingError を送出し、
+    呼び出し側は従来の個別の呼び出しで処理する。
+    """
+
+    def __init__(self, snapshot: Optional[ConfigSnapshot] = None, context_cache: Optional[Any] = None):
+        """
+        Args:
+            snapshot (ConfigSnapshot, optional): 使用する設定スナップショット（省略時は現在の設定）
+            context_cache (GeminiContextCache, optional): 書き起こしのコンテキストキャッシュ
+        """
+        self.snapshot = snapshot or config_manager.get_snapshot()
+        self.context_cache = context_cache
+        self.prompt_manager = PromptManager()
+
+    def build_prompt(self, include_speaker_mapping: bool = True) -> str:
+        """
+        一括生成用のプロンプトを作成する（既存の話者リマップ・議事録プロンプトを組み合わせる）
+
+        Args:
+            include_speaker_mapping (bool): 話者マッピングを生成するかどうか
+        Returns:
+            str: プロンプト
+        """
+        if include_speaker_mapping:
+            speaker_section = f"{self.prompt_manager.get_prompt('speakerremap')}\n\n{SPEAKER_MAPPING_INSTRUCTION}"
+            minutes_note = "議事録では speaker_mapping で特定した実際の話者名を使用すること。"
+        else:
+            speaker_section = "speaker_mapping は空の配列とすること。"
+            minutes_note = ""
+
+        return (
+            "会議の書き起こしから、以下の3つをまとめて作成し、指定のJSON形式（title, speaker_mapping, minutes）で1つの応答として出力してください。\n\n"
+            "### 1. title\n"
+            "会議の書き起こしからこの会議のメインとなる議題が何だったのかを短くまとめる。例：取引先とカフェの方向性に関する会議\n\n"
+            "### 2. speaker_mapping\n"
+            f"{speaker_section}\n\n"
+            "### 3. minutes\n"
+            f"{self.prompt_manager.get_prompt('minutes')}\n"
+            f"{minutes_note}"
+        )
+
+    def _generate(self, transcript_text: str, prompt: str) -> str:
+        """設定された議事録生成モデルで構造化出力を生成する"""
+        model = self.snapshot.config.summarization.model
+        logger.info(f"一括後処理を開始します（議事録生成モデル: {model}）")
+        if model == "openai":
+            return generate_structured_chat_response(
+                system_prompt=prompt,
+                user_message_content=transcript_text,
+                json_schema=MEETING_POST_PROCESSING_SCHEMA,
+            )
+        if model == "gemini":
+            return GeminiAPI().generate_structured(
+                transcript_text, prompt, MEETING_POST_PROCESSING_SCHEMA, context_cache=self.context_cache
+            )
+        raise FusedPostProcessingError(f"未対応の議事録生成モデル: {model}")
+
+    def process(self, transcript_file: Union[str, Path], include_speaker_mapping: bool = True) -> FusedPostProcessResult:
+        """
+        書き起こしファイルからタイトル・話者マッピング・議事録を生成する
+
+        Args:
+            transcript_file (str | Path): 書き起こしファイルのパス
+            include_speaker_mapping (bool): 話者マッピングを生成するかどうか
+        Returns:
+            FusedPostProcessResult: 生成結果
+        Raises:
+            FusedPostProcessingError: 生成に失敗した場合、または応答が検証に通らなかった場合
+        """
+        transcript_text = Path(transcript_file).read_text(encoding="utf-8")
+        try:
+            response = self._generate(transcript_text, self.build_prompt(include_speaker_mapping))
+        except FusedPostProcessingError:
+            raise
+        except Exception as e:
+            raise FusedPostProcessingError(f"一括後処理の呼び出しに失敗しました: {str(e)}")
+
+        try:
+            data = parse_structured_response(response, MEETING_POST_PROCESSING_SCHEMA)
+        except ValueError as e:
+            raise FusedPostProcessingError(f"一括後処理の応答が不正です: {str(e)}")
+
+        title = data["title"].strip()
+        minutes = data["minutes"].strip()
+        if not title:
+            raise FusedPostProcessingError("一括後処理の応答のタイトルが空です")
+        if len(minutes) < MIN_MINUTES_CHARS:
+            raise FusedPostProcessingError(f"一括後処理の応答の議事録が短すぎます（{len(minutes)}文字）")
+
+        speaker_mapping = {}
+        if include_speaker_mapping:
+            # 書き起こしに存在しない話者識別子は無視する
+            conversations, _ = parse_conversations(transcript_text)
+            speakers = {item.get("speaker", "") for item in conversations}
+            for item in data["speaker_mapping"]:
+                if speakers and item["speaker"] not in speakers:
+                    logger.warning(f"書き起こしに存在しない話者のマッピングを無視します: {item['speaker']}")
+                    continue
+                speaker_mapping[item["speaker"]] = item["name"]
+
+        logger.info(f"一括後処理が完了しました: タイトル={title}, 話者マッピング={len(speaker_mapping)}件, 議事録={len(minutes)}文字")
+        return FusedPostProcessResult(title=title, minutes=minutes, speaker_mapping=speaker_mapping)
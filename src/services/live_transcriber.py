@@ -0,0 +1,168 @@
+import time
+import logging
+import subprocess
+import threading
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Union
+
+from src.utils.paths import get_ffmpeg_path
+from src.modules.audio_splitter import AudioSplitter, SILENCE_SEARCH_MARGIN_MS
+from src.modules.segment_buffer import AudioSegmentBuffer
+
+logger = logging.getLogger(__name__)
+
+# 録音中のファイルから取り出す音声の形式（書き起こしには16kHzモノラルで十分）
+LIVE_SAMPLE_RATE = 16000
+LIVE_CHANNELS = 1
+LIVE_SAMPLE_WIDTH = 2  # バイト（s16le）
+
+# FFmpegの出力を読み込む単位（バイト、約1秒分）
+READ_CHUNK_BYTES = LIVE_SAMPLE_RATE * LIVE_CHANNELS * LIVE_SAMPLE_WIDTH
+
+class LiveTranscriptionError(Exception):
+    """ライブ書き起こしに関連するエラーを扱うカスタム例外クラス"""
+    pass
+
+class LiveAudioSource:
+    """録音中（書き込み中）の音声/動画ファイルを追いかけ、セグメントを順に切り出す
+
+    FFmpegのfileプロトコルの follow オプションで、ファイルの終端に達しても
+    追記を待ちながらPCMにデコードし続ける。まだセグメントにしていない音声が
+    分割長＋無音探索範囲に達するたびに AudioSplitter と同じ無音検出で分割位置を決め、
+    セグメントとして返す。ファイルが idle_timeout_seconds の間伸びなければ録音終了とみなし、
+    残りの音声を最後のセグメントとして返す。
+
+    MP4（断片化されていないもの）は録音終了までインデックスが書き込まれず読み込めないため、
+    録音形式はMKV・MPEG-TS・断片化MP4などを使う。
+    """
+
+    def __init__(self, input_file: Union[str, Path], idle_timeout_seconds: int = 30):
+        """
+        Args:
+            input_file (str | Path): 録音中のファイル
+            idle_timeout_seconds (int): ファイルが伸びなくなってから録音終了とみなすまでの時間（秒）
+        """
+        self.input_file = Path(input_file)
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.segment_length_seconds = 450
+        self.on_finished: Optional[Callable[[List[AudioSegmentBuffer]], None]] = None
+        self.segments_cut: List[AudioSegmentBuffer] = []
+        self.decoded_ms = 0  # これまでにデコードした音声の長さ（ミリ秒）
+
+    def __len__(self) -> int:
+        """これまでに切り出したセグメントの数（全て返し終えた後は総数）"""
+        return len(self.segments_cut)
+
+    def start(
+        self,
+        segment_length_seconds: int,
+        on_finished: Optional[Callable[[List[AudioSegmentBuffer]], None]] = None
+    ) -> "LiveAudioSource":
+        """
+        分割方法を設定する（戻り値を for 文で回すとセグメントが切り出され次第返る）
+
+        Args:
+            segment_length_seconds (int): 分割長（秒）
+            on_finished (Callable, optional): 全てのセグメントを返し終えたときに、セグメントのリストを受け取る関数
+        Returns:
+            LiveAudioSource: 自身（セグメントのイテラブル）
+        """
+        self.segment_length_seconds = segment_length_seconds
+        self.on_finished = on_finished
+        return self
+
+    def _wait_for_file(self) -> None:
+        """録音ファイルが作成されるまで待つ"""
+        deadline = time.monotonic() + self.idle_timeout_seconds
+        while not self.input_file.exists() or self.input_file.stat().st_size == 0:
+            if time.monotonic() > deadline:
+                raise LiveTranscriptionError(f"録音ファイルが{self.idle_timeout_seconds}秒以内に作成されませんでした: {self.input_file}")
+            time.sleep(1)
+
+    def _start_decoder(self) -> subprocess.Popen:
+        """録音ファイルを追いかけてPCMにデコードするFFmpegを起動する"""
+        cmd = [
+            get_ffmpeg_path(), "-v", "error",
+            # 終端に達しても追記を待ち、rw_timeout（マイクロ秒）の間伸びなければ終了する
+            "-follow", "1", "-rw_timeout", str(self.idle_timeout_seconds * 1000000),
+            "-i", f"file:{self.input_file.resolve()}",
+            "-vn", "-ac", str(LIVE_CHANNELS), "-ar", str(LIVE_SAMPLE_RATE),
+            "-f", "s16le", "pipe:1",
+        ]
+        logger.debug(f"FFmpegライブデコードコマンド: {' '.join(cmd)}")
+        return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def __iter__(self) -> Iterator[AudioSegmentBuffer]:
+        """
+        録音の進行に合わせてセグメントを返す（録音が終了するまで返し続ける）
+
+        呼び出し側が1つのセグメントを書き起こしている間はデコードを進めないが、
+        録音はファイルに書き込まれ続けるため、次の呼び出しで遅れを取り戻す
+        （デコードは実時間より十分速い）。
+
+        Yields:
+            AudioSegmentBuffer: 切り出したセグメント（MP3、位置は録音の先頭からの時間）
+        Raises:
+            LiveTranscriptionError: 録音ファイルを読み込めない場合
+        """
+        from pydub import AudioSegment
+
+        self._wait_for_file()
+        self.segments_cut = []
+        splitter = AudioSplitter(segment_length_seconds=self.segment_length_seconds)
+        logger.info(f"録音中のファイルの書き起こしを開始します: {self.input_file}（分割長: {self.segment_length_seconds}秒, 録音終了の判定: {self.idle_timeout_seconds}秒）")
+
+        process = self._start_decoder()
+        stderr_lines: List[bytes] = []
+        stderr_reader = threading.Thread(target=lambda: stderr_lines.extend(process.stderr), daemon=True)
+        stderr_reader.start()
+
+        pending = bytearray()
+        offset_ms = 0
+        bytes_per_ms = LIVE_SAMPLE_RATE * LIVE_CHANNELS * LIVE_SAMPLE_WIDTH // 1000
+        # 分割位置を探すのに必要な音声の量（それまでは無音検出を行わない）
+        split_ready_bytes = (splitter.segment_length_ms + SILENCE_SEARCH_MARGIN_MS) * bytes_per_ms
+        try:
+            finished = False
+            while not finished:
+                chunk = process.stdout.read(READ_CHUNK_BYTES)
+                if chunk:
+                    pending.extend(chunk)
+                    self.decoded_ms += len(chunk) // bytes_per_ms
+                else:
+                    finished = True
+                    logger.info(f"録音ファイルが{self.idle_timeout_seconds}秒間伸びなかったため、録音終了とみなします（録音の長さ: {self.decoded_ms / 1000:.1f}秒）")
+
+                # 分割できるだけの音声が揃っていれば、無音位置で切り出す（終了時は残りを全て切り出す）
+                while pending and (finished or len(pending) >= split_ready_bytes):
+                    usable = len(pending) - len(pending) % (LIVE_SAMPLE_WIDTH * LIVE_CHANNELS)
+                    audio = AudioSegment(
+                        data=bytes(pending[:usable]), sample_width=LIVE_SAMPLE_WIDTH,
+                        frame_rate=LIVE_SAMPLE_RATE, channels=LIVE_CHANNELS,
+                    )
+                    split_ms = splitter.next_split_point(audio, final=finished)
+                    if not split_ms:
+                        break
+                    segment = AudioSegmentBuffer(
+                        len(self.segments_cut) + 1, offset_ms, offset_ms + split_ms,
+                        data=splitter.encode_segment(audio[:split_ms], "mp3"),
+                    )
+                    self.segments_cut.append(segment)
+                    del pending[:split_ms * bytes_per_ms]
+                    offset_ms += split_ms
+                    logger.info(f"セグメント {segment.index} を切り出しました: {segment.start_ms/1000:.2f}秒 - {segment.end_ms/1000:.2f}秒")
+                    yield segment
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+            stderr_reader.join(timeout=5)
+
+        if not self.segments_cut:
+            detail = b"".join(stderr_lines).decode("utf-8", errors="replace").strip()[:500]
+            raise LiveTranscriptionError(
+                f"録音ファイルから音声を読み込めませんでした（録音形式はMKV・MPEG-TS・断片化MP4などを使用してください）: {detail}"
+            )
+        logger.info(f"録音から{len(self.segments_cut)}個のセグメントを切り出しました（合計 {offset_ms / 1000:.1f}秒）")
+        if self.on_finished:
+            self.on_finished(self.segments_cut)
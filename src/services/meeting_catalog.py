@@ -0,0 +1,541 @@
+"""
+会議カタログ
+
+処理したすべての会議のメタデータ（タイトル、日付、長さ、話者、元ファイルのハッシュ）と
+発言をローカルのSQLiteデータベースに登録し、FTS5の全文検索インデックスで
+「どの会議でXXの話をしたか」を検索できるようにする。
+
+日本語は単語の区切りがないため、FTS5の trigram トークナイザ（SQLite 3.34以降）を使う。
+trigram では3文字未満の語を索引から引けないため、短い語は LIKE による絞り込みで補う。
+
+使用方法:
+    python -m src.services.meeting_catalog search "予算 承認" --context 2
+    python -m src.services.meeting_catalog list
+    python -m src.services.meeting_catalog import ~/Documents/議事録   # 整理済みの会議フォルダを登録する
+"""
+
+import re
+import sys
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import argparse
+import threading
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from src.utils.config import config_manager
+from src.utils.run_context import RunContext
+from src.utils.transcript_json import parse_conversations
+
+logger = logging.getLogger(__name__)
+
+# 書き起こしの話者名に付加されたセグメント識別子（例: "Male_seg3"）
+_SEGMENT_SUFFIX_PATTERN = re.compile(r"_seg(\d+)$")
+
+# 整理済みの会議フォルダ名（YYYY-MM-DD_タイトル）
+_MEETING_FOLDER_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2})_(.+)$")
+
+# trigramトークナイザで索引から引ける最短の語の長さ
+TRIGRAM_MIN_CHARS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalog_info (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meetings (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    meeting_date TEXT NOT NULL,
+    duration_seconds REAL,
+    speakers TEXT NOT NULL DEFAULT '[]',
+    source_name TEXT,
+    source_hash TEXT,
+    folder TEXT,
+    indexed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_meetings_source_hash ON meetings(source_hash);
+CREATE INDEX IF NOT EXISTS idx_meetings_date ON meetings(meeting_date);
+CREATE TABLE IF NOT EXISTS utterances (
+    id INTEGER PRIMARY KEY,
+    meeting_id INTEGER NOT NULL REFERENCES meetings(id),
+    position INTEGER NOT NULL,
+    segment_index INTEGER,
+    segment_start_ms INTEGER,
+    segment_end_ms INTEGER,
+    speaker TEXT NOT NULL,
+    utterance TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_utterances_meeting ON utterances(meeting_id, position);
+"""
+
+# 発言テーブルと全文検索インデックスを同期するトリガー
+_FTS_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS utterances_ai AFTER INSERT ON utterances BEGIN
+    INSERT INTO utterances_fts(rowid, utterance) VALUES (new.id, new.utterance);
+END;
+CREATE TRIGGER IF NOT EXISTS utterances_ad AFTER DELETE ON utterances BEGIN
+    INSERT INTO utterances_fts(utterances_fts, rowid, utterance) VALUES ('delete', old.id, old.utterance);
+END;
+CREATE TRIGGER IF NOT EXISTS utterances_au AFTER UPDATE OF utterance ON utterances BEGIN
+    INSERT INTO utterances_fts(utterances_fts, rowid, utterance) VALUES ('delete', old.id, old.utterance);
+    INSERT INTO utterances_fts(rowid, utterance) VALUES (new.id, new.utterance);
+END;
+"""
+
+class MeetingCatalogError(Exception):
+    """会議カタログに関連するエラーを扱うカスタム例外クラス"""
+    pass
+
+@dataclass
+class SearchHit:
+    """検索に一致した発言と、その会議・セグメントの情報"""
+    meeting_id: int
+    run_id: str
+    title: str
+    meeting_date: str
+    folder: Optional[str]
+    position: int  # 会議内での発言の順番（0始まり）
+    speaker: str
+    utterance: str
+    snippet: str  # 一致箇所を【】で囲んだ抜粋
+    segment_index: Optional[int] = None
+    segment_start_ms: Optional[int] = None  # セグメントの開始位置（元の音声の時間軸）
+    segment_end_ms: Optional[int] = None
+    context_before: List[Dict[str, str]] = field(default_factory=list)  # 直前の発言
+    context_after: List[Dict[str, str]] = field(default_factory=list)  # 直後の発言
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+def file_sha256(file_path: Union[str, Path], chunk_size: int = 1024 * 1024) -> str:
+    """ファイルのSHA-256ハッシュを返す（同じ録音の再処理を判別するため）"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class MeetingCatalog:
+    """処理した会議と発言を登録・検索するSQLiteデータベース"""
+
+    def __init__(self, db_path: Union[str, Path]):
+        """
+        Args:
+            db_path (str | Path): データベースファイルのパス（存在しない場合は作成する）
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self.tokenizer = self._ensure_schema()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _ensure_schema(self) -> Optional[str]:
+        """テーブルと全文検索インデックスを作成し、使用するトークナイザを返す（FTS5が使えない場合はNone）"""
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+            row = self._conn.execute("SELECT value FROM catalog_info WHERE key = 'tokenizer'").fetchone()
+            if row:
+                return row["value"] or None
+
+            tokenizer = None
+            for candidate in ("trigram", "unicode61"):
+                try:
+                    self._conn.execute(
+                        "CREATE VIRTUAL TABLE utterances_fts USING fts5("
+                        f"utterance, content='utterances', content_rowid='id', tokenize='{candidate}')"
+                    )
+                    tokenizer = candidate
+                    break
+                except sqlite3.OperationalError as e:
+                    logger.warning(f"全文検索インデックス（{candidate}）を作成できません: {str(e)}")
+            if tokenizer:
+                self._conn.executescript(_FTS_TRIGGERS)
+                # 既に登録済みの発言があれば索引に追加する
+                self._conn.execute("INSERT INTO utterances_fts(utterances_fts) VALUES ('rebuild')")
+            else:
+                logger.warning("FTS5が使えないため、検索は全件走査（LIKE）で行います")
+            self._conn.execute(
+                "INSERT INTO catalog_info(key, value) VALUES ('tokenizer', ?)", (tokenizer or "",)
+            )
+            return tokenizer
+
+    def index_meeting(
+        self,
+        run_id: str,
+        title: str,
+        meeting_date: str,
+        conversations: List[Dict[str, Any]],
+        duration_seconds: Optional[float] = None,
+        source_name: Optional[str] = None,
+        source_hash: Optional[str] = None,
+        folder: Optional[str] = None,
+        segments: Optional[List[Dict[str, Any]]] = None,
+        segment_indexes: Optional[List[Optional[int]]] = None
+    ) -> int:
+        """
+        会議と発言を登録する（同じ run_id、または同じ元ファイルの会議が登録済みの場合は置き換える）
+
+        Args:
+            run_id (str): 実行ID（取り込んだ会議フォルダの場合はフォルダ名から作る）
+            title (str): 会議タイトル
+            meeting_date (str): 会議の日付（ISO形式）
+            conversations (List[Dict[str, Any]]): 発言のリスト（speaker, utterance）
+            duration_seconds (float, optional): 録音の長さ（秒）
+            source_name (str, optional): 元ファイル名
+            source_hash (str, optional): 元ファイルのSHA-256ハッシュ
+            folder (str, optional): 整理済みの会議フォルダ
+            segments (List[Dict[str, Any]], optional): セグメントの範囲（実行メタデータの segmentation.segments）
+            segment_indexes (List[Optional[int]], optional): 発言ごとのセグメント番号（conversations と同じ順番）
+        Returns:
+            int: 会議のID
+        """
+        segment_ranges = {s["index"]: (s["start_ms"], s["end_ms"]) for s in segments or []}
+        speakers = list(dict.fromkeys(str(item.get("speaker", "")) for item in conversations if item.get("speaker")))
+        rows = []
+        for position, item in enumerate(conversations):
+            segment_index = segment_indexes[position] if segment_indexes and position < len(segment_indexes) else None
+            start_ms, end_ms = segment_ranges.get(segment_index, (None, None))
+            rows.append((
+                position, segment_index, start_ms, end_ms,
+                str(item.get("speaker", "")), str(item.get("utterance", "")),
+            ))
+
+        with self._lock, self._conn:
+            existing = self._conn.execute(
+                "SELECT id FROM meetings WHERE run_id = ? OR (? IS NOT NULL AND source_hash = ?)",
+                (run_id, source_hash, source_hash),
+            ).fetchall()
+            for row in existing:
+                self._delete_meeting(row["id"])
+            cursor = self._conn.execute(
+                "INSERT INTO meetings(run_id, title, meeting_date, duration_seconds, speakers, source_name, source_hash, folder, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id, title, meeting_date, duration_seconds, json.dumps(speakers, ensure_ascii=False),
+                    source_name, source_hash, folder, datetime.now().isoformat(timespec="seconds"),
+                ),
+            )
+            meeting_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO utterances(meeting_id, position, segment_index, segment_start_ms, segment_end_ms, speaker, utterance) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(meeting_id, *row) for row in rows],
+            )
+        logger.info(f"会議をカタログに登録しました: {title}（ID: {meeting_id}, 発言: {len(rows)}件, 置き換え: {len(existing)}件）")
+        return meeting_id
+
+    def _delete_meeting(self, meeting_id: int) -> None:
+        """会議と発言を削除する（ロックを取得した状態で呼び出す）"""
+        self._conn.execute("DELETE FROM utterances WHERE meeting_id = ?", (meeting_id,))
+        self._conn.execute("DELETE FROM meetings WHERE id = ?", (meeting_id,))
+
+    def index_run(
+        self,
+        run: RunContext,
+        transcript_file: Union[str, Path],
+        title: str,
+        source_file: Optional[Union[str, Path]] = None,
+        segment_transcript_file: Optional[Union[str, Path]] = None
+    ) -> int:
+        """
+        処理が完了した実行の書き起こしを登録する
+
+        Args:
+            run (RunContext): 実行コンテキスト（日付とセグメントの範囲を使う）
+            transcript_file (str | Path): 最終的な書き起こしファイル（話者置換後）
+            title (str): 会議タイトル
+            source_file (str | Path, optional): 元の音声/動画ファイル（ハッシュを記録する）
+            segment_transcript_file (str | Path, optional): 話者名にセグメント識別子（_segN）が付いた話者置換前の書き起こし。
+                話者置換では発言の順番と件数が変わらないため、同じ順番の発言のセグメント番号として使う
+        Returns:
+            int: 会議のID
+        """
+        conversations, _ = parse_conversations(Path(transcript_file).read_text(encoding="utf-8"))
+        labelled = conversations
+        if segment_transcript_file and Path(segment_transcript_file) != Path(transcript_file):
+            labelled, _ = parse_conversations(Path(segment_transcript_file).read_text(encoding="utf-8"))
+            if len(labelled) != len(conversations):
+                logger.warning("話者置換前後で発言の件数が異なるため、セグメント番号を記録しません")
+                labelled = []
+        segment_indexes = []
+        for item in labelled:
+            match = _SEGMENT_SUFFIX_PATTERN.search(str(item.get("speaker", "")))
+            segment_indexes.append(int(match.group(1)) if match else None)
+
+        segments = (run.to_dict()["metadata"].get("segmentation") or {}).get("segments") or []
+        duration_seconds = max((s["end_ms"] for s in segments), default=0) / 1000 or None
+        source_hash = None
+        source_name = None
+        if source_file and Path(source_file).exists():
+            source_name = Path(source_file).name
+            source_hash = file_sha256(source_file)
+
+        return self.index_meeting(
+            run_id=run.run_id,
+            title=title,
+            meeting_date=run.started_at.isoformat(timespec="seconds"),
+            conversations=conversations,
+            duration_seconds=duration_seconds,
+            source_name=source_name,
+            source_hash=source_hash,
+            segments=segments,
+            segment_indexes=segment_indexes,
+        )
+
+    def set_folder(self, run_id: str, folder: str) -> bool:
+        """整理済みの会議フォルダを記録する（登録されていない run_id の場合はFalse）"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute("UPDATE meetings SET folder = ? WHERE run_id = ?", (folder, run_id))
+            return cursor.rowcount > 0
+
+    def import_folders(self, root: Union[str, Path]) -> int:
+        """
+        整理済みの会議フォルダ（YYYY-MM-DD_タイトル/..._書き起こし.txt）をまとめて登録する
+
+        カタログ導入前に処理した会議を検索できるようにするためのもの。
+        フォルダ名から run_id を作るため、同じフォルダを再度取り込むと置き換える。
+
+        Args:
+            root (str | Path): 会議フォルダが並んでいる出力ディレクトリ
+        Returns:
+            int: 登録した会議の数
+        """
+        count = 0
+        for transcript in sorted(Path(root).glob("*/*_書き起こし.txt")):
+            folder = transcript.parent
+            match = _MEETING_FOLDER_PATTERN.match(folder.name)
+            if not match:
+                continue
+            conversations, _ = parse_conversations(transcript.read_text(encoding="utf-8"))
+            if not conversations:
+                logger.warning(f"発言を読み取れないため登録しません: {transcript}")
+                continue
+            self.index_meeting(
+                run_id=f"import:{folder.name}",
+                title=match.group(2),
+                meeting_date=match.group(1),
+                conversations=conversations,
+                folder=str(folder),
+            )
+            count += 1
+        return count
+
+    @staticmethod
+    def _fts_phrase(term: str) -> str:
+        """検索語をFTS5のフレーズとして引用する"""
+        return '"' + term.replace('"', '""') + '"'
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        context: int = 1,
+        speaker: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None
+    ) -> List[SearchHit]:
+        """
+        発言を全文検索する（空白区切りの語をすべて含む発言を返す）
+
+        Args:
+            query (str): 検索語（空白区切りで複数指定するとAND検索）
+            limit (int): 返す件数の上限
+            context (int): 前後に付ける発言の数
+            speaker (str, optional): 話者名で絞り込む（部分一致）
+            since (str, optional): この日付以降の会議に絞り込む（YYYY-MM-DD）
+            until (str, optional): この日付以前の会議に絞り込む（YYYY-MM-DD）
+        Returns:
+            List[SearchHit]: 一致した発言（全文検索インデックスを使う場合は関連度順、それ以外は新しい会議順）
+        Raises:
+            MeetingCatalogError: 検索語が空の場合
+        """
+        terms = query.split()
+        if not terms:
+            raise MeetingCatalogError("検索語が空です")
+        min_chars = TRIGRAM_MIN_CHARS if self.tokenizer == "trigram" else 1
+        fts_terms = [term for term in terms if self.tokenizer and len(term) >= min_chars]
+        like_terms = [term for term in terms if term not in fts_terms]
+
+        conditions, params = [], []
+        if fts_terms:
+            source = "utterances_fts JOIN utterances u ON u.id = utterances_fts.rowid"
+            conditions.append("utterances_fts MATCH ?")
+            params.append(" ".join(self._fts_phrase(term) for term in fts_terms))
+            snippet = "snippet(utterances_fts, 0, '【', '】', '…', 32)"
+            order = "bm25(utterances_fts), m.meeting_date DESC"
+        else:
+            source = "utterances u"
+            snippet = "u.utterance"
+            order = "m.meeting_date DESC, u.position"
+        for term in like_terms:
+            conditions.append("u.utterance LIKE ? ESCAPE '\\'")
+            params.append("%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        if speaker:
+            conditions.append("u.speaker LIKE ?")
+            params.append(f"%{speaker}%")
+        if since:
+            conditions.append("m.meeting_date >= ?")
+            params.append(since)
+        if until:
+            # 日付のみの指定はその日の終わりまでを含める
+            conditions.append("m.meeting_date <= ?")
+            params.append(until if "T" in until else f"{until}T23:59:59")
+
+        sql = (
+            f"SELECT u.meeting_id, u.position, u.segment_index, u.segment_start_ms, u.segment_end_ms, "
+            f"u.speaker, u.utterance, {snippet} AS snippet, m.run_id, m.title, m.meeting_date, m.folder "
+            f"FROM {source} JOIN meetings m ON m.id = u.meeting_id "
+            f"WHERE {' AND '.join(conditions)} ORDER BY {order} LIMIT ?"
+        )
+        with self._lock:
+            try:
+                rows = self._conn.execute(sql, (*params, limit)).fetchall()
+            except sqlite3.OperationalError as e:
+                raise MeetingCatalogError(f"検索に失敗しました: {str(e)}")
+            hits = [self._to_hit(row, context) for row in rows]
+        return hits
+
+    def _to_hit(self, row: sqlite3.Row, context: int) -> SearchHit:
+        """検索結果の行に前後の発言を付ける（ロックを取得した状態で呼び出す）"""
+        hit = SearchHit(
+            meeting_id=row["meeting_id"],
+            run_id=row["run_id"],
+            title=row["title"],
+            meeting_date=row["meeting_date"],
+            folder=row["folder"],
+            position=row["position"],
+            speaker=row["speaker"],
+            utterance=row["utterance"],
+            snippet=row["snippet"],
+            segment_index=row["segment_index"],
+            segment_start_ms=row["segment_start_ms"],
+            segment_end_ms=row["segment_end_ms"],
+        )
+        if context > 0:
+            neighbours = self._conn.execute(
+                "SELECT position, speaker, utterance FROM utterances "
+                "WHERE meeting_id = ? AND position BETWEEN ? AND ? AND position != ? ORDER BY position",
+                (hit.meeting_id, hit.position - context, hit.position + context, hit.position),
+            ).fetchall()
+            for neighbour in neighbours:
+                item = {"speaker": neighbour["speaker"], "utterance": neighbour["utterance"]}
+                (hit.context_before if neighbour["position"] < hit.position else hit.context_after).append(item)
+        return hit
+
+    def list_meetings(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """登録済みの会議を新しい順に返す"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT m.*, (SELECT COUNT(*) FROM utterances u WHERE u.meeting_id = m.id) AS utterance_count "
+                "FROM meetings m ORDER BY m.meeting_date DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        meetings = []
+        for row in rows:
+            meeting = dict(row)
+            meeting["speakers"] = json.loads(meeting["speakers"])
+            meetings.append(meeting)
+        return meetings
+
+# データベースファイルごとのカタログ（同じファイルへの接続を共有する）
+_catalogs: Dict[str, MeetingCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+def get_meeting_catalog(db_path: Optional[Union[str, Path]] = None) -> MeetingCatalog:
+    """
+    会議カタログを取得する
+
+    Args:
+        db_path (str | Path, optional): データベースファイルのパス（省略時は設定の catalog.db_path）
+    Returns:
+        MeetingCatalog: 会議カタログ
+    """
+    path = str(Path(db_path or config_manager.get_snapshot().config.catalog.db_path).resolve())
+    with _catalogs_lock:
+        catalog = _catalogs.get(path)
+        if catalog is None:
+            catalog = MeetingCatalog(path)
+            _catalogs[path] = catalog
+        return catalog
+
+def _format_ms(value: Optional[int]) -> str:
+    if value is None:
+        return "-"
+    seconds = value // 1000
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+def _print_hits(hits: List[SearchHit]) -> None:
+    for hit in hits:
+        segment = ""
+        if hit.segment_index is not None:
+            segment = f" / セグメント{hit.segment_index}（{_format_ms(hit.segment_start_ms)}〜{_format_ms(hit.segment_end_ms)}）"
+        print(f"\n■ {hit.meeting_date[:10]} {hit.title}{segment}")
+        for item in hit.context_before:
+            print(f"    {item['speaker']}: {item['utterance']}")
+        print(f"  > {hit.speaker}: {hit.snippet}")
+        for item in hit.context_after:
+            print(f"    {item['speaker']}: {item['utterance']}")
+        if hit.folder:
+            print(f"    ({hit.folder})")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """コマンドラインから会議カタログを検索・管理する"""
+    parser = argparse.ArgumentParser(description="GiJiRoKu 会議カタログ")
+    parser.add_argument("--db", help="データベースファイルのパス（省略時は設定の catalog.db_path）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    search_parser = subparsers.add_parser("search", help="発言を全文検索する")
+    search_parser.add_argument("query", help="検索語（空白区切りでAND検索）")
+    search_parser.add_argument("--limit", type=int, default=20, help="表示する件数")
+    search_parser.add_argument("--context", type=int, default=1, help="前後に表示する発言の数")
+    search_parser.add_argument("--speaker", help="話者名で絞り込む")
+    search_parser.add_argument("--since", help="この日付以降の会議（YYYY-MM-DD）")
+    search_parser.add_argument("--until", help="この日付以前の会議（YYYY-MM-DD）")
+    search_parser.add_argument("--json", action="store_true", help="JSONで出力する")
+
+    list_parser = subparsers.add_parser("list", help="登録済みの会議を表示する")
+    list_parser.add_argument("--limit", type=int, default=50, help="表示する件数")
+
+    import_parser = subparsers.add_parser("import", help="整理済みの会議フォルダをまとめて登録する")
+    import_parser.add_argument("root", help="会議フォルダが並んでいる出力ディレクトリ")
+
+    args = parser.parse_args(argv)
+    catalog = get_meeting_catalog(args.db)
+
+    if args.command == "search":
+        started = time.perf_counter()
+        try:
+            hits = catalog.search(args.query, args.limit, args.context, args.speaker, args.since, args.until)
+        except MeetingCatalogError as e:
+            print(str(e), file=sys.stderr)
+            return 1
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if args.json:
+            print(json.dumps({"hits": [hit.to_dict() for hit in hits], "elapsed_ms": round(elapsed_ms, 2)}, ensure_ascii=False, indent=2))
+        else:
+            _print_hits(hits)
+            print(f"\n{len(hits)}件（{elapsed_ms:.1f}ms）")
+    elif args.command == "list":
+        for meeting in catalog.list_meetings(args.limit):
+            duration = f"{meeting['duration_seconds'] / 60:.0f}分" if meeting["duration_seconds"] else "-"
+            print(f"{meeting['meeting_date'][:10]}  {meeting['title']}  （{duration}, 発言{meeting['utterance_count']}件, 話者: {', '.join(meeting['speakers'])}）")
+    elif args.command == "import":
+        count = catalog.import_folders(args.root)
+        print(f"{count}件の会議を登録しました")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
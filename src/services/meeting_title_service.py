@@ -3,17 +3,23 @@ import os
 import re
 from datetime import datetime
 from src.utils.file_utils import FileUtils
-from src.utils.config import ConfigManager, config_manager
+from src.utils.config import ConfigManager, ConfigSnapshot, config_manager
+from src.utils.run_context import RunContext
 from .title_generator import TitleGeneratorFactory, TitleGeneratorFactoryError, TitleGenerationError
 
 class MeetingTitleService:
-    def __init__(self):
+    def __init__(self, snapshot: ConfigSnapshot = None, run_context: RunContext = None):
         """
         MeetingTitleServiceの初期化
         FileUtilsのインスタンスを作成
+        Args:
+            snapshot: 使用する設定スナップショット（省略時は現在の設定）
+            run_context: 実行コンテキスト（指定時はその作業ディレクトリにタイトルを保存）
         """
         self.file_utils = FileUtils()
         self.config_manager = config_manager
+        self.run_context = run_context
+        self.snapshot = run_context.snapshot if run_context else snapshot
 
     def _read_transcript_file(self, transcript_file_path: str) -> str:
         """
@@ -64,7 +70,9 @@ class MeetingTitleService:
         Returns:
             str: タイトルファイルのパス
         """
-        # output/title ディレクトリにタイトルファイルを作成
+        # output/title（実行コンテキスト指定時は作業ディレクトリ内の title）にタイトルファイルを作成
+        if self.run_context:
+            return os.path.join(str(self.run_context.path("title")), f"meetingtitle_{timestamp}.txt")
         return os.path.join("output", "title", f"meetingtitle_{timestamp}.txt")
 
     def _save_title(self, title_file_path: str, title: str) -> None:
@@ -85,6 +93,24 @@ class MeetingTitleService:
             print(error_msg)
             raise
 
+    def save_title_for_transcript(self, transcript_file_path: str, title: str) -> str:
+        """
+        書き起こしファイルに対応するタイトルファイルを保存する（生成済みのタイトルを保存する場合にも使用）
+        Args:
+            transcript_file_path: 書き起こしファイルのパス
+            title: 会議タイトル
+        Returns:
+            str: 保存したタイトルファイルのパス
+        """
+        timestamp = self._extract_timestamp(transcript_file_path)
+        title_file_path = self._generate_title_file_path(timestamp)
+        
+        # タイトル保存前にディレクトリを作成
+        os.makedirs(os.path.dirname(title_file_path), exist_ok=True)
+        
+        self._save_title(title_file_path, title)
+        return title_file_path
+
     def process_transcript_and_generate_title(self, transcript_file_path: str) -> str:
         """
         書き起こしファイルからタイトルを生成して保存する統合処理
@@ -95,14 +121,15 @@ class MeetingTitleService:
         """
         try:
             # 1. 設定から書き起こし方式を取得
-            config = self.config_manager.get_config()
+            config = (self.snapshot or self.config_manager.get_snapshot()).config
             print(f"[DEBUG] process_transcript_and_generate_title - config id: {id(config)}")
             print(f"[DEBUG] process_transcript_and_generate_title - transcription.method: {config.transcription.method}")
             transcription_method = config.transcription.method
             print(f"Using transcription method: {transcription_method}")
             
-            # 2. タイトルジェネレーターを作成
-            title_generator = TitleGeneratorFactory.create_generator(transcription_method)
+            # 2. タイトルジェネレーターを作成（実行コンテキストにキャッシュがあれば共有する）
+            context_cache = self.run_context.context_cache if self.run_context else None
+            title_generator = TitleGeneratorFactory.create_generator(transcription_method, context_cache)
             
             # 3. ファイル読み込み
             transcript_text = self._read_transcript_file(transcript_file_path)
@@ -112,7 +139,10 @@ class MeetingTitleService:
             marker_count = transcript_text.count(marker)
             text_for_title = transcript_text  # デフォルトは全文
 
-            if marker_count == 0:
+            if context_cache is not None and context_cache.covers(transcript_text):
+                # キャッシュ済みの全文は入力トークンの処理が不要なため、切り詰めずに送信する
+                print("[INFO] 書き起こしのコンテキストキャッシュを使用するため、全文を送信します。")
+            elif marker_count == 0:
                 print(f"[WARN] 発話者マーカー '{marker}' が見つかりませんでした。全文を送信します。")
             elif marker_count > 60:  # 30から60に変更
                 print(f"[INFO] 発話者マーカーの出現回数が {marker_count} 回 (>60) です。")
@@ -152,17 +182,8 @@ class MeetingTitleService:
             
             print(f"Generated title: {title}")
             
-            # 5. タイトルファイル生成
-            timestamp = self._extract_timestamp(transcript_file_path)
-            title_file_path = self._generate_title_file_path(timestamp)
-            
-            # タイトル保存前にディレクトリを作成
-            os.makedirs(os.path.dirname(title_file_path), exist_ok=True)
-            
-            # 6. タイトル保存
-            self._save_title(title_file_path, title)
-            
-            return title_file_path
+            # 5-6. タイトルファイル生成・保存
+            return self.save_title_for_transcript(transcript_file_path, title)
             
         except (TitleGeneratorFactoryError, TitleGenerationError) as e:
             error_msg = f"Error in title generation process: {str(e)}"
@@ -3,7 +3,7 @@ import sys
 import pathlib
 import logging
 from datetime import datetime
-from typing import Dict, Any, Union
+from typing import Dict, Any, Optional, Union
 from pathlib import Path
 
 from ..utils.summarizer_factory import SummarizerFactory, SummarizerFactoryError
@@ -19,16 +19,18 @@ class MinutesError(Exception):
 class MinutesService:
     """議事録生成サービス"""
 
-    def __init__(self, output_dir: str = "output/minutes", config_path: str = "config/settings.json"):
+    def __init__(self, output_dir: str = "output/minutes", config_path: str = "config/settings.json", context_cache: Optional[Any] = None):
         """Initialize minutes generation service
 
         Args:
             output_dir (str): 出力ディレクトリ
             config_path (str): 設定ファイルのパス
+            context_cache (GeminiContextCache, optional): 書き起こしのコンテキストキャッシュ
         """
         self.output_dir = pathlib.Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.config_path = config_path
+        self.context_cache = context_cache
         logger.info(f"出力ディレクトリを作成/確認: {self.output_dir}")
 
     def generate_minutes(self, text: Union[str, Path], prompt_path: str = "src/prompts/minutes.txt") -> Dict[str, Any]:
@@ -77,32 +79,53 @@ class MinutesService:
             logger.info(f"議事録プロンプトを取得しました（{len(prompt)}文字）")
 
             # Summarizerの生成
-            summarizer = SummarizerFactory.create_summarizer()
+            summarizer = SummarizerFactory.create_summarizer(self.context_cache)
             logger.info("議事録生成を開始します")
 
             # 議事録の生成
             minutes = summarizer.summarize(input_text, prompt)
 
-            # 出力ファイルパスの生成（既存の命名規則に合わせる）
-            output_path = self.output_dir / f"transcription_summary_{timestamp}_minutes.md"
-
-            # 議事録の保存
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(minutes)
-
-            logger.info(f"議事録を保存しました: {output_path}")
-
-            return {
-                "text": minutes,
-                "file_path": output_path,
-                "timestamp": timestamp
-            }
+            return self._save_minutes(minutes, timestamp)
 
         except Exception as e:
             error_msg = f"議事録の生成に失敗しました: {str(e)}"
             logger.error(error_msg)
             raise MinutesError(error_msg)
 
+    def save_minutes(self, transcription_file: Union[str, Path], minutes: str) -> Dict[str, Any]:
+        """生成済みの議事録を書き起こしファイルに対応する名前で保存する
+
+        Args:
+            transcription_file (Union[str, Path]): 議事録の元になった書き起こしファイルのパス
+            minutes (str): 議事録
+
+        Returns:
+            Dict[str, Any]: 保存結果（generate_minutes と同じ形式）
+        """
+        input_path = Path(transcription_file)
+        if "transcription_summary_" in input_path.stem:
+            timestamp = input_path.stem.split("transcription_summary_")[1]
+        else:
+            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        return self._save_minutes(minutes, timestamp)
+
+    def _save_minutes(self, minutes: str, timestamp: str) -> Dict[str, Any]:
+        """議事録を保存する"""
+        # 出力ファイルパスの生成（既存の命名規則に合わせる）
+        output_path = self.output_dir / f"transcription_summary_{timestamp}_minutes.md"
+
+        # 議事録の保存
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(minutes)
+
+        logger.info(f"議事録を保存しました: {output_path}")
+
+        return {
+            "text": minutes,
+            "file_path": output_path,
+            "timestamp": timestamp
+        }
+
     def get_output_path(self, transcription_file: pathlib.Path) -> pathlib.Path:
         """出力ファイルパスの生成"""
         return self.output_dir / f"{transcription_file.stem}_minutes.md"
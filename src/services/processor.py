@@ -1,22 +1,154 @@
+import sys
+import json
 import logging
+import argparse
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, Optional
 from .audio import AudioProcessor, AudioProcessingError
 from .transcription import TranscriptionService
 from .csv_converter import CSVConverterService
 from .minutes import MinutesService
-from .format_converter import convert_file, cleanup_file, FormatConversionError
+from .format_converter import prepare_media, cleanup_file, FormatConversionError
 from .meeting_title_service import MeetingTitleService
 from .speaker_remapper import create_speaker_remapper
+from .fused_post_processor import FusedPostProcessor, FusedPostProcessResult, FusedPostProcessingError
+from .meeting_catalog import get_meeting_catalog
+from .live_transcriber import LiveAudioSource
 from src.utils.config import config_manager
+from src.utils.run_context import RunContext, RunContextError, resume_run_context
+from src.utils.metrics import metrics
+from src.utils.progress import ProgressEvent, progress_bus, format_progress
+from src.utils.file_utils import FileUtils
+from src.utils.new_gemini_api import GeminiContextCache
 
 logger = logging.getLogger(__name__)
 
-def process_audio_file(input_file: Path, modes: dict) -> dict:
-    """音声ファイルの処理を実行"""
-    results = {}
+def _prepare_context_cache(run: RunContext, modes: dict, transcript_file_path: Optional[str]) -> None:
+    """
+    タイトル生成と議事録生成の両方をGeminiで行う場合、書き起こしのコンテキストキャッシュを実行コンテキストに用意する
+
+    キャッシュの作成自体は最初の呼び出し時に行われる（GeminiContextCache.acquire）。
+
+    Args:
+        run (RunContext): 実行コンテキスト
+        modes (dict): 処理モード
+        transcript_file_path (str, optional): 後処理の入力となる書き起こしファイル
+    """
+    config = run.config
+    if not config.summarization.context_cache_enabled or not transcript_file_path:
+        return
+    if config.transcription.method != "gemini" or not modes.get("minutes") or config.summarization.model != "gemini":
+        logger.info("タイトル生成と議事録生成の両方がGeminiではないため、コンテキストキャッシュを使用しません")
+        return
+    try:
+        transcript_text = Path(transcript_file_path).read_text(encoding="utf-8")
+        run.context_cache = GeminiContextCache(
+            transcript_text,
+            model=config_manager.get_model("gemini_minutes"),
+            ttl_seconds=config.summarization.context_cache_ttl_seconds,
+            min_chars=config.summarization.context_cache_min_chars,
+        )
+    except Exception as e:
+        logger.warning(f"コンテキストキャッシュの準備に失敗しました: {str(e)}")
+
+def _run_fused_post_processing(run: RunContext, modes: dict, transcript_file_path: Optional[str]) -> Optional[FusedPostProcessResult]:
+    """
+    一括後処理（タイトル・話者マッピング・議事録を1回で生成）を実行する
+
+    Args:
+        run (RunContext): 実行コンテキスト
+        modes (dict): 処理モード
+        transcript_file_path (str, optional): 書き起こしファイル
+    Returns:
+        Optional[FusedPostProcessResult]: 生成結果（無効な場合・失敗した場合はNone。呼び出し側は個別の処理を行う）
+    """
+    config = run.config
+    if not config.summarization.fused_post_processing or not modes.get("minutes") or not transcript_file_path:
+        return None
+    run.progress.start_stage("post_process")
+    try:
+        result = FusedPostProcessor(snapshot=run.snapshot).process(
+            transcript_file_path,
+            include_speaker_mapping=config.transcription.enable_speaker_remapping,
+        )
+        run.set_metadata("post_processing", {"mode": "fused"})
+        return result
+    except FusedPostProcessingError as e:
+        logger.warning(f"一括後処理に失敗したため、個別の処理で続行します: {str(e)}")
+        run.set_metadata("post_processing", {"mode": "separate", "fused_error": str(e)})
+        return None
+
+def _index_in_catalog(
+    run: RunContext,
+    results: dict,
+    transcript_file_path: str,
+    segment_transcript_file_path: Optional[str],
+    source_file: str
+) -> None:
+    """
+    会議のメタデータと発言を会議カタログに登録する（失敗しても処理は続行する）
+
+    Args:
+        run (RunContext): 実行コンテキスト
+        results (dict): 処理結果（登録した会議のIDを追加する）
+        transcript_file_path (str): 最終的な書き起こしファイル
+        segment_transcript_file_path (str, optional): 話者置換前の書き起こしファイル（セグメント番号の取得に使う）
+        source_file (str): 元の音声/動画ファイル
+    """
+    if not run.config.catalog.enabled:
+        return
+    run.progress.start_stage("catalog")
+    try:
+        title_file = (results.get("meeting_title") or {}).get("file_path")
+        title = FileUtils().get_meeting_title(title_file) if title_file else "未定義会議"
+        meeting_id = get_meeting_catalog(run.config.catalog.db_path).index_run(
+            run,
+            transcript_file_path,
+            title,
+            source_file=source_file,
+            segment_transcript_file=segment_transcript_file_path,
+        )
+        results["catalog"] = {"meeting_id": meeting_id}
+    except Exception as e:
+        logger.warning(f"会議カタログへの登録に失敗しました: {str(e)}")
+        results["catalog"] = {"error": str(e)}
+
+def process_audio_file(
+    input_file: Path,
+    modes: dict,
+    run_context: Optional[RunContext] = None,
+    progress_callback: Optional[Callable[[ProgressEvent], None]] = None
+) -> dict:
+    """音声ファイルの処理を実行
+
+    Args:
+        input_file (Path): 入力ファイル
+        modes (dict): 処理モード（transcribe, minutes, reflection, deferred, live）。
+            deferred が True の場合、セグメントの書き起こしをバッチAPIでまとめて実行する（急ぎでない録音向け）。
+            live が True の場合、録音中のファイルを追いかけ、セグメントが揃い次第書き起こす（録音終了後すぐに結果が出る）
+        run_context (RunContext, optional): 実行コンテキスト（省略時は新規作成）。
+            出力ファイルは run_context の作業ディレクトリ（output/runs/<run_id>/）に保存されるため、
+            複数のファイルを同時に処理しても衝突しない。
+            遅延実行モードで待機中に中断した場合は、resume_run_context(run_id) で作成した RunContext を渡すと
+            投入済みのバッチジョブの完了を待つ（コマンドラインの --resume-run-id、ジョブサーバーの resume_run_id）。
+        progress_callback (Callable, optional): この実行の進捗イベント（段階の開始・終了、セグメントの完了と残り時間、
+            再試行、アップロード量）を受け取る関数。処理スレッドから呼ばれる
+
+    Returns:
+        dict: 処理結果（run_id と workspace_dir を含む）
+    """
+    # 処理中に設定ファイルが更新されても一貫した設定で処理するため、開始時のスナップショットを使う
+    owns_run_context = run_context is None
+    run = run_context or RunContext(snapshot=config_manager.get_snapshot())
+    run.open()
+    unsubscribe_progress = progress_bus.subscribe(progress_callback, run_id=run.run_id) if progress_callback else None
+    snapshot = run.snapshot
+    results = {"run_id": run.run_id, "workspace_dir": str(run.workspace)}
+    # 構造化出力の検証結果は実行ごとの差分を記録する（同時に処理している実行の分も含まれる）
+    structured_output_before = metrics.snapshot("structured_output.")
     
-    logger.info(f"処理開始 - 入力ファイル: {input_file}")
+    logger.info(f"処理開始 - 入力ファイル: {input_file} (run_id: {run.run_id})")
     logger.info(f"モード設定: {modes}")
     
     # 追加: 変換フラグおよび変換後ファイル保持用変数の初期化
@@ -26,67 +158,88 @@ def process_audio_file(input_file: Path, modes: dict) -> dict:
     try:
         # 追加: ファイル形式の判定・変換処理
         original_path = str(input_file)
-        try:
-            converted = convert_file(original_path)
-            if converted != original_path:
-                conversion_performed = True
-                converted_file = Path(converted)
-                logger.info(f"変換が実施されました。変換後のファイルを使用します: {converted_file}")
-                input_file = converted_file
-            else:
-                logger.info("ファイル形式は既に対応済みのため変換は不要です。")
-        except FormatConversionError as e:
-            logger.error(f"ファイル形式の変換に失敗しました: {str(e)}")
-            raise AudioProcessingError(f"ファイル形式の変換に失敗しました: {str(e)}")
-
-        # 音声処理サービスの初期化
-        audio_processor = AudioProcessor()
+        live = bool(modes.get("live"))
+        if live:
+            # ライブモード: 録音中のファイルは変換・速度変更・圧縮を行わず、書き起こし側で追いかけながら切り出す
+            logger.info("ライブモード: 録音中のファイルをそのまま書き起こします")
+            audio_file, speed_factor = input_file, 1.0
+        else:
+            run.progress.start_stage("prepare")
+            try:
+                # パススルーが有効な場合、書き起こし方式がそのまま受け付ける音声は再エンコードしない
+                transcription_config = snapshot.config.transcription
+                converted = prepare_media(
+                    original_path,
+                    output_dir=run.path("temp"),
+                    method=transcription_config.method if transcription_config.media_passthrough else None
+                )
+                if converted != original_path:
+                    conversion_performed = True
+                    converted_file = Path(converted)
+                    logger.info(f"変換が実施されました。変換後のファイルを使用します: {converted_file}")
+                    input_file = converted_file
+                else:
+                    logger.info("ファイル形式は既に対応済みのため変換は不要です。")
+            except FormatConversionError as e:
+                logger.error(f"ファイル形式の変換に失敗しました: {str(e)}")
+                raise AudioProcessingError(f"ファイル形式の変換に失敗しました: {str(e)}")
+
+            # 音声処理サービスの初期化
+            audio_processor = AudioProcessor(temp_dir=run.path("temp"))
+        
+            # 音声を速めて書き起こす（音声の長さに比例するトークン数・処理時間を減らす。時刻は書き起こし側で元に戻す）
+            speed_factor = snapshot.config.transcription.speed_factor
+            if speed_factor != 1.0:
+                original_size = input_file.stat().st_size
+                input_file = audio_processor.change_speed(input_file, speed_factor)
+                run.set_metadata("speed_up", {
+                    "factor": speed_factor,
+                    "input_bytes": original_size,
+                    "output_bytes": input_file.stat().st_size,
+                })
         
-        # 音声の抽出と必要に応じた圧縮
-        logger.info(f"音声ファイルの処理を開始: {input_file}")
-        audio_file, was_compressed = audio_processor.extract_audio(input_file)
-        logger.info(f"音声処理完了 - 圧縮状態: {was_compressed}")
+            # 音声の抽出と必要に応じた圧縮
+            logger.info(f"音声ファイルの処理を開始: {input_file}")
+            audio_file, was_compressed = audio_processor.extract_audio(input_file)
+            logger.info(f"音声処理完了 - 圧縮状態: {was_compressed}")
         
         try:
+            fused_result = None
             # 書き起こし処理（必須）
             if modes["transcribe"]:
                 logger.info("書き起こし処理を開始")
-                transcription_service = TranscriptionService()
+                run.progress.start_stage("transcribe")
+                transcription_service = TranscriptionService(
+                    run_context=run,
+                    deferred=bool(modes.get("deferred")),
+                    speed_factor=speed_factor,
+                    live_source=LiveAudioSource(
+                        input_file, idle_timeout_seconds=snapshot.config.transcription.live_idle_timeout_seconds
+                    ) if live else None
+                )
                 transcription_result = transcription_service.process_audio(audio_file)
                 results["transcription"] = transcription_result
+                # 話者置換前の書き起こし（話者名にセグメント識別子が付いている）
+                segment_transcript_file = transcription_result.get("formatted_file")
                 
-                # 会議タイトル生成処理を追加
-                try:
-                    logger.info("会議タイトル生成処理を開始")
-                    # タイトル出力ディレクトリの確認と作成
-                    title_output_dir = Path("output/title")
-                    if not title_output_dir.exists():
-                        title_output_dir.mkdir(parents=True, exist_ok=True)
-                        logger.info(f"タイトル出力ディレクトリを作成しました: {title_output_dir}")
-
-                    title_service = MeetingTitleService()
-                    transcript_file_path = transcription_result.get("formatted_file")
-                    if transcript_file_path:
-                        title_file_path = title_service.process_transcript_and_generate_title(str(transcript_file_path))
-                        results["meeting_title"] = {"file_path": title_file_path}
-                        logger.info(f"会議タイトル生成完了: {title_file_path}")
-                    else:
-                        logger.warning("書き起こしファイルのパスが見つかりません")
-                except Exception as e:
-                    logger.error(f"会議タイトル生成中にエラーが発生: {str(e)}")
-                    results["meeting_title"] = {"error": str(e)}
+                # タイトル・話者マッピング・議事録を1回の呼び出しでまとめて生成する（有効時のみ）
+                fused_result = _run_fused_post_processing(run, modes, transcription_result.get("formatted_file"))
                 
                 # 追加: スピーカーリマップ処理
                 try:
                     # 話者置換処理の設定を取得
-                    enable_speaker_remapping = config_manager.get_config().transcription.enable_speaker_remapping
+                    enable_speaker_remapping = snapshot.config.transcription.enable_speaker_remapping
                     
                     if enable_speaker_remapping:
                         logger.info("スピーカーリマップ処理を開始")
-                        speaker_remapper = create_speaker_remapper()
+                        run.progress.start_stage("speaker_remap")
+                        speaker_remapper = create_speaker_remapper(snapshot)
                         transcript_file_path = transcription_result.get("formatted_file")
                         if transcript_file_path:
-                            remapped_file_path = speaker_remapper.process_transcript(transcript_file_path)
+                            remapped_file_path = speaker_remapper.process_transcript(
+                                transcript_file_path,
+                                speaker_mapping=fused_result.speaker_mapping if fused_result else None
+                            )
                             # リマップ後のファイルを以降の処理で使用するように設定
                             transcription_result["formatted_file"] = remapped_file_path
                             results["speaker_remap"] = {"file_path": remapped_file_path}
@@ -100,17 +253,50 @@ def process_audio_file(input_file: Path, modes: dict) -> dict:
                     logger.error(f"スピーカーリマップ処理中にエラーが発生: {str(e)}")
                     results["speaker_remap"] = {"error": str(e)}
                 
+                # タイトル生成と議事録生成が同じ書き起こしを入力とする場合はコンテキストキャッシュを共有する
+                # （話者置換後の書き起こしを両方で使うため、タイトル生成は話者置換の後に行う）
+                if fused_result is None:
+                    _prepare_context_cache(run, modes, transcription_result.get("formatted_file"))
+                
+                # 会議タイトル生成処理を追加
+                try:
+                    logger.info("会議タイトル生成処理を開始")
+                    run.progress.start_stage("title")
+                    title_service = MeetingTitleService(run_context=run)
+                    transcript_file_path = transcription_result.get("formatted_file")
+                    if transcript_file_path and fused_result:
+                        title_file_path = title_service.save_title_for_transcript(str(transcript_file_path), fused_result.title)
+                        results["meeting_title"] = {"file_path": title_file_path}
+                        logger.info(f"会議タイトルを保存しました（一括後処理）: {title_file_path}")
+                    elif transcript_file_path:
+                        title_file_path = title_service.process_transcript_and_generate_title(str(transcript_file_path))
+                        results["meeting_title"] = {"file_path": title_file_path}
+                        logger.info(f"会議タイトル生成完了: {title_file_path}")
+                    else:
+                        logger.warning("書き起こしファイルのパスが見つかりません")
+                except Exception as e:
+                    logger.error(f"会議タイトル生成中にエラーが発生: {str(e)}")
+                    results["meeting_title"] = {"error": str(e)}
+                
                 # CSV変換
                 logger.info("CSV変換を開始")
-                csv_converter = CSVConverterService()
+                run.progress.start_stage("csv")
+                csv_converter = CSVConverterService(output_dir=str(run.path("csv")))
                 csv_file = csv_converter.convert_to_csv(transcription_result["formatted_file"])
                 results["csv"] = csv_file
+                
+                # 会議カタログへの登録（全文検索用）
+                _index_in_catalog(run, results, transcription_result["formatted_file"], segment_transcript_file, original_path)
             
             # 議事録生成
             if modes["minutes"]:
                 logger.info("議事録生成を開始")
-                minutes_service = MinutesService()
-                minutes_result = minutes_service.generate_minutes(transcription_result["formatted_file"])
+                run.progress.start_stage("minutes")
+                minutes_service = MinutesService(output_dir=str(run.path("minutes")), context_cache=run.context_cache)
+                if fused_result:
+                    minutes_result = minutes_service.save_minutes(transcription_result["formatted_file"], fused_result.minutes)
+                else:
+                    minutes_result = minutes_service.generate_minutes(transcription_result["formatted_file"])
                 # 戻り値のキーを適切に取り扱う
                 results["minutes"] = minutes_result.get("file_path") or minutes_result.get("minutes_file")
                 if not results["minutes"]:
@@ -120,7 +306,8 @@ def process_audio_file(input_file: Path, modes: dict) -> dict:
             # 反省点抽出
             if modes["reflection"]:
                 logger.info("反省点抽出を開始")
-                minutes_service = MinutesService()
+                run.progress.start_stage("reflection")
+                minutes_service = MinutesService(output_dir=str(run.path("minutes")))
                 
                 # 議事録ファイルの内容を読み込む
                 with open(results["minutes"], "r", encoding="utf-8") as f:
@@ -131,7 +318,10 @@ def process_audio_file(input_file: Path, modes: dict) -> dict:
                 results["reflection"] = reflection_path
             
             # 成功結果を返す
+            run.set_metadata("structured_output", metrics.delta(structured_output_before, "structured_output."))
+            results["run"] = run.to_dict()
             results["success"] = True
+            run.progress.finish(success=True)
             return results
             
         except Exception as e:
@@ -139,6 +329,7 @@ def process_audio_file(input_file: Path, modes: dict) -> dict:
             logger.error(f"処理中にエラーが発生: {str(e)}")
             results["success"] = False
             results["error"] = str(e)
+            run.progress.finish(success=False, message=str(e))
             return results
             
     except Exception as e:
@@ -146,12 +337,69 @@ def process_audio_file(input_file: Path, modes: dict) -> dict:
         logger.error(f"音声前処理中にエラーが発生: {str(e)}")
         results["success"] = False
         results["error"] = str(e)
+        run.progress.finish(success=False, message=str(e))
         return results
     finally:
+        # 後処理が終わったらキャッシュを削除する（保持期間の課金を避けるため）
+        if run.context_cache is not None:
+            run.context_cache.close()
+            run.context_cache = None
         # 一時ファイルのクリーンアップ
         if conversion_performed and converted_file and converted_file.exists():
             try:
                 cleanup_file(str(converted_file))
                 logger.info(f"一時ファイルを削除しました: {converted_file}")
             except Exception as e:
-                logger.warning(f"一時ファイルの削除に失敗: {str(e)}") 
\ No newline at end of file
+                logger.warning(f"一時ファイルの削除に失敗: {str(e)}")
+        if unsubscribe_progress:
+            unsubscribe_progress()
+        # 呼び出し元から渡されたコンテキストは呼び出し元が終了させる
+        if owns_run_context:
+            run.close()
+
+def _print_progress(event: ProgressEvent) -> None:
+    """進捗イベントを標準エラー出力に1行で表示する"""
+    print(f"{datetime.fromtimestamp(event.timestamp):%H:%M:%S} {format_progress(event)}", file=sys.stderr, flush=True)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """コマンドラインから音声/動画ファイルを処理する（進捗は標準エラー出力、結果は標準出力にJSONで表示）"""
+    parser = argparse.ArgumentParser(description="GiJiRoKu 音声/動画ファイルの処理")
+    parser.add_argument("input_file", help="音声/動画ファイル")
+    parser.add_argument("--no-minutes", action="store_true", help="議事録を作成しない")
+    parser.add_argument("--deferred", action="store_true", help="バッチAPIでまとめて書き起こす（急ぎでない録音向け）")
+    parser.add_argument("--live", action="store_true", help="録音中のファイルを追いかけて書き起こす")
+    parser.add_argument("--resume-run-id", help="中断した遅延実行モードの実行ID（投入済みのバッチジョブの完了を待つ。同じ入力ファイルを指定する）")
+    parser.add_argument("--verbose", action="store_true", help="処理ログを表示する")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    from src.utils.ffmpeg_handler import setup_ffmpeg
+    setup_ffmpeg()
+
+    modes = {
+        "transcribe": True,
+        "minutes": not args.no_minutes,
+        "reflection": False,
+        "deferred": args.deferred or bool(args.resume_run_id),
+        "live": args.live,
+    }
+    run_context = None
+    if args.resume_run_id:
+        try:
+            run_context = resume_run_context(args.resume_run_id)
+        except RunContextError as e:
+            print(str(e), file=sys.stderr)
+            return 1
+    try:
+        results = process_audio_file(Path(args.input_file), modes, run_context=run_context, progress_callback=_print_progress)
+    finally:
+        if run_context is not None:
+            run_context.close()
+    print(json.dumps(results, ensure_ascii=False, indent=2, default=str))
+    return 0 if results.get("success") else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
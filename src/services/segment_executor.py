@@ -0,0 +1,366 @@
+import re
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, FIRST_COMPLETED, wait
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from ..modules.segment_buffer import AudioSegmentBuffer
+from ..utils.error_chain import iter_exception_chain
+
+logger = logging.getLogger(__name__)
+
+# 遅延の分布を学習する際に保持する直近の件数
+LATENCY_WINDOW = 50
+
+# この件数の実績が集まるまでは追加のリクエストを送らない
+MIN_SAMPLES_FOR_HEDGE = 3
+
+# 接続先側の障害とみなすエラーメッセージ（SDKの例外がラップされてステータスコードを辿れない場合に使う）
+_PROVIDER_ERROR_PATTERN = re.compile(
+    r"\b(408|429|5\d\d)\b|RESOURCE_EXHAUSTED|UNAVAILABLE|DEADLINE_EXCEEDED|rate limit|timed out|timeout",
+    re.IGNORECASE
+)
+
+# 接続先側の障害とみなす例外クラス名（openai / httpx）
+_PROVIDER_ERROR_TYPES = ("APITimeoutError", "APIConnectionError", "ConnectError", "ConnectTimeout", "ReadTimeout")
+
+class SegmentTimeoutError(Exception):
+    """セグメントの書き起こしが制限時間内に終わらなかったことを表すカスタム例外"""
+    pass
+
+def is_provider_error(error: BaseException) -> bool:
+    """
+    レート制限（429）・サーバーエラー（5xx）・タイムアウトなど、接続先側の障害によるエラーかを判定する
+
+    GeminiAPIError などでラップされた例外も、元の例外（__cause__ / __context__）まで辿って判定する。
+
+    Args:
+        error (BaseException): 判定する例外
+    Returns:
+        bool: 接続先側の障害によるエラーの場合はTrue
+    """
+    for current in iter_exception_chain(error):
+        if isinstance(current, SegmentTimeoutError) or type(current).__name__ in _PROVIDER_ERROR_TYPES:
+            return True
+        status = getattr(current, "status_code", None) or getattr(current, "code", None)
+        if isinstance(status, int) and (status in (408, 429) or status >= 500):
+            return True
+    return bool(_PROVIDER_ERROR_PATTERN.search(str(error)))
+
+class LatencyTracker:
+    """直近のセグメントの遅延（音声1秒あたりの処理時間）を保持し、パーセンタイルを求める"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        """
+        Args:
+            window (int): 保持する直近の件数
+        """
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def record(self, elapsed_seconds: float, audio_seconds: float) -> None:
+        """
+        完了したリクエストの遅延を記録する
+
+        Args:
+            elapsed_seconds (float): 処理時間（秒）
+            audio_seconds (float): セグメントの長さ（秒）
+        """
+        with self._lock:
+            self._samples.append(elapsed_seconds / max(audio_seconds, 1.0))
+
+    def percentile(self, q: float) -> Optional[float]:
+        """音声1秒あたりの処理時間のパーセンタイル（実績がない場合はNone）"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(round(q * (len(samples) - 1)))))
+        return samples[index]
+
+class SegmentExecutor:
+    """セグメントの書き起こしを、遅延の大きいリクエストへの追加送信（ヘッジ）付きで実行する
+
+    直近のセグメントから学習した遅延のパーセンタイルを超えても応答がない場合、
+    同じセグメントの書き起こしをもう1つ送信し、先に返った結果を採用する。
+    採用されなかった側のリクエストは結果を破棄する（SDKの呼び出しは中断できないため、
+    デーモンスレッドのまま終了を待たない）。1つの遅いセグメントが処理全体の完了時間を
+    決めてしまうことを防ぐ。追加のリクエストは応答が遅い場合にだけ送り、エラーの再試行は
+    呼び出し元に任せる。
+
+    制限時間を超えたリクエストも中断できないため、応答待ちのまま保持しておき、同じセグメントの
+    再試行ではリクエストを送り直さずにその結果を待つ。結果を破棄したリクエストや応答待ちの
+    リクエストが残っている間は追加のリクエストを送らないため、同時に送るリクエストは
+    実行中のセグメントあたり最大2件（切り替え先を含めて3件）に収まる。
+
+    切り替え先（もう一方のプロバイダー）の関数を渡した場合は、接続先側の障害によるエラーが
+    連続した時点、または応答が一定時間ない時点でセグメントを切り替え先に送る。
+    切り替えた後は一定時間、元のプロバイダーを試さずに切り替え先を使う。
+    """
+
+    def __init__(
+        self,
+        hedge_enabled: bool = False,
+        hedge_percentile: float = 0.9,
+        hedge_min_delay_seconds: float = 20.0,
+        timeout_seconds: Optional[float] = None,
+        failover_after_errors: int = 0,
+        failover_after_seconds: Optional[float] = None,
+        failover_cooldown_seconds: float = 120.0
+    ):
+        """
+        Args:
+            hedge_enabled (bool): 追加のリクエストを送るかどうか
+            hedge_percentile (float): 追加のリクエストを送る遅延のパーセンタイル（0〜1）
+            hedge_min_delay_seconds (float): 追加のリクエストを送るまでの最短の待ち時間（秒）
+            timeout_seconds (float, optional): 1回の書き起こしの制限時間（秒）。超えた場合は SegmentTimeoutError
+            failover_after_errors (int): 接続先側の障害によるエラーがこの回数連続したら切り替え先に送る（0は無効）
+            failover_after_seconds (float, optional): この秒数応答がない場合に切り替え先にも送る
+            failover_cooldown_seconds (float): 切り替えた後、元のプロバイダーを再び試すまでの時間（秒）
+        """
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay_seconds = hedge_min_delay_seconds
+        self.timeout_seconds = timeout_seconds
+        self.failover_after_errors = failover_after_errors
+        self.failover_after_seconds = failover_after_seconds
+        self.failover_cooldown_seconds = failover_cooldown_seconds
+        self.latency = LatencyTracker()
+        self._lock = threading.Lock()
+        self._consecutive_provider_errors = 0
+        self._failover_since: Optional[float] = None
+        self.failover_events: List[Dict[str, Any]] = []
+        # 応答を待たずに戻ったリクエスト（Future -> (セグメント, 書き起こし関数, 種類, 再試行で待つか)）
+        self._abandoned: Dict[Future, Tuple[AudioSegmentBuffer, Callable, str, bool]] = {}
+        self.stats: Dict[str, int] = {
+            "requests": 0, "hedged": 0, "hedge_wins": 0, "timeouts": 0, "failovers": 0, "failover_wins": 0
+        }
+
+    @classmethod
+    def from_config(cls, transcription_config: Any) -> "SegmentExecutor":
+        """TranscriptionConfig から生成する"""
+        return cls(
+            hedge_enabled=transcription_config.hedge_enabled,
+            hedge_percentile=transcription_config.hedge_percentile,
+            hedge_min_delay_seconds=transcription_config.hedge_min_delay_seconds,
+            timeout_seconds=transcription_config.segment_timeout_seconds or None,
+            failover_after_errors=transcription_config.failover_after_errors,
+            failover_after_seconds=transcription_config.failover_after_seconds or None,
+            failover_cooldown_seconds=transcription_config.failover_cooldown_seconds,
+        )
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _record_provider_error(self) -> bool:
+        """接続先側の障害によるエラーを記録し、切り替えるべきかを返す"""
+        with self._lock:
+            self._consecutive_provider_errors += 1
+            return bool(self.failover_after_errors) and self._consecutive_provider_errors >= self.failover_after_errors
+
+    def _record_provider_success(self) -> None:
+        """元のプロバイダーが応答したため、連続エラー数と切り替え状態を戻す"""
+        with self._lock:
+            if self._failover_since is not None:
+                logger.info("元のプロバイダーが復旧したため、切り替えを終了します")
+            self._consecutive_provider_errors = 0
+            self._failover_since = None
+
+    def _in_failover(self) -> bool:
+        """エラーによる切り替え中で、元のプロバイダーを再び試す時間になっていないか"""
+        with self._lock:
+            return (
+                self._failover_since is not None
+                and time.monotonic() - self._failover_since < self.failover_cooldown_seconds
+            )
+
+    def _abandon(self, pending: Dict[Future, str], segment: AudioSegmentBuffer, transcribe: Callable, timed_out: bool) -> None:
+        """応答を待たずに戻るリクエストを記録する（制限時間切れの場合は同じセグメントの再試行で結果を待つ）"""
+        with self._lock:
+            for future, label in pending.items():
+                self._abandoned[future] = (segment, transcribe, label, timed_out)
+
+    def _adopt_abandoned(self, segment: AudioSegmentBuffer, transcribe: Callable) -> Dict[Future, str]:
+        """制限時間切れで残した同じセグメント・同じ関数のリクエストを引き取る"""
+        with self._lock:
+            adopted = {
+                future: label
+                for future, (owner, function, label, timed_out) in self._abandoned.items()
+                if timed_out and owner is segment and function is transcribe
+            }
+            for future in adopted:
+                del self._abandoned[future]
+            return adopted
+
+    def in_flight_abandoned(self) -> int:
+        """応答を待たずに戻ったリクエストのうち、まだ実行中の件数"""
+        with self._lock:
+            for future in [future for future in self._abandoned if future.done()]:
+                del self._abandoned[future]
+            return len(self._abandoned)
+
+    def hedge_delay(self, audio_seconds: float) -> Optional[float]:
+        """追加のリクエストを送るまでの待ち時間（秒）。実績が足りない場合はNone"""
+        if not self.hedge_enabled or len(self.latency) < MIN_SAMPLES_FOR_HEDGE:
+            return None
+        per_second = self.latency.percentile(self.hedge_percentile)
+        return max(self.hedge_min_delay_seconds, per_second * max(audio_seconds, 1.0))
+
+    @staticmethod
+    def _start(transcribe: Callable[[AudioSegmentBuffer], str], segment: AudioSegmentBuffer) -> Future:
+        """書き起こしをデーモンスレッドで開始する（終了を待たずにプロセスを終了できるようにする）"""
+        future: Future = Future()
+        future.set_running_or_notify_cancel()
+
+        def run() -> None:
+            try:
+                # 結果を採用した後に呼び出し元が release() しても、このスレッドが終わるまでデータを残す
+                with segment.in_use():
+                    result = transcribe(segment)
+                future.set_result(result)
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name=f"segment-{segment.index}", daemon=True).start()
+        return future
+
+    def wrap(
+        self,
+        transcribe: Callable[[AudioSegmentBuffer], str],
+        hedge: Optional[Callable[[AudioSegmentBuffer], str]] = None,
+        failover: Optional[Callable[[AudioSegmentBuffer], str]] = None
+    ) -> Callable[[AudioSegmentBuffer], str]:
+        """
+        書き起こし関数をヘッジ・制限時間・プロバイダー切り替え付きの関数に変換する
+
+        Args:
+            transcribe (Callable): セグメントを受け取り書き起こしテキストを返す関数
+            hedge (Callable, optional): 追加のリクエストに使う関数（別のモデルなど。省略時は transcribe）
+            failover (Callable, optional): 障害時に使うもう一方のプロバイダーの関数
+        Returns:
+            Callable: 同じ引数・戻り値の関数
+        """
+        if not self.hedge_enabled and not self.timeout_seconds and failover is None:
+            return transcribe
+        return lambda segment: self.run(segment, transcribe, hedge or transcribe, failover)
+
+    def run(
+        self,
+        segment: AudioSegmentBuffer,
+        transcribe: Callable[[AudioSegmentBuffer], str],
+        hedge: Callable[[AudioSegmentBuffer], str],
+        failover: Optional[Callable[[AudioSegmentBuffer], str]] = None
+    ) -> str:
+        """
+        セグメントを書き起こす（必要に応じて追加のリクエストを送り、先に返った結果を使う）
+
+        Args:
+            segment (AudioSegmentBuffer): 書き起こすセグメント
+            transcribe (Callable): 最初のリクエストに使う関数
+            hedge (Callable): 追加のリクエストに使う関数
+            failover (Callable, optional): 障害時に使うもう一方のプロバイダーの関数
+        Returns:
+            str: 書き起こしテキスト
+        Raises:
+            SegmentTimeoutError: 制限時間内にどのリクエストも完了しなかった場合
+        """
+        self._count("requests")
+        audio_seconds = segment.duration_seconds
+        started = time.monotonic()
+        deadline = started + self.timeout_seconds if self.timeout_seconds else None
+        pending: Dict[Future, str] = {}
+        hedge_at = failover_at = None
+
+        def start_failover(reason: str) -> None:
+            self._count("failovers")
+            with self._lock:
+                self.failover_events.append({
+                    "segment": segment.index,
+                    "reason": reason,
+                    "elapsed_seconds": round(time.monotonic() - started, 1),
+                })
+            logger.warning(f"セグメント {segment.index}: もう一方のプロバイダーに切り替えて書き起こします（{reason}）")
+            pending[self._start(failover, segment)] = "failover"
+
+        adopted = self._adopt_abandoned(segment, transcribe)
+        if adopted:
+            # 制限時間切れで残したリクエストがまだ応答を待っている（送り直さずにその結果を待つ）
+            logger.info(f"セグメント {segment.index}: 前回の制限時間切れで応答待ちのリクエスト（{len(adopted)}件）の結果を待ちます")
+            pending.update(adopted)
+        elif failover is not None and self._in_failover():
+            start_failover("障害による切り替え中")
+        else:
+            pending[self._start(transcribe, segment)] = "primary"
+            delay = self.hedge_delay(audio_seconds)
+            hedge_at = started + delay if delay is not None else None
+            if failover is not None and self.failover_after_seconds:
+                failover_at = started + self.failover_after_seconds
+
+        while pending:
+            now = time.monotonic()
+            timers = [t for t in (hedge_at, failover_at, deadline) if t is not None]
+            wake_at = min(timers) if timers else None
+            done, _ = wait(list(pending), timeout=max(0.0, wake_at - now) if wake_at else None, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                label = pending.pop(future)
+                error = future.exception()
+                if error is None:
+                    elapsed = time.monotonic() - started
+                    if label == "failover":
+                        self._count("failover_wins")
+                        logger.info(f"セグメント {segment.index}: 切り替え先のプロバイダーで完了しました（{elapsed:.1f}秒）")
+                    else:
+                        self.latency.record(elapsed, audio_seconds)
+                        self._record_provider_success()
+                    if label == "hedge":
+                        self._count("hedge_wins")
+                        logger.info(f"セグメント {segment.index}: 追加のリクエストが先に完了しました（{elapsed:.1f}秒）")
+                    if pending:
+                        logger.info(f"セグメント {segment.index}: 残りのリクエストの結果は破棄します")
+                        self._abandon(pending, segment, transcribe, timed_out=False)
+                    return future.result()
+
+                should_failover = label != "failover" and is_provider_error(error) and self._record_provider_error()
+                if failover is not None and should_failover and "failover" not in pending.values():
+                    logger.warning(f"セグメント {segment.index}: {label}のリクエストが失敗しました: {str(error)}")
+                    with self._lock:
+                        self._failover_since = time.monotonic()
+                    hedge_at = failover_at = None
+                    start_failover(f"エラー: {str(error)}")
+                    continue
+                if not pending:
+                    # 応答待ちのリクエストがなければ、再試行は呼び出し元に任せる
+                    raise error
+                logger.warning(f"セグメント {segment.index}: {label}のリクエストが失敗しました: {str(error)}")
+
+            now = time.monotonic()
+            if hedge_at is not None and now >= hedge_at and self.in_flight_abandoned():
+                hedge_at = None
+                logger.info(f"セグメント {segment.index}: 結果を破棄したリクエストが実行中のため、追加のリクエストは送信しません")
+            if hedge_at is not None and now >= hedge_at:
+                hedge_at = None
+                self._count("hedged")
+                logger.warning(
+                    f"セグメント {segment.index}: {now - started:.1f}秒経過しても応答がないため、追加のリクエストを送信します"
+                )
+                pending[self._start(hedge, segment)] = "hedge"
+            if failover_at is not None and now >= failover_at:
+                failover_at = None
+                if "failover" not in pending.values():
+                    start_failover(f"{now - started:.1f}秒経過しても応答がない")
+            if deadline is not None and now >= deadline:
+                self._count("timeouts")
+                self._abandon(pending, segment, transcribe, timed_out=True)
+                raise SegmentTimeoutError(
+                    f"セグメント {segment.index} の書き起こしが制限時間（{self.timeout_seconds:.0f}秒）内に完了しませんでした"
+                )
+
+        raise SegmentTimeoutError(f"セグメント {segment.index} の書き起こしが完了しませんでした")
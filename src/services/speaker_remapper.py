@@ -18,7 +18,7 @@ from typing import Dict, Any, Optional, Union
 
 from src.utils.Common_OpenAIAPI import generate_chat_response, APIError
 from src.utils.new_gemini_api import GeminiAPI, GeminiAPIError
-from src.utils.config import config_manager
+from src.utils.config import config_manager, ConfigSnapshot
 from src.utils.prompt_manager import PromptManager
 
 logger = logging.getLogger(__name__)
@@ -34,12 +34,13 @@ class SpeakerRemapperBase:
         """話者リマッププロンプトを取得"""
         return self.prompt_manager.get_prompt("speakerremap")
 
-    def process_transcript(self, transcript_file: Union[str, Path]) -> Path:
+    def process_transcript(self, transcript_file: Union[str, Path], speaker_mapping: Optional[Dict[str, str]] = None) -> Path:
         """
         文字起こしファイルの話者名をリマップする
 
         Args:
             transcript_file (Union[str, Path]): 文字起こしファイルのパス
+            speaker_mapping (Dict[str, str], optional): 取得済みの話者マッピング（一括後処理の結果など。省略時はAIで取得）
 
         Returns:
             Path: リマップ後のファイルパス
@@ -59,15 +60,20 @@ class SpeakerRemapperBase:
         speaker_count = transcript_text.count('"speaker"')
         logger.info(f"変換対象の文字起こしファイル: 長さ={transcript_length}文字, 話者出現回数={speaker_count}回")
 
-        # "speaker": パターンの出現をカウント
+        # 結合済みの書き起こしは有効なJSONのため、解析できれば正規表現による走査を行わない
         speaker_pattern = r'"speaker"\s*:\s*"([^"]*)"'
-        speakers = re.findall(speaker_pattern, transcript_text)
+        transcript_data = self._load_transcript_json(transcript_text)
+        if transcript_data is not None:
+            speakers = [item.get("speaker", "") for item in transcript_data["conversations"]]
+        else:
+            speakers = re.findall(speaker_pattern, transcript_text)
         unique_speakers = set(speakers)
 
         logger.info(f"変換前の一意な話者: {len(unique_speakers)}人 - {', '.join(sorted(unique_speakers))}")
 
-        # AIによる話者マッピングの取得
-        speaker_mapping = self._get_speaker_mapping(transcript_text)
+        # AIによる話者マッピングの取得（取得済みの場合はそれを使う）
+        if speaker_mapping is None:
+            speaker_mapping = self._get_speaker_mapping(transcript_text)
 
         # マッピング結果を表形式で分かりやすく表示
         logger.info("【話者マッピング結果】")
@@ -90,10 +96,13 @@ class SpeakerRemapperBase:
                 logger.warning(f"警告: マッピングには「{original}」が含まれていますが、元のテキストには存在しません")
 
         # 話者名の置換処理
-        remapped_text = self._replace_speakers(transcript_text, speaker_mapping)
-
-        # 変換後の話者情報をログ
-        after_speakers = re.findall(speaker_pattern, remapped_text)
+        if transcript_data is not None:
+            remapped_data = self._replace_speakers_in_conversations(transcript_data, speaker_mapping)
+            remapped_text = json.dumps(remapped_data, ensure_ascii=False, indent=2)
+            after_speakers = [item.get("speaker", "") for item in remapped_data["conversations"]]
+        else:
+            remapped_text = self._replace_speakers(transcript_text, speaker_mapping)
+            after_speakers = re.findall(speaker_pattern, remapped_text)
         after_unique_speakers = set(after_speakers)
 
         # 変換結果の概要を表示
@@ -141,28 +150,7 @@ class SpeakerRemapperBase:
             str: 話者名が置換されたテキスト
         """
         result_text = transcript_text
-
-        # 詳細なログ出力のために全体のマッピングをログに記録
-        logger.info(f"話者リマップ開始: 以下のマッピングを適用します:")
-
-        # スキップする話者名のフィルタリング
-        skip_patterns = ["[不明]", "[", "unknown", "Unknown", "不明"]
-        filtered_mapping = {}
-        skipped_mapping = {}
-
-        for old_name, new_name in speaker_mapping.items():
-            # 特定のパターンを含む場合はスキップする
-            if any(pattern in new_name for pattern in skip_patterns):
-                skipped_mapping[old_name] = new_name
-                logger.info(f"  - \"{old_name}\" → \"{new_name}\" (スキップします: 不明/unknownを含むため)")
-            else:
-                filtered_mapping[old_name] = new_name
-                logger.info(f"  - \"{old_name}\" → \"{new_name}\"")
-
-        if skipped_mapping:
-            logger.warning(f"以下の{len(skipped_mapping)}件のマッピングはスキップされます (不明/unknownを含むため):")
-            for old, new in skipped_mapping.items():
-                logger.warning(f"  - \"{old}\" → \"{new}\"")
+        filtered_mapping = self._filter_speaker_mapping(speaker_mapping)
 
         # 変換カウントを記録する辞書
         replacement_counts = {old: 0 for old in filtered_mapping.keys()}
@@ -186,7 +174,48 @@ class SpeakerRemapperBase:
 
             logger.info(f"  話者置換: \"{old_name}\" → \"{new_name}\"、{actual_count}件の置換 (検出: {count}件)")
 
-        # 全体の置換結果サマリーをログに記録
+        self._log_replacement_summary(replacement_counts)
+        return result_text
+
+    def _load_transcript_json(self, transcript_text: str) -> Optional[Dict[str, Any]]:
+        """書き起こしが {"conversations": [...]} 形式のJSONであれば解析結果を返す（それ以外はNone）"""
+        try:
+            data = json.loads(transcript_text)
+        except json.JSONDecodeError:
+            logger.info("書き起こしがJSONとして解析できないため、テキストとして処理します")
+            return None
+        if isinstance(data, dict) and isinstance(data.get("conversations"), list):
+            data["conversations"] = [item for item in data["conversations"] if isinstance(item, dict)]
+            return data
+        return None
+
+    def _replace_speakers_in_conversations(self, transcript_data: Dict[str, Any], speaker_mapping: Dict[str, str]) -> Dict[str, Any]:
+        """
+        解析済みの書き起こしJSON内の話者名を置換する
+
+        Args:
+            transcript_data (Dict[str, Any]): {"conversations": [...]} 形式の書き起こし
+            speaker_mapping (Dict[str, str]): 話者名マッピング辞書
+
+        Returns:
+            Dict[str, Any]: 話者名が置換された書き起こし
+        """
+        filtered_mapping = self._filter_speaker_mapping(speaker_mapping)
+        replacement_counts = {old: 0 for old in filtered_mapping.keys()}
+
+        for item in transcript_data["conversations"]:
+            speaker = item.get("speaker")
+            if speaker in filtered_mapping:
+                item["speaker"] = filtered_mapping[speaker]
+                replacement_counts[speaker] += 1
+
+        for old_name, count in replacement_counts.items():
+            logger.info(f"  話者置換: \"{old_name}\" → \"{filtered_mapping[old_name]}\"、{count}件の置換")
+        self._log_replacement_summary(replacement_counts)
+        return transcript_data
+
+    def _log_replacement_summary(self, replacement_counts: Dict[str, int]) -> None:
+        """置換結果のサマリーをログに記録する"""
         total_replacements = sum(replacement_counts.values())
         logger.info(f"話者リマップ完了: 合計{total_replacements}件の置換を実行しました")
 
@@ -195,7 +224,31 @@ class SpeakerRemapperBase:
             if count == 0:
                 logger.warning(f"警告: 話者「{old_name}」は定義されていますが、テキスト内での置換はありませんでした")
 
-        return result_text
+    def _filter_speaker_mapping(self, speaker_mapping: Dict[str, str]) -> Dict[str, str]:
+        """不明/unknownを含むマッピングを除外する"""
+        # 詳細なログ出力のために全体のマッピングをログに記録
+        logger.info(f"話者リマップ開始: 以下のマッピングを適用します:")
+
+        # スキップする話者名のフィルタリング
+        skip_patterns = ["[不明]", "[", "unknown", "Unknown", "不明"]
+        filtered_mapping = {}
+        skipped_mapping = {}
+
+        for old_name, new_name in speaker_mapping.items():
+            # 特定のパターンを含む場合はスキップする
+            if any(pattern in new_name for pattern in skip_patterns):
+                skipped_mapping[old_name] = new_name
+                logger.info(f"  - \"{old_name}\" → \"{new_name}\" (スキップします: 不明/unknownを含むため)")
+            else:
+                filtered_mapping[old_name] = new_name
+                logger.info(f"  - \"{old_name}\" → \"{new_name}\"")
+
+        if skipped_mapping:
+            logger.warning(f"以下の{len(skipped_mapping)}件のマッピングはスキップされます (不明/unknownを含むため):")
+            for old, new in skipped_mapping.items():
+                logger.warning(f"  - \"{old}\" → \"{new}\"")
+
+        return filtered_mapping
 
     def _parse_mapping_response(self, ai_response: str) -> Dict[str, str]:
         """
@@ -315,6 +368,10 @@ class GeminiSpeakerRemapper(SpeakerRemapperBase):
         try:
             self.gemini_api = GeminiAPI()
             remap_prompt = self.get_remap_prompt()
+            if self.gemini_api.use_response_schema:
+                # スキーマに従った構造化出力で取得する（JSONの抽出やパースの失敗が起きない）
+                return self.gemini_api.generate_speaker_mapping(transcript_text, remap_prompt)
+
             combined_prompt = f"{remap_prompt}\n\n{transcript_text}"
 
             # Gemini APIを呼び出し
@@ -331,15 +388,18 @@ class GeminiSpeakerRemapper(SpeakerRemapperBase):
             return {}
 
 
-def create_speaker_remapper() -> SpeakerRemapperBase:
+def create_speaker_remapper(snapshot: Optional[ConfigSnapshot] = None) -> SpeakerRemapperBase:
     """
     設定に基づいて適切な話者リマッパーを作成する
 
+    Args:
+        snapshot (ConfigSnapshot, optional): 使用する設定スナップショット（省略時は現在の設定）
+
     Returns:
         SpeakerRemapperBase: 話者リマッパーのインスタンス
     """
     # 設定からAIモデルタイプを取得
-    ai_model = config_manager.get_config().transcription.method
+    ai_model = (snapshot or config_manager.get_snapshot()).config.transcription.method
 
     # 詳細なログ
     logger.info(f"話者リマッパー作成: 設定されたAIモデル={ai_model}")
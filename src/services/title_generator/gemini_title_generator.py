@@ -1,13 +1,19 @@
+from typing import Optional
 from .base_title_generator import BaseTitleGenerator, TitleGenerationError
-from ...utils.new_gemini_api import GeminiAPI, GeminiAPIError as TranscriptionError
+from ...utils.new_gemini_api import GeminiAPI, GeminiContextCache, GeminiAPIError as TranscriptionError
 
 class GeminiTitleGenerator(BaseTitleGenerator):
     """Google Geminiを使用した会議タイトル生成クラス"""
     
-    def __init__(self):
-        """Initialize Gemini title generator"""
+    def __init__(self, context_cache: Optional[GeminiContextCache] = None):
+        """Initialize Gemini title generator
+
+        Args:
+            context_cache (GeminiContextCache, optional): 書き起こしのコンテキストキャッシュ
+        """
         super().__init__()
         self.gemini_api = GeminiAPI()
+        self.context_cache = context_cache
         
         # タイトル生成用のシステムプロンプト
         self.system_prompt = """会議の書き起こしからこの会議のメインとなる議題が何だったのかを教えて。
@@ -39,7 +45,7 @@ class GeminiTitleGenerator(BaseTitleGenerator):
             self.logger.info("Geminiでタイトル生成を開始")
             
             # Gemini APIを使用してタイトルを生成
-            title = self.gemini_api.generate_meeting_title(text)
+            title = self.gemini_api.generate_meeting_title(text, self.context_cache)
             
             self.logger.info(f"タイトル生成完了: {title}")
             return title
@@ -14,7 +14,7 @@ class TitleGeneratorFactory:
     """タイトルジェネレーターのファクトリークラス"""
     
     @staticmethod
-    def create_generator(transcription_method: str) -> BaseTitleGenerator:
+    def create_generator(transcription_method: str, context_cache: Optional[object] = None) -> BaseTitleGenerator:
         """
         書き起こし方式に応じたタイトルジェネレーターを生成する
 
@@ -23,6 +23,7 @@ class TitleGeneratorFactory:
                 - "whisper_gpt4": Whisper + GPT-4方式
                 - "gpt4_audio": GPT-4 Audio方式
                 - "gemini": Gemini方式
+            context_cache (GeminiContextCache, optional): 書き起こしのコンテキストキャッシュ（Gemini方式のみ使用）
 
         Returns:
             BaseTitleGenerator: タイトルジェネレーターのインスタンス
@@ -36,7 +37,7 @@ class TitleGeneratorFactory:
             if transcription_method in ["whisper_gpt4", "gpt4_audio"]:
                 return GPTTitleGenerator()
             elif transcription_method == "gemini":
-                return GeminiTitleGenerator()
+                return GeminiTitleGenerator(context_cache)
             else:
                 raise TitleGeneratorFactoryError(f"サポートされていない書き起こし方式です: {transcription_method}")
                 
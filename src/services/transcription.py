@@ -1,18 +1,31 @@
 import os
+import copy
 import pathlib
 import logging
 import datetime
 import json
-from typing import Dict, Any, Literal
-from ..utils.Common_OpenAIAPI import generate_transcribe_from_audio, generate_structured_chat_response, generate_audio_chat_response, APIError, MEETING_TRANSCRIPT_SCHEMA
+from typing import Dict, Any, Literal, Callable, Iterable, List, Optional
+from ..utils.Common_OpenAIAPI import generate_transcribe_from_audio, generate_structured_chat_response, generate_audio_chat_response, get_api_key, APIError, MEETING_TRANSCRIPT_SCHEMA
 from ..utils.new_gemini_api import GeminiAPI, GeminiAPIError as TranscriptionError
 import sys
 from ..modules.audio_splitter import AudioSplitter
-from pathlib import Path
+from ..modules.segment_buffer import AudioSegmentBuffer
+from ..modules.segment_planner import SegmentPlanner, SegmentationStats
+from .segment_executor import SegmentExecutor
+from .batch_transcription import BatchTranscriber
+from .format_converter import probe_media, passthrough_formats
+from .live_transcriber import LiveAudioSource
+from ..utils.transcript_json import merge_segment_transcripts, parse_conversations, dump_conversations
 import re
+import shutil
+from ..utils.config import config_manager, ConfigSnapshot
+from ..utils.run_context import RunContext
 
 logger = logging.getLogger(__name__)
 
+# 段階的書き起こしで、出力文字数が過去の実績（発話1秒あたり）のこの割合を下回る場合は書き起こし漏れとみなす
+ESCALATION_MIN_COVERAGE_RATIO = 0.3
+
 def add_speaker_identifier(text, identifier):
     """
     文字起こしテキスト内の話者名に識別子を付加する
@@ -68,7 +81,32 @@ class TranscriptionError(Exception):
     pass
 
 class TranscriptionService:
-    def __init__(self, output_dir: str = "output/transcriptions", config_path: str = "config/settings.json"):
+    def __init__(self, output_dir: str = "output/transcriptions", config_path: str = None, snapshot: ConfigSnapshot = None, run_context: RunContext = None, deferred: bool = False, speed_factor: float = 1.0, live_source: Optional[LiveAudioSource] = None):
+        """
+        Args:
+            output_dir (str): 出力ディレクトリ（run_context指定時はその作業ディレクトリを使用）
+            config_path (str, optional): 互換性のために残している引数（設定はConfigManagerから取得する）
+            snapshot (ConfigSnapshot, optional): 使用する設定スナップショット（省略時は現在の設定）
+            run_context (RunContext, optional): 実行コンテキスト（出力先・設定・実行ごとの状態）
+            deferred (bool): 遅延実行モード（セグメントの書き起こしをバッチAPIでまとめて実行する）
+            speed_factor (float): 入力音声を速めた倍率（AudioProcessor.change_speed。セグメントの位置を元の時間軸に戻すために使う）
+            live_source (LiveAudioSource, optional): ライブモードで録音中のファイルからセグメントを切り出すソース
+                （指定時は音声ファイルを分割せず、切り出されたセグメントから順に書き起こす）
+        """
+        self.run_context = run_context
+        self.live_source = live_source
+        if live_source is not None and deferred:
+            logger.warning("ライブモードは遅延実行モードに対応していないため、通常の書き起こしで処理します")
+            deferred = False
+        self.deferred = deferred
+        self.speed_factor = speed_factor
+        self._segmentation_info: Dict[str, Any] = {}
+        self._owns_run_context = run_context is None
+        if run_context is not None:
+            output_dir = run_context.path("transcriptions")
+            snapshot = run_context.snapshot
+        self.snapshot = snapshot or config_manager.get_snapshot()
+
         self.output_dir = pathlib.Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         logger.info(f"出力ディレクトリを作成/確認: {self.output_dir}")
@@ -77,29 +115,17 @@ class TranscriptionService:
         is_frozen = getattr(sys, 'frozen', False)
         logger.info(f"TranscriptionService初期化: 実行モード={'PyInstaller' if is_frozen else '通常'}")
 
-        # PyInstallerモードでの設定ファイルパスの解決
-        if is_frozen:
-            exe_dir = pathlib.Path(sys.executable).parent
-            alt_config_path = exe_dir / config_path
-            if alt_config_path.exists():
-                logger.info(f"PyInstaller実行モード: 代替設定ファイルを使用 - {alt_config_path}")
-                config_path = str(alt_config_path)
-            else:
-                logger.warning(f"PyInstaller実行モード: 代替設定ファイルが見つかりません - {alt_config_path}")
-
-        logger.info(f"使用する設定ファイルパス: {config_path}")
+        if config_path:
+            logger.warning(f"config_pathは使用されません。ConfigManagerの設定を使用します: {config_path}")
 
-        # 設定の読み込み
-        self.config = self._load_config(config_path)
+        # 設定の読み込み（ConfigManagerのスナップショットを使用し、ファイルは再読み込みしない）
+        self.config = self._load_config(self.snapshot)
         self.transcription_method = self.config.get("transcription", {}).get("method", "gpt4_audio")
         logger.info(f"書き起こし方式: {self.transcription_method}")
 
-        # 再試行フラグの初期化
-        self.has_reached_max_retries = False
-
         # Gemini APIの初期化（Gemini方式が選択されている場合）
         if self.transcription_method == "gemini":
-            self.gemini_api = GeminiAPI()
+            self.gemini_api = GeminiAPI(snapshot=self.snapshot)
             logger.info("Gemini APIを初期化しました")
 
         # プロンプトの読み込み
@@ -138,79 +164,54 @@ class TranscriptionService:
             logger.error(f"プロンプトファイルの読み込み中にエラー: {str(e)}")
             raise TranscriptionError(f"プロンプトファイルの読み込みに失敗しました: {str(e)}")
 
-    def _load_config(self, config_path: str) -> Dict[str, Any]:
-        """設定ファイルから設定を読み込む"""
-        try:
-            logger.info(f"設定ファイルを読み込み開始: {config_path}")
-            config_file = pathlib.Path(config_path)
-
-            if not config_file.exists():
-                logger.info("設定ファイルが見つかりません。デフォルトの設定を使用します。")
-                default_config = {"transcription": {"method": "gpt4_audio"}}
-                logger.info(f"デフォルト設定内容: {default_config}")
-                return default_config
-
-            try:
-                logger.info(f"設定ファイルを読み込み中: {config_file} (サイズ: {config_file.stat().st_size} bytes)")
-                with open(config_file, "r", encoding="utf-8") as f:
-                    config_text = f.read().strip()
-                    # 空ファイルチェック
-                    if not config_text:
-                        logger.warning("設定ファイルが空です。デフォルトの設定を使用します。")
-                        default_config = {"transcription": {"method": "gpt4_audio"}}
-                        logger.info(f"空ファイル時のデフォルト設定内容: {default_config}")
-                        return default_config
-
-                    # 文字列を整形して余分な文字を削除
-                    config_text = config_text.replace('\n', '').replace('\r', '').strip()
-                    # 最後のカンマを削除（一般的なJSON解析エラーの原因）
-                    if config_text.endswith(',}'):
-                        config_text = config_text[:-2] + '}'
-
-                    logger.info(f"設定ファイル内容（処理後）: {config_text[:100]}...")
-                    config = json.loads(config_text)
-            except json.JSONDecodeError as e:
-                logger.warning(f"設定ファイルのJSONパースに失敗しました: {str(e)}。デフォルトの設定を使用します。")
-                default_config = {"transcription": {"method": "gpt4_audio"}}
-                logger.info(f"JSONエラー時のデフォルト設定内容: {default_config}")
-                return default_config
-            except Exception as e:
-                logger.warning(f"設定ファイルの読み込み中に予期せぬエラーが発生しました: {str(e)}。デフォルトの設定を使用します。")
-                default_config = {"transcription": {"method": "gpt4_audio"}}
-                logger.info(f"その他エラー時のデフォルト設定内容: {default_config}")
-                return default_config
-
-            method = config.get("transcription", {}).get("method", "gpt4_audio")
-            logger.info(f"読み込まれた書き起こし方式: {method}")
+    @property
+    def has_reached_max_retries(self) -> bool:
+        """現在の実行で最大再試行回数に達したセグメントがあるか（状態はRunContextが保持する）"""
+        return self.run_context is not None and self.run_context.has_reached_max_retries
 
-            if method not in ["whisper_gpt4", "gpt4_audio", "gemini"]:
-                logger.warning(f"無効な書き起こし方式が指定されています: {method}")
-                logger.info("デフォルトの書き起こし方式を使用します。")
-                config["transcription"]["method"] = "gpt4_audio"
+    def _load_config(self, snapshot: ConfigSnapshot) -> Dict[str, Any]:
+        """設定スナップショットから書き起こしサービス用の設定辞書を作成する"""
+        # 従来どおり設定ファイルの生データを使用する（未設定の項目は各処理のデフォルト値を使う）
+        config = copy.deepcopy(dict(snapshot.raw))
+        if not isinstance(config.get("transcription"), dict):
+            config["transcription"] = {"method": "gpt4_audio"}
+        method = config["transcription"].get("method", "gpt4_audio")
+        logger.info(f"読み込まれた書き起こし方式: {method} (設定バージョン: {snapshot.version})")
 
-            return config
+        if method not in ["whisper_gpt4", "gpt4_audio", "gemini"]:
+            logger.warning(f"無効な書き起こし方式が指定されています: {method}")
+            logger.info("デフォルトの書き起こし方式を使用します。")
+            config["transcription"]["method"] = "gpt4_audio"
 
-        except Exception as e:
-            logger.error(f"設定ファイルの処理中に予期せぬエラーが発生しました: {str(e)}")
-            default_config = {"transcription": {"method": "gpt4_audio"}}
-            logger.info(f"最終エラー時のデフォルト設定内容: {default_config}")
-            return default_config
+        return config
 
     def process_audio(self, audio_file: pathlib.Path, additional_prompt: str = "") -> Dict[str, Any]:
         """音声ファイルの書き起こし処理を実行"""
         try:
             logger.info(f"書き起こしを開始: {audio_file}")
-            logger.info(f"音声ファイルサイズ: {audio_file.stat().st_size:,} bytes")
+            if self.live_source is None:
+                # ライブモードでは録音ファイルがまだ作成されていない場合がある（作成は LiveAudioSource が待つ）
+                logger.info(f"音声ファイルサイズ: {audio_file.stat().st_size:,} bytes")
             logger.info(f"使用する書き起こし方式: {self.transcription_method}")
 
-            # 再試行フラグをリセット
-            self.has_reached_max_retries = False
+            # 実行コンテキストが渡されていない場合は呼び出しごとに作成する（出力先は従来どおり）
+            if self._owns_run_context:
+                self.run_context = RunContext(snapshot=self.snapshot)
 
-            # タイムスタンプの生成
-            timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-            logger.info(f"タイムスタンプ: {timestamp}")
+            # タイムスタンプは実行コンテキストのものを使用（出力ファイル名に使う）
+            timestamp = self.run_context.timestamp
+            logger.info(f"タイムスタンプ: {timestamp} (run_id: {self.run_context.run_id})")
+
+            # 再開可能アップロードの進捗を実行の進捗イベントとして発行する
+            if self.transcription_method == "gemini" and self.gemini_api.upload_progress_callback is None:
+                progress = self.run_context.progress
+                self.gemini_api.upload_progress_callback = lambda upload: progress.bytes_uploaded(upload.sent_bytes, upload.total_bytes)
 
             # 書き起こし処理の実行
+            if self.deferred and self.transcription_method == "whisper_gpt4":
+                logger.warning("Whisper + GPT-4方式は遅延実行モードに対応していないため、通常の書き起こしで処理します")
+            if self.live_source is not None and self.transcription_method == "whisper_gpt4":
+                raise TranscriptionError("Whisper + GPT-4方式はライブモードに対応していません（Gemini または GPT-4 Audio 方式を使用してください）")
             if self.transcription_method == "whisper_gpt4":
                 result = self._process_with_whisper_gpt4(audio_file, additional_prompt, timestamp)
             elif self.transcription_method == "gemini":
@@ -221,6 +222,7 @@ class TranscriptionService:
             # 処理完了後、最大再試行回数に達したかどうかをチェックして通知
             if self.has_reached_max_retries:
                 result["warning"] = "一部のセグメントで最大再試行回数に達しました。文字起こし結果にエラーが含まれている可能性があります。"
+                self.run_context.add_warning(result["warning"])
                 logger.warning("警告: 一部のセグメントで最大再試行回数に達しました。文字起こし結果にエラーが含まれている可能性があります。")
 
             return result
@@ -288,7 +290,7 @@ class TranscriptionService:
                     logger.warning(f"再試行します ({attempt+1}/{max_retries})")
                 else:
                     logger.error(f"最大再試行回数に達しました。")
-                    self.has_reached_max_retries = True  # エラー表示のためのフラグ
+                    self.run_context.mark_max_retries_reached()  # エラー表示のためのフラグ
                     raise TranscriptionError(f"テキストの整形に失敗しました: {str(e)}")
 
         if not formatted_text:
@@ -318,89 +320,110 @@ class TranscriptionService:
 
     def _process_with_gpt4_audio(self, audio_file: pathlib.Path, timestamp: str) -> Dict[str, Any]:
         """GPT-4 Audio方式での書き起こし処理"""
-        logger.info("GPT-4 Audioで音声認識・整形を開始")
+        def transcribe_with(model_name):
+            return lambda segment: generate_audio_chat_response(
+                segment.source(), self.system_prompt, audio_format=segment.format, model_name=model_name
+            )
+
+        return self._process_segmented(
+            audio_file,
+            timestamp,
+            method_label="GPT-4 Audio",
+            transcribe_with=transcribe_with,
+            strong_model=self.snapshot.get_model("openai_4oaudio"),
+            fast_model_type="openai_4oaudio_fast",
+            create_batch_transcriber=lambda model_name: BatchTranscriber(
+                "openai", model_name, self.run_context, system_prompt=self.system_prompt
+            ),
+            save_raw_text=False
+        )
+
+    def _process_with_gemini(self, audio_file: pathlib.Path, timestamp: str) -> Dict[str, Any]:
+        """Gemini方式での書き起こし処理"""
+        def transcribe_with(model_name):
+            return lambda segment: self.gemini_api.transcribe_audio(
+                segment.source(), mime_type=segment.mime_type, model=model_name
+            )
+
+        return self._process_segmented(
+            audio_file,
+            timestamp,
+            method_label="Gemini",
+            transcribe_with=transcribe_with,
+            strong_model=self.gemini_api.transcription_model,
+            fast_model_type="gemini_transcription_fast",
+            create_batch_transcriber=lambda model_name: BatchTranscriber(
+                "gemini", model_name, self.run_context, gemini_api=self.gemini_api
+            ),
+            save_raw_text=True
+        )
+
+    def _process_segmented(
+        self,
+        audio_file: pathlib.Path,
+        timestamp: str,
+        method_label: str,
+        transcribe_with: Callable[[str], Callable[[AudioSegmentBuffer], str]],
+        strong_model: str,
+        fast_model_type: str,
+        create_batch_transcriber: Callable[[str], BatchTranscriber],
+        save_raw_text: bool
+    ) -> Dict[str, Any]:
+        """音声を分割してセグメントごとに書き起こし、結果を結合して保存する（GPT-4 Audio方式・Gemini方式の共通処理）
+
+        Args:
+            audio_file (pathlib.Path): 音声ファイル
+            timestamp (str): 出力ファイル名に使うタイムスタンプ
+            method_label (str): ログ・エラーメッセージに使う方式名
+            transcribe_with (Callable): モデル名を受け取り、セグメントを書き起こす関数を返す関数
+            strong_model (str): 書き起こしに使うモデル（段階的書き起こしでは上位モデル）
+            fast_model_type (str): 段階的書き起こしの高速モデルの設定名
+            create_batch_transcriber (Callable): モデル名を受け取り、遅延実行モードのBatchTranscriberを返す関数
+            save_raw_text (bool): 結合した書き起こしを生テキスト（transcription_<timestamp>.txt）としても保存するかどうか
+
+        Returns:
+            Dict[str, Any]: 書き起こし結果（raw_text, formatted_text, raw_file, formatted_file, timestamp）
+        Raises:
+            TranscriptionError: 書き起こしに失敗した場合
+        """
+        logger.info(f"{method_label}で音声認識・整形を開始")
 
         try:
-            # 設定から分割長を取得（デフォルトは100秒）
-            segment_length = self.config.get('transcription', {}).get('segment_length_seconds', 100)
+            # 設定から分割長を取得（未設定の場合は TranscriptionConfig の既定値）
+            segment_length = self.snapshot.config.transcription.segment_length_seconds
             logger.info(f"設定された分割長: {segment_length}秒")
 
-            # AudioSplitterの初期化（設定された分割長を使用）
-            splitter = AudioSplitter(segment_length_seconds=segment_length)
-
-            # セグメント保存用の一時ディレクトリを作成
+            # セグメント保存用の一時ディレクトリ
             segments_dir = self.output_dir / "segments" / timestamp
-            segments_dir.mkdir(parents=True, exist_ok=True)
-            logger.info(f"セグメント一時ディレクトリを作成: {segments_dir}")
 
             # 音声ファイルを分割
             logger.info("音声ファイルの分割を開始")
-            split_files = splitter.split_audio(str(audio_file), str(segments_dir))
-            logger.info(f"音声を {len(split_files)} 個のセグメントに分割しました")
-
-            # 各セグメントの文字起こし結果を保存
-            all_transcriptions = []
-            for i, segment_file in enumerate(split_files, 1):
-                logger.info(f"セグメント {i}/{len(split_files)} の文字起こしを実行中...")
-
-                # セグメントの文字起こし処理部分を変更
-                max_retries = 2  # 最大再試行回数
-                segment_text = None
-
-                for attempt in range(max_retries + 1):
-                    try:
-                        segment_text_raw = generate_audio_chat_response(str(segment_file), self.system_prompt)
-                        # 文字起こし結果の余分な空白を除去
-                        segment_text = re.sub(r'\s+', ' ', segment_text_raw).strip() if segment_text_raw else ""
-
-                        logger.info(f"セグメント {i} の文字起こし結果: 文字数={len(segment_text)}")
-                        logger.debug(f"セグメント {i} の文字起こし結果（先頭100文字）: {segment_text[:100]}...")
-
-                        # 問題のあるパターンをチェック
-                        logger.info(f"セグメント {i} の繰り返しパターンチェックを実行")
-                        if segment_text and self.is_problematic_transcription(segment_text):
-                            logger.warning(f"セグメント {i} で問題のあるパターンが検出されました")
-                            if attempt < max_retries:
-                                logger.warning(f"セグメント {i} に問題のあるパターンが検出されました。再試行します ({attempt+1}/{max_retries})")
-                                continue
-                            else:
-                                logger.error(f"セグメント {i} の処理が最大再試行回数に達しました。最後の結果を使用します。")
-                        else:
-                            logger.info(f"セグメント {i} は正常なテキストと判断されました")
-                        # 問題なければループを抜ける
-                        break
-                    except Exception as e:
-                        logger.error(f"セグメント {i} の文字起こし中にエラー: {str(e)}")
-                        if attempt < max_retries:
-                            logger.warning(f"再試行します ({attempt+1}/{max_retries})")
-                        else:
-                            logger.error(f"最大再試行回数に達しました。このセグメントをスキップします。")
-                            self.has_reached_max_retries = True  # エラー表示のためのフラグ
-                            segment_text = ""
-
-                if not segment_text:
-                    logger.warning(f"セグメント {i} の文字起こし結果が空です")
-                    continue
-
-                # 話者名に識別子を付加 (セグメント番号を使用)
-                segment_identifier = f"seg{i}"
-                segment_text = add_speaker_identifier(segment_text, segment_identifier)
-                logger.info(f"セグメント {i} の話者名に識別子 '{segment_identifier}' を付加しました")
-
-                # セグメント情報を追加
-                segment_result = {
-                    "segment": i,
-                    "segment_file": Path(segment_file).name,
-                    "text": segment_text
-                }
-                all_transcriptions.append(segment_result)
-                logger.info(f"セグメント {i} の文字起こしが完了")
+            segments = self._split_into_segments(audio_file, segments_dir, segment_length)
+
+            # 各セグメントの文字起こし（段階的書き起こしが有効な場合は高速モデルから始める）
+            fast_model = self._fast_transcription_model(fast_model_type, strong_model)
+            executor = SegmentExecutor.from_config(self.snapshot.config.transcription)
+            self._prepare_failover()
+            transcribe_segment = self._hedged(executor, transcribe_with, fast_model or strong_model)
+            if self.deferred:
+                # 遅延実行モード: 全セグメントをバッチジョブで書き起こし、結果を通常の検証・結合処理に渡す
+                transcribe_segment = create_batch_transcriber(fast_model or strong_model).transcriber(
+                    segments, fallback=transcribe_segment
+                )
+            all_transcriptions = self._transcribe_segments(
+                segments,
+                transcribe_segment,
+                escalate_segment=self._hedged(executor, transcribe_with, strong_model) if fast_model else None
+            )
+            self._record_model_tiering(fast_model, strong_model)
+            self._record_executor_stats(executor)
 
             # 中間結果をJSONとして保存
             complete_result = {
                 "metadata": {
-                    "total_segments": len(split_files),
-                    "original_file": str(audio_file)
+                    "total_segments": len(segments),
+                    "original_file": str(audio_file),
+                    "speed_factor": self.speed_factor
                 },
                 "segments": all_transcriptions
             }
@@ -410,184 +433,456 @@ class TranscriptionService:
                 json.dump(complete_result, f, ensure_ascii=False, indent=2)
             logger.info(f"中間結果をJSONとして保存: {complete_json_path}")
 
-            # 全セグメントの結果を結合
-            combined_text = "".join(seg["text"] for seg in all_transcriptions)
-            formatted_text = re.sub(r'\s+', ' ', combined_text).strip()
-            formatted_text = re.sub(r'(?<=[\u3000-\u303F\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF])\s+(?=[\u3000-\u303F\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF])', '', formatted_text)
-
-            # 最終結果を保存
+            # 全セグメントの結果を1つのJSON文書として結合して保存
             formatted_output_path = self.output_dir / f"transcription_summary_{timestamp}.txt"
-            formatted_output_path.parent.mkdir(parents=True, exist_ok=True)
-
             try:
-                with open(formatted_output_path, "w", encoding="utf-8") as f:
-                    f.write(formatted_text)
+                merge_segment_transcripts([seg["text"] for seg in all_transcriptions], formatted_output_path)
+                formatted_text = formatted_output_path.read_text(encoding="utf-8")
             except Exception as e:
                 logger.error(f"整形済みテキストの保存中にエラー: {str(e)}")
                 raise TranscriptionError(f"整形済みテキストの保存に失敗しました: {str(e)}")
 
-            # 一時ファイルのクリーンアップ
+            # 生のテキストを保存（新APIの動作に合わせる）
+            raw_output_path = None
+            if save_raw_text:
+                raw_output_path = self.output_dir / f"transcription_{timestamp}.txt"
+                logger.info(f"生テキストを保存: {raw_output_path}")
+                try:
+                    with open(raw_output_path, "w", encoding="utf-8") as f:
+                        f.write(formatted_text)
+                except Exception as e:
+                    logger.error(f"生テキストの保存中にエラー: {str(e)}")
+                    logger.warning("生テキストの保存に失敗しましたが、処理は続行します")
+
+            # 一時ファイルのクリーンアップ（メモリモードで退避が発生しなかった場合はディレクトリ自体が存在しない）
             try:
-                import shutil
-                shutil.rmtree(segments_dir)
-                logger.info("一時ファイルのクリーンアップが完了しました")
+                if segments_dir.exists():
+                    shutil.rmtree(segments_dir)
+                    logger.info("一時ファイルのクリーンアップが完了しました")
             except Exception as e:
                 logger.warning(f"一時ファイルのクリーンアップ中にエラー: {str(e)}")
 
-            logger.info("GPT-4 Audio方式での書き起こし処理が完了しました")
+            logger.info(f"{method_label}方式での書き起こし処理が完了しました")
             return {
-                "raw_text": "",  # GPT-4 Audio方式では生テキストは生成されない
+                "raw_text": formatted_text if save_raw_text else "",  # GPT-4 Audio方式では生テキストは生成されない
                 "formatted_text": formatted_text,
-                "raw_file": None,
+                "raw_file": raw_output_path,
                 "formatted_file": formatted_output_path,
                 "timestamp": timestamp
             }
 
         except Exception as e:
-            logger.error(f"GPT-4 Audio方式での処理中にエラー: {str(e)}")
-            raise TranscriptionError(f"GPT-4 Audio方式での処理に失敗しました: {str(e)}")
+            logger.error(f"{method_label}方式での処理中にエラー: {str(e)}")
+            raise TranscriptionError(f"{method_label}方式での処理に失敗しました: {str(e)}")
 
-    def _process_with_gemini(self, audio_file: pathlib.Path, timestamp: str) -> Dict[str, Any]:
-        """Gemini方式での書き起こし処理"""
-        logger.info("Geminiで音声認識・整形を開始")
+    def _split_into_segments(self, audio_file: pathlib.Path, segments_dir: pathlib.Path, segment_length: int) -> Iterable[AudioSegmentBuffer]:
+        """音声ファイルを分割してセグメントのリストを返す
 
+        設定で in_memory_segments が有効な場合はセグメントをメモリ上に保持し、
+        segment_memory_budget_mb を超えた分だけ segments_dir に退避する。
+        音声を速めている場合は、分割長などの元の時間軸の値を速めた音声の長さに換算して分割し、
+        各セグメントの位置は元の時間軸に戻す。
+        ライブモードでは、録音の進行に合わせてセグメントを返すイテラブル（LiveAudioSource）を返す。
+        """
+        if self.live_source is not None:
+            logger.info("ライブモード: 録音中のファイルからセグメントを切り出し次第書き起こします")
+            self._segmentation_info = {"mode": "live", "idle_timeout_seconds": self.live_source.idle_timeout_seconds}
+            return self.live_source.start(segment_length, on_finished=self._record_segment_plan)
+
+        segment_length = max(1, int(segment_length / self.speed_factor))
+        segments = self._split_audio(audio_file, segments_dir, segment_length)
+        if self.speed_factor != 1.0:
+            for segment in segments:
+                segment.rescale(self.speed_factor)
+        logger.info(f"音声を {len(segments)} 個のセグメントに分割しました")
+        self._record_segment_plan(segments)
+        return segments
+
+    def _split_audio(self, audio_file: pathlib.Path, segments_dir: pathlib.Path, segment_length: int) -> List[AudioSegmentBuffer]:
+        """音声ファイルを分割する（位置は分割した音声上の値。分割方法は self._segmentation_info に記録する）"""
+        transcription_config = self.snapshot.config.transcription
+        passthrough_segment = self._passthrough_segment(audio_file, segment_length)
+        if passthrough_segment is not None:
+            return [passthrough_segment]
+
+        planner = None
+        if transcription_config.segment_mode == "auto":
+            # 発話密度と出力トークン上限から区間ごとにセグメント長を決める（速めた音声では発話1秒あたりの文字数も増える）
+            planner = SegmentPlanner(
+                output_token_limit=transcription_config.output_token_limit,
+                min_segment_seconds=transcription_config.auto_min_segment_seconds / self.speed_factor,
+                max_segment_seconds=transcription_config.auto_max_segment_seconds / self.speed_factor,
+                chars_per_speech_second=SegmentationStats().chars_per_speech_second() * self.speed_factor,
+            )
+        self._segmentation_info = {
+            "mode": "auto" if planner else "fixed",
+            "chars_per_speech_second": planner.chars_per_speech_second / self.speed_factor if planner else None,
+        }
+        splitter = AudioSplitter(segment_length_seconds=segment_length, planner=planner)
+
+        if transcription_config.in_memory_segments:
+            budget_mb = transcription_config.segment_memory_budget_mb
+            logger.info(f"メモリモードで分割します（メモリ予算: {budget_mb}MB）")
+            return splitter.split_audio_to_buffers(
+                str(audio_file),
+                spill_dir=str(segments_dir),
+                memory_budget_bytes=budget_mb * 1024 * 1024
+            )
+
+        segments_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"セグメント一時ディレクトリを作成: {segments_dir}")
+        split_files = splitter.split_audio(str(audio_file), str(segments_dir))
+        points = splitter.last_split_points_ms
+        return [
+            AudioSegmentBuffer.from_file(
+                i, path,
+                start_ms=points[i - 1] if i < len(points) else 0,
+                end_ms=points[i] if i < len(points) else 0,
+                speech_ms=splitter.speech_ms_of(i - 1)
+            )
+            for i, path in enumerate(split_files, 1)
+        ]
+
+    def _passthrough_segment(self, audio_file: pathlib.Path, segment_length: int) -> Optional[AudioSegmentBuffer]:
+        """1セグメントに収まる録音を、分割・再エンコードせずにそのまま送るセグメントとして返す
+
+        パススルーが有効で、書き起こし方式がそのまま受け付ける形式・上限サイズ以下・
+        分割長以下の長さの場合のみ使う。それ以外はNoneを返し、通常どおり分割する。
+        """
+        transcription_config = self.snapshot.config.transcription
+        if not transcription_config.media_passthrough:
+            return None
+        audio_format = audio_file.suffix.lower().lstrip(".")
+        if audio_format not in passthrough_formats(self.transcription_method):
+            return None
+        max_size_mb = transcription_config.passthrough_max_size_mb
+        size_mb = audio_file.stat().st_size / (1024 * 1024)
+        if size_mb > max_size_mb:
+            logger.info(f"音声ファイルがパススルーの上限サイズを超えるため分割します（{size_mb:.1f}MB > {max_size_mb}MB）")
+            return None
+        info = probe_media(audio_file)
+        if info is None or info["has_video"] or info["duration"] <= 0:
+            return None
+        if transcription_config.segment_mode == "auto":
+            max_seconds = transcription_config.auto_max_segment_seconds / self.speed_factor
+        else:
+            max_seconds = segment_length
+        if info["duration"] > max_seconds:
+            return None
+
+        logger.info(f"音声ファイルを分割・再エンコードせずに送信します（{audio_format}, {info['duration']:.1f}秒, {size_mb:.1f}MB）")
+        self._segmentation_info = {"mode": "passthrough", "format": audio_format, "audio_codec": info["audio_codec"]}
+        return AudioSegmentBuffer.from_file(1, audio_file, start_ms=0, end_ms=int(info["duration"] * 1000))
+
+    def _record_segment_plan(self, segments: List[AudioSegmentBuffer]) -> None:
+        """分割結果を実行のメタデータに記録する（位置は元の時間軸）"""
+        if self.run_context is None:
+            return
+        self.run_context.set_metadata("segmentation", {
+            **self._segmentation_info,
+            "speed_factor": self.speed_factor,
+            "segments": [
+                {
+                    "index": segment.index,
+                    "start_ms": segment.start_ms,
+                    "end_ms": segment.end_ms,
+                    "speech_ms": segment.speech_ms,
+                }
+                for segment in segments
+            ],
+        })
+
+    def _fast_transcription_model(self, model_type: str, strong_model: str) -> Optional[str]:
+        """段階的書き起こしが有効な場合に最初に使う高速モデルを返す（無効・上位モデルと同じ場合はNone）"""
+        if not self.snapshot.config.models.tiered_transcription:
+            return None
+        fast_model = self.snapshot.get_model(model_type)
+        if not fast_model or fast_model == strong_model:
+            return None
+        logger.info(f"段階的書き起こし: 高速モデル={fast_model}, 上位モデル={strong_model}")
+        return fast_model
+
+    def _hedged(
+        self,
+        executor: SegmentExecutor,
+        transcribe_with: Callable[[str], Callable[[AudioSegmentBuffer], str]],
+        model: str
+    ) -> Callable[[AudioSegmentBuffer], str]:
+        """モデルの書き起こし関数を、遅延時の追加リクエスト（hedge_model指定時はそのモデル）付きにする"""
+        hedge_model = self.snapshot.config.transcription.hedge_model
+        hedge = transcribe_with(hedge_model) if hedge_model and hedge_model != model else None
+        return executor.wrap(transcribe_with(model), hedge, self._failover_transcribe)
+
+    def _prepare_failover(self) -> None:
+        """障害時に使うもう一方のプロバイダーの書き起こし関数を用意する（無効な場合や利用できない場合はNone）"""
+        self._failover_transcribe = None
+        self._failover_provider = None
+        if not self.snapshot.config.transcription.failover_enabled:
+            return
         try:
-            # 設定から分割長を取得（デフォルトは100秒）
-            segment_length = self.config.get('transcription', {}).get('segment_length_seconds', 600)
-            logger.info(f"設定された分割長: {segment_length}秒")
+            if self.transcription_method == "gemini":
+                get_api_key()  # APIキーを確認する（資格情報プールのレート枠は使わない）
+                model_name = self.snapshot.get_model("openai_4oaudio")
+                self._failover_transcribe = lambda segment: generate_audio_chat_response(
+                    segment.source(), self.system_prompt, audio_format=segment.format, model_name=model_name
+                )
+                self._failover_provider = "openai"
+            else:
+                gemini_api = GeminiAPI(snapshot=self.snapshot)
+                self._failover_transcribe = lambda segment: gemini_api.transcribe_audio(
+                    segment.source(), mime_type=segment.mime_type
+                )
+                self._failover_provider = "gemini"
+            logger.info(f"障害時は {self._failover_provider} に切り替えて書き起こします")
+        except Exception as e:
+            logger.warning(f"切り替え先のプロバイダーを利用できないため、プロバイダーの切り替えは無効です: {str(e)}")
+
+    def _record_executor_stats(self, executor: SegmentExecutor) -> None:
+        """追加リクエスト・プロバイダー切り替えの統計を実行コンテキストのメタデータに記録する"""
+        if self.run_context is None:
+            return
+        if executor.hedge_enabled or executor.timeout_seconds or self._failover_transcribe is not None:
+            logger.info(f"セグメント実行の統計: {executor.stats}")
+            self.run_context.set_metadata("segment_executor", dict(executor.stats))
+        if executor.failover_events:
+            logger.warning(f"{len(executor.failover_events)}件のセグメントを {self._failover_provider} に切り替えて書き起こしました")
+            self.run_context.set_metadata("provider_failover", {
+                "from": self.transcription_method,
+                "to": self._failover_provider,
+                "events": list(executor.failover_events),
+            })
+
+    def _record_model_tiering(self, fast_model: Optional[str], strong_model: str) -> None:
+        """段階的書き起こしの結果を実行コンテキストのメタデータに記録する"""
+        if fast_model is None or self.run_context is None:
+            return
+        escalated = self._escalated_segments
+        logger.info(f"段階的書き起こし: {len(escalated)}個のセグメントを上位モデルで再実行しました")
+        self.run_context.set_metadata("model_tiering", {
+            "fast_model": fast_model,
+            "strong_model": strong_model,
+            "escalated_segments": escalated,
+        })
+
+    def _escalation_reason(self, segment: AudioSegmentBuffer, text: str) -> Optional[str]:
+        """
+        高速モデルの書き起こし結果を検証し、上位モデルで再実行すべき理由を返す
 
-            # AudioSplitterの初期化（設定された分割長を使用）
-            splitter = AudioSplitter(segment_length_seconds=segment_length)
+        Args:
+            segment (AudioSegmentBuffer): 書き起こしたセグメント
+            text (str): 高速モデルの書き起こし結果
+        Returns:
+            Optional[str]: 再実行すべき理由（問題がなければNone）
+        """
+        if not text:
+            return "書き起こし結果が空"
+        if self.is_problematic_transcription(text):
+            return "繰り返しパターンを検出"
+        conversations, complete = parse_conversations(text)
+        if not complete or not conversations:
+            return "JSONとして不正"
+        if segment.speech_ms:
+            # 推定発話時間に対して出力が少なすぎる場合は書き起こし漏れとみなす
+            expected_chars = segment.speech_ms / 1000 * SegmentationStats().chars_per_speech_second()
+            if len(text) < expected_chars * ESCALATION_MIN_COVERAGE_RATIO:
+                return f"出力が少なすぎる（{len(text)}文字 / 想定{expected_chars:.0f}文字）"
+        return None
+
+    def _transcribe_segments(
+        self,
+        segments: Iterable[AudioSegmentBuffer],
+        transcribe_segment: Callable[[AudioSegmentBuffer], str],
+        escalate_segment: Optional[Callable[[AudioSegmentBuffer], str]] = None
+    ) -> List[Dict[str, Any]]:
+        """各セグメントを順に書き起こし、話者名に識別子を付加した結果のリストを返す
 
-            # セグメント保存用の一時ディレクトリを作成
-            segments_dir = self.output_dir / "segments" / timestamp
-            segments_dir.mkdir(parents=True, exist_ok=True)
-            logger.info(f"セグメント一時ディレクトリを作成: {segments_dir}")
+        Args:
+            segments (Iterable[AudioSegmentBuffer]): 分割済みセグメント（ライブモードでは切り出され次第返るイテラブル）
+            transcribe_segment (Callable): セグメントを受け取り書き起こしテキストを返す関数
+            escalate_segment (Callable, optional): 検証に失敗したセグメントを再実行する上位モデルの関数。
+                指定時は transcribe_segment を高速モデルとして扱い、再試行・分割再実行は上位モデルで行う
 
-            # 音声ファイルを分割
-            logger.info("音声ファイルの分割を開始")
-            split_files = splitter.split_audio(str(audio_file), str(segments_dir))
-            logger.info(f"音声を {len(split_files)} 個のセグメントに分割しました")
-
-            # 各セグメントの文字起こし結果を保存
-            all_transcriptions = []
-            for i, segment_file in enumerate(split_files, 1):
-                logger.info(f"セグメント {i}/{len(split_files)} の文字起こしを実行中...")
-
-                # セグメントの文字起こし処理部分
-                max_retries = 2  # 最大再試行回数
-                segment_text = None
-
-                for attempt in range(max_retries + 1):
-                    try:
-                        segment_text_raw = self.gemini_api.transcribe_audio(str(segment_file))
-                        # 文字起こし結果の余分な空白を除去
-                        segment_text = re.sub(r'\s+', ' ', segment_text_raw).strip() if segment_text_raw else ""
-
-                        logger.info(f"セグメント {i} の文字起こし結果: 文字数={len(segment_text)}")
-                        logger.debug(f"セグメント {i} の文字起こし結果（先頭100文字）: {segment_text[:100]}...")
-
-                        # 問題のあるパターンをチェック
-                        logger.info(f"セグメント {i} の繰り返しパターンチェックを実行")
-                        if segment_text and self.is_problematic_transcription(segment_text):
-                            logger.warning(f"セグメント {i} で問題のあるパターンが検出されました")
-                            if attempt < max_retries:
-                                logger.warning(f"セグメント {i} に問題のあるパターンが検出されました。再試行します ({attempt+1}/{max_retries})")
-                                continue
-                            else:
-                                logger.error(f"セグメント {i} の処理が最大再試行回数に達しました。最後の結果を使用します。")
-                                self.has_reached_max_retries = True  # エラー表示のためのフラグ
-                        else:
-                            logger.info(f"セグメント {i} は正常なテキストと判断されました")
-                        # 問題なければループを抜ける
-                        break
-                    except Exception as e:
-                        logger.error(f"セグメント {i} の文字起こし中にエラー: {str(e)}")
+        Returns:
+            List[Dict[str, Any]]: セグメントごとの書き起こし結果
+        """
+        retry_strategy = self.snapshot.config.transcription.retry_strategy
+        # ライブモードではセグメントの総数は録音が終わるまで分からない
+        total = len(segments) if isinstance(segments, list) else "?"
+        progress = self.run_context.progress
+        if isinstance(segments, list):
+            progress.plan_segments(len(segments), sum(segment.end_ms - segment.start_ms for segment in segments))
+        else:
+            progress.plan_segments(None)
+        all_transcriptions = []
+        density_samples = []  # (推定発話時間[秒], 出力文字数) 次回以降の分割計画に使う
+        self._escalated_segments = []
+        for segment in segments:
+            i = segment.index
+            logger.info(f"セグメント {i}/{total} の文字起こしを実行中...")
+
+            # セグメントの文字起こし処理部分
+            max_retries = 2  # 最大再試行回数
+            segment_text = None
+            current_transcribe = transcribe_segment
+            escalation_pending = escalate_segment is not None
+
+            for attempt in range(max_retries + 1):
+                try:
+                    segment_text_raw = current_transcribe(segment)
+                    # 文字起こし結果の余分な空白を除去
+                    segment_text = re.sub(r'\s+', ' ', segment_text_raw).strip() if segment_text_raw else ""
+
+                    if escalation_pending:
+                        escalation_pending = False
+                        reason = self._escalation_reason(segment, segment_text)
+                        if reason:
+                            logger.warning(f"セグメント {i} の高速モデルの結果を採用できません（{reason}）。上位モデルで再実行します")
+                            self._escalated_segments.append({"segment": i, "reason": reason})
+                            current_transcribe = escalate_segment
+                            segment_text_raw = current_transcribe(segment)
+                            segment_text = re.sub(r'\s+', ' ', segment_text_raw).strip() if segment_text_raw else ""
+
+                    logger.info(f"セグメント {i} の文字起こし結果: 文字数={len(segment_text)}")
+                    logger.debug(f"セグメント {i} の文字起こし結果（先頭100文字）: {segment_text[:100]}...")
+
+                    # 問題のあるパターンをチェック
+                    logger.info(f"セグメント {i} の繰り返しパターンチェックを実行")
+                    if segment_text and self.is_problematic_transcription(segment_text):
+                        logger.warning(f"セグメント {i} で問題のあるパターンが検出されました")
+                        if retry_strategy == "bisect":
+                            # 問題のある部分だけを分割して再書き起こしする
+                            bisected_text = self._retranscribe_by_bisection(segment, current_transcribe)
+                            if bisected_text is not None:
+                                segment_text = bisected_text
+                                break
+                            logger.info(f"セグメント {i} を分割できないため、セグメント全体を再試行します")
                         if attempt < max_retries:
-                            logger.warning(f"再試行します ({attempt+1}/{max_retries})")
+                            logger.warning(f"セグメント {i} に問題のあるパターンが検出されました。再試行します ({attempt+1}/{max_retries})")
+                            progress.retry(i, attempt + 1, max_retries, "問題のあるパターンを検出")
+                            continue
                         else:
-                            logger.error(f"最大再試行回数に達しました。このセグメントをスキップします。")
-                            self.has_reached_max_retries = True  # エラー表示のためのフラグ
-                            segment_text = ""
-
-                if not segment_text:
-                    logger.warning(f"セグメント {i} の文字起こし結果が空です")
-                    continue
-
-                # 話者名に識別子を付加 (セグメント番号を使用)
-                segment_identifier = f"seg{i}"
-                segment_text = add_speaker_identifier(segment_text, segment_identifier)
-                logger.info(f"セグメント {i} の話者名に識別子 '{segment_identifier}' を付加しました")
-
-                # セグメント情報を追加
-                segment_result = {
-                    "segment": i,
-                    "segment_file": Path(segment_file).name,
-                    "text": segment_text
-                }
-                all_transcriptions.append(segment_result)
-                logger.info(f"セグメント {i} の文字起こしが完了")
+                            logger.error(f"セグメント {i} の処理が最大再試行回数に達しました。最後の結果を使用します。")
+                            self.run_context.mark_max_retries_reached()  # エラー表示のためのフラグ
+                    else:
+                        logger.info(f"セグメント {i} は正常なテキストと判断されました")
+                    # 問題なければループを抜ける
+                    break
+                except Exception as e:
+                    logger.error(f"セグメント {i} の文字起こし中にエラー: {str(e)}")
+                    if escalate_segment is not None and current_transcribe is transcribe_segment:
+                        # 高速モデルでのエラーは上位モデルで再試行する
+                        logger.warning(f"セグメント {i} を上位モデルで再試行します")
+                        self._escalated_segments.append({"segment": i, "reason": f"エラー: {str(e)}"})
+                        escalation_pending = False
+                        current_transcribe = escalate_segment
+                    if attempt < max_retries:
+                        logger.warning(f"再試行します ({attempt+1}/{max_retries})")
+                        progress.retry(i, attempt + 1, max_retries, str(e))
+                    else:
+                        logger.error(f"最大再試行回数に達しました。このセグメントをスキップします。")
+                        self.run_context.mark_max_retries_reached()  # エラー表示のためのフラグ
+                        segment_text = ""
 
-            # 中間結果をJSONとして保存
-            complete_result = {
-                "metadata": {
-                    "total_segments": len(split_files),
-                    "original_file": str(audio_file)
-                },
-                "segments": all_transcriptions
-            }
+            # 書き起こしが終わったセグメントのメモリを解放（結果を破棄したリクエストが実行中なら、その終了後に解放される）
+            segment.release()
+            progress.segment_done(i, segment.end_ms - segment.start_ms)
 
-            complete_json_path = self.output_dir / f"complete_transcription_{timestamp}.json"
-            with open(complete_json_path, "w", encoding="utf-8") as f:
-                json.dump(complete_result, f, ensure_ascii=False, indent=2)
-            logger.info(f"中間結果をJSONとして保存: {complete_json_path}")
+            if not segment_text:
+                logger.warning(f"セグメント {i} の文字起こし結果が空です")
+                continue
 
-            # 全セグメントの結果を結合
-            combined_text = "".join(seg["text"] for seg in all_transcriptions)
-            formatted_text = re.sub(r'\s+', ' ', combined_text).strip()
-            formatted_text = re.sub(r'(?<=[\u3000-\u303F\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF])\s+(?=[\u3000-\u303F\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF])', '', formatted_text)
+            if segment.speech_ms and not self.is_problematic_transcription(segment_text):
+                density_samples.append((segment.speech_ms / 1000, len(segment_text)))
 
-            # 最終結果を保存
-            formatted_output_path = self.output_dir / f"transcription_summary_{timestamp}.txt"
-            formatted_output_path.parent.mkdir(parents=True, exist_ok=True)
+            # 話者名に識別子を付加 (セグメント番号を使用)
+            segment_identifier = f"seg{i}"
+            segment_text = add_speaker_identifier(segment_text, segment_identifier)
+            logger.info(f"セグメント {i} の話者名に識別子 '{segment_identifier}' を付加しました")
 
-            try:
-                with open(formatted_output_path, "w", encoding="utf-8") as f:
-                    f.write(formatted_text)
-            except Exception as e:
-                logger.error(f"整形済みテキストの保存中にエラー: {str(e)}")
-                raise TranscriptionError(f"整形済みテキストの保存に失敗しました: {str(e)}")
+            # セグメント情報を追加
+            segment_result = {
+                "segment": i,
+                "segment_file": segment.name,
+                "text": segment_text
+            }
+            all_transcriptions.append(segment_result)
+            logger.info(f"セグメント {i} の文字起こしが完了")
 
-            # 生のテキストを保存（新APIの動作に合わせる）
-            raw_output_path = self.output_dir / f"transcription_{timestamp}.txt"
-            logger.info(f"生テキストを保存: {raw_output_path}")
-            try:
-                with open(raw_output_path, "w", encoding="utf-8") as f:
-                    f.write(formatted_text)
-            except Exception as e:
-                logger.error(f"生テキストの保存中にエラー: {str(e)}")
-                logger.warning("生テキストの保存に失敗しましたが、処理は続行します")
+        if density_samples:
+            SegmentationStats().record(density_samples)
 
-            # 一時ファイルのクリーンアップ
-            try:
-                import shutil
-                shutil.rmtree(segments_dir)
-                logger.info("一時ファイルのクリーンアップが完了しました")
-            except Exception as e:
-                logger.warning(f"一時ファイルのクリーンアップ中にエラー: {str(e)}")
+        return all_transcriptions
 
-            logger.info("Gemini方式での書き起こし処理が完了しました")
-            return {
-                "raw_text": formatted_text,
-                "formatted_text": formatted_text,
-                "raw_file": raw_output_path,
-                "formatted_file": formatted_output_path,
-                "timestamp": timestamp
-            }
+    def _retranscribe_by_bisection(self, segment: AudioSegmentBuffer, transcribe_segment: Callable[[AudioSegmentBuffer], str], depth: int = 1) -> Optional[str]:
+        """問題のあるセグメントを無音区間で2分割し、各部分を書き起こして結合する
+
+        分割した部分のうち、書き起こし結果に問題がある部分だけをさらに分割して再実行する。
+        セグメント全体を繰り返し再送するより送信する音声が少なく済む。
+
+        Args:
+            segment (AudioSegmentBuffer): 問題のあるセグメント
+            transcribe_segment (Callable): セグメントを受け取り書き起こしテキストを返す関数
+            depth (int): 現在の分割回数
 
+        Returns:
+            Optional[str]: 結合した書き起こし結果（分割できない場合はNone）
+        """
+        transcription_config = self.snapshot.config.transcription
+        min_chunk_ms = transcription_config.bisect_min_chunk_seconds * 1000
+        max_depth = transcription_config.bisect_max_depth
+        if depth > max_depth:
+            return None
+
+        try:
+            chunks = AudioSplitter().bisect_segment(segment, min_chunk_ms)
         except Exception as e:
-            logger.error(f"Gemini方式での処理中にエラー: {str(e)}")
-            raise TranscriptionError(f"Gemini方式での処理に失敗しました: {str(e)}")
+            logger.warning(f"セグメント {segment.index} の分割に失敗しました: {str(e)}")
+            return None
+        if not chunks:
+            return None
+
+        texts = []
+        for chunk in chunks:
+            position = f"{chunk.start_ms/1000:.2f}秒 - {chunk.end_ms/1000:.2f}秒"
+            logger.info(f"セグメント {segment.index} の部分 ({position}) を書き起こします（分割 {depth}回目）")
+            text = self._transcribe_chunk(chunk, transcribe_segment)
+            if text and self.is_problematic_transcription(text):
+                logger.warning(f"セグメント {segment.index} の部分 ({position}) で問題のあるパターンが検出されました")
+                retried_text = self._retranscribe_by_bisection(chunk, transcribe_segment, depth + 1)
+                if retried_text is None:
+                    # これ以上分割できない場合はこの部分だけをもう一度書き起こす
+                    retried_text = self._transcribe_chunk(chunk, transcribe_segment)
+                    if not retried_text or self.is_problematic_transcription(retried_text):
+                        logger.error(f"セグメント {segment.index} の部分 ({position}) の問題が解消しませんでした。最後の結果を使用します。")
+                        self.run_context.mark_max_retries_reached()  # エラー表示のためのフラグ
+                    retried_text = retried_text or text
+                text = retried_text
+            chunk.release()
+            texts.append(text)
+
+        return self._stitch_transcriptions(texts)
+
+    def _transcribe_chunk(self, chunk: AudioSegmentBuffer, transcribe_segment: Callable[[AudioSegmentBuffer], str]) -> str:
+        """分割した部分を書き起こす（エラー時は1回だけ再試行し、失敗した場合は空文字を返す）"""
+        for attempt in range(2):
+            try:
+                text = transcribe_segment(chunk)
+                return re.sub(r'\s+', ' ', text).strip() if text else ""
+            except Exception as e:
+                logger.error(f"セグメント {chunk.index} の部分の書き起こし中にエラー: {str(e)}")
+        self.run_context.mark_max_retries_reached()  # エラー表示のためのフラグ
+        return ""
+
+    def _stitch_transcriptions(self, texts: List[str]) -> str:
+        """分割して書き起こした結果を順に結合する（JSON形式の場合は会話リストを連結する）"""
+        texts = [text for text in texts if text]
+        conversations = []
+        for text in texts:
+            parsed, _ = parse_conversations(text)
+            if not parsed:
+                return " ".join(texts)
+            conversations.extend(parsed)
+        return dump_conversations(conversations)
 
     def get_output_path(self, timestamp: str = None) -> pathlib.Path:
         """出力ファイルパスの生成"""
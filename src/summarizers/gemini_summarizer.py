@@ -1,6 +1,6 @@
 import logging
 from typing import Optional
-from ..utils.new_gemini_api import GeminiAPI, GeminiAPIError as TranscriptionError
+from ..utils.new_gemini_api import GeminiAPI, GeminiContextCache, GeminiAPIError as TranscriptionError
 from ..utils.summarizer import Summarizer
 #from ..utils.config import config_manager
 
@@ -9,10 +9,15 @@ logger = logging.getLogger(__name__)
 class GeminiSummarizer(Summarizer):
     """Gemini APIを使用した議事録生成クラス"""
 
-    def __init__(self):
-        """Initialize Gemini summarizer"""
+    def __init__(self, context_cache: Optional[GeminiContextCache] = None):
+        """Initialize Gemini summarizer
+
+        Args:
+            context_cache (GeminiContextCache, optional): 書き起こしのコンテキストキャッシュ
+        """
         super().__init__()
         self.api = GeminiAPI()
+        self.context_cache = context_cache
         logger.info("Gemini Summarizerを初期化しました")
 
     def summarize(self, text: str, prompt: str) -> str:
@@ -31,7 +36,7 @@ class GeminiSummarizer(Summarizer):
         """
         try:
             logger.info("Gemini APIを使用して議事録生成を開始します")
-            response = self.api.summarize_minutes(text, prompt)
+            response = self.api.summarize_minutes(text, prompt, self.context_cache)
             logger.info(f"議事録生成が完了しました（{len(response)}文字）")
             return response
 
@@ -6,14 +6,11 @@ import threading
 #import subprocess
 import os
 from typing import Optional
-from ..services.audio import AudioProcessor, AudioProcessingError
-from ..services.transcription import TranscriptionService, TranscriptionError
-from ..services.csv_converter import CSVConverterService, CSVConversionError
 from ..services.file_organizer import FileOrganizer
 from ..utils.config import config_manager, ConfigError, ModelsConfig
 from ..utils.prompt_manager import prompt_manager
-from ..services.processor import process_audio_file
 from ..utils.path_resolver import get_config_file_path
+from ..utils.progress import ProgressEvent, format_progress
 import json
 
 logger = logging.getLogger(__name__)
@@ -162,6 +159,11 @@ class MainWindow:
             if self.status_var.get().startswith(base_text):
                 self.root.after(500, self._animate_status_label)
 
+    def _on_progress(self, event: ProgressEvent):
+        """進捗イベントをステータスに表示する（処理スレッドから呼ばれるため、更新はUIスレッドで行う）"""
+        text = format_progress(event)
+        self.root.after(0, lambda: self.status_var.set(text))
+
     def _execute_processing(self):
         """処理の実行"""
         if not self.file_path_var.get():
@@ -179,6 +181,11 @@ class MainWindow:
 
     def _process_file(self):
         """ファイル処理の実行（別スレッド）"""
+        # 処理系のサービスは起動時間短縮のため初回実行時に読み込む
+        from ..services.audio import AudioProcessingError
+        from ..services.transcription import TranscriptionError
+        from ..services.csv_converter import CSVConversionError
+        from ..services.processor import process_audio_file
         try:
             input_file = pathlib.Path(self.file_path_var.get())
             
@@ -191,7 +198,7 @@ class MainWindow:
             
             # 処理の実行
             self.status_var.set("処理中...")
-            results = process_audio_file(input_file, modes)
+            results = process_audio_file(input_file, modes, progress_callback=self._on_progress)
             
             # デバッグ用ログ出力
             logger.debug(f"処理結果: {results}")
@@ -203,7 +210,7 @@ class MainWindow:
                 logger.debug(f"取得したtimestamp: {timestamp}")
                 if timestamp:
                     try:
-                        new_folder = self.file_organizer.organize_meeting_files(timestamp)
+                        new_folder = self.file_organizer.organize_meeting_files(timestamp, workspace_dir=results.get('workspace_dir'))
                         logger.info(f"ファイルを整理しました: {new_folder}")
                     except Exception as e:
                         logger.error(f"ファイル整理中にエラーが発生: {str(e)}")
@@ -1,21 +1,18 @@
-import openai
 import os
 import base64
 from typing import List, Dict, Any
 import logging
+import threading
 from pathlib import Path
 from .config import config_manager
+from .credential_pool import get_credential_pool, mask_key
+from .transcript_json import complete_truncated_transcript, is_max_tokens_finish
 import json
-from openai import OpenAI, APIConnectionError, RateLimitError, APIStatusError
 
 logger = logging.getLogger(__name__)
 
 # 定数定義
-DEFAULT_CHAT_MODEL = config_manager.get_model("openai_chat")
-DEFAULT_ST_MODEL = config_manager.get_model("openai_st")
-DEFAULT_STTITLE_MODEL = config_manager.get_model("openai_sttitle")
-DEFAULT_AUDIO_MODEL = config_manager.get_model("openai_audio")
-DEFAULT_4oAUDIO_MODEL = config_manager.get_model("openai_4oaudio")
+# モデル名は設定画面での変更を反映するため、インポート時ではなく呼び出し時に設定から解決する
 DEFAULT_TEMPERATURE = 0.1
 DEFAULT_MAX_TOKENS = ""
 
@@ -23,6 +20,18 @@ class APIError(Exception):
     """API関連のエラーを扱うカスタム例外クラス"""
     pass
 
+# APIキーごとに生成済みのクライアントを保持（接続プールを再利用するため）
+_client_cache: Dict[str, Any] = {}
+
+# 資格情報プール（設定の再読み込み時だけ作り直す。レート制限を受けたキーの報告にも使う）
+_credential_pool = None
+_credential_pool_key = None  # プールを作成したときの (設定のバージョン, 既定のキー)
+_credential_pool_lock = threading.Lock()
+
+def _resolve_model(model_name, model_type: str) -> str:
+    """モデル名が未指定の場合は設定ファイルのモデル名を返す"""
+    return model_name or config_manager.get_model(model_type)
+
 def setup_logging(log_level=logging.INFO):
     """ロギングの設定"""
     log_dir = Path("logs")
@@ -37,23 +46,38 @@ def setup_logging(log_level=logging.INFO):
     logger.addHandler(file_handler)
     logger.setLevel(log_level)
 
-def get_client():
+def _get_credential_pool(primary_key: str):
     """
-    OpenAI APIクライアントを取得する
-    
+    OpenAIの資格情報プールを取得する（呼び出しごとには作らず、設定が再読み込みされた場合だけ取得し直す）
+
+    Args:
+        primary_key (str): 既定のAPIキー
+    Returns:
+        CredentialPool: 資格情報プール
+    """
+    global _credential_pool, _credential_pool_key
+    pool_key = (config_manager.get_snapshot().version, primary_key)
+    with _credential_pool_lock:
+        if _credential_pool is None or _credential_pool_key != pool_key:
+            _credential_pool = get_credential_pool("openai", primary_key)
+            _credential_pool_key = pool_key
+        return _credential_pool
+
+def get_api_key() -> str:
+    """
+    既定のOpenAI APIキーを取得する（資格情報プールのレート枠は使わない）
+
     環境変数 OPENAI_API_KEY からAPIキーを取得
     環境変数に設定されていない場合は設定ファイルから取得
     どちらにも存在しない場合はエラーを発生
-    
+    APIキーが設定されているかの確認にはこの関数を使う（get_client は呼び出しごとにキーを割り当てる）
+
     Returns:
-        openai.OpenAI: OpenAI APIクライアント
-    
+        str: APIキー
+
     Raises:
         APIError: APIキーが見つからない場合
     """
-    if 'SSL_CERT_FILE' in os.environ:
-        del os.environ['SSL_CERT_FILE']
-    
     # 1. 環境変数からAPIキーを取得
     api_key = os.getenv("OPENAI_API_KEY")
     
@@ -74,15 +98,67 @@ def get_client():
         error_msg = "OpenAI API keyが環境変数にも設定ファイルにも設定されていません"
         logger.error(error_msg)
         raise APIError(error_msg)
+    return api_key
+
+def get_client(key_hint: str = None, lease: bool = True):
+    """
+    OpenAI APIクライアントを取得する
+
+    設定ファイルに追加のキー（openai_api_keys）がある場合は、資格情報プールから呼び出しごとにキーを割り当てる
+
+    Args:
+        key_hint (str, optional): 使用するキーを固定する場合の伏せ字のキー（バッチジョブを作成したキーなど）
+        lease (bool): 資格情報プールからキーを割り当てるか（False の場合はレート枠を使わず既定のキーのクライアントを返す。事前生成用）
+    
+    Returns:
+        openai.OpenAI: OpenAI APIクライアント
+    
+    Raises:
+        APIError: APIキーが見つからない場合
+    """
+    if 'SSL_CERT_FILE' in os.environ:
+        del os.environ['SSL_CERT_FILE']
+
+    api_key = get_api_key()
+
+    # 資格情報プールからこの呼び出しに使うキーを割り当てる
+    if lease:
+        credential_pool = _get_credential_pool(api_key)
+        api_key = credential_pool.acquire(credential_pool.find(key_hint))
     
+    # 接続先（環境変数 OPENAI_BASE_URL → 設定ファイルの順。未設定の場合はSDKのデフォルト）
+    config = config_manager.get_snapshot().config
+    base_url = os.getenv("OPENAI_BASE_URL") or config.openai_base_url
+    # 応答のないリクエストで処理全体が止まらないよう、タイムアウトを設定する
+    timeout_seconds = config.api_timeout_seconds
+
+    # SDKの読み込みは起動時間に影響するため、初回のクライアント生成時まで遅延させる
+    import openai
+
     openai.api_key = api_key
-    return openai.OpenAI()
+    cache_key = f"{api_key}@{base_url or ''}@{timeout_seconds}"
+    client = _client_cache.get(cache_key)
+    if client is None:
+        if timeout_seconds:
+            client = openai.OpenAI(api_key=api_key, base_url=base_url or None, timeout=timeout_seconds)
+        else:
+            client = openai.OpenAI(api_key=api_key, base_url=base_url or None)
+        _client_cache[cache_key] = client
+        logger.info(f"OpenAI APIクライアントを生成しました{f'（接続先: {base_url}）' if base_url else ''}")
+    return client
 
-def generate_chat_response(system_prompt, user_message_content, max_tokens=DEFAULT_MAX_TOKENS, temperature=DEFAULT_TEMPERATURE, model_name=DEFAULT_CHAT_MODEL):
+def _report_client_error(client, error: Exception) -> None:
+    """エラーを資格情報プールに報告する（レート制限を受けたキーは一定時間後回しにする）"""
+    credential_pool = _credential_pool
+    if credential_pool is not None:
+        credential_pool.report_error(getattr(client, "api_key", ""), error)
+
+def generate_chat_response(system_prompt, user_message_content, max_tokens=DEFAULT_MAX_TOKENS, temperature=DEFAULT_TEMPERATURE, model_name=None):
     """チャットレスポンスを生成（リトライなし）
     
     もしもモデル名に"o3-mini"が含まれている場合は、o3mini向けのパラメータ形式でリクエストします。
     """
+    model_name = _resolve_model(model_name, "openai_chat")
     client = get_client()
     try:
         # o3miniの場合（例: "o3-mini-2025-01-31"など）
@@ -129,11 +205,13 @@ def generate_chat_response(system_prompt, user_message_content, max_tokens=DEFAU
             return response.choices[0].message.content
 
     except Exception as e:
+        _report_client_error(client, e)
         logger.error(f"チャットレスポンス生成中にエラーが発生しました: {str(e)}")
         raise APIError(f"チャットレスポンスの生成に失敗しました: {str(e)}")
 
-def generate_transcribe_from_audio(audio_file, model=DEFAULT_AUDIO_MODEL, language="ja", prompt=""):
+def generate_transcribe_from_audio(audio_file, model=None, language="ja", prompt=""):
     """音声からテキストを生成"""
+    model = _resolve_model(model, "openai_audio")
     client = get_client()
     try:
         logger.info(f"音声の書き起こしを開始: モデル={model}")
@@ -147,77 +225,206 @@ def generate_transcribe_from_audio(audio_file, model=DEFAULT_AUDIO_MODEL, langua
         logger.info("音声の書き起こしが完了しました")
         return transcript.text
     except Exception as e:
+        _report_client_error(client, e)
         logger.error(f"音声の書き起こし中にエラーが発生しました: {str(e)}")
         raise APIError(f"音声の書き起こしに失敗しました: {str(e)}")
 
-def generate_audio_chat_response(audio_file_path, system_prompt, temperature=DEFAULT_TEMPERATURE, model_name=DEFAULT_4oAUDIO_MODEL, max_tokens=2048):
+def build_audio_chat_request(audio_data: bytes, system_prompt: str, audio_format: str, model_name: str,
+                             temperature=DEFAULT_TEMPERATURE, max_tokens=2048) -> Dict[str, Any]:
+    """
+    音声チャット（GPT-4 with audio）のリクエスト本文を作成する（通常の呼び出しとバッチで共通）
+
+    Args:
+        audio_data (bytes): 音声データ
+        system_prompt (str): システムプロンプト
+        audio_format (str): 音声フォーマット（mp3, wav）
+        model_name (str): 使用するモデル名
+        temperature (float): 生成時の温度パラメータ
+        max_tokens (int): 最大トークン数
+
+    Returns:
+        Dict[str, Any]: chat.completions.create に渡すパラメータ
+    """
+    return {
+        "model": model_name,
+        "messages": [
+            {
+                "role": "system",
+                "content": [{"type": "text", "text": system_prompt}]
+            },
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": ""},
+                    {
+                        "type": "input_audio",
+                        "input_audio": {
+                            "data": base64.b64encode(audio_data).decode('utf-8'),
+                            "format": audio_format
+                        }
+                    }
+                ]
+            }
+        ],
+        "modalities": ["text"],
+        "response_format": {"type": "text"},
+        "temperature": temperature,
+        "max_completion_tokens": max_tokens,
+        "top_p": 1,
+        "frequency_penalty": 0,
+        "presence_penalty": 0,
+    }
+
+def submit_chat_batch(requests: List[Dict[str, Any]], custom_ids: List[str]) -> Dict[str, str]:
+    """
+    チャットのリクエストをまとめてバッチAPIに投入する（結果は24時間以内に非同期で返る）
+
+    Args:
+        requests (List[Dict[str, Any]]): chat.completions.create に渡すパラメータのリスト
+        custom_ids (List[str]): 結果と対応付けるためのリクエストごとのID
+
+    Returns:
+        Dict[str, str]: {"id": バッチID, "input_file_id": 入力ファイルID, "key_hint": 投入に使ったキー（伏せ字）}
+
+    Raises:
+        APIError: 投入に失敗した場合
+    """
+    client = get_client()
+    try:
+        lines = [
+            json.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}, ensure_ascii=False)
+            for custom_id, body in zip(custom_ids, requests)
+        ]
+        batch_file = client.files.create(file=("batch_requests.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch")
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info(f"バッチジョブを投入しました: {batch.id}（{len(lines)}件）")
+        return {"id": batch.id, "input_file_id": batch_file.id, "key_hint": mask_key(client.api_key)}
+    except Exception as e:
+        _report_client_error(client, e)
+        logger.error(f"バッチジョブの投入中にエラーが発生しました: {str(e)}")
+        raise APIError(f"バッチジョブの投入に失敗しました: {str(e)}")
+
+def retrieve_chat_batch(batch_id: str, key_hint: str = None) -> Dict[str, Any]:
+    """
+    バッチジョブの状態を取得し、完了していれば結果を返す
+
+    Args:
+        batch_id (str): バッチID
+        key_hint (str, optional): 投入に使ったキー（伏せ字）
+
+    Returns:
+        Dict[str, Any]: {"state": "running" | "succeeded" | "failed", "detail": 元の状態,
+            "results": {custom_id: {"text": 応答テキスト, "truncated": 出力上限で途中まで出力されたか}}}
+            （エラーになったリクエストは results に含めない）
+
+    Raises:
+        APIError: 取得に失敗した場合
+    """
+    client = get_client(key_hint)
+    try:
+        batch = client.batches.retrieve(batch_id)
+        status = batch.status
+        if status in ("failed", "cancelled", "cancelling"):
+            return {"state": "failed", "detail": status, "results": {}}
+        # 期限切れの場合も、期限までに完了した分の結果は取得できる
+        if status not in ("completed", "expired"):
+            return {"state": "running", "detail": status, "results": {}}
+
+        results = {}
+        if batch.output_file_id:
+            content = client.files.content(batch.output_file_id).text
+            for line in content.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                body = (item.get("response") or {}).get("body") or {}
+                choices = body.get("choices") or []
+                if item.get("error") or not choices:
+                    continue
+                results[item["custom_id"]] = {
+                    "text": choices[0].get("message", {}).get("content") or "",
+                    "truncated": is_max_tokens_finish(choices[0].get("finish_reason")),
+                }
+        return {"state": "succeeded", "detail": status, "results": results}
+    except Exception as e:
+        _report_client_error(client, e)
+        logger.error(f"バッチジョブの取得中にエラーが発生しました: {str(e)}")
+        raise APIError(f"バッチジョブの取得に失敗しました: {str(e)}")
+
+def generate_audio_chat_response(audio_file_path, system_prompt, temperature=DEFAULT_TEMPERATURE, model_name=None, max_tokens=2048, audio_format=None, max_continuations=None):
     """
     音声ファイルとシステムプロンプトを使用してGPT-4 with audioモデルからレスポンスを生成する
 
     Args:
-        audio_file_path (str): 処理する音声ファイルのパス
+        audio_file_path (str | bytes | memoryview): 処理する音声ファイルのパス、またはメモリ上の音声データ
         system_prompt (str): システムプロンプト
         temperature (float): 生成時の温度パラメータ
         model_name (str): 使用するモデル名
         max_tokens (int): 最大トークン数
+        audio_format (str, optional): 音声フォーマット（メモリ上のデータを渡す場合は必須）
+        max_continuations (int, optional): 書き起こしJSONが出力上限で切れた場合に続きを依頼する最大回数（省略時は設定値）
 
     Returns:
-        str: モデルからの応答テキスト
+        str: モデルからの応答テキスト（続きを依頼した場合は結合済み）
     """
+    model_name = _resolve_model(model_name, "openai_4oaudio")
     client = get_client()
     try:
-        with open(audio_file_path, "rb") as audio_file:
-            logger.info(f"音声チャットリクエストを送信: モデル={model_name}")
+        if isinstance(audio_file_path, (bytes, bytearray, memoryview)):
+            if not audio_format:
+                raise APIError("メモリ上の音声データを渡す場合はaudio_formatの指定が必要です")
+            audio_data = bytes(audio_file_path)
+        else:
+            with open(audio_file_path, "rb") as audio_file:
+                audio_data = audio_file.read()
+            audio_format = audio_format or audio_file_path.split('.')[-1].lower()
 
-            response = client.chat.completions.create(
-                model=model_name,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": [{"type": "text", "text": system_prompt}]
-                    },
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": ""},
-                            {
-                                "type": "input_audio",
-                                "input_audio": {
-                                    "data": base64.b64encode(audio_file.read()).decode('utf-8'),
-                                    "format": audio_file_path.split('.')[-1].lower()
-                                }
-                            }
-                        ]
-                    }
-                ],
-                modalities=["text"],
-                response_format={"type": "text"},
-                temperature=temperature,
-                max_completion_tokens=max_tokens,
-                top_p=1,
-                frequency_penalty=0,
-                presence_penalty=0
-            )
-
-            logger.info("音声チャットレスポンスを受信しました")
-            return response.choices[0].message.content
+        logger.info(f"音声チャットリクエストを送信: モデル={model_name}")
+
+        request = build_audio_chat_request(audio_data, system_prompt, audio_format, model_name, temperature, max_tokens)
+        messages = request["messages"]
+
+        def create(request_messages):
+            response = client.chat.completions.create(**{**request, "messages": request_messages})
+            choice = response.choices[0]
+            return choice.message.content or "", is_max_tokens_finish(choice.finish_reason)
+
+        content, truncated = create(messages)
+        logger.info("音声チャットレスポンスを受信しました")
+
+        def request_continuation(prompt, previous_output):
+            # これまでの出力をアシスタントの応答として渡し、続きだけを依頼する
+            return create(messages + [
+                {"role": "assistant", "content": previous_output},
+                {"role": "user", "content": prompt},
+            ])
+
+        if max_continuations is None:
+            max_continuations = config_manager.get_snapshot().config.transcription.max_continuations
+        return complete_truncated_transcript(content, truncated, request_continuation, max_continuations=max_continuations)
 
     except Exception as e:
+        _report_client_error(client, e)
         logger.error(f"音声チャットレスポンス生成中にエラーが発生しました: {str(e)}")
         raise APIError(f"音声チャットレスポンスの生成に失敗しました: {str(e)}")
 
 def generate_structured_chat_response(system_prompt: str, user_message_content: str, json_schema: dict,
-                                   temperature=DEFAULT_TEMPERATURE, model_name=DEFAULT_ST_MODEL):
+                                   temperature=DEFAULT_TEMPERATURE, model_name=None):
     """構造化されたJSONレスポンスを生成する関数
     Args:
         system_prompt (str): システムプロンプト
         user_message_content (str): ユーザーメッセージ
         json_schema (dict): 期待するJSONスキーマ
         temperature (float): 生成時の温度パラメータ
-        model_name (str): 使用するモデル名
+        model_name (str): 使用するモデル名（省略時は設定ファイルの値）
     Returns:
         dict: スキーマに従った構造化されたレスポンス
     """
+    model_name = _resolve_model(model_name, "openai_st")
     client = get_client()
     try:
         params = {
@@ -247,6 +454,7 @@ def generate_structured_chat_response(system_prompt: str, user_message_content:
         return response.choices[0].message.content
 
     except Exception as e:
+        _report_client_error(client, e)
         logger.error(f"構造化チャットレスポンス生成中にエラーが発生しました: {str(e)}")
         raise APIError(f"構造化チャットレスポンスの生成に失敗しました: {str(e)}")
 
@@ -299,8 +507,84 @@ MEETING_TITLE_SCHEMA = {
     }
 }
 
-def generate_meeting_title(transcript_text: str, temperature=DEFAULT_TEMPERATURE, model_name=DEFAULT_STTITLE_MODEL) -> str:
+# 話者マッピング生成用のスキーマ（話者識別子はキーにできないため配列で表す）
+SPEAKER_MAPPING_SCHEMA = {
+    "name": "speaker_mapping",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "speaker_mapping": {
+                "type": "array",
+                "description": "書き起こしの話者識別子と実際の話者名の対応",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "speaker": {
+                            "type": "string",
+                            "description": "書き起こし中の話者識別子"
+                        },
+                        "name": {
+                            "type": "string",
+                            "description": "実際の話者名（特定できない場合は役割に基づく呼び名）"
+                        }
+                    },
+                    "required": ["speaker", "name"],
+                    "additionalProperties": False
+                }
+            }
+        },
+        "required": ["speaker_mapping"],
+        "additionalProperties": False
+    }
+}
+
+# 話者リマップ用のプロンプト（JSONオブジェクトでの出力を指示している）を上記のスキーマに合わせるための追記
+SPEAKER_MAPPING_INSTRUCTION = "ただし出力は speaker_mapping 配列の要素 {\"speaker\": \"話者識別子\", \"name\": \"実際の話者名\"} として表すこと。"
+
+# タイトル・話者マッピング・議事録を1回の呼び出しでまとめて生成するためのスキーマ
+MEETING_POST_PROCESSING_SCHEMA = {
+    "name": "meeting_post_processing",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "title": {
+                "type": "string",
+                "description": "会議のメインとなる議題を短くまとめたタイトル"
+            },
+            "speaker_mapping": {
+                "type": "array",
+                "description": "書き起こしの話者識別子と実際の話者名の対応",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "speaker": {
+                            "type": "string",
+                            "description": "書き起こし中の話者識別子"
+                        },
+                        "name": {
+                            "type": "string",
+                            "description": "実際の話者名（特定できない場合は役割に基づく呼び名）"
+                        }
+                    },
+                    "required": ["speaker", "name"],
+                    "additionalProperties": False
+                }
+            },
+            "minutes": {
+                "type": "string",
+                "description": "マークダウン形式の議事録"
+            }
+        },
+        "required": ["title", "speaker_mapping", "minutes"],
+        "additionalProperties": False
+    }
+}
+
+def generate_meeting_title(transcript_text: str, temperature=DEFAULT_TEMPERATURE, model_name=None) -> str:
     """Generate the meeting title from the transcript text using a structured chat response."""
+    model_name = _resolve_model(model_name, "openai_sttitle")
     system_prompt = "会議の書き起こしからこの会議のメインとなる議題が何だったのかを教えて。例：取引先とカフェの方向性に関する会議"
     response = generate_structured_chat_response(system_prompt=system_prompt, user_message_content=transcript_text, json_schema=MEETING_TITLE_SCHEMA, temperature=temperature, model_name=model_name)
     try:
@@ -1,8 +1,12 @@
 #import os
+import copy
 import json
 import logging
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Any, Optional
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Callable, List, Mapping
 from pydantic import BaseModel, Field
 import sys
 from .path_resolver import get_config_file_path
@@ -20,12 +24,42 @@ class OutputConfig(BaseModel):
 class TranscriptionConfig(BaseModel):
     """文字起こし設定モデル"""
     method: str = "gemini"
-    segment_length_seconds: int = 450
+    segment_length_seconds: int = 450  # 固定長で分割するセグメントの長さ（秒）。以前は箇所により100秒・600秒と既定値が異なっていたものを統一した
+    segment_mode: str = "fixed"  # 分割方法（fixed: segment_length_secondsごと, auto: 発話密度と出力トークン上限から区間ごとに決める）
+    output_token_limit: int = 8192  # 書き起こし1回あたりの出力トークン上限
+    max_continuations: int = 3  # 出力上限で途中まで出力された場合に続きを依頼する最大回数
+    gemini_response_schema: bool = True  # Geminiの書き起こし・タイトル・話者マッピングの出力をresponse_schemaでスキーマに従わせるかどうか
+    auto_min_segment_seconds: int = 120  # auto時のセグメントの最小長（秒）
+    auto_max_segment_seconds: int = 900  # auto時のセグメントの最大長（秒）
     enable_speaker_remapping: bool = True  # 話者置換処理を有効にするかどうか
+    in_memory_segments: bool = False  # 分割セグメントを一時ファイルに書かずメモリ上で扱うかどうか
+    segment_memory_budget_mb: int = 256  # メモリ上に保持するセグメントの上限（超過分のみディスクへ退避）
+    media_passthrough: bool = False  # 入力の音声コーデックを書き起こし方式がそのまま受け付ける場合、MP3への再エンコードを省くかどうか（映像を含む場合は音声のみを取り出す）
+    passthrough_max_size_mb: int = 20  # 1セグメントに収まる録音を分割・再エンコードせずにそのまま送る上限サイズ（MB）
+    speed_factor: float = 1.0  # 書き起こし前に音声を速める倍率（1.0〜2.0、ピッチは保つ。1.0は無効）。音声の長さに比例するトークン数と処理時間を減らす
+    retry_strategy: str = "bisect"  # 問題のある書き起こしの再試行方法（bisect: 問題のある部分のみ分割して再実行, whole: セグメント全体を再実行）
+    bisect_min_chunk_seconds: int = 30  # bisect時に分割する最小の長さ（秒）
+    bisect_max_depth: int = 4  # bisect時の最大分割回数
+    hedge_enabled: bool = False  # 応答の遅いセグメントに追加のリクエストを送り、先に返った結果を使うかどうか
+    hedge_percentile: float = 0.9  # 直近のセグメントの遅延がこのパーセンタイルを超えたら追加のリクエストを送る
+    hedge_min_delay_seconds: int = 20  # 追加のリクエストを送るまでの最短の待ち時間（秒）
+    hedge_model: str = ""  # 追加のリクエストに使うモデル（空の場合は同じモデル）
+    segment_timeout_seconds: int = 0  # 1回のセグメント書き起こしの制限時間（秒、0は無制限）
+    failover_enabled: bool = False  # 接続先の障害時にセグメントをもう一方のプロバイダー（Gemini / OpenAI）で書き起こすかどうか
+    failover_after_errors: int = 2  # 429・5xx・タイムアウトがこの回数連続したらもう一方のプロバイダーに切り替える（0はエラーでは切り替えない）
+    failover_after_seconds: int = 0  # この秒数応答がない場合にもう一方のプロバイダーにも送信する（0は無効）
+    failover_cooldown_seconds: int = 120  # 切り替えた後、元のプロバイダーを再び試すまでの時間（秒）
+    batch_poll_interval_seconds: int = 60  # 遅延実行（バッチAPI）モードでジョブの完了を確認する間隔（秒）
+    batch_max_wait_hours: int = 24  # 遅延実行モードでジョブの完了を待つ最大時間（時間）
+    live_idle_timeout_seconds: int = 30  # ライブモードで録音ファイルが伸びなくなってから録音終了とみなすまでの時間（秒）
 
 class SummarizationConfig(BaseModel):
     """議事録生成設定モデル"""
     model: str = "gemini"  # デフォルト値はGemini
+    context_cache_enabled: bool = False  # タイトル生成と議事録生成で書き起こしのコンテキストキャッシュを共有するかどうか（Geminiのみ。有効時はタイトル生成も議事録用モデルで行う）
+    context_cache_ttl_seconds: int = 1800  # コンテキストキャッシュの有効期間（秒）
+    context_cache_min_chars: int = 8000  # これより短い書き起こしはキャッシュしない
+    fused_post_processing: bool = False  # タイトル・話者マッピング・議事録を1回の構造化出力でまとめて生成するかどうか（失敗時は個別に生成）
 
 class ModelsConfig(BaseModel):
     """AIモデル名設定モデル"""
@@ -37,11 +71,39 @@ class ModelsConfig(BaseModel):
     openai_sttitle: str = "gpt-4.1-mini"
     openai_audio: str = "gpt-4o-mini-transcribe"
     openai_4oaudio: str = "gpt-4o-audio-preview"
+    tiered_transcription: bool = False  # 各セグメントをまず高速モデルで書き起こし、検証に失敗したセグメントのみ上記の書き起こし用モデルで再実行するかどうか
+    gemini_transcription_fast: str = "gemini-2.5-flash"  # 段階的書き起こしで最初に使うGeminiのモデル
+    openai_4oaudio_fast: str = "gpt-4o-mini-audio-preview"  # 段階的書き起こしで最初に使うGPT-4 Audio方式のモデル
+
+class CredentialPoolConfig(BaseModel):
+    """資格情報プール設定モデル"""
+    requests_per_minute_per_key: int = 0  # APIキーごとの1分あたりのリクエスト数の上限（0は無制限）
+    cooldown_seconds: int = 60  # レート制限を受けたAPIキーを後回しにする時間（秒）
+
+class UploadConfig(BaseModel):
+    """アップロード設定モデル"""
+    resumable_threshold_mb: int = 20  # このサイズ（MB）を超えるファイルはチャンク分割の再開可能アップロードで送る（0は無効）
+    chunk_size_mb: int = 8  # 再開可能アップロードの1チャンクのサイズ（MB、256KBの倍数に切り下げる）
+    max_chunk_retries: int = 5  # 通信エラー時にチャンクを再送する最大回数
+    max_file_size_mb: int = 2048  # 再開可能アップロードで送れるファイルサイズの上限（MB、Files APIの上限は2GB）
+
+class CatalogConfig(BaseModel):
+    """会議カタログ（全文検索）の設定"""
+    enabled: bool = True  # 処理した会議のメタデータと発言を検索用のデータベースに登録するかどうか
+    db_path: str = "output/meeting_catalog.sqlite3"  # 会議カタログのデータベースファイル
 
 class AppConfig(BaseModel):
     """アプリケーション設定モデル"""
     openai_api_key: Optional[str] = None
     gemini_api_key: Optional[str] = None
+    openai_api_keys: List[str] = []  # 追加のOpenAI APIキー（複数のキーに呼び出しを分散する）
+    gemini_api_keys: List[str] = []  # 追加のGemini APIキー（複数のキーに呼び出しを分散する）
+    credential_pool: CredentialPoolConfig = CredentialPoolConfig()
+    openai_base_url: Optional[str] = None  # OpenAI APIの接続先（負荷試験用の疑似サーバーなど。通常は未設定）
+    gemini_base_url: Optional[str] = None  # Gemini APIの接続先（負荷試験用の疑似サーバーなど。通常は未設定）
+    api_timeout_seconds: int = 600  # OpenAI / Gemini APIの1リクエストあたりのタイムアウト（秒、0はSDKのデフォルト）
+    upload: UploadConfig = UploadConfig()
+    catalog: CatalogConfig = CatalogConfig()
     output: OutputConfig = OutputConfig()
     debug_mode: bool = False
     log_level: str = "INFO"
@@ -55,6 +117,27 @@ class AppConfig(BaseModel):
     class Config:
         arbitrary_types_allowed = True
 
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """ある時点の設定の読み取り専用スナップショット
+
+    1つの処理（ジョブ）の開始時に取得し、処理中はこのスナップショットだけを参照することで、
+    途中で設定ファイルが更新されても一貫した設定で処理できる。
+    """
+    config: AppConfig  # 検証済みの設定（スナップショットごとのコピー）
+    raw: Mapping[str, Any]  # 設定ファイルの生データ（promptsなどAppConfigにない項目を含む）
+    version: int  # 再読み込みのたびに増える番号
+    mtime_ns: Optional[int]  # 読み込んだ時点の設定ファイルの更新時刻
+
+    def get_model(self, model_type: str) -> str:
+        """指定されたタイプのAIモデル名を取得する"""
+        return getattr(self.config.models, model_type, None) or getattr(ModelsConfig(), model_type, "")
+
+    def get_prompt(self, prompt_type: str) -> Optional[str]:
+        """設定ファイルに保存されたカスタムプロンプトを取得する（未設定の場合はNone）"""
+        prompts = self.raw.get("prompts") or {}
+        return prompts.get(prompt_type)
+
 class ConfigManager:
     def __init__(self, config_file: str = "settings.json"):
         # 実行モードの詳細なログ
@@ -65,16 +148,35 @@ class ConfigManager:
         self.config_file = get_config_file_path(config_file)
         logger.info(f"設定ファイル絶対パス: {self.config_file.absolute()}")
         
+        self._lock = threading.RLock()
+        self._raw_config: Dict[str, Any] = {}
+        self._mtime_ns: Optional[int] = None
+        self._version = 0
+        self._snapshot: Optional[ConfigSnapshot] = None
+        self._subscribers: List[Callable[[ConfigSnapshot], None]] = []
+
         self.config = self._load_config()
+        self._snapshot = self._build_snapshot()
+
+    def _stat_mtime_ns(self) -> Optional[int]:
+        """設定ファイルの更新時刻を取得する（存在しない場合はNone）"""
+        try:
+            return self.config_file.stat().st_mtime_ns
+        except OSError:
+            return None
 
     def _load_config(self) -> AppConfig:
         """設定ファイルの読み込み"""
+        self._mtime_ns = self._stat_mtime_ns()
+        self._raw_config = {}
         try:
             if self.config_file.exists():
                 logger.info(f"設定ファイルを読み込みます: {self.config_file}")
                 with open(self.config_file, "r", encoding="utf-8") as f:
                     config_data = json.load(f)
                 logger.info("設定ファイルの読み込みに成功しました")
+                if isinstance(config_data, dict):
+                    self._raw_config = config_data
                 
                 # 文字起こし設定の詳細なログ
                 transcription_method = config_data.get("transcription", {}).get("method", "gemini")
@@ -95,17 +197,109 @@ class ConfigManager:
             logger.info(f"エラー後のデフォルト文字起こし方式: {default_config.transcription.method}")
             return default_config
 
+    def _build_snapshot(self) -> ConfigSnapshot:
+        """現在の設定からスナップショットを作成する"""
+        self._version += 1
+        return ConfigSnapshot(
+            config=AppConfig(**copy.deepcopy(self.config.dict())),
+            raw=MappingProxyType(copy.deepcopy(self._raw_config)),
+            version=self._version,
+            mtime_ns=self._mtime_ns,
+        )
+
+    def _publish(self) -> None:
+        """スナップショットを作り直し、購読者に通知する"""
+        with self._lock:
+            snapshot = self._build_snapshot()
+            self._snapshot = snapshot
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                logger.error(f"設定変更の通知中にエラーが発生しました: {str(e)}")
+
+    def reload_if_changed(self) -> bool:
+        """
+        設定ファイルが更新されていれば再読み込みする（更新時刻のみを確認するため軽量）
+
+        Returns:
+            bool: 再読み込みした場合はTrue
+        """
+        mtime_ns = self._stat_mtime_ns()
+        if mtime_ns == self._mtime_ns:
+            return False
+        with self._lock:
+            if self._stat_mtime_ns() == self._mtime_ns:
+                return False
+            logger.info("設定ファイルの更新を検出したため再読み込みします")
+            self.config = self._load_config()
+        self._publish()
+        return True
+
+    def get_snapshot(self) -> ConfigSnapshot:
+        """
+        現在の設定のスナップショットを取得する
+
+        設定ファイルの更新時刻が変わっている場合のみ再読み込みする。
+        1つの処理の中では同じスナップショットを使い回すこと。
+
+        Returns:
+            ConfigSnapshot: 読み取り専用の設定スナップショット
+        """
+        self.reload_if_changed()
+        return self._snapshot
+
+    def subscribe(self, callback: Callable[[ConfigSnapshot], None]) -> Callable[[], None]:
+        """
+        設定変更の通知を購読する
+
+        Args:
+            callback (Callable[[ConfigSnapshot], None]): 新しいスナップショットを受け取るコールバック
+        Returns:
+            Callable[[], None]: 購読を解除する関数
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def save_raw_section(self, key: str, value: Optional[Any]) -> None:
+        """
+        AppConfigで管理しない設定セクション（promptsなど）を保存する
+
+        Args:
+            key (str): セクション名
+            value (Any, optional): 保存する値（Noneの場合はセクションを削除）
+        """
+        with self._lock:
+            if value is None:
+                self._raw_config.pop(key, None)
+            else:
+                self._raw_config[key] = copy.deepcopy(value)
+        self.save_config()
+
     def save_config(self) -> None:
         """設定の保存"""
         try:
-            config_dict = self.config.dict()
-            logger.info(f"設定を保存します: {self.config_file.absolute()}")
-            with open(self.config_file, "w", encoding="utf-8") as f:
-                json.dump(config_dict, f, indent=4, ensure_ascii=False)
+            with self._lock:
+                # promptsなどAppConfigにない項目を消さないよう、生データに上書きして保存する
+                config_dict = copy.deepcopy(self._raw_config)
+                config_dict.update(self.config.dict())
+                logger.info(f"設定を保存します: {self.config_file.absolute()}")
+                with open(self.config_file, "w", encoding="utf-8") as f:
+                    json.dump(config_dict, f, indent=4, ensure_ascii=False)
+                self._raw_config = config_dict
+                self._mtime_ns = self._stat_mtime_ns()
             logger.info("設定の保存に成功しました")
         except Exception as e:
             logger.error(f"設定の保存中にエラーが発生しました: {str(e)}")
             raise ConfigError(f"設定の保存に失敗しました: {str(e)}")
+        self._publish()
 
     def update_config(self, config_dict: Dict[str, Any]) -> None:
         """
@@ -127,7 +321,10 @@ class ConfigManager:
             if "transcription" in config_dict:
                 transcription_config = config_dict["transcription"]
                 if isinstance(transcription_config, dict):
-                    self.config.transcription = TranscriptionConfig(**transcription_config)
+                    # 設定画面に表示されない項目を保持するため、既存の設定に上書きする
+                    current_transcription_dict = self.config.transcription.dict()
+                    current_transcription_dict.update(transcription_config)
+                    self.config.transcription = TranscriptionConfig(**current_transcription_dict)
                 else:
                     logger.warning("Invalid transcription configuration format")
                 del config_dict["transcription"]
@@ -167,13 +364,14 @@ class ConfigManager:
             raise ConfigError(f"Failed to update configuration: {str(e)}")
 
     def get_config(self) -> AppConfig:
-        """現在の設定を取得"""
+        """現在の設定を取得（設定画面など、設定を編集する側で使用する）"""
+        self.reload_if_changed()
         return self.config
 
     def get_model(self, model_type: str) -> str:
         """指定されたタイプのAIモデル名を取得する"""
         try:
-            model_name = getattr(self.config.models, model_type, None)
+            model_name = getattr(self.get_snapshot().config.models, model_type, None)
             if model_name is None:
                 # ModelsConfigのデフォルト値を使うため、エラーではなく警告ログに留める
                 logger.warning(f"指定されたモデルタイプが見つかりません: {model_type}。ModelsConfigのデフォルト値を使用します。")
@@ -193,7 +391,8 @@ class ConfigManager:
     def reset_to_defaults(self) -> None:
         """設定をデフォルトに戻す"""
         try:
-            self.config = AppConfig()
+            with self._lock:
+                self.config = AppConfig()
             self.save_config()
             logger.info("Configuration reset to defaults")
         except Exception as e:
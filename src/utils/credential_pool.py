@@ -0,0 +1,220 @@
+import re
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Optional
+
+from .config import config_manager
+from .error_chain import iter_exception_chain
+
+logger = logging.getLogger(__name__)
+
+# 1分あたりのリクエスト数を数える期間（秒）
+RATE_WINDOW_SECONDS = 60.0
+
+# 割り当て可能なキーがない場合に待機する最大間隔（秒）
+MAX_WAIT_INTERVAL = 1.0
+
+# レート制限とみなすエラーメッセージ（SDKの例外がラップされてステータスコードを辿れない場合に使う）
+_RATE_LIMIT_PATTERN = re.compile(r"\b429\b|RESOURCE_EXHAUSTED|rate limit|quota", re.IGNORECASE)
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    レート制限（429 / RESOURCE_EXHAUSTED）によるエラーかを判定する（ラップされた例外も辿る）
+
+    Args:
+        error (BaseException): 判定する例外
+    Returns:
+        bool: レート制限によるエラーの場合はTrue
+    """
+    for current in iter_exception_chain(error):
+        status = getattr(current, "status_code", None) or getattr(current, "code", None)
+        if status == 429 or type(current).__name__ == "RateLimitError":
+            return True
+    return bool(_RATE_LIMIT_PATTERN.search(str(error)))
+
+class _KeyState:
+    """APIキーごとの利用状況"""
+
+    def __init__(self):
+        self.recent: Deque[float] = deque()  # 直近1分間のリクエスト時刻
+        self.last_used = 0.0
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.throttled = 0
+
+class CredentialPool:
+    """複数のAPIキーに呼び出しを分散する資格情報プール
+
+    キーごとに直近1分間のリクエスト数とレート制限の状態を保持し、
+    利用可能なキーのうち最も長く使われていないものを割り当てる。
+    レート制限（429）を受けたキーは一定時間、他のキーより後回しにする。
+    requests_per_minute を指定した場合、キーごとの上限に達したら空きが出るまで待つため、
+    全体の1分あたりのリクエスト数はキーの数に比例して増える。
+    """
+
+    def __init__(self, name: str, keys: List[str], requests_per_minute: int = 0, cooldown_seconds: float = 60.0):
+        """
+        Args:
+            name (str): ログ表示用の名前（gemini / openai）
+            keys (List[str]): APIキーのリスト（先頭が既定のキー）
+            requests_per_minute (int): キーごとの1分あたりのリクエスト数の上限（0は無制限）
+            cooldown_seconds (float): レート制限を受けたキーを後回しにする時間（秒）
+        """
+        if not keys:
+            raise ValueError("APIキーが指定されていません")
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.cooldown_seconds = cooldown_seconds
+        self._states: Dict[str, _KeyState] = {key: _KeyState() for key in keys}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    @property
+    def keys(self) -> List[str]:
+        """プールに含まれるAPIキー"""
+        return list(self._states)
+
+    def find(self, key_hint: Optional[str]) -> Optional[str]:
+        """
+        伏せ字のキー（mask_key の結果）に一致するキーを探す
+
+        バッチジョブなど、作成したキーのプロジェクトでしか参照できない資源を後から参照する場合に使う。
+        APIキーそのものはファイルに保存しない。
+
+        Args:
+            key_hint (str, optional): mask_key で伏せ字にしたキー
+        Returns:
+            Optional[str]: 一致するキー（見つからない場合はNone）
+        """
+        if not key_hint:
+            return None
+        return next((key for key in self._states if mask_key(key) == key_hint), None)
+
+    def _ready_at(self, state: _KeyState, now: float) -> float:
+        """キーごとの上限で次にリクエストを送れる時刻"""
+        while state.recent and now - state.recent[0] >= RATE_WINDOW_SECONDS:
+            state.recent.popleft()
+        if self.requests_per_minute and len(state.recent) >= self.requests_per_minute:
+            return state.recent[0] + RATE_WINDOW_SECONDS
+        return now
+
+    def acquire(self, preferred: Optional[str] = None) -> str:
+        """
+        リクエストに使うAPIキーを割り当てる（キーごとの上限に達している場合は空くまで待つ）
+
+        Args:
+            preferred (str, optional): 使用するキーを固定する場合のキー（コンテキストキャッシュなどキーに紐づく資源を使う場合）
+        Returns:
+            str: APIキー
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                candidates = [preferred] if preferred in self._states else list(self._states)
+                ready = []
+                wait_until = None
+                for key in candidates:
+                    state = self._states[key]
+                    ready_at = self._ready_at(state, now)
+                    if ready_at <= now:
+                        ready.append(key)
+                    elif wait_until is None or ready_at < wait_until:
+                        wait_until = ready_at
+                if ready:
+                    # レート制限中のキーは、他に使えるキーがない場合だけ使う
+                    key = min(ready, key=lambda k: (self._states[k].cooldown_until > now, self._states[k].last_used))
+                    state = self._states[key]
+                    state.recent.append(now)
+                    state.last_used = now
+                    state.requests += 1
+                    return key
+            logger.info(f"{self.name}: 全てのAPIキーが1分あたりの上限に達しているため待機します（{wait_until - now:.1f}秒）")
+            time.sleep(min(max(wait_until - now, 0.01), MAX_WAIT_INTERVAL))
+
+    def report_error(self, key: str, error: BaseException) -> None:
+        """リクエストのエラーを報告する（レート制限の場合はキーを一定時間後回しにする）"""
+        if not is_rate_limit_error(error):
+            return
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                return
+            state.throttled += 1
+            state.cooldown_until = time.monotonic() + self.cooldown_seconds
+        if len(self) > 1:
+            logger.warning(f"{self.name}: APIキー {mask_key(key)} がレート制限を受けたため、{self.cooldown_seconds:.0f}秒間は他のキーを優先します")
+
+    @contextmanager
+    def lease(self, preferred: Optional[str] = None) -> Iterator[str]:
+        """
+        APIキーを割り当て、処理中のエラーを報告するコンテキストマネージャ
+
+        Args:
+            preferred (str, optional): 使用するキーを固定する場合のキー
+        Yields:
+            str: APIキー
+        """
+        key = self.acquire(preferred)
+        try:
+            yield key
+        except Exception as e:
+            self.report_error(key, e)
+            raise
+
+    def stats(self) -> List[Dict[str, int]]:
+        """キーごとのリクエスト数・レート制限の回数（キーは伏せ字にする）"""
+        with self._lock:
+            return [
+                {"key": mask_key(key), "requests": state.requests, "throttled": state.throttled}
+                for key, state in self._states.items()
+            ]
+
+def mask_key(key: str) -> str:
+    """ログ表示用にAPIキーの末尾4文字以外を伏せる"""
+    return f"...{key[-4:]}" if key else ""
+
+# プロバイダーごとの資格情報プール（設定が変わった場合は作り直す）
+_pools: Dict[str, CredentialPool] = {}
+_pools_lock = threading.Lock()
+
+def get_credential_pool(provider: str, primary_key: str) -> CredentialPool:
+    """
+    プロバイダーの資格情報プールを取得する
+
+    既定のキー（環境変数または設定ファイルの単一キー）と、設定ファイルの追加キー
+    （gemini_api_keys / openai_api_keys）をまとめたプールを返す。
+
+    Args:
+        provider (str): "gemini" または "openai"
+        primary_key (str): 既定のAPIキー
+    Returns:
+        CredentialPool: 資格情報プール
+    """
+    config = config_manager.get_snapshot().config
+    extra_keys = config.gemini_api_keys if provider == "gemini" else config.openai_api_keys
+    keys = list(dict.fromkeys(key for key in [primary_key, *extra_keys] if key))
+    pool_config = config.credential_pool
+
+    with _pools_lock:
+        pool = _pools.get(provider)
+        if (
+            pool is None
+            or pool.keys != keys
+            or pool.requests_per_minute != pool_config.requests_per_minute_per_key
+            or pool.cooldown_seconds != pool_config.cooldown_seconds
+        ):
+            pool = CredentialPool(
+                provider,
+                keys,
+                requests_per_minute=pool_config.requests_per_minute_per_key,
+                cooldown_seconds=pool_config.cooldown_seconds,
+            )
+            _pools[provider] = pool
+            if len(keys) > 1:
+                logger.info(f"{provider}: {len(keys)}個のAPIキーに呼び出しを分散します")
+        return pool
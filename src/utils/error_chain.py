@@ -0,0 +1,20 @@
+from typing import Iterator
+
+def iter_exception_chain(error: BaseException) -> Iterator[BaseException]:
+    """
+    例外と、その元になった例外（__cause__ / __context__）を順に返す
+
+    GeminiAPIError などでラップされた例外から、SDKの元の例外（ステータスコードを持つもの）を
+    辿るために使う。循環している場合は同じ例外を2度返さない。
+
+    Args:
+        error (BaseException): 起点の例外
+    Yields:
+        BaseException: 起点の例外から順に、元になった例外
+    """
+    seen = set()
+    current = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        yield current
+        current = current.__cause__ or current.__context__
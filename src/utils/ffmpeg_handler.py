@@ -99,7 +99,7 @@ def setup_ffmpeg():
     FFmpegの環境設定を行う。
     - FFmpegとffprobeのパスを取得
     - 環境変数を設定（PATH, FFMPEG_BINARY, FFPROBE_BINARY）
-    - pydubの設定を更新
+    - pydubの設定を更新（読み込み済みの場合のみ）
 
     Returns:
         tuple: (ffmpeg_path, ffprobe_path) - 設定されたパス
@@ -119,14 +119,19 @@ def setup_ffmpeg():
         logger.debug(f"PATHを更新しました: {ffmpeg_dir} を追加")
         
         # pydubのconverter設定
-        try:
-            from pydub import AudioSegment
-            AudioSegment.converter = ffmpeg_path
-            if ffprobe_path:
-                AudioSegment.ffprobe = ffprobe_path
-            logger.debug(f"pydub設定を更新しました: converter={ffmpeg_path}, ffprobe={ffprobe_path}")
-        except ImportError:
-            logger.warning("pydubのインポートに失敗しました。AudioSegment設定はスキップします。")
+        # 起動時間短縮のためpydubはここでは読み込まない。未読み込みの場合は
+        # 初回インポート時に上記のPATHからFFmpegが検出される
+        if "pydub" in sys.modules:
+            try:
+                from pydub import AudioSegment
+                AudioSegment.converter = ffmpeg_path
+                if ffprobe_path:
+                    AudioSegment.ffprobe = ffprobe_path
+                logger.debug(f"pydub設定を更新しました: converter={ffmpeg_path}, ffprobe={ffprobe_path}")
+            except ImportError:
+                logger.warning("pydubのインポートに失敗しました。AudioSegment設定はスキップします。")
+        else:
+            logger.debug("pydubは未読み込みのため、PATH経由でFFmpegを検出させます")
         
         # 環境変数の設定
         os.environ["FFMPEG_BINARY"] = ffmpeg_path
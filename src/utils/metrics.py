@@ -0,0 +1,74 @@
+import logging
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class Metrics:
+    """処理中の出来事を数えるカウンター（スレッドセーフ）
+
+    セグメントの書き起こしは複数のスレッドで並行して行われるため、
+    カウンターの更新はロックで保護する。値はプロセス全体の累計で、
+    実行ごとの件数は開始時の snapshot との差分（delta）で求める。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        """
+        カウンターを増やす
+
+        Args:
+            name (str): カウンター名（例: "structured_output.gemini_title.invalid"）
+            amount (int): 増やす量
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def get(self, name: str) -> int:
+        """カウンターの現在の値を返す"""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self, prefix: str = "") -> Dict[str, int]:
+        """
+        現在の全カウンターの値を返す
+
+        Args:
+            prefix (str): この文字列で始まるカウンターのみを返す
+        Returns:
+            Dict[str, int]: カウンター名 → 値
+        """
+        with self._lock:
+            return {name: value for name, value in self._counters.items() if name.startswith(prefix)}
+
+    def delta(self, since: Dict[str, int], prefix: str = "") -> Dict[str, int]:
+        """
+        snapshot を取得した時点からの増加量を返す（増えていないカウンターは含めない）
+
+        Args:
+            since (Dict[str, int]): 以前に取得した snapshot
+            prefix (str): この文字列で始まるカウンターのみを返す
+        Returns:
+            Dict[str, int]: カウンター名 → 増加量
+        """
+        current = self.snapshot(prefix)
+        return {
+            name: value - since.get(name, 0)
+            for name, value in sorted(current.items())
+            if value != since.get(name, 0)
+        }
+
+    def reset(self, prefix: Optional[str] = None) -> None:
+        """カウンターを消去する（prefix を指定した場合はその文字列で始まるもののみ）"""
+        with self._lock:
+            if prefix is None:
+                self._counters.clear()
+            else:
+                for name in [name for name in self._counters if name.startswith(prefix)]:
+                    del self._counters[name]
+
+# グローバルなMetricsインスタンス
+metrics = Metrics()
@@ -1,27 +1,101 @@
 import base64
+import io
 import os
 import logging
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Union, Iterator
-import json
+from typing import Dict, Any, Callable, Optional, List, Tuple, Union, Iterator
 import time
-import httplib2
+import hashlib
+import mimetypes
+import inspect
+import functools
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 
-from google import genai
-from google.genai import types
-from ..utils.config import config_manager
+from ..utils.config import config_manager, ConfigSnapshot
+from ..utils.transcript_json import complete_truncated_transcript, is_max_tokens_finish
+from ..utils.schema_utils import to_gemini_schema, parse_structured_response
+from ..utils.Common_OpenAIAPI import MEETING_TRANSCRIPT_SCHEMA, MEETING_TITLE_SCHEMA, SPEAKER_MAPPING_SCHEMA, SPEAKER_MAPPING_INSTRUCTION
+from ..utils.metrics import metrics
+from ..utils.credential_pool import get_credential_pool, mask_key
+from ..utils.resumable_upload import ResumableUploader, UploadProgress
 
 logger = logging.getLogger(__name__)
 
-# デフォルトのモデル設定
-DEFAULT_TRANSCRIPTION_MODEL = config_manager.get_model("gemini_transcription")
-DEFAULT_MINUTES_MODEL = config_manager.get_model("gemini_minutes")
-DEFAULT_TITLE_MODEL = config_manager.get_model("gemini_title")
-
 MAX_RETRIES = 3
 RETRY_DELAY = 5  # 秒
 MAX_FILE_SIZE_MB = 100  # デフォルトの最大ファイルサイズ（MB）
 
+# APIキーごとに生成済みのクライアントを保持（接続を再利用するため）
+_client_cache: Dict[str, Any] = {}
+
+def get_shared_client(api_key: str, base_url: Optional[str] = None) -> Any:
+    """APIキーに対応するGeminiクライアントを取得する（未生成の場合は生成してキャッシュ）
+
+    Args:
+        api_key (str): Gemini APIキー
+        base_url (str, optional): 接続先（負荷試験用の疑似サーバーなど。省略時はSDKのデフォルト）
+
+    Returns:
+        Any: genai.Client インスタンス
+    """
+    # 応答のないリクエストで処理全体が止まらないよう、タイムアウトを設定する（ミリ秒で指定）
+    timeout_seconds = config_manager.get_snapshot().config.api_timeout_seconds
+    cache_key = f"{api_key}@{base_url or ''}@{timeout_seconds}"
+    client = _client_cache.get(cache_key)
+    if client is None:
+        # google-genai SDK はインポートに時間がかかるため、初回のクライアント生成時に読み込む
+        from google import genai
+
+        http_options = {}
+        if base_url:
+            http_options["base_url"] = base_url
+        if timeout_seconds:
+            http_options["timeout"] = timeout_seconds * 1000
+        if http_options:
+            client = genai.Client(api_key=api_key, http_options=http_options)
+        else:
+            client = genai.Client(api_key=api_key)
+        _client_cache[cache_key] = client
+        logger.info(f"Geminiクライアントを生成しました{f'（接続先: {base_url}）' if base_url else ''}")
+    return client
+
+def _uses_credential(method):
+    """メソッドの呼び出し中に使うAPIキーを資格情報プールから割り当てるデコレータ
+
+    アップロードしたファイルやコンテキストキャッシュはAPIキー（プロジェクト）ごとの資源のため、
+    1回の呼び出しの中では同じキーを使う。context_cache 引数がある場合はキャッシュのキーに固定する。
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        context_cache = signature.bind(self, *args, **kwargs).arguments.get("context_cache")
+        with self._lease(context_cache.api_key if context_cache is not None else None):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+# 文字起こし用のプロンプト
+TRANSCRIPTION_PROMPT = """議事録を作成して 以下のJSON形式で出力：
+{
+  "conversations": [
+    {
+      "speaker": "発言者名",
+      "utterance": "発言内容"
+    },
+    ...
+  ]
+}
+"""
+
+# バッチジョブの状態（SDKのバージョンにより JOB_STATE_* または BATCH_STATE_*）
+_BATCH_SUCCEEDED_STATES = ("JOB_STATE_SUCCEEDED", "BATCH_STATE_SUCCEEDED")
+_BATCH_FAILED_STATES = (
+    "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED",
+    "BATCH_STATE_FAILED", "BATCH_STATE_CANCELLED", "BATCH_STATE_EXPIRED",
+)
+
 class MediaType:
     """サポートされるメディアタイプの定数"""
     AUDIO = "audio"
@@ -38,6 +112,111 @@ class VideoFileTooLargeError(GeminiAPIError):
     """動画ファイルサイズが大きすぎる場合のエラー"""
     pass
 
+class GeminiContextCache:
+    """書き起こし全文のコンテキストキャッシュ（1回の処理の後処理で共有する）
+
+    同じ書き起こしを入力とするタイトル生成・議事録生成などの呼び出しで、
+    書き起こし部分の入力トークン処理を1回にまとめる。キャッシュは最初に必要になった
+    時点で作成し、有効期限が近づいたら延長する。処理の終了時に close() で削除する。
+    キャッシュはモデルごとに作成されるため、すべての呼び出しを self.model で実行する。
+    """
+
+    # 有効期限がこれより近い場合は使用前に延長する（秒）
+    TTL_REFRESH_MARGIN_SECONDS = 120
+
+    def __init__(self, transcript_text: str, model: str, ttl_seconds: int = 1800, min_chars: int = 8000, api_key: str = None):
+        """
+        Args:
+            transcript_text (str): キャッシュする書き起こし全文
+            model (str): キャッシュを作成するモデル（後処理はすべてこのモデルで実行される）
+            ttl_seconds (int): キャッシュの有効期間（秒）
+            min_chars (int): これより短い書き起こしはキャッシュしない（最小トークン数の制約と作成コストのため）
+            api_key (str, optional): 直接指定するAPIキー
+        """
+        config = config_manager.get_snapshot().config
+        self.api_key = api_key or os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY") or config.gemini_api_key
+        self.base_url = os.getenv("GEMINI_BASE_URL") or getattr(config, "gemini_base_url", None)
+        self.model = model
+        self.ttl_seconds = ttl_seconds
+        self.min_chars = min_chars
+        self.text_hash = hashlib.sha256(transcript_text.encode("utf-8")).hexdigest()
+        self.transcript_text = transcript_text
+        self.name: Optional[str] = None
+        self.expire_at: Optional[datetime] = None
+        self.hits = 0
+        self._disabled = False
+        self._lock = threading.Lock()
+
+    def covers(self, text: str) -> bool:
+        """指定したテキストがキャッシュ対象の書き起こしと同一かどうか"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest() == self.text_hash
+
+    def acquire(self, text: str) -> Optional[str]:
+        """
+        テキストに対応するキャッシュ名を取得する（未作成の場合は作成し、期限が近い場合は延長する）
+
+        Args:
+            text (str): 呼び出しの入力テキスト
+        Returns:
+            Optional[str]: キャッシュ名（対象外・作成失敗時はNone。呼び出し側は通常の入力で実行する）
+        """
+        if self._disabled or not self.covers(text):
+            return None
+        with self._lock:
+            if self._disabled:
+                return None
+            client = get_shared_client(self.api_key, self.base_url)
+            try:
+                if self.name is None:
+                    if len(self.transcript_text) < self.min_chars:
+                        logger.info(f"書き起こしが短いため（{len(self.transcript_text)}文字）コンテキストキャッシュを使用しません")
+                        self._disabled = True
+                        return None
+                    cached = client.caches.create(
+                        model=self.model,
+                        config={
+                            "contents": [self.transcript_text],
+                            "display_name": f"gijiroku-{self.text_hash[:12]}",
+                            "ttl": f"{self.ttl_seconds}s",
+                        },
+                    )
+                    self.name = cached.name
+                    self.expire_at = self._expire_time_of(cached)
+                    token_count = getattr(getattr(cached, "usage_metadata", None), "total_token_count", None)
+                    logger.info(f"コンテキストキャッシュを作成しました: {self.name} (モデル: {self.model}, トークン数: {token_count})")
+                elif self.expire_at and self.expire_at - datetime.now(timezone.utc) < timedelta(seconds=self.TTL_REFRESH_MARGIN_SECONDS):
+                    updated = client.caches.update(name=self.name, config={"ttl": f"{self.ttl_seconds}s"})
+                    self.expire_at = self._expire_time_of(updated)
+                    logger.info(f"コンテキストキャッシュの有効期限を延長しました: {self.name}")
+            except Exception as e:
+                # キャッシュが使えなくても処理は継続できるため、以降は通常の入力で実行する
+                logger.warning(f"コンテキストキャッシュを使用できません。通常の入力で実行します: {str(e)}")
+                self._disabled = True
+                return None
+            self.hits += 1
+            return self.name
+
+    def _expire_time_of(self, cached: Any) -> datetime:
+        """キャッシュの有効期限を取得する（応答に含まれない場合はTTLから計算）"""
+        expire_time = getattr(cached, "expire_time", None)
+        if isinstance(expire_time, datetime):
+            return expire_time if expire_time.tzinfo else expire_time.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+
+    def close(self) -> None:
+        """キャッシュを削除する（複数回呼び出しても安全）"""
+        with self._lock:
+            if self.name is None:
+                return
+            name, self.name = self.name, None
+            self._disabled = True
+        try:
+            get_shared_client(self.api_key, self.base_url).caches.delete(name=name)
+            logger.info(f"コンテキストキャッシュを削除しました: {name} (使用回数: {self.hits})")
+        except Exception as e:
+            # 削除に失敗してもTTLの経過で自動的に削除される
+            logger.warning(f"コンテキストキャッシュの削除に失敗しました（有効期限後に自動削除されます）: {str(e)}")
+
 class GeminiAPI:
     """Gemini APIクライアント"""
     
@@ -47,7 +226,9 @@ class GeminiAPI:
         minutes_model: str = None,
         title_model: str = None,
         max_file_size_mb: int = None,
-        api_key: str = None
+        api_key: str = None,
+        upload_progress_callback: Optional[Callable[[UploadProgress], None]] = None,
+        snapshot: Optional[ConfigSnapshot] = None
     ):
         """Gemini APIクライアントを初期化
         
@@ -57,15 +238,20 @@ class GeminiAPI:
             title_model (str, optional): タイトル生成用のモデル名
             max_file_size_mb (int, optional): 最大ファイルサイズ（MB）
             api_key (str, optional): 直接指定するAPIキー
+            upload_progress_callback (Callable, optional): 再開可能アップロードの進捗を受け取る関数
+            snapshot (ConfigSnapshot, optional): 使用する設定のスナップショット（省略時は現在の設定）
         """
         # SSL証明書の設定（互換性のため）
         cert_path = os.environ.get('SSL_CERT_FILE')
         if cert_path:
+            import httplib2
+
             httplib2.CA_CERTS = cert_path
             logger.info(f"SSL証明書が設定されました: {cert_path}")
             
-        # 設定の読み込み
-        config = config_manager.get_config()
+        # 設定の読み込み（実行中のジョブから生成する場合は、そのジョブのスナップショットを使う）
+        snapshot = snapshot or config_manager.get_snapshot()
+        config = snapshot.config
         
         # APIキーを取得（優先順位: 引数 > 環境変数 > 設定ファイル）
         self.api_key = api_key or os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY") or config.gemini_api_key
@@ -76,22 +262,37 @@ class GeminiAPI:
             raise GeminiAPIError(error_msg)
         
         # モデル名の設定（引数 → 設定ファイル → デフォルト値の優先順）
-        self.transcription_model = transcription_model or getattr(config.models, "gemini_transcription", DEFAULT_TRANSCRIPTION_MODEL)
-        self.minutes_model = minutes_model or getattr(config.models, "gemini_minutes", DEFAULT_MINUTES_MODEL)
-        self.title_model = title_model or getattr(config.models, "gemini_title", DEFAULT_TITLE_MODEL)
+        self.transcription_model = transcription_model or snapshot.get_model("gemini_transcription")
+        self.minutes_model = minutes_model or snapshot.get_model("gemini_minutes")
+        self.title_model = title_model or snapshot.get_model("gemini_title")
         
         # 最大ファイルサイズの設定
         self.max_file_size_mb = max_file_size_mb or getattr(config, "max_file_size_mb", MAX_FILE_SIZE_MB)
+        # 大きなファイルはチャンク分割の再開可能アップロードで送る
+        self.upload_config = config.upload
+        self.upload_progress_callback = upload_progress_callback
+        self.api_timeout_seconds = config.api_timeout_seconds
+        self.last_upload_stats: Dict[str, Any] = {}
         
-        # クライアントの初期化 - 新しいGemini APIスタイル
-        self.client = genai.Client(api_key=self.api_key)
+        # クライアントの初期化 - 新しいGemini APIスタイル（同じAPIキーのクライアントは共有する）
+        # 設定ファイルに追加のキー（gemini_api_keys）がある場合は、呼び出しごとに資格情報プールからキーを割り当てる
+        self.base_url = os.getenv("GEMINI_BASE_URL") or getattr(config, "gemini_base_url", None)
+        self.credential_pool = get_credential_pool("gemini", self.api_key)
+        self._leased = threading.local()
         
+        # 書き起こしの出力トークン上限（自動分割の見積もりと同じ値を使う）
+        self.transcription_output_token_limit = config.transcription.output_token_limit
+        # 出力上限で途中まで出力された場合に続きを依頼する最大回数
+        self.max_continuations = config.transcription.max_continuations
+        # 書き起こし・タイトル・話者マッピングの出力をresponse_schemaでスキーマに従わせる
+        self.use_response_schema = config.transcription.gemini_response_schema
+
         # 互換性のための設定
         self.generation_config = {
             "temperature": 0.1,
             "top_p": 0.95,
             "top_k": 40,
-            "max_output_tokens": 8192,
+            "max_output_tokens": self.transcription_output_token_limit,
             "response_mime_type": "application/json",
         }
         
@@ -139,33 +340,106 @@ class GeminiAPI:
         logger.info(f"Minutes model: {self.minutes_model}, Title model: {self.title_model}")
         logger.info(f"Max file size: {self.max_file_size_mb} MB")
 
-    def _check_file_size(self, file_path: str) -> None:
+    @property
+    def client(self) -> Any:
+        """現在の呼び出しに割り当てられたAPIキーのクライアント（呼び出し外では既定のキー）"""
+        return get_shared_client(self._current_key, self.base_url)
+
+    @property
+    def _current_key(self) -> str:
+        """現在の呼び出しに割り当てられたAPIキー（呼び出し外では既定のキー）"""
+        return getattr(self._leased, "key", None) or self.api_key
+
+    @contextmanager
+    def _lease(self, preferred_key: Optional[str] = None) -> Iterator[str]:
+        """
+        資格情報プールからAPIキーを割り当て、このスレッドの呼び出し中は同じキーを使う
+
+        Args:
+            preferred_key (str, optional): 使用するキーを固定する場合のキー（コンテキストキャッシュのキーなど）
+        Yields:
+            str: APIキー
+        """
+        current = getattr(self._leased, "key", None)
+        if current is not None:
+            # 入れ子の呼び出しは外側のキーをそのまま使う
+            yield current
+            return
+        with self.credential_pool.lease(preferred_key) as key:
+            self._leased.key = key
+            try:
+                yield key
+            finally:
+                self._leased.key = None
+
+    def _uses_resumable_upload(self, file_size_mb: float) -> bool:
+        """再開可能アップロードで送るサイズかどうか"""
+        threshold = self.upload_config.resumable_threshold_mb
+        return threshold > 0 and file_size_mb > threshold
+
+    def _check_file_size(self, file_path: Union[str, bytes, memoryview]) -> float:
         """ファイルサイズをチェックし、大きすぎる場合は例外を発生
         
+        一括アップロードでは max_file_size_mb、再開可能アップロードでは
+        設定の upload.max_file_size_mb（Files APIの上限）までのファイルを受け付ける。
+
         Args:
-            file_path (str): チェックするファイルのパス
+            file_path (Union[str, bytes, memoryview]): チェックするファイルのパス、またはメモリ上のデータ
             
+        Returns:
+            float: ファイルサイズ（MB）
+
         Raises:
             VideoFileTooLargeError: ファイルサイズが制限を超えている場合
             FileNotFoundError: ファイルが存在しない場合
         """
-        file_path_obj = Path(file_path)
-        if not file_path_obj.exists():
-            raise FileNotFoundError(f"ファイルが見つかりません: {file_path}")
-        
-        file_size_mb = file_path_obj.stat().st_size / (1024 * 1024)
-        if file_size_mb > self.max_file_size_mb:
+        if isinstance(file_path, (bytes, bytearray, memoryview)):
+            file_size_mb = len(file_path) / (1024 * 1024)
+        else:
+            file_path_obj = Path(file_path)
+            if not file_path_obj.exists():
+                raise FileNotFoundError(f"ファイルが見つかりません: {file_path}")
+            file_size_mb = file_path_obj.stat().st_size / (1024 * 1024)
+
+        if self._uses_resumable_upload(file_size_mb):
+            limit_mb, setting = max(self.upload_config.max_file_size_mb, self.max_file_size_mb), "upload.max_file_size_mb"
+        else:
+            limit_mb, setting = self.max_file_size_mb, "max_file_size_mb"
+        if file_size_mb > limit_mb:
             raise VideoFileTooLargeError(
-                f"ファイルサイズ({file_size_mb:.1f}MB)が制限({self.max_file_size_mb}MB)を超えています。"
-                "ファイルを小さく分割するか、設定の'max_file_size_mb'を増やしてください。"
+                f"ファイルサイズ({file_size_mb:.1f}MB)が制限({limit_mb}MB)を超えています。"
+                f"ファイルを小さく分割するか、設定の'{setting}'を増やしてください。"
             )
+        return file_size_mb
+
+    def _upload_resumable(self, file_path: Union[str, bytes, memoryview], mime_type: Optional[str]) -> Any:
+        """チャンク分割の再開可能アップロードで送信し、SDKのファイルオブジェクトを返す"""
+        if not mime_type:
+            if isinstance(file_path, (bytes, bytearray, memoryview)):
+                raise GeminiAPIError("メモリ上のデータをアップロードする場合はMIMEタイプの指定が必要です")
+            mime_type = mimetypes.guess_type(str(file_path))[0] or "application/octet-stream"
+        uploader = ResumableUploader(
+            self._current_key,
+            base_url=self.base_url,
+            chunk_size_mb=self.upload_config.chunk_size_mb,
+            max_chunk_retries=self.upload_config.max_chunk_retries,
+            retry_delay=RETRY_DELAY,
+            timeout=self.api_timeout_seconds,
+            progress_callback=self.upload_progress_callback,
+        )
+        resource = uploader.upload(file_path, mime_type)
+        self.last_upload_stats = uploader.last_stats
+        return self.client.files.get(name=resource["name"])
 
-    def upload_file(self, file_path: str, mime_type: Optional[str] = None) -> Any:
+    def upload_file(self, file_path: Union[str, bytes, memoryview], mime_type: Optional[str] = None) -> Any:
         """ファイルをGemini APIにアップロード
         
+        設定の upload.resumable_threshold_mb を超えるファイルはチャンクに分けて送信し、
+        通信が切れた場合は受信済みの位置から再開する。
+
         Args:
-            file_path (str): アップロードするファイルのパス
-            mime_type (str, optional): ファイルのMIMEタイプ (非推奨、新APIでは自動検出)
+            file_path (Union[str, bytes, memoryview]): アップロードするファイルのパス、またはメモリ上のデータ
+            mime_type (str, optional): ファイルのMIMEタイプ（パス指定時は自動検出、メモリ上のデータでは必須）
             
         Returns:
             Any: アップロードされたファイルオブジェクト
@@ -175,11 +449,23 @@ class GeminiAPI:
         """
         try:
             # ファイルサイズのチェック
-            self._check_file_size(file_path)
+            file_size_mb = self._check_file_size(file_path)
             
             # ファイルをアップロード
-            logger.info(f"Uploading file: {file_path}")
-            uploaded_file = self.client.files.upload(file=file_path)
+            if self._uses_resumable_upload(file_size_mb):
+                logger.info(f"Uploading with resumable upload: {file_size_mb:.1f} MB")
+                uploaded_file = self._upload_resumable(file_path, mime_type)
+            elif isinstance(file_path, (bytes, bytearray, memoryview)):
+                if not mime_type:
+                    raise GeminiAPIError("メモリ上のデータをアップロードする場合はMIMEタイプの指定が必要です")
+                logger.info(f"Uploading in-memory data: {len(file_path):,} bytes ({mime_type})")
+                uploaded_file = self.client.files.upload(
+                    file=io.BytesIO(file_path),
+                    config={"mime_type": mime_type}
+                )
+            else:
+                logger.info(f"Uploading file: {file_path}")
+                uploaded_file = self.client.files.upload(file=file_path)
             logger.info(f"File uploaded successfully: {uploaded_file.uri}")
             
             return uploaded_file
@@ -190,18 +476,23 @@ class GeminiAPI:
             logger.error(error_msg)
             raise GeminiAPIError(error_msg)
 
+    @_uses_credential
     def transcribe(
         self, 
-        file_path: str, 
+        file_path: Union[str, bytes, memoryview], 
         media_type: str = MediaType.AUDIO,
-        stream: bool = False
+        stream: bool = False,
+        mime_type: Optional[str] = None,
+        model: Optional[str] = None
     ) -> Union[str, Iterator[str]]:
         """音声または動画ファイルを文字起こし
         
         Args:
-            file_path (str): 文字起こしするファイルのパス
+            file_path (Union[str, bytes, memoryview]): 文字起こしするファイルのパス、またはメモリ上のデータ
             media_type (str): メディアタイプ（'audio' or 'video'）
             stream (bool): ストリーミングレスポンスを返すかどうか
+            mime_type (str, optional): メモリ上のデータを渡す場合のMIMEタイプ
+            model (str, optional): 使用するモデル（省略時は書き起こし用のモデル）
             
         Returns:
             Union[str, Iterator[str]]: 文字起こしテキスト
@@ -210,43 +501,23 @@ class GeminiAPI:
             GeminiAPIError: 文字起こしに失敗した場合
         """
         try:
-            uploaded_file = self.upload_file(file_path)
-            
-            # 文字起こし用のプロンプト
-            system_prompt = """議事録を作成して 以下のJSON形式で出力：
-{
-  "conversations": [
-    {
-      "speaker": "発言者名",
-      "utterance": "発言内容"
-    },
-    ...
-  ]
-}
-"""
+            uploaded_file = self.upload_file(file_path, mime_type=mime_type)
             
             # コンテンツとして、アップロードしたファイルとプロンプトを渡す
             contents = [
                 uploaded_file,
-                system_prompt
+                TRANSCRIPTION_PROMPT
             ]
+            generation_config = self._transcription_config()
             
-            # 温度や最大トークン数などのパラメータ設定
-            generation_config = {
-                "temperature": 0.1,
-                "top_p": 0.95,
-                "top_k": 40,
-                "max_output_tokens": 8192,
-                "response_mime_type": "application/json",
-            }
-            
-            logger.info(f"Transcribing {media_type} file using {self.transcription_model}")
+            model = model or self.transcription_model
+            logger.info(f"Transcribing {media_type} file using {model}")
             
             # 応答を生成（ストリーミングまたは通常）
             if stream:
-                return self._transcribe_stream(contents, config=generation_config)
+                return self._transcribe_stream(contents, config=generation_config, model=model)
             else:
-                return self._transcribe_normal(contents, config=generation_config)
+                return self._transcribe_normal(contents, config=generation_config, model=model)
                 
         except Exception as e:
             error_msg = f"{media_type.capitalize()}ファイルの文字起こしに失敗しました: {str(e)}"
@@ -263,12 +534,145 @@ class GeminiAPI:
             except Exception as e:
                 logger.warning(f"アップロードファイルの削除に失敗しました: {str(e)}")
 
-    def transcribe_audio(self, audio_file_path: str, system_prompt: str = None) -> str:
+    def _transcription_config(self) -> Dict[str, Any]:
+        """文字起こし用の生成設定（温度や最大トークン数など）"""
+        generation_config = {
+            "temperature": 0.1,
+            "top_p": 0.95,
+            "top_k": 40,
+            "max_output_tokens": self.transcription_output_token_limit,
+            "response_mime_type": "application/json",
+        }
+        if self.use_response_schema:
+            generation_config["response_schema"] = to_gemini_schema(MEETING_TRANSCRIPT_SCHEMA)
+        return generation_config
+
+    @staticmethod
+    def _validate_structured(kind: str, text: str, json_schema: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        構造化出力の応答をスキーマで検証し、結果をメトリクスに記録する
+
+        Args:
+            kind (str): 呼び出しの種類（メトリクス名に使う。例: "gemini_title"）
+            text (str): 応答テキスト
+            json_schema (Dict[str, Any]): 期待するスキーマ
+        Returns:
+            Optional[Dict[str, Any]]: 解析結果（検証に失敗した場合はNone）
+        """
+        try:
+            data = parse_structured_response(text, json_schema)
+        except ValueError as e:
+            metrics.increment(f"structured_output.{kind}.invalid")
+            logger.warning(f"応答がスキーマの検証に失敗しました（{kind}）: {str(e)}")
+            return None
+        metrics.increment(f"structured_output.{kind}.valid")
+        return data
+
+    def submit_transcription_batch(
+        self,
+        media: List[Tuple[Union[bytes, memoryview], str]],
+        model: Optional[str] = None,
+        display_name: str = ""
+    ) -> Dict[str, Any]:
+        """
+        複数の音声をアップロードし、文字起こしのバッチジョブを作成する（結果は非同期で返る）
+
+        アップロードしたファイルとバッチジョブはAPIキーのプロジェクトに属するため、同じキーで作成する。
+
+        Args:
+            media (List[Tuple[bytes | memoryview, str]]): (音声データ, MIMEタイプ) のリスト
+            model (str, optional): 使用するモデル（省略時は書き起こし用のモデル）
+            display_name (str): ジョブの表示名
+        Returns:
+            Dict[str, Any]: {"name": ジョブ名, "key_hint": 作成に使ったキー（伏せ字）, "files": アップロードしたファイル名のリスト}
+        Raises:
+            GeminiAPIError: 作成に失敗した場合
+        """
+        model = model or self.transcription_model
+        files = []
+        try:
+            with self._lease() as key:
+                requests = []
+                for data, mime_type in media:
+                    uploaded_file = self.upload_file(data, mime_type=mime_type)
+                    files.append(uploaded_file.name)
+                    requests.append({
+                        "contents": [{
+                            "role": "user",
+                            "parts": [
+                                {"file_data": {"file_uri": uploaded_file.uri, "mime_type": mime_type}},
+                                {"text": TRANSCRIPTION_PROMPT},
+                            ],
+                        }],
+                        "config": self._transcription_config(),
+                    })
+                job = self.client.batches.create(model=model, src=requests, config={"display_name": display_name})
+                logger.info(f"バッチジョブを作成しました: {job.name}（{len(requests)}件, モデル: {model}）")
+                return {"name": job.name, "key_hint": mask_key(key), "files": files}
+        except Exception as e:
+            self.delete_files(files)
+            error_msg = f"バッチジョブの作成に失敗しました: {str(e)}"
+            logger.error(error_msg)
+            raise GeminiAPIError(error_msg)
+
+    def get_transcription_batch(self, name: str, key_hint: Optional[str] = None) -> Dict[str, Any]:
+        """
+        バッチジョブの状態を取得し、完了していれば結果を返す
+
+        Args:
+            name (str): ジョブ名
+            key_hint (str, optional): 作成に使ったキー（伏せ字）
+        Returns:
+            Dict[str, Any]: {"state": "running" | "succeeded" | "failed", "detail": 元の状態,
+                "results": {リクエストの順番: {"text": 応答テキスト, "truncated": 出力上限で途中まで出力されたか}}}
+                （エラーになったリクエストは results に含めない）
+        Raises:
+            GeminiAPIError: 取得に失敗した場合
+        """
+        try:
+            with self._lease(self.credential_pool.find(key_hint)):
+                job = self.client.batches.get(name=name)
+            state = getattr(job.state, "name", None) or str(job.state)
+            if state in _BATCH_FAILED_STATES:
+                return {"state": "failed", "detail": state, "results": {}}
+            if state not in _BATCH_SUCCEEDED_STATES:
+                return {"state": "running", "detail": state, "results": {}}
+
+            results = {}
+            inlined = (getattr(job.dest, "inlined_responses", None) or []) if job.dest else []
+            for i, item in enumerate(inlined):
+                response = getattr(item, "response", None)
+                if getattr(item, "error", None) or response is None or not response.text:
+                    continue
+                truncated = self._is_truncated_response(response)
+                if not truncated:
+                    self._validate_structured("gemini_transcription", response.text, MEETING_TRANSCRIPT_SCHEMA)
+                results[i] = {"text": response.text, "truncated": truncated}
+            return {"state": "succeeded", "detail": state, "results": results}
+        except Exception as e:
+            error_msg = f"バッチジョブの取得に失敗しました: {str(e)}"
+            logger.error(error_msg)
+            raise GeminiAPIError(error_msg)
+
+    def delete_files(self, names: List[str], key_hint: Optional[str] = None) -> None:
+        """アップロードしたファイルを削除する（失敗しても処理は続行する）"""
+        if not names:
+            return
+        with self._lease(self.credential_pool.find(key_hint)):
+            for name in names:
+                try:
+                    self.client.files.delete(name=name)
+                except Exception as e:
+                    logger.warning(f"アップロードファイルの削除に失敗しました: {name}: {str(e)}")
+
+    def transcribe_audio(self, audio_file_path: Union[str, bytes, memoryview], system_prompt: str = None, mime_type: Optional[str] = None, model: Optional[str] = None) -> str:
         """音声ファイルを文字起こしする（既存APIとの互換性のためのメソッド）
         
         Args:
-            audio_file_path (str): 音声ファイルのパス
+            audio_file_path (Union[str, bytes, memoryview]): 音声ファイルのパス、またはメモリ上のデータ
             system_prompt (str, optional): 文字起こし用のシステムプロンプト
+            mime_type (str, optional): メモリ上のデータを渡す場合のMIMEタイプ
+            model (str, optional): 使用するモデル（省略時は書き起こし用のモデル）
             
         Returns:
             str: 文字起こしテキスト
@@ -278,19 +682,20 @@ class GeminiAPI:
         """
         try:
             # 新しいAPIを使用して文字起こし
-            result = self.transcribe(audio_file_path, media_type=MediaType.AUDIO)
+            result = self.transcribe(audio_file_path, media_type=MediaType.AUDIO, mime_type=mime_type, model=model)
             return result
         except Exception as e:
             error_msg = f"音声ファイルの文字起こしに失敗しました: {str(e)}"
             logger.error(error_msg)
             raise GeminiAPIError(error_msg)
 
-    def _transcribe_stream(self, contents: List, config: Dict) -> Iterator[str]:
+    def _transcribe_stream(self, contents: List, config: Dict, model: Optional[str] = None) -> Iterator[str]:
         """文字起こしをストリーミングモードで実行
         
         Args:
             contents (List): コンテンツリスト
             config (Dict): 生成設定
+            model (str, optional): 使用するモデル（省略時は書き起こし用のモデル）
             
         Returns:
             Iterator[str]: 文字起こしテキストのストリーム
@@ -298,7 +703,7 @@ class GeminiAPI:
         try:
             # 新しいストリーミングAPI呼び出し方式
             for chunk in self.client.models.generate_content_stream(
-                model=self.transcription_model,
+                model=model or self.transcription_model,
                 contents=contents,
                 config=config,
             ):
@@ -309,39 +714,86 @@ class GeminiAPI:
             logger.error(error_msg)
             raise GeminiAPIError(error_msg)
 
-    def _transcribe_normal(self, contents: List, config: Dict) -> str:
+    def _transcribe_normal(self, contents: List, config: Dict, model: Optional[str] = None) -> str:
         """文字起こしを通常モードで実行
         
         Args:
             contents (List): コンテンツリスト
             config (Dict): 生成設定
+            model (str, optional): 使用するモデル（省略時は書き起こし用のモデル）
             
         Returns:
             str: 文字起こしテキスト
         """
+        model = model or self.transcription_model
         try:
             # 新しいAPI呼び出し方式
             response = self.client.models.generate_content(
-                model=self.transcription_model,
+                model=model,
                 contents=contents,
                 config=config,
             )
             
-            if hasattr(response, 'text') and response.text:
-                return response.text
-            else:
+            if not (hasattr(response, 'text') and response.text):
                 raise GeminiAPIError("Gemini APIからの応答が空です")
+
+            def request_continuation(prompt: str, previous_output: str):
+                # 同じ音声ファイルに対して、これまでの出力の続きだけを依頼する
+                continuation = self.client.models.generate_content(
+                    model=model,
+                    contents=list(contents) + [prompt],
+                    config=config,
+                )
+                return continuation.text or "", self._is_truncated_response(continuation)
+
+            text = complete_truncated_transcript(
+                response.text,
+                self._is_truncated_response(response),
+                request_continuation,
+                max_continuations=self.max_continuations,
+            )
+            # 検証に失敗しても後続の処理（途中で切れたJSONの救済など）に任せるため、結果はそのまま返す
+            self._validate_structured("gemini_transcription", text, MEETING_TRANSCRIPT_SCHEMA)
+            return text
                 
         except Exception as e:
             error_msg = f"文字起こしに失敗しました: {str(e)}"
             logger.error(error_msg)
             raise GeminiAPIError(error_msg)
 
-    def generate_title(self, transcription_text: str) -> str:
+    @staticmethod
+    def _is_truncated_response(response: Any) -> bool:
+        """応答が出力トークン上限で打ち切られたかどうかを判定する"""
+        candidates = getattr(response, "candidates", None) or []
+        return bool(candidates) and is_max_tokens_finish(getattr(candidates[0], "finish_reason", None))
+
+    def _with_context_cache(
+        self,
+        model: str,
+        text: str,
+        prompt: str,
+        config: Dict,
+        context_cache: Optional[GeminiContextCache]
+    ) -> tuple:
+        """
+        コンテキストキャッシュが使える場合は、書き起こしをキャッシュ参照に置き換えたリクエストを組み立てる
+
+        Returns:
+            tuple: (モデル名, contents, config)
+        """
+        cache_name = context_cache.acquire(text) if context_cache else None
+        if cache_name:
+            logger.info(f"コンテキストキャッシュを使用します: {cache_name}")
+            return context_cache.model, [prompt], {**config, "cached_content": cache_name}
+        return model, [text, prompt], config
+
+    @_uses_credential
+    def generate_title(self, transcription_text: str, context_cache: Optional[GeminiContextCache] = None) -> str:
         """会議の書き起こしからタイトルを生成
         
         Args:
             transcription_text (str): 会議の書き起こしテキスト
+            context_cache (GeminiContextCache, optional): 書き起こしのコンテキストキャッシュ
             
         Returns:
             str: 生成されたタイトル
@@ -358,6 +810,8 @@ class GeminiAPI:
                 "max_output_tokens": 200,
                 "response_mime_type": "application/json",
             }
+            if self.use_response_schema:
+                title_config["response_schema"] = to_gemini_schema(MEETING_TITLE_SCHEMA)
             
             # タイトル生成用のプロンプト
             system_prompt =  """
@@ -369,17 +823,16 @@ JSON形式で。
 
 """
             
-            # コンテンツ準備
-            contents = [
-                transcription_text,
-                system_prompt
-            ]
+            # コンテンツ準備（キャッシュ使用時は書き起こしをキャッシュ参照に置き換える）
+            model, contents, title_config = self._with_context_cache(
+                self.title_model, transcription_text, system_prompt, title_config, context_cache
+            )
             
-            logger.info(f"Generating title using {self.title_model}")
+            logger.info(f"Generating title using {model}")
             
             # タイトル生成
             response = self.client.models.generate_content(
-                model=self.title_model,
+                model=model,
                 contents=contents,
                 config=title_config,
             )
@@ -388,45 +841,123 @@ JSON形式で。
                 raise GeminiAPIError("タイトル生成からの応答が空です")
             
             # JSONパースとタイトル抽出
-            try:
-                response_data = json.loads(response.text)
-                title = response_data.get("title", "").strip()
-                
-                if not title:
-                    logger.warning("生成されたタイトルが空です。デフォルトのタイトルを使用します。")
-                    title = "会議録"
-                
-                logger.info(f"Generated title: {title}")
-                return title
-                
-            except json.JSONDecodeError:
-                # JSON解析に失敗した場合、テキストをそのまま返す
+            response_data = self._validate_structured("gemini_title", response.text, MEETING_TITLE_SCHEMA)
+            if response_data is None:
+                # スキーマに従っていない場合、テキストをそのまま返す
                 cleaned_text = response.text.strip()
                 logger.warning(f"JSONパースに失敗しました。テキストをタイトルとして使用: {cleaned_text}")
                 return cleaned_text
+            
+            title = response_data["title"].strip()
+            if not title:
+                logger.warning("生成されたタイトルが空です。デフォルトのタイトルを使用します。")
+                title = "会議録"
+            
+            logger.info(f"Generated title: {title}")
+            return title
                 
         except Exception as e:
             error_msg = f"タイトル生成に失敗しました: {str(e)}"
             logger.error(error_msg)
             raise GeminiAPIError(error_msg)
 
-    def generate_meeting_title(self, text: str) -> str:
+    @_uses_credential
+    def generate_structured(
+        self,
+        text: str,
+        prompt: str,
+        json_schema: Dict[str, Any],
+        model: Optional[str] = None,
+        max_output_tokens: int = 8192,
+        context_cache: Optional[GeminiContextCache] = None
+    ) -> str:
+        """スキーマに従ったJSONを生成する
+        
+        Args:
+            text (str): 入力テキスト（会議の書き起こしなど）
+            prompt (str): 指示プロンプト
+            json_schema (Dict[str, Any]): 出力のスキーマ（OpenAIの json_schema 形式も可）
+            model (str, optional): 使用するモデル（省略時は議事録用モデル）
+            max_output_tokens (int): 出力トークン上限
+            context_cache (GeminiContextCache, optional): 書き起こしのコンテキストキャッシュ
+            
+        Returns:
+            str: 生成されたJSONテキスト
+            
+        Raises:
+            GeminiAPIError: 生成に失敗した場合
+        """
+        try:
+            structured_config = {
+                "temperature": 0.2,
+                "top_p": 0.95,
+                "max_output_tokens": max_output_tokens,
+                "response_mime_type": "application/json",
+                "response_schema": to_gemini_schema(json_schema),
+            }
+            model, contents, structured_config = self._with_context_cache(
+                model or self.minutes_model, text, prompt, structured_config, context_cache
+            )
+            
+            logger.info(f"Generating structured output using {model}")
+            response = self.client.models.generate_content(
+                model=model,
+                contents=contents,
+                config=structured_config,
+            )
+            
+            if not hasattr(response, 'text') or not response.text:
+                raise GeminiAPIError("構造化出力の応答が空です")
+            if self._is_truncated_response(response):
+                raise GeminiAPIError("構造化出力が出力上限で途中まで出力されました")
+            return response.text
+                
+        except GeminiAPIError:
+            raise
+        except Exception as e:
+            error_msg = f"構造化出力の生成に失敗しました: {str(e)}"
+            logger.error(error_msg)
+            raise GeminiAPIError(error_msg)
+
+    def generate_speaker_mapping(self, transcription_text: str, prompt: str) -> Dict[str, str]:
+        """会議の書き起こしから話者マッピングを生成する（スキーマに従った構造化出力）
+        
+        Args:
+            transcription_text (str): 会議の書き起こしテキスト
+            prompt (str): 話者マッピング用のプロンプト
+            
+        Returns:
+            Dict[str, str]: 話者識別子 → 実際の話者名
+            
+        Raises:
+            GeminiAPIError: 生成に失敗した場合、または応答がスキーマに従っていない場合
+        """
+        response = self.generate_structured(transcription_text, f"{prompt}\n\n{SPEAKER_MAPPING_INSTRUCTION}", SPEAKER_MAPPING_SCHEMA)
+        data = self._validate_structured("gemini_speaker_mapping", response, SPEAKER_MAPPING_SCHEMA)
+        if data is None:
+            raise GeminiAPIError("話者マッピングの応答がスキーマに従っていません")
+        return {item["speaker"]: item["name"] for item in data["speaker_mapping"]}
+
+    def generate_meeting_title(self, text: str, context_cache: Optional[GeminiContextCache] = None) -> str:
         """会議タイトルを生成する（互換性のため）
         
         Args:
             text (str): 会議の書き起こしテキスト
+            context_cache (GeminiContextCache, optional): 書き起こしのコンテキストキャッシュ
             
         Returns:
             str: 生成された会議タイトル
         """
-        return self.generate_title(text)
+        return self.generate_title(text, context_cache)
 
-    def summarize_minutes(self, text: str, system_prompt: str) -> str:
+    @_uses_credential
+    def summarize_minutes(self, text: str, system_prompt: str, context_cache: Optional[GeminiContextCache] = None) -> str:
         """議事録のまとめを生成する
         
         Args:
             text (str): 要約する元のテキスト
             system_prompt (str): 議事録生成用のシステムプロンプト
+            context_cache (GeminiContextCache, optional): 書き起こしのコンテキストキャッシュ
             
         Returns:
             str: 生成された議事録のまとめ
@@ -444,17 +975,16 @@ JSON形式で。
                 "response_mime_type": "text/plain",
             }
             
-            # コンテンツ準備
-            contents = [
-                text,
-                system_prompt
-            ]
+            # コンテンツ準備（キャッシュ使用時は書き起こしをキャッシュ参照に置き換える）
+            model, contents, minutes_config = self._with_context_cache(
+                self.minutes_model, text, system_prompt, minutes_config, context_cache
+            )
             
-            logger.info(f"Generating minutes using {self.minutes_model}")
+            logger.info(f"Generating minutes using {model}")
             
             # 議事録生成
             response = self.client.models.generate_content(
-                model=self.minutes_model,
+                model=model,
                 contents=contents,
                 config=minutes_config,
             )
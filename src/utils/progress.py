@@ -0,0 +1,303 @@
+import time
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 処理の段階（表示名）
+STAGE_LABELS = {
+    "prepare": "音声の準備",
+    "transcribe": "書き起こし",
+    "post_process": "一括後処理",
+    "speaker_remap": "話者の置換",
+    "title": "タイトル生成",
+    "csv": "CSV変換",
+    "catalog": "カタログ登録",
+    "minutes": "議事録生成",
+    "reflection": "反省点抽出",
+}
+
+@dataclass
+class ProgressEvent:
+    """処理の進捗イベント
+
+    kind ごとに使う項目:
+    - stage_started / stage_finished: stage（終了時は elapsed_seconds）
+    - segment_done: segment, completed, total（ライブモードではNone）, eta_seconds
+    - retry: segment, attempt, max_attempts, message（再試行の理由）
+    - bytes_uploaded: sent_bytes, total_bytes
+    - run_finished: success, elapsed_seconds
+    """
+    STAGE_STARTED = "stage_started"
+    STAGE_FINISHED = "stage_finished"
+    SEGMENT_DONE = "segment_done"
+    RETRY = "retry"
+    BYTES_UPLOADED = "bytes_uploaded"
+    RUN_FINISHED = "run_finished"
+
+    run_id: str
+    kind: str
+    stage: Optional[str] = None
+    timestamp: float = 0.0
+    segment: Optional[int] = None
+    completed: Optional[int] = None
+    total: Optional[int] = None
+    eta_seconds: Optional[float] = None
+    attempt: Optional[int] = None
+    max_attempts: Optional[int] = None
+    sent_bytes: Optional[int] = None
+    total_bytes: Optional[int] = None
+    elapsed_seconds: Optional[float] = None
+    success: Optional[bool] = None
+    message: str = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        """イベントを辞書形式で返す（値がNoneの項目は含めない）"""
+        return {key: value for key, value in asdict(self).items() if value is not None and value != ""}
+
+class ProgressBus:
+    """進捗イベントの配信（スレッドセーフ）
+
+    購読者は全ての実行のイベント、または run_id を指定して1つの実行のイベントのみを受け取る。
+    購読者のコールバックは発行したスレッド（処理スレッド）で呼ばれるため、
+    UIを更新する場合はUIスレッドに渡すこと。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: List[Tuple[Optional[str], Callable[[ProgressEvent], None]]] = []
+
+    def subscribe(self, callback: Callable[[ProgressEvent], None], run_id: Optional[str] = None) -> Callable[[], None]:
+        """
+        進捗イベントを購読する
+
+        Args:
+            callback (Callable[[ProgressEvent], None]): イベントを受け取るコールバック
+            run_id (str, optional): この実行のイベントのみを受け取る（省略時は全ての実行）
+        Returns:
+            Callable[[], None]: 購読を解除する関数
+        """
+        entry = (run_id, callback)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+        return unsubscribe
+
+    def publish(self, event: ProgressEvent) -> None:
+        """イベントを購読者に配信する（購読者のエラーは処理に影響させない）"""
+        with self._lock:
+            subscribers = [callback for run_id, callback in self._subscribers if run_id is None or run_id == event.run_id]
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"進捗イベントの通知中にエラーが発生しました: {str(e)}")
+
+class ProgressTracker:
+    """1回の実行の進捗を記録し、イベントを発行する
+
+    書き起こしの残り時間は、書き起こしが完了したセグメントの音声の長さと経過時間から求めた
+    処理速度（音声1秒あたりの処理時間）で、残りの音声を処理する時間として見積もる。
+    セグメントの音声の長さが分からない場合はセグメント数で見積もる。
+    """
+
+    def __init__(self, run_id: str, bus: Optional["ProgressBus"] = None):
+        """
+        Args:
+            run_id (str): 実行ID
+            bus (ProgressBus, optional): イベントの配信先（省略時はグローバルな progress_bus）
+        """
+        self.run_id = run_id
+        self.bus = bus or progress_bus
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.stage: Optional[str] = None
+        self._stage_started_at = self.started_at
+        self.segments_total: Optional[int] = None
+        self.segments_completed = 0
+        self.retries = 0
+        self._audio_total_ms: Optional[int] = None
+        self._audio_done_ms = 0
+        self._segments_started_at: Optional[float] = None
+        self.last_event: Optional[ProgressEvent] = None
+        self._last_event_at = self.started_at
+
+    def _emit(self, kind: str, **fields: Any) -> ProgressEvent:
+        """イベントを作成して配信する"""
+        with self._lock:
+            event = ProgressEvent(run_id=self.run_id, kind=kind, stage=self.stage, timestamp=time.time(), **fields)
+            self.last_event = event
+            self._last_event_at = time.monotonic()
+        self.bus.publish(event)
+        return event
+
+    def start_stage(self, stage: str) -> None:
+        """
+        処理の段階の開始を記録する（実行中の段階があれば終了させる）
+
+        Args:
+            stage (str): 段階の名前（STAGE_LABELS のキー）
+        """
+        self.finish_stage()
+        with self._lock:
+            self.stage = stage
+            self._stage_started_at = time.monotonic()
+        self._emit(ProgressEvent.STAGE_STARTED)
+
+    def finish_stage(self) -> None:
+        """実行中の段階の終了を記録する"""
+        if self.stage is None:
+            return
+        self._emit(ProgressEvent.STAGE_FINISHED, elapsed_seconds=round(time.monotonic() - self._stage_started_at, 2))
+        with self._lock:
+            self.stage = None
+
+    def plan_segments(self, total: Optional[int], audio_ms: Optional[int] = None) -> None:
+        """
+        書き起こすセグメントの数を記録し、残り時間の計測を開始する
+
+        Args:
+            total (int, optional): セグメント数（ライブモードなど事前に分からない場合はNone）
+            audio_ms (int, optional): セグメントの音声の長さの合計（ミリ秒）
+        """
+        with self._lock:
+            self.segments_total = total
+            self.segments_completed = 0
+            self._audio_total_ms = audio_ms
+            self._audio_done_ms = 0
+            self._segments_started_at = time.monotonic()
+
+    def _estimate_remaining(self) -> Optional[float]:
+        """処理済みのセグメントの処理速度から残り時間（秒）を見積もる"""
+        if self._segments_started_at is None or not self.segments_completed or self.segments_total is None:
+            return None
+        elapsed = time.monotonic() - self._segments_started_at
+        if self._audio_total_ms and self._audio_done_ms:
+            seconds_per_audio_ms = elapsed / self._audio_done_ms
+            return max(0.0, (self._audio_total_ms - self._audio_done_ms) * seconds_per_audio_ms)
+        return max(0, self.segments_total - self.segments_completed) * elapsed / self.segments_completed
+
+    def segment_done(self, segment: int, audio_ms: Optional[int] = None) -> None:
+        """
+        セグメントの書き起こしの完了を記録する
+
+        Args:
+            segment (int): セグメント番号
+            audio_ms (int, optional): セグメントの音声の長さ（ミリ秒）
+        """
+        with self._lock:
+            self.segments_completed += 1
+            self._audio_done_ms += audio_ms or 0
+            eta = self._estimate_remaining()
+            completed, total = self.segments_completed, self.segments_total
+        self._emit(
+            ProgressEvent.SEGMENT_DONE,
+            segment=segment,
+            completed=completed,
+            total=total,
+            eta_seconds=round(eta, 1) if eta is not None else None,
+        )
+
+    def retry(self, segment: Optional[int], attempt: int, max_attempts: int, reason: str = "") -> None:
+        """
+        再試行を記録する
+
+        Args:
+            segment (int, optional): セグメント番号
+            attempt (int): 何回目の再試行か（1始まり）
+            max_attempts (int): 再試行の上限
+            reason (str): 再試行の理由
+        """
+        with self._lock:
+            self.retries += 1
+        self._emit(ProgressEvent.RETRY, segment=segment, attempt=attempt, max_attempts=max_attempts, message=reason)
+
+    def bytes_uploaded(self, sent_bytes: int, total_bytes: int) -> None:
+        """アップロード済みのバイト数を記録する（resumable_upload.UploadProgress の値）"""
+        self._emit(ProgressEvent.BYTES_UPLOADED, sent_bytes=sent_bytes, total_bytes=total_bytes)
+
+    def finish(self, success: bool, message: str = "") -> None:
+        """実行の終了を記録する"""
+        self.finish_stage()
+        self._emit(
+            ProgressEvent.RUN_FINISHED,
+            success=success,
+            elapsed_seconds=round(time.monotonic() - self.started_at, 2),
+            message=message,
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        現在の進捗を辞書形式で返す（ジョブの状態表示用）
+
+        seconds_since_update が大きく伸び続けている場合は、処理が止まっている可能性がある。
+        """
+        with self._lock:
+            eta = self._estimate_remaining()
+            return {
+                "stage": self.stage,
+                "segments_completed": self.segments_completed,
+                "segments_total": self.segments_total,
+                "retries": self.retries,
+                "eta_seconds": round(eta, 1) if eta is not None else None,
+                "elapsed_seconds": round(time.monotonic() - self.started_at, 1),
+                "seconds_since_update": round(time.monotonic() - self._last_event_at, 1),
+                "last_event": self.last_event.to_dict() if self.last_event else None,
+            }
+
+def format_duration(seconds: float) -> str:
+    """秒数を「1時間5分」「4分12秒」「30秒」の形式にする"""
+    seconds = int(round(seconds))
+    hours, remainder = divmod(seconds, 3600)
+    minutes, secs = divmod(remainder, 60)
+    if hours:
+        return f"{hours}時間{minutes}分"
+    if minutes:
+        return f"{minutes}分{secs}秒"
+    return f"{secs}秒"
+
+def format_progress(event: ProgressEvent) -> str:
+    """
+    進捗イベントを1行の表示用テキストにする（UI・ログ・コマンドライン用）
+
+    Args:
+        event (ProgressEvent): 進捗イベント
+    Returns:
+        str: 表示用テキスト（例: 「書き起こし中: セグメント 3/10 完了（残り約 4分12秒）」）
+    """
+    label = STAGE_LABELS.get(event.stage, event.stage or "処理")
+    if event.kind == ProgressEvent.STAGE_STARTED:
+        return f"{label}中..."
+    if event.kind == ProgressEvent.STAGE_FINISHED:
+        return f"{label}完了（{format_duration(event.elapsed_seconds or 0)}）"
+    if event.kind == ProgressEvent.SEGMENT_DONE:
+        total = event.total if event.total is not None else "?"
+        text = f"{label}中: セグメント {event.completed}/{total} 完了"
+        if event.eta_seconds is not None:
+            text += f"（残り約 {format_duration(event.eta_seconds)}）"
+        return text
+    if event.kind == ProgressEvent.RETRY:
+        target = f"セグメント {event.segment} " if event.segment is not None else ""
+        return f"{label}中: {target}再試行 {event.attempt}/{event.max_attempts}" + (f"（{event.message}）" if event.message else "")
+    if event.kind == ProgressEvent.BYTES_UPLOADED:
+        fraction = event.sent_bytes / event.total_bytes if event.total_bytes else 1.0
+        return f"{label}中: アップロード {fraction:.0%}（{(event.sent_bytes or 0) / (1024 * 1024):.1f}/{(event.total_bytes or 0) / (1024 * 1024):.1f}MB）"
+    if event.kind == ProgressEvent.RUN_FINISHED:
+        result = "完了" if event.success else "失敗"
+        return f"処理{result}（{format_duration(event.elapsed_seconds or 0)}）"
+    return f"{label}: {event.kind}"
+
+def _log_progress(event: ProgressEvent) -> None:
+    """段階の区切りとセグメントの完了をログに出力する（再試行・アップロードは各処理がログに出力する）"""
+    if event.kind in (ProgressEvent.STAGE_FINISHED, ProgressEvent.SEGMENT_DONE, ProgressEvent.RUN_FINISHED):
+        logger.info(f"[進捗 {event.run_id}] {format_progress(event)}")
+
+# グローバルなProgressBusインスタンス（ログへの出力を購読済み）
+progress_bus = ProgressBus()
+progress_bus.subscribe(_log_progress)
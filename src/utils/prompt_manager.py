@@ -1,10 +1,10 @@
-import json
 import logging
 import os
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Optional
 import sys
 from .path_resolver import get_config_file_path, resolve_resource_path
+from .config import config_manager
 
 logger = logging.getLogger(__name__)
 
@@ -79,20 +79,13 @@ class PromptManager:
             bool: 保存成功フラグ
         """
         try:
-            # 設定ファイルの読み込み
-            config = self._load_config()
+            # 現在のプロンプト設定をコピーして更新
+            prompts = dict(config_manager.get_snapshot().raw.get("prompts") or {})
+            prompts[prompt_type] = prompt_text
             
-            # prompts セクションが存在しない場合は作成
-            if "prompts" not in config:
-                config["prompts"] = {}
-            
-            # プロンプトを保存
-            config["prompts"][prompt_type] = prompt_text
-            
-            # 設定ファイルに書き込み
+            # 設定ファイルに書き込み（ConfigManager経由で他の設定と一緒に保存）
             logger.info(f"カスタムプロンプトを保存します: {self.config_file.absolute()}")
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=4, ensure_ascii=False)
+            config_manager.save_raw_section("prompts", prompts)
                 
             logger.info(f"カスタムプロンプトを保存しました: {prompt_type}")
             return True
@@ -112,21 +105,15 @@ class PromptManager:
             bool: リセット成功フラグ
         """
         try:
-            # 設定ファイルの読み込み
-            config = self._load_config()
+            prompts = dict(config_manager.get_snapshot().raw.get("prompts") or {})
             
             # prompts セクションが存在し、対象プロンプトが含まれる場合は削除
-            if "prompts" in config and prompt_type in config["prompts"]:
-                del config["prompts"][prompt_type]
-                
-                # prompts セクションが空になった場合は削除
-                if not config["prompts"]:
-                    del config["prompts"]
+            if prompt_type in prompts:
+                del prompts[prompt_type]
                 
-                # 設定ファイルに書き込み
+                # 設定ファイルに書き込み（prompts セクションが空になった場合は削除）
                 logger.info(f"プロンプト設定をリセットします: {self.config_file.absolute()}")
-                with open(self.config_file, 'w', encoding='utf-8') as f:
-                    json.dump(config, f, indent=4, ensure_ascii=False)
+                config_manager.save_raw_section("prompts", prompts or None)
                 
             logger.info(f"プロンプトをデフォルトにリセットしました: {prompt_type}")
             return True
@@ -174,31 +161,11 @@ class PromptManager:
             Optional[str]: カスタムプロンプトテキスト（設定されていない場合はNone）
         """
         try:
-            config = self._load_config()
-            return config.get("prompts", {}).get(prompt_type)
+            # 設定ファイルは更新時のみ再読み込みされるスナップショットから取得する
+            return config_manager.get_snapshot().get_prompt(prompt_type)
         except Exception as e:
             logger.error(f"カスタムプロンプト取得中にエラーが発生しました: {str(e)}")
             return None
-    
-    def _load_config(self) -> Dict:
-        """
-        設定ファイルを読み込む
-        
-        Returns:
-            Dict: 設定データ
-        """
-        try:
-            logger.debug(f"設定ファイルを読み込みます: {self.config_file}")
-            if self.config_file.exists():
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                logger.debug(f"設定ファイルを読み込みました: {len(config)} 項目")
-                return config
-            logger.debug("設定ファイルが存在しないため、空の設定を返します")
-            return {}
-        except Exception as e:
-            logger.error(f"設定ファイル読み込み中にエラーが発生しました: {str(e)}")
-            return {}
 
 # グローバルなPromptManagerインスタンス
 prompt_manager = PromptManager() 
\ No newline at end of file
@@ -0,0 +1,244 @@
+import json
+import time
+import socket
+import logging
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Gemini APIの既定の接続先
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com"
+
+# チャンクのサイズはこの値の倍数にする必要がある（最後のチャンクを除く）
+CHUNK_GRANULARITY = 256 * 1024
+
+# 再試行の待機時間の上限（秒）
+MAX_RETRY_DELAY = 30.0
+
+class ResumableUploadError(Exception):
+    """再開可能アップロードに関連するエラーを扱うカスタム例外クラス"""
+    pass
+
+@dataclass
+class UploadProgress:
+    """アップロードの進捗"""
+    sent_bytes: int
+    total_bytes: int
+    elapsed_seconds: float
+    bytes_per_second: float
+
+    @property
+    def fraction(self) -> float:
+        """進捗率（0〜1）"""
+        return self.sent_bytes / self.total_bytes if self.total_bytes else 1.0
+
+class _RetryableError(Exception):
+    """再試行すれば成功する可能性のある通信エラー"""
+    pass
+
+class ResumableUploader:
+    """Gemini Files APIへの再開可能（チャンク分割）アップロード
+
+    ファイルを一定サイズのチャンクに分けて送信し、通信が切れた場合は
+    サーバーが受信済みのバイト数を問い合わせてその位置から送り直す。
+    SDKの一括アップロードのように、途中で失敗しても先頭から送り直す必要がない。
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        chunk_size_mb: int = 8,
+        max_chunk_retries: int = 5,
+        retry_delay: float = 2.0,
+        timeout: Optional[float] = None,
+        progress_callback: Optional[Callable[[UploadProgress], None]] = None
+    ):
+        """
+        Args:
+            api_key (str): Gemini APIキー
+            base_url (str, optional): APIの接続先（省略時は既定の接続先）
+            chunk_size_mb (int): 1チャンクのサイズ（MB）
+            max_chunk_retries (int): チャンクごとの再試行回数
+            retry_delay (float): 最初の再試行までの待機時間（秒、再試行ごとに倍にする）
+            timeout (float, optional): 1リクエストあたりのタイムアウト（秒）
+            progress_callback (Callable, optional): チャンクを送信するたびに進捗を受け取る関数
+        """
+        self.api_key = api_key
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        chunk_size = max(int(chunk_size_mb * 1024 * 1024), CHUNK_GRANULARITY)
+        self.chunk_size = chunk_size - chunk_size % CHUNK_GRANULARITY
+        self.max_chunk_retries = max_chunk_retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout or None
+        self.progress_callback = progress_callback
+        self.last_stats: Dict[str, Any] = {}
+
+    def _request(self, url: str, headers: Dict[str, str], body: bytes = b"") -> Tuple[Dict[str, str], bytes]:
+        """POSTリクエストを送信する（再試行可能な失敗は _RetryableError にする）"""
+        request = urllib.request.Request(url, data=body, method="POST")
+        request.add_header("x-goog-api-key", self.api_key)
+        for key, value in headers.items():
+            request.add_header(key, value)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return {k.lower(): v for k, v in response.headers.items()}, response.read()
+        except urllib.error.HTTPError as e:
+            detail = e.read().decode("utf-8", errors="replace")[:500]
+            if e.code in (408, 429) or e.code >= 500:
+                raise _RetryableError(f"HTTP {e.code}: {detail}")
+            raise ResumableUploadError(f"アップロードが拒否されました（HTTP {e.code}）: {detail}")
+        except (urllib.error.URLError, socket.timeout, ConnectionError) as e:
+            raise _RetryableError(str(e))
+
+    def _with_retries(self, description: str, action: Callable[[], Any]) -> Any:
+        """通信エラー時に待機して再試行する"""
+        for attempt in range(self.max_chunk_retries + 1):
+            try:
+                return action()
+            except _RetryableError as e:
+                if attempt >= self.max_chunk_retries:
+                    raise ResumableUploadError(f"{description}に{self.max_chunk_retries + 1}回失敗しました: {str(e)}")
+                delay = min(self.retry_delay * (2 ** attempt), MAX_RETRY_DELAY)
+                logger.warning(f"{description}に失敗しました。{delay:.1f}秒後に再試行します（{attempt + 1}/{self.max_chunk_retries}）: {str(e)}")
+                time.sleep(delay)
+
+    def _start(self, total_bytes: int, mime_type: str, display_name: Optional[str]) -> str:
+        """アップロードセッションを開始し、チャンクの送信先URLを返す"""
+        metadata = {"file": {"displayName": display_name}} if display_name else {"file": {}}
+        headers, _ = self._request(
+            f"{self.base_url}/upload/v1beta/files",
+            {
+                "X-Goog-Upload-Protocol": "resumable",
+                "X-Goog-Upload-Command": "start",
+                "X-Goog-Upload-Header-Content-Length": str(total_bytes),
+                "X-Goog-Upload-Header-Content-Type": mime_type,
+                "Content-Type": "application/json",
+            },
+            json.dumps(metadata).encode("utf-8"),
+        )
+        upload_url = headers.get("x-goog-upload-url")
+        if not upload_url:
+            raise ResumableUploadError("アップロードセッションのURLが返されませんでした")
+        return upload_url
+
+    def _query(self, upload_url: str) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """サーバーが受信済みのバイト数を問い合わせる（戻り値: (受信済みバイト数, 完了済みの場合はファイル情報)）"""
+        headers, body = self._request(upload_url, {"X-Goog-Upload-Command": "query"})
+        if headers.get("x-goog-upload-status") == "final":
+            return -1, json.loads(body.decode("utf-8") or "{}").get("file")
+        return int(headers.get("x-goog-upload-size-received") or 0), None
+
+    @staticmethod
+    def _read_chunk(source: Union[BinaryIO, memoryview], offset: int, size: int) -> bytes:
+        if isinstance(source, memoryview):
+            return bytes(source[offset:offset + size])
+        source.seek(offset)
+        return source.read(size)
+
+    def _upload_chunks(self, source: Union[BinaryIO, memoryview], total_bytes: int, upload_url: str) -> Dict[str, Any]:
+        """チャンクを順に送信し、完了したファイル情報を返す"""
+        offset = 0
+        started = time.monotonic()
+        sent_bytes = 0  # 送り直した分も含む送信量
+        retries = 0  # 現在のチャンクの再試行回数
+        total_retries = 0
+        next_log = 0.1
+
+        while True:
+            chunk = self._read_chunk(source, offset, self.chunk_size)
+            finalize = offset + len(chunk) >= total_bytes
+            headers = {
+                "X-Goog-Upload-Command": "upload, finalize" if finalize else "upload",
+                "X-Goog-Upload-Offset": str(offset),
+                "Content-Type": "application/octet-stream",
+            }
+            try:
+                _, body = self._request(upload_url, headers, chunk)
+            except _RetryableError as e:
+                sent_bytes += len(chunk)
+                retries += 1
+                total_retries += 1
+                if retries > self.max_chunk_retries:
+                    raise ResumableUploadError(f"チャンクの送信に{retries}回失敗しました（{offset:,}バイト目）: {str(e)}")
+                delay = min(self.retry_delay * (2 ** (retries - 1)), MAX_RETRY_DELAY)
+                logger.warning(f"チャンクの送信に失敗しました（{offset:,}/{total_bytes:,}バイト）。{delay:.1f}秒後に受信済みの位置から再開します: {str(e)}")
+                time.sleep(delay)
+                received, resource = self._with_retries("受信済みバイト数の問い合わせ", lambda: self._query(upload_url))
+                if resource is not None:
+                    self._finish(started, total_bytes, sent_bytes, total_retries)
+                    return resource
+                offset = received
+                continue
+
+            sent_bytes += len(chunk)
+            offset += len(chunk)
+            retries = 0
+            elapsed = time.monotonic() - started
+            progress = UploadProgress(
+                sent_bytes=offset,
+                total_bytes=total_bytes,
+                elapsed_seconds=elapsed,
+                bytes_per_second=sent_bytes / elapsed if elapsed > 0 else 0.0,
+            )
+            if self.progress_callback:
+                self.progress_callback(progress)
+            if progress.fraction >= next_log and not finalize:
+                logger.info(f"アップロード中: {progress.fraction:.0%}（{offset:,}/{total_bytes:,}バイト, {progress.bytes_per_second / (1024 * 1024):.2f}MB/s）")
+                next_log = int(progress.fraction * 10) / 10 + 0.1
+
+            if finalize:
+                self._finish(started, total_bytes, sent_bytes, total_retries)
+                resource = json.loads(body.decode("utf-8") or "{}").get("file")
+                if not resource:
+                    raise ResumableUploadError("アップロード完了時にファイル情報が返されませんでした")
+                return resource
+
+    def _finish(self, started: float, total_bytes: int, sent_bytes: int, retries: int) -> None:
+        """アップロード速度を記録する"""
+        elapsed = time.monotonic() - started
+        self.last_stats = {
+            "bytes": total_bytes,
+            "sent_bytes": sent_bytes,
+            "seconds": round(elapsed, 3),
+            "bytes_per_second": round(sent_bytes / elapsed, 1) if elapsed > 0 else 0.0,
+            "retries": retries,
+        }
+        logger.info(
+            f"アップロードが完了しました: {total_bytes:,}バイト, {elapsed:.1f}秒, "
+            f"{self.last_stats['bytes_per_second'] / (1024 * 1024):.2f}MB/s（送り直し: {max(sent_bytes - total_bytes, 0):,}バイト）"
+        )
+
+    def upload(
+        self,
+        source: Union[str, Path, bytes, bytearray, memoryview],
+        mime_type: str,
+        display_name: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        ファイルをチャンクに分けてアップロードする
+
+        Args:
+            source (str | Path | bytes | memoryview): アップロードするファイルのパス、またはメモリ上のデータ
+            mime_type (str): ファイルのMIMEタイプ
+            display_name (str, optional): ファイルの表示名
+        Returns:
+            Dict[str, Any]: アップロードされたファイルの情報（name, uri, mimeType など）
+        Raises:
+            ResumableUploadError: 再試行しても送信できなかった場合、またはサーバーが拒否した場合
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            data = memoryview(source)
+            total_bytes = data.nbytes
+            upload_url = self._with_retries("アップロードセッションの開始", lambda: self._start(total_bytes, mime_type, display_name))
+            return self._upload_chunks(data, total_bytes, upload_url)
+
+        path = Path(source)
+        total_bytes = path.stat().st_size
+        upload_url = self._with_retries("アップロードセッションの開始", lambda: self._start(total_bytes, mime_type, display_name or path.name))
+        with open(path, "rb") as f:
+            return self._upload_chunks(f, total_bytes, upload_url)
@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Union
+
+from .config import config_manager, ConfigSnapshot
+from .progress import ProgressTracker
+
+logger = logging.getLogger(__name__)
+
+# 各実行の作業ディレクトリを作成する場所
+RUNS_DIR = Path("output") / "runs"
+
+# 実行中であることを示すロックファイル（別プロセスのクリーンアップから作業ディレクトリを守る）
+LOCK_FILE_NAME = ".run.lock"
+
+# ロックファイルがこれより古い場合は異常終了した実行とみなす
+STALE_LOCK_HOURS = 24
+
+# 遅延実行モードのバッチジョブの状態を保存するファイル（作業ディレクトリからの相対パス）
+BATCH_MANIFEST_PATH = Path("batch") / "transcription_batch.json"
+
+# 実行中のRunContext（プロセス内）
+_active_runs: Dict[str, "RunContext"] = {}
+_registry_lock = threading.Lock()
+
+class RunContextError(Exception):
+    """RunContext関連のエラーを扱うカスタム例外クラス"""
+    pass
+
+class RunContext:
+    """1回の処理（1ファイル）に固有の情報を保持するコンテキスト
+
+    一意な実行ID、専用の作業ディレクトリ、開始時点の設定スナップショット、
+    実行ごとの状態（再試行上限への到達、警告、メタデータ、進捗）を各サービスに引き渡す。
+    作業ディレクトリは output/runs/<run_id>/ 以下に transcriptions, csv, minutes,
+    title, temp のサブディレクトリを持ち、同時に複数の処理を実行しても
+    出力ファイルが衝突しない。
+    """
+
+    def __init__(
+        self,
+        snapshot: Optional[ConfigSnapshot] = None,
+        runs_dir: Optional[Union[str, Path]] = None,
+        run_id: Optional[str] = None
+    ):
+        """
+        Args:
+            snapshot (ConfigSnapshot, optional): 使用する設定（省略時は現在の設定）
+            runs_dir (str | Path, optional): 作業ディレクトリを作成する場所（省略時は output/runs）
+            run_id (str, optional): 実行ID（省略時は自動生成）
+        """
+        self.started_at = datetime.now()
+        # 出力ファイル名に使うタイムスタンプ（既存の命名規則と同じ14桁形式）
+        self.timestamp = self.started_at.strftime("%Y%m%d%H%M%S")
+        self.run_id = run_id or f"{self.timestamp}_{uuid.uuid4().hex[:8]}"
+        self.snapshot = snapshot or config_manager.get_snapshot()
+        self.workspace = Path(runs_dir or RUNS_DIR) / self.run_id
+
+        # 実行ごとの状態
+        self.has_reached_max_retries = False
+        self.warnings: List[str] = []
+        self.metadata: Dict[str, Any] = {}
+        # 後処理で共有するLLMのコンテキストキャッシュ（close()で削除する）
+        self.context_cache: Optional[Any] = None
+        # 進捗（段階・セグメントの完了・再試行）の記録と progress_bus へのイベント発行
+        self.progress = ProgressTracker(self.run_id)
+        self._state_lock = threading.Lock()
+        self._opened = False
+
+    def __enter__(self) -> "RunContext":
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    @property
+    def config(self):
+        """この実行で使用する設定（AppConfig）"""
+        return self.snapshot.config
+
+    def open(self) -> "RunContext":
+        """作業ディレクトリを作成し、実行中として登録する"""
+        if self._opened:
+            return self
+        self.workspace.mkdir(parents=True, exist_ok=True)
+        lock_data = {
+            "run_id": self.run_id,
+            "pid": os.getpid(),
+            "started_at": self.started_at.isoformat(),
+        }
+        with open(self.workspace / LOCK_FILE_NAME, "w", encoding="utf-8") as f:
+            json.dump(lock_data, f, ensure_ascii=False)
+        with _registry_lock:
+            _active_runs[self.run_id] = self
+        self._opened = True
+        logger.info(f"実行を開始しました: run_id={self.run_id}, 作業ディレクトリ={self.workspace}")
+        return self
+
+    def close(self) -> None:
+        """実行中の登録を解除する（作業ディレクトリは削除しない）"""
+        if not self._opened:
+            return
+        if self.context_cache is not None:
+            try:
+                self.context_cache.close()
+            except Exception as e:
+                logger.warning(f"コンテキストキャッシュの削除に失敗しました: {str(e)}")
+            self.context_cache = None
+        with _registry_lock:
+            _active_runs.pop(self.run_id, None)
+        try:
+            (self.workspace / LOCK_FILE_NAME).unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"ロックファイルの削除に失敗しました: {str(e)}")
+        self._opened = False
+        logger.info(f"実行を終了しました: run_id={self.run_id}")
+
+    def path(self, name: str) -> Path:
+        """
+        作業ディレクトリ内のサブディレクトリを取得する（存在しない場合は作成）
+
+        Args:
+            name (str): サブディレクトリ名（transcriptions, csv, minutes, title, temp など）
+        Returns:
+            Path: サブディレクトリのパス
+        """
+        directory = self.workspace / name
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory
+
+    def mark_max_retries_reached(self) -> None:
+        """いずれかのセグメントが最大再試行回数に達したことを記録する"""
+        with self._state_lock:
+            self.has_reached_max_retries = True
+
+    def add_warning(self, message: str) -> None:
+        """利用者に通知する警告を追加する"""
+        with self._state_lock:
+            if message not in self.warnings:
+                self.warnings.append(message)
+
+    def set_metadata(self, key: str, value: Any) -> None:
+        """実行のメタデータを記録する"""
+        with self._state_lock:
+            self.metadata[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """実行情報を辞書形式で返す"""
+        with self._state_lock:
+            return {
+                "run_id": self.run_id,
+                "timestamp": self.timestamp,
+                "workspace_dir": str(self.workspace),
+                "config_version": self.snapshot.version,
+                "has_reached_max_retries": self.has_reached_max_retries,
+                "warnings": list(self.warnings),
+                "metadata": dict(self.metadata),
+            }
+
+    def remove_workspace(self) -> None:
+        """作業ディレクトリを削除する（成果物を整理した後に呼び出す）"""
+        if self._opened:
+            raise RunContextError(f"実行中の作業ディレクトリは削除できません: {self.run_id}")
+        shutil.rmtree(self.workspace, ignore_errors=True)
+        logger.info(f"作業ディレクトリを削除しました: {self.workspace}")
+
+def get_active_runs() -> List[RunContext]:
+    """このプロセスで実行中のRunContextの一覧を返す"""
+    with _registry_lock:
+        return list(_active_runs.values())
+
+def is_run_active(workspace: Union[str, Path], stale_hours: float = STALE_LOCK_HOURS) -> bool:
+    """
+    作業ディレクトリが実行中かどうかを判定する（別プロセスの実行も含む）
+
+    Args:
+        workspace (str | Path): 作業ディレクトリのパス
+        stale_hours (float): これより古いロックファイルは異常終了したものとみなす
+    Returns:
+        bool: 実行中の場合はTrue
+    """
+    workspace = Path(workspace)
+    with _registry_lock:
+        if workspace.name in _active_runs:
+            return True
+    lock_file = workspace / LOCK_FILE_NAME
+    try:
+        age_seconds = time.time() - lock_file.stat().st_mtime
+    except OSError:
+        return False
+    return age_seconds < stale_hours * 3600
+
+def has_pending_batch(workspace: Union[str, Path]) -> bool:
+    """
+    作業ディレクトリに完了していないバッチジョブがあるかどうかを判定する
+
+    完了前のバッチジョブの記録は、同じ run_id で再実行（--resume-run-id）するときに必要なため削除しない。
+
+    Args:
+        workspace (str | Path): 作業ディレクトリのパス
+    Returns:
+        bool: 完了していないバッチジョブがある場合はTrue
+    """
+    manifest_path = Path(workspace) / BATCH_MANIFEST_PATH
+    if not manifest_path.exists():
+        return False
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except Exception:
+        # 読み込めない記録は再開にも使えないが、判断できないため残しておく
+        return True
+    return not manifest.get("completed_at")
+
+def resume_run_context(run_id: str, runs_dir: Optional[Union[str, Path]] = None) -> RunContext:
+    """
+    完了していないバッチジョブがある実行を再開するためのRunContextを作成する
+
+    Args:
+        run_id (str): 中断した実行のID
+        runs_dir (str | Path, optional): 作業ディレクトリの場所（省略時は output/runs）
+    Returns:
+        RunContext: 同じ作業ディレクトリを使うRunContext（呼び出し側が close() する）
+    Raises:
+        RunContextError: 作業ディレクトリがない、完了していないバッチジョブがない、または実行中の場合
+    """
+    workspace = Path(runs_dir or RUNS_DIR) / run_id
+    if not workspace.is_dir():
+        raise RunContextError(f"実行の作業ディレクトリが見つかりません: {workspace}")
+    if not has_pending_batch(workspace):
+        raise RunContextError(f"再開できるバッチジョブがありません（完了済み、または遅延実行モードではありません）: {run_id}")
+    if is_run_active(workspace):
+        raise RunContextError(f"この実行は処理中です: {run_id}")
+    return RunContext(runs_dir=runs_dir, run_id=run_id)
+
+def find_run_workspace(path: Union[str, Path]) -> Optional[Path]:
+    """
+    パスが含まれる作業ディレクトリを返す（作業ディレクトリ外の場合はNone）
+
+    Args:
+        path (str | Path): 判定するパス
+    Returns:
+        Optional[Path]: output/runs/<run_id> のパス
+    """
+    try:
+        relative = Path(path).resolve().relative_to(RUNS_DIR.resolve())
+    except ValueError:
+        return None
+    if not relative.parts:
+        return None
+    return RUNS_DIR / relative.parts[0]
@@ -0,0 +1,102 @@
+import copy
+import json
+import logging
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Geminiのresponse_schemaが受け付けないキー
+_GEMINI_UNSUPPORTED_KEYS = ("additionalProperties", "strict", "$schema")
+
+_JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "integer": int,
+    "number": (int, float),
+}
+
+def unwrap_schema(json_schema: Dict[str, Any]) -> Dict[str, Any]:
+    """OpenAIの json_schema 形式（name / strict / schema）から中身のスキーマを取り出す"""
+    if "schema" in json_schema and "type" not in json_schema:
+        return json_schema["schema"]
+    return json_schema
+
+def to_gemini_schema(json_schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    OpenAIの json_schema 形式のスキーマをGeminiの response_schema に変換する
+
+    Args:
+        json_schema (Dict[str, Any]): MEETING_TITLE_SCHEMA などのスキーマ定義
+    Returns:
+        Dict[str, Any]: Geminiが受け付ける形式のスキーマ
+    """
+    def strip(node: Any) -> Any:
+        if isinstance(node, dict):
+            return {key: strip(value) for key, value in node.items() if key not in _GEMINI_UNSUPPORTED_KEYS}
+        if isinstance(node, list):
+            return [strip(item) for item in node]
+        return node
+
+    return strip(copy.deepcopy(unwrap_schema(json_schema)))
+
+def validate_json(data: Any, json_schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """
+    JSONデータがスキーマに従っているかを検証する（type / properties / required / items / additionalProperties のみ対応）
+
+    Args:
+        data (Any): 検証するデータ
+        json_schema (Dict[str, Any]): スキーマ（OpenAIの json_schema 形式も可）
+        path (str): エラーメッセージに使う位置
+    Returns:
+        List[str]: 検証エラーのリスト（問題がなければ空）
+    """
+    schema = unwrap_schema(json_schema)
+    expected = schema.get("type")
+    if expected in _JSON_TYPES:
+        # boolはintのサブクラスのため、数値型の検証では除外する
+        if not isinstance(data, _JSON_TYPES[expected]) or (expected in ("integer", "number") and isinstance(data, bool)):
+            return [f"{path}: {expected} が必要です（実際: {type(data).__name__}）"]
+
+    errors = []
+    if expected == "object":
+        properties = schema.get("properties", {})
+        for key in schema.get("required", []):
+            if key not in data:
+                errors.append(f"{path}.{key}: 必須項目がありません")
+        for key, value in data.items():
+            if key in properties:
+                errors.extend(validate_json(value, properties[key], f"{path}.{key}"))
+            elif schema.get("additionalProperties") is False:
+                errors.append(f"{path}.{key}: 定義されていない項目です")
+    elif expected == "array" and "items" in schema:
+        for i, item in enumerate(data):
+            errors.extend(validate_json(item, schema["items"], f"{path}[{i}]"))
+    return errors
+
+def parse_structured_response(text: str, json_schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    構造化出力の応答テキストを解析し、スキーマで検証する
+
+    Args:
+        text (str): 応答テキスト（```json ブロックで囲まれていてもよい）
+        json_schema (Dict[str, Any]): 期待するスキーマ
+    Returns:
+        Dict[str, Any]: 解析結果
+    Raises:
+        ValueError: JSONとして解析できない場合、またはスキーマに従っていない場合
+    """
+    stripped = (text or "").strip()
+    if stripped.startswith("```"):
+        stripped = stripped.split("\n", 1)[1] if "\n" in stripped else ""
+        if stripped.rstrip().endswith("```"):
+            stripped = stripped.rstrip()[:-3]
+    try:
+        data = json.loads(stripped)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSONとして解析できません: {str(e)}")
+    errors = validate_json(data, json_schema)
+    if errors:
+        raise ValueError("スキーマに従っていません: " + "; ".join(errors[:5]))
+    return data
@@ -1,4 +1,3 @@
-import json
 import logging
 from pathlib import Path
 from typing import Dict, Any, Optional
@@ -18,10 +17,13 @@ class SummarizerFactory:
     """議事録生成クラスのファクトリ"""
 
     @staticmethod
-    def create_summarizer() -> Summarizer:
+    def create_summarizer(context_cache: Optional[Any] = None) -> Summarizer:
         """
         設定に基づいて適切なSummarizerインスタンスを生成する
 
+        Args:
+            context_cache (GeminiContextCache, optional): 書き起こしのコンテキストキャッシュ（Geminiの場合のみ使用）
+
         Returns:
             Summarizer: 生成されたSummarizerインスタンス
 
@@ -29,27 +31,14 @@ class SummarizerFactory:
             SummarizerFactoryError: Summarizerの生成に失敗した場合
         """
         try:
-            # 設定ファイルの取得（config_managerによるパス解決・PyInstaller対応）
+            # 設定の取得（ファイルの更新時のみ再読み込みされるスナップショットを使用）
             try:
-                config = config_manager.get_config()
-                logger.debug(f"読み込まれた設定: {config}")
-                logger.debug(f"設定のすべての属性: {dir(config)}")
-                
-                # summarization属性の有無を確認
-                has_summarization = hasattr(config, 'summarization')
-                logger.debug(f"summarization属性があるか: {has_summarization}")
-                
-                # 代替として直接設定ファイルの内容を確認
-                config_file = config_manager.config_file
-                if config_file.exists():
-                    with open(config_file, "r", encoding="utf-8") as f:
-                        raw_config = json.load(f)
-                        logger.debug(f"設定ファイルの生データ: {raw_config}")
-                        logger.debug(f"summarizationセクションの内容: {raw_config.get('summarization', 'なし')}")
+                config = config_manager.get_snapshot().config
+                logger.debug(f"summarizationセクションの内容: {config.summarization}")
             except Exception as e:
                 logger.warning(f"設定ファイルの読み込みに失敗しました: {str(e)}")
                 logger.info("デフォルトのGeminiSummarizerを使用します")
-                return GeminiSummarizer()
+                return GeminiSummarizer(context_cache)
 
             # 議事録生成モデルの取得（デフォルトはGemini）
             model = config.summarization.model
@@ -59,7 +48,7 @@ class SummarizerFactory:
             if model == "openai":
                 return OpenAISummarizer()
             elif model == "gemini":
-                return GeminiSummarizer()
+                return GeminiSummarizer(context_cache)
             else:
                 raise SummarizerFactoryError(f"未対応の議事録生成モデル: {model}")
 
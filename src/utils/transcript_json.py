@@ -0,0 +1,255 @@
+import re
+import json
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# 続きの書き起こしを依頼する際に、直前の発言として示す件数
+CONTINUATION_CONTEXT_UTTERANCES = 3
+
+def _salvage_conversations(text: str) -> List[Dict[str, Any]]:
+    """
+    途中で切れたJSONから、最後まで出力された発言だけを取り出す
+
+    Args:
+        text (str): 途中で切れた書き起こしJSON
+    Returns:
+        List[Dict[str, Any]]: 完全な形で出力されていた発言のリスト
+    """
+    key_position = text.find('"conversations"')
+    start = text.find("[", key_position if key_position >= 0 else 0)
+    if start < 0:
+        return []
+
+    decoder = json.JSONDecoder()
+    conversations = []
+    position = start + 1
+    while position < len(text):
+        # 区切りの空白とカンマを読み飛ばす
+        while position < len(text) and text[position] in " \t\r\n,":
+            position += 1
+        if position >= len(text) or text[position] != "{":
+            break
+        try:
+            item, position = decoder.raw_decode(text, position)
+        except json.JSONDecodeError:
+            break  # ここから先は途中で切れている
+        if isinstance(item, dict):
+            conversations.append(item)
+    return conversations
+
+def parse_conversations(text: str) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    書き起こしJSONから発言のリストを取り出す（途中で切れたJSONにも対応）
+
+    Args:
+        text (str): 書き起こし結果（{"conversations": [...]} または [...] 形式）
+    Returns:
+        Tuple[List[Dict[str, Any]], bool]: (発言のリスト, JSONとして完結していたか)
+    """
+    if not text:
+        return [], True
+    stripped = text.strip()
+    # コードブロックで囲まれている場合は中身だけを使う
+    if stripped.startswith("```"):
+        stripped = stripped.split("\n", 1)[1] if "\n" in stripped else ""
+        if stripped.rstrip().endswith("```"):
+            stripped = stripped.rstrip()[:-3]
+    try:
+        data = json.loads(stripped)
+    except json.JSONDecodeError:
+        return _salvage_conversations(stripped), False
+
+    if isinstance(data, dict) and isinstance(data.get("conversations"), list):
+        return [item for item in data["conversations"] if isinstance(item, dict)], True
+    if isinstance(data, list):
+        return [item for item in data if isinstance(item, dict)], True
+    return [], True
+
+def looks_truncated(text: str) -> bool:
+    """JSON形式の出力が途中で切れているかどうかを判定する"""
+    if not text:
+        return False
+    stripped = text.strip()
+    if not stripped.startswith(("{", "[", "```")):
+        return False
+    return not parse_conversations(stripped)[1]
+
+def dump_conversations(conversations: List[Dict[str, Any]]) -> str:
+    """発言のリストを書き起こしJSONに変換する"""
+    return json.dumps({"conversations": conversations}, ensure_ascii=False)
+
+def build_continuation_prompt(conversations: List[Dict[str, Any]]) -> str:
+    """
+    途中で切れた書き起こしの続きを依頼するプロンプトを作成する
+
+    Args:
+        conversations (List[Dict[str, Any]]): これまでに書き起こされた発言
+    Returns:
+        str: 続きを依頼するプロンプト
+    """
+    if not conversations:
+        return "前回の出力は途中で切れました。音声の最初から、同じJSON形式で書き起こしてください。"
+    recent = conversations[-CONTINUATION_CONTEXT_UTTERANCES:]
+    lines = "\n".join(f'- {item.get("speaker", "")}: {item.get("utterance", "")}' for item in recent)
+    return (
+        "前回の出力は出力上限に達したため途中で切れました。これまでの書き起こしの最後の発言は以下のとおりです。\n"
+        f"{lines}\n"
+        "音声のこの発言より後の部分だけを、同じJSON形式（{\"conversations\": [...]}）で書き起こしてください。"
+        "既に書き起こした発言は繰り返さないでください。"
+    )
+
+def merge_conversations(existing: List[Dict[str, Any]], continuation: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    続きの書き起こしを結合する（続きの先頭で繰り返された発言は除く）
+
+    Args:
+        existing (List[Dict[str, Any]]): これまでの発言
+        continuation (List[Dict[str, Any]]): 続きの発言
+    Returns:
+        List[Dict[str, Any]]: 結合した発言のリスト
+    """
+    recent = [item.get("utterance") for item in existing[-CONTINUATION_CONTEXT_UTTERANCES:]]
+    start = 0
+    while start < len(continuation) and continuation[start].get("utterance") in recent:
+        start += 1
+    return existing + continuation[start:]
+
+def complete_truncated_transcript(
+    text: str,
+    truncated: bool,
+    request_continuation: Callable[[str, str], Tuple[str, bool]],
+    max_continuations: int = 3
+) -> str:
+    """
+    出力上限で途中まで出力された書き起こしに対し、続きを依頼して結合する
+
+    セグメント全体を書き起こし直す代わりに、切れた位置以降だけを依頼する。
+
+    Args:
+        text (str): 最初の応答テキスト
+        truncated (bool): APIが出力上限による終了を報告したか（finish_reason）
+        request_continuation (Callable[[str, str], Tuple[str, bool]]):
+            (続きを依頼するプロンプト, これまでの出力) を受け取り、(応答テキスト, 途中で切れたか) を返す関数
+        max_continuations (int): 続きを依頼する最大回数
+    Returns:
+        str: 結合した書き起こしJSON（途中で切れていない場合は元のテキスト）
+    """
+    conversations, complete = parse_conversations(text)
+    if complete and not truncated:
+        return text
+    if not conversations and not looks_truncated(text):
+        # JSON形式ではない出力は続きを依頼できないためそのまま返す
+        return text
+    if complete:
+        # finish_reasonのみが上限到達を示し、JSONは閉じている場合
+        logger.warning("出力上限に達しましたが、JSONは完結しているため続きを依頼します")
+
+    for attempt in range(1, max_continuations + 1):
+        logger.warning(f"書き起こしが出力上限で途中まで出力されました（{len(conversations)}件の発言）。続きを依頼します ({attempt}/{max_continuations})")
+        continuation_text, truncated = request_continuation(build_continuation_prompt(conversations), dump_conversations(conversations))
+        continuation, complete = parse_conversations(continuation_text)
+        if not continuation:
+            logger.warning("続きの書き起こしから発言を取り出せませんでした")
+            break
+        conversations = merge_conversations(conversations, continuation)
+        if not truncated and complete:
+            logger.info(f"続きの書き起こしを結合しました（合計{len(conversations)}件の発言）")
+            break
+    else:
+        logger.warning(f"続きの依頼が上限回数に達しました。取得できた{len(conversations)}件の発言を使用します")
+
+    return dump_conversations(conversations)
+
+def is_max_tokens_finish(finish_reason: Optional[Any]) -> bool:
+    """APIの終了理由が出力上限によるものかを判定する（Gemini: MAX_TOKENS, OpenAI: length）"""
+    if finish_reason is None:
+        return False
+    name = getattr(finish_reason, "name", None) or str(finish_reason)
+    return name.upper().endswith("MAX_TOKENS") or name.lower() == "length"
+
+# 日本語の文字の間にある空白（書き起こし結果の整形で除去する）
+_CJK_SPACE_PATTERN = re.compile(
+    r'(?<=[\u3000-\u303F\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF])\s+(?=[\u3000-\u303F\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF])'
+)
+
+def normalize_text(text: str) -> str:
+    """連続する空白を1つにまとめ、日本語の文字の間の空白を除去する"""
+    text = re.sub(r'\s+', ' ', text).strip()
+    return _CJK_SPACE_PATTERN.sub('', text)
+
+class TranscriptMerger:
+    """セグメントごとの書き起こしJSONを1つの {"conversations": [...]} 文書として書き出す
+
+    各セグメントのJSONは1回だけ解析し、発言を順にファイルへ書き込む。
+    出力は常に有効なJSONになるため、後続の処理は json.loads でそのまま読み込める。
+    """
+
+    def __init__(self, output_path: Union[str, Path]):
+        """
+        Args:
+            output_path (str | Path): 出力先のファイルパス
+        """
+        self.output_path = Path(output_path)
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conversation_count = 0
+        self._file = open(self.output_path, "w", encoding="utf-8")
+        self._file.write('{"conversations": [')
+
+    def __enter__(self) -> "TranscriptMerger":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def add_segment(self, text: str, segment_label: str = "") -> int:
+        """
+        セグメントの書き起こし結果を追加する
+
+        Args:
+            text (str): セグメントの書き起こし結果（JSON形式。途中で切れていても完全な発言は取り出す）
+            segment_label (str): ログ表示用のセグメント名
+        Returns:
+            int: 追加した発言の数
+        """
+        conversations, complete = parse_conversations(text)
+        if not complete:
+            logger.warning(f"{segment_label} の書き起こしJSONが完結していません。完全な{len(conversations)}件の発言を使用します")
+        if not conversations and text.strip():
+            logger.warning(f"{segment_label} の書き起こし結果がJSON形式ではないため、1つの発言として扱います")
+            conversations = [{"speaker": "", "utterance": text}]
+
+        for item in conversations:
+            entry = dict(item)
+            entry["speaker"] = normalize_text(str(entry.get("speaker", "")))
+            entry["utterance"] = normalize_text(str(entry.get("utterance", "")))
+            if self.conversation_count:
+                self._file.write(",")
+            self._file.write("\n  " + json.dumps(entry, ensure_ascii=False))
+            self.conversation_count += 1
+        return len(conversations)
+
+    def close(self) -> Path:
+        """文書を閉じる（複数回呼び出しても安全）"""
+        if not self._file.closed:
+            self._file.write("\n]}\n" if self.conversation_count else "]}\n")
+            self._file.close()
+        return self.output_path
+
+def merge_segment_transcripts(texts: List[str], output_path: Union[str, Path]) -> Path:
+    """
+    セグメントごとの書き起こし結果を結合して1つのJSON文書として保存する
+
+    Args:
+        texts (List[str]): セグメント順の書き起こし結果
+        output_path (str | Path): 出力先のファイルパス
+    Returns:
+        Path: 出力したファイルのパス
+    """
+    with TranscriptMerger(output_path) as merger:
+        for i, text in enumerate(texts, 1):
+            merger.add_segment(text, f"セグメント {i}")
+    logger.info(f"{len(texts)}個のセグメントを結合しました（{merger.conversation_count}件の発言）: {output_path}")
+    return merger.output_path